@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Header, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
 from datetime import datetime
 from enum import Enum
+import asyncio
 import json
 import os
 
@@ -14,6 +16,7 @@ from ...services.automation import (
     get_automation_settings,
     update_automation_settings
 )
+from ...utils.event_bus import event_bus
 import logging
 
 router = APIRouter()
@@ -57,6 +60,11 @@ class ScheduleSettings(BaseModel):
     nextRun: Optional[datetime] = None
 
 
+class NamedScheduleSettings(ScheduleSettings):
+    template_id: Optional[str] = None  # Template for runs of this schedule (defaults to the automation template)
+    status_filter: str = "Pending"  # "Pending" sends pending emails, "Failed" retries failed ones
+
+
 class EmailLogEntry(BaseModel):
     timestamp: datetime
     email_id: int
@@ -116,12 +124,93 @@ async def get_status():
         raise HTTPException(status_code=500, detail="Failed to get automation status")
 
 
+@router.get("/recent")
+async def get_recent():
+    """
+    Get the most recent emails of the current or last automation run.
+    """
+    try:
+        from ...services.automation import get_recent_emails
+        
+        return {
+            "success": True,
+            "data": get_recent_emails()
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving recent automation emails: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve recent automation emails")
+
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _format_sse(event: Dict[str, Any]) -> Optional[str]:
+    """Format a bus event as a server-sent event frame (None to skip it)"""
+    data = event["data"]
+    if event["type"] == "log":
+        data = _clean_log_for_frontend(data)
+        if data is None:
+            return None
+    return f"id: {event_bus.format_id(event['id'])}\nevent: {event['type']}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/events")
+async def stream_events(request: Request, last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """
+    Stream automation status, schedule and log updates as server-sent events.
+    
+    Event types: status (status and summary counters), log (cleaned log
+    entry), schedule (schedule settings and next run) and resync (the
+    requested Last-Event-ID is no longer buffered; reload state via REST).
+    Reconnecting clients resume from the Last-Event-ID header.
+    """
+    queue, backlog = event_bus.subscribe(last_event_id or None)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            
+            # Fresh and resynced connections start with a status snapshot
+            if not last_event_id or (backlog and backlog[0]["type"] == "resync"):
+                try:
+                    yield f"event: status\ndata: {json.dumps(get_automation_status(), default=str)}\n\n"
+                except Exception as e:
+                    logger.debug(f"Error getting automation status for event stream: {str(e)}")
+            
+            for event in backlog:
+                frame = _format_sse(event)
+                if frame:
+                    yield frame
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                frame = _format_sse(event)
+                if frame:
+                    yield frame
+        finally:
+            event_bus.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/start")
-async def start():
+def start():
     """
     Start the email automation process.
     This endpoint only processes emails with status 'Pending',
     never affecting failed or successful emails.
+    
+    A plain function, so the pre-flight checks run in the threadpool
+    instead of blocking the event loop.
     """
     try:
         status = start_automation()
@@ -536,6 +625,125 @@ def _clean_log_for_frontend(log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return cleaned_log
 
 
+@router.get("/logs/archive")
+async def get_archived_logs(
+    date: str,
+    log_type: str = "email_automation",
+    email_id: Optional[int] = None,
+    filter_status: Optional[str] = None,
+    limit: int = 100
+):
+    """
+    Get log entries for an archived (closed) day.
+    
+    Only the archive blocks whose index can contain the requested email ID
+    or status are decompressed.
+    
+    Args:
+        date: Day to read (YYYY-MM-DD)
+        log_type: automation, success, error or email_automation
+        email_id: Only return entries for this email ID
+        filter_status: Only return entries with this status (Success, Failed)
+        limit: Maximum number of log entries to return
+        
+    Returns:
+        List of log entries
+    """
+    try:
+        from ...utils.log_archiver import get_log_archiver, LOG_TYPES
+        
+        if log_type not in LOG_TYPES:
+            raise HTTPException(status_code=400, detail=f"Invalid log type. Must be one of: {', '.join(LOG_TYPES)}")
+        
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        
+        entries = get_log_archiver().query_entries(log_type, day, email_id, filter_status, limit)
+        
+        return {
+            "success": True,
+            "data": entries
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving archived logs: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve archived logs")
+
+
+@router.get("/retries")
+async def get_retries():
+    """
+    Get the failed emails scheduled for an automatic retry.
+    """
+    try:
+        from ...services.automation import get_scheduled_retries
+        
+        return {
+            "success": True,
+            "data": get_scheduled_retries()
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving scheduled retries: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve scheduled retries")
+
+
+@router.get("/workers")
+async def get_workers():
+    """
+    Get the automation worker processes, their leases and the requested run.
+
+    Leases held by workers that stopped heartbeating are released when this
+    is called.
+    """
+    try:
+        from ...services.automation import get_worker_status
+
+        return {
+            "success": True,
+            "data": get_worker_status()
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving automation workers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve automation workers")
+
+
+@router.get("/timings")
+async def get_stage_timings(process_id: Optional[str] = None):
+    """
+    Get per-stage send pipeline latency percentiles for an automation run.
+    
+    Args:
+        process_id: Run to report on; defaults to the most recent run
+        
+    Returns:
+        Per-stage count, p50, p95, p99, max and total seconds, plus the IDs
+        of the runs that have timing data
+    """
+    try:
+        from ...utils.stage_timing import get_run_timings, list_timed_runs
+        
+        histogram = get_run_timings(process_id)
+        if process_id and not histogram:
+            raise HTTPException(status_code=404, detail=f"No timing data for process {process_id}")
+        
+        return {
+            "success": True,
+            "data": {
+                "process_id": histogram.process_id if histogram else None,
+                "stages": histogram.summary() if histogram else {},
+                "runs": list_timed_runs()
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving stage timings: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve stage timings")
+
+
 @router.post("/logs/clear")
 async def clear_logs():
     """
@@ -658,6 +866,88 @@ async def get_schedule():
         raise HTTPException(status_code=500, detail="Failed to get schedule settings")
 
 
+@router.get("/schedules")
+async def get_schedules():
+    """
+    Get the named automation schedules.
+    
+    Returns:
+        Named schedules with their settings and next run times
+    """
+    try:
+        from ...services.automation import get_named_schedules
+        
+        return {
+            "success": True,
+            "data": get_named_schedules()
+        }
+    except Exception as e:
+        logger.error(f"Error getting named schedules: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get schedules")
+
+
+@router.put("/schedules/{name}")
+async def update_named_schedule(name: str, settings: NamedScheduleSettings):
+    """
+    Create or update a named automation schedule.
+    
+    Named schedules run alongside the default schedule, each with its own
+    timing, template and status filter.
+    
+    Args:
+        name: Schedule name
+        settings: Schedule settings
+        
+    Returns:
+        The schedule's settings including its next run
+    """
+    try:
+        from ...services.automation import update_named_schedule as update_schedule_by_name
+        
+        if settings.status_filter not in ("Pending", "Failed"):
+            raise HTTPException(status_code=400, detail="status_filter must be 'Pending' or 'Failed'")
+        
+        return {
+            "success": True,
+            "data": update_schedule_by_name(name, settings.dict(exclude={"lastRun", "nextRun"}))
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error updating schedule '{name}': {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update schedule")
+
+
+@router.delete("/schedules/{name}")
+async def delete_named_schedule(name: str):
+    """
+    Delete a named automation schedule.
+    
+    Args:
+        name: Schedule name
+        
+    Returns:
+        Success status
+    """
+    try:
+        from ...services.automation import remove_named_schedule
+        
+        if not remove_named_schedule(name):
+            raise HTTPException(status_code=404, detail=f"Schedule '{name}' not found")
+        
+        return {
+            "success": True,
+            "message": f"Schedule '{name}' deleted"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting schedule '{name}': {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to delete schedule")
+
+
 @router.get("/attachment-settings")
 async def get_attachment_settings():
     """
@@ -722,6 +1012,10 @@ async def update_attachment_settings(settings: AttachmentSettingsModel):
         if hasattr(config_module, 'get_settings'):
             config_module.get_settings.cache_clear()
         
+        # Cached folder sizes depend on the extension filter
+        from ...services.email.core.manifest_cache import get_manifest_size_cache
+        get_manifest_size_cache().invalidate()
+        
         logger.info(f"Updated attachment settings: threshold={settings.fileCountThreshold}, "
                    f"extensions={settings.allowedExtensions}")
         
@@ -929,7 +1223,9 @@ async def send_test_mail(request: TestMailRequest):
     """
     try:
         from ...services.email import EmailSender
-        from ...services.templates import get_template_by_id
+        from ...services.templates import (
+            get_template_by_id, get_compiled_template, compile_template, build_placeholder_values
+        )
         from ...services.automation.core.settings_manager import _get_smtp_settings
         from datetime import datetime
         
@@ -966,24 +1262,21 @@ async def send_test_mail(request: TestMailRequest):
         # Get email body from template or use custom body
         email_body = request.body or ""
         
+        # Placeholder values, as a test record would provide them
+        placeholder_values = build_placeholder_values(
+            company_name=request.companyName or "Test Company",
+            recipient=request.recipientEmail,
+            subject=request.subject,
+            file_path=request.folderPath or ""
+        )
+        
         if request.templateId and request.templateId != "none":
             try:
                 template = get_template_by_id(request.templateId)
                 if template:
-                    # Process template placeholders
-                    placeholders = {
-                        "{{company_name}}": request.companyName or "Test Company",
-                        "{{recipient}}": request.recipientEmail,
-                        "{{subject}}": request.subject,
-                        "{{date}}": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "{{file_path}}": request.folderPath or ""
-                    }
-                    
-                    template_body = template['body_template']
-                    for placeholder, value in placeholders.items():
-                        template_body = template_body.replace(placeholder, str(value))
-                    
-                    email_body = template_body
+                    compiled_template = get_compiled_template(template['file_path'])
+                    if compiled_template:
+                        email_body = compiled_template.render(placeholder_values)
             except Exception as e:
                 logger.warning(f"Could not load template {request.templateId}: {str(e)}")
                 if not email_body:
@@ -992,10 +1285,10 @@ async def send_test_mail(request: TestMailRequest):
         if not email_body:
             email_body = f"<p>Test email sent on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>"
         
-        # Process subject placeholders
-        subject = request.subject
-        subject = subject.replace("{{company_name}}", request.companyName or "Test Company")
-        subject = subject.replace("{{date}}", datetime.now().strftime("%Y-%m-%d"))
+        # Process subject placeholders (dates without the time)
+        subject = compile_template(request.subject).render(
+            {**placeholder_values, "date": datetime.now().strftime("%Y-%m-%d")}
+        )
         
         # Send using smart attachment logic
         folder_path = request.folderPath if request.folderPath else None
@@ -39,7 +39,36 @@ class Settings(BaseSettings):
     # Path configurations - must be read from environment variables
     EMAIL_ARCHIVE_PATH: str
     LOG_DIR_PATH: str
+    EVENT_STORE_PATH: Optional[str] = None  # SQLite send-event store; defaults to LOG_DIR_PATH/send_events.db
+    AUTOMATION_QUEUE_PATH: Optional[str] = None  # Durable automation run queue; defaults to LOG_DIR_PATH/automation_queue.db
+    AUTOMATION_RESUME_ON_STARTUP: bool = True  # Resume an automation run interrupted by a restart when the API starts
+    AUTOMATION_QUEUE_POLICY: str = "send_date"  # Send order of a run: 'send_date' or 'smallest_first' (by attachment folder size)
+    AUTOMATION_QUEUE_AGING_MB_PER_HOUR: float = 10.0  # smallest_first: size credit per hour a record has waited, so large ones are not starved
+    AUTOMATION_DRIVE_LANE_INTERVAL: int = 0  # Send one email needing a Drive upload after every N others (0 = no separate lane)
+    AUTOMATION_QUEUE_SIZING_SECONDS: float = 5.0  # Most time spent sizing folders to order a run; folders not sized by then count as empty
+    AUTOMATION_GROUP_MAX_RECIPIENTS: int = 0  # Send emails identical apart from the recipient as one BCC-style message to up to N recipients (0 = off)
+    AUTOMATION_DIGEST_MAX_EMAILS: int = 0  # Merge up to N queued emails of one recipient into one digest with a combined archive (0 = off)
+    MANIFEST_CACHE_TTL_SECONDS: int = 3600  # How long cached attachment folder sizes are trusted while the folder's mtime is unchanged
+    AUTOMATION_PREFLIGHT: bool = True  # Validate addresses and folders of a run in bulk and fail unsendable emails before sending
+    AUTOMATION_PREFLIGHT_WORKERS: int = 8  # Threads checking attachment folders during pre-flight validation
+    AUTOMATION_RECENT_EMAILS: int = 200  # Most recent emails of a run kept in memory for the UI
+    RETRY_MAX_ATTEMPTS: int = 5  # Automatic retries of an email after transient failures (SMTP 4xx, timeouts, Drive quota)
+    RETRY_MAX_BACKOFF_SECONDS: int = 21600  # Cap of the exponential backoff between retries, which starts at the retry interval
+    RETRY_STORE_PATH: Optional[str] = None  # Scheduled retries; defaults to LOG_DIR_PATH/automation_retries.db
+    AUTOMATION_EXTERNAL_WORKERS: bool = False  # Runs are processed by worker.py processes; the API only coordinates and reports
+    WORKER_BATCH_SIZE: int = 25  # Pending rows a worker leases at a time
+    WORKER_LEASE_SECONDS: int = 120  # Lease duration; leases of workers silent for this long are released
+    WORKER_HEARTBEAT_SECONDS: int = 20  # How often workers renew their leases and report
+    WORKER_POLL_SECONDS: int = 10  # How often idle workers check for a requested run
+    WORKER_STATUS_REFRESH_SECONDS: int = 5  # How often the API reads the worker run state and pushes changes to the UI
+    
+    # Log archival of closed days
+    LOG_ARCHIVE_ENABLED: bool = True  # Compress closed log days into indexed .log.gz archives
+    LOG_ARCHIVE_INTERVAL_MINUTES: int = 60  # How often the background archiver looks for closed days
+    LOG_ARCHIVE_BLOCK_SIZE_KB: int = 256  # Uncompressed size of each independently readable block
+    LOG_ARCHIVE_QUIET_MINUTES: int = 60  # Days with log files written to more recently are archived later
     DEFAULT_EMAIL_TEMPLATE_PATH: Optional[str] = "templates/default_template.txt"
+    TEMPLATE_CACHE_TTL_SECONDS: int = 30  # How long cached template files are used before checking them for changes
     
     # Email attachment size limits (in MB)
     EMAIL_MAX_SIZE_MB: int = 25
@@ -50,6 +79,18 @@ class Settings(BaseSettings):
     GDRIVE_CREDENTIALS_PATH: Optional[str] = "credentials/oauth_credentials.json"
     GDRIVE_TOKEN_PATH: Optional[str] = "credentials/token.pickle"
     GDRIVE_FOLDER_ID: Optional[str] = None  # Optional folder ID for uploads
+    GDRIVE_TOKEN_REFRESH_MARGIN_SECONDS: int = 300  # Refresh the OAuth token when it expires within this window
+    GDRIVE_AVAILABILITY_TTL_SECONDS: int = 300  # How long a failed Drive authentication is cached before retrying
+    GDRIVE_UPLOAD_CHUNK_SIZE_MB: int = 8  # Resumable upload chunk size (rounded to a multiple of 256 KB)
+    GDRIVE_UPLOAD_MAX_RETRIES: int = 3  # Retries per chunk on transient errors
+    GDRIVE_UPLOAD_STATE_PATH: Optional[str] = None  # Resumable session state file (defaults next to the token file)
+    GDRIVE_UPLOAD_CONCURRENCY: int = 3  # Parallel Drive uploads per account during automation runs
+    GDRIVE_UPLOAD_QUOTA_RETRIES: int = 5  # Retries with exponential backoff after a Drive rate-limit error
+    GDRIVE_UPLOAD_DEDUP_ENABLED: bool = True  # Reuse an earlier Drive upload of identical content
+    GDRIVE_UPLOAD_CACHE_PATH: Optional[str] = None  # Content hash -> Drive file cache (defaults next to the token file)
+    GDRIVE_API_BASE_URL: Optional[str] = None  # Alternative Drive API endpoint without OAuth, e.g. the local fake Drive server
+    LARGE_ATTACHMENT_LINK_LATER: bool = False  # Send emails too large to attach once their Drive upload finishes, without holding up the run (not used with external workers)
+    LINK_LATER_STORE_PATH: Optional[str] = None  # Emails waiting for their Drive link; defaults to LOG_DIR_PATH/link_later.db
 
     # Server environment flag
     SERVER_ENV: Optional[str] = "false"  # Use 'true' to enable non-interactive mode
@@ -57,6 +98,8 @@ class Settings(BaseSettings):
     # Smart Attachment Settings
     ATTACHMENT_FILE_COUNT_THRESHOLD: int = 5  # Files <= this: attach directly; > this: compress to ZIP
     ATTACHMENT_ALLOWED_EXTENSIONS: str = "all"  # Comma-separated list or 'all' for all files
+    ATTACHMENT_SPLIT_ENABLED: bool = True  # Send folders too large for one email (and Drive unavailable) as "part i of n" emails
+    ATTACHMENT_SPLIT_MAX_PARTS: int = 10  # Most emails one record may be split into
     
     @validator('EMAIL_ARCHIVE_PATH')
     def validate_archive_path(cls, v):
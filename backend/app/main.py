@@ -56,6 +56,37 @@ from .api.endpoints import templates
 app.include_router(templates.router, prefix="/api/templates", tags=["templates"])
 
 
+@app.on_event("startup")
+async def start_background_services():
+    """Start background maintenance threads."""
+    from .utils.log_archiver import start_log_archiver
+    start_log_archiver()
+    from .utils.event_store import start_backfill
+    start_backfill()
+    from .services.automation.processing.link_later import start_link_later_service
+    start_link_later_service()
+    if settings.AUTOMATION_RESUME_ON_STARTUP:
+        from .services.automation import resume_interrupted_run
+        resume_interrupted_run()
+    # Pick up retries of failed emails scheduled before the restart
+    from .services.automation import sync_retry_job
+    sync_retry_job()
+    # Follow runs carried out by worker processes
+    from .services.automation import start_worker_status_refresh
+    start_worker_status_refresh()
+
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    """Signal background maintenance threads to stop."""
+    from .utils.log_archiver import stop_log_archiver
+    stop_log_archiver()
+    from .services.automation.processing.link_later import stop_link_later_service
+    stop_link_later_service()
+    from .services.automation import stop_worker_status_refresh
+    stop_worker_status_refresh()
+
+
 @app.get("/")
 async def root():
     """Root endpoint to verify API is running."""
@@ -3,7 +3,13 @@ from .core.automation_manager import (
     start_automation,
     stop_automation,
     restart_failed_emails,
-    get_automation_status
+    get_automation_status,
+    get_recent_emails,
+    retry_emails,
+    resume_interrupted_run,
+    get_worker_status,
+    start_worker_status_refresh,
+    stop_worker_status_refresh
 )
 
 from .core.settings_manager import (
@@ -15,7 +21,15 @@ from .scheduling.scheduler import (
     start_scheduler,
     stop_scheduler,
     update_schedule_settings,
-    get_schedule_settings
+    get_schedule_settings,
+    get_named_schedules,
+    update_named_schedule,
+    remove_named_schedule
+)
+
+from .scheduling.retry_scheduler import (
+    get_scheduled_retries,
+    sync_retry_job
 )
 
 from .database.status_repository import (
@@ -31,12 +45,23 @@ __all__ = [
     'stop_automation', 
     'restart_failed_emails',
     'get_automation_status',
+    'get_recent_emails',
+    'retry_emails',
+    'resume_interrupted_run',
+    'get_worker_status',
+    'start_worker_status_refresh',
+    'stop_worker_status_refresh',
     'get_automation_settings',
     'update_automation_settings',
     'start_scheduler',
     'stop_scheduler',
     'update_schedule_settings',
     'get_schedule_settings',
+    'get_named_schedules',
+    'update_named_schedule',
+    'remove_named_schedule',
+    'get_scheduled_retries',
+    'sync_retry_job',
     'update_email_status',
     '_validate_recipient_mapping'
 ]
@@ -13,69 +13,90 @@ a complete email automation solution.
 """
 
 import logging
-import queue
 import threading
-from datetime import datetime
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
 
 from ....models.email import EmailStatus
-from ....utils.email_logger import email_logger
+from ....utils.email_logger import email_logger, LogEvent
 from ....core.config import get_settings
 from ....utils.db_utils import get_db_connection
-from ..database.email_repository import _load_emails_by_status
+from ..database.email_repository import _load_emails_by_status, _check_email_status, _requeue_failed_emails
+from ..database.lease_repository import (
+    get_run_control, set_run_control, get_workers, release_expired_leases,
+    RUN_REQUESTED, RUN_STOP_REQUESTED, RUN_DONE
+)
 from ..processing.email_processor import _process_email_queue
 from ..processing.batch_processor import _update_summary
-from .state_manager import get_automation_state
+from ..processing.queue_policy import order_emails
+from ..validation.preflight import run_preflight
+from .state_manager import get_automation_state, publish_status, STATUS_RUNNING
+from .run_queue import (
+    RunQueue, create_run_queue, get_run_queue_store,
+    RUN_COMPLETED, RUN_STOPPED, ITEM_CLAIMED, ITEM_UPLOADING, ITEM_SENDING, ITEM_FINISHED,
+    OUTCOME_SENT, OUTCOME_FAILED, OUTCOME_SKIPPED
+)
 
 logger = logging.getLogger(__name__)
 
+_status_refresh_thread: Optional[threading.Thread] = None
+_status_refresh_stop = threading.Event()
 
-def start_automation() -> Dict[str, Any]:
-    """Start email automation process for PENDING emails only"""
+
+def start_automation(template_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Start email automation process for PENDING emails only
+    
+    Args:
+        template_id: Optional template for this run instead of the configured one
+    """
     automation_state = get_automation_state()
     
-    if automation_state["is_running"]:
+    if automation_state.is_running:
         logger.info("Email automation is already running")
         return get_automation_status()
     
-    automation_state["stop_requested"] = False
+    if get_settings().AUTOMATION_EXTERNAL_WORKERS:
+        return _request_worker_run("auto", template_id, preflight=True)
+    
+    # Take the run slot first, so the pre-flight check never marks records
+    # Failed while another run is sending them
+    process_id = f"auto_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if not automation_state.try_begin_run(process_id, None, template_id):
+        logger.info("Email automation is already running")
+        return get_automation_status()
     
+    started = False
     try:
-        process_id = f"auto_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         email_logger.start_process(process_id, "Email Automation Process")
         
-        emails_to_process = _load_emails_by_status(EmailStatus.PENDING.value)
-        automation_state["summary"]["pending"] = len(emails_to_process)
+        # Fail the emails that cannot be sent before any is queued
+        emails_to_process = run_preflight(_load_emails_by_status(EmailStatus.PENDING.value), process_id)
+        automation_state.summary.set(pending=len(emails_to_process))
         
         if not emails_to_process:
             email_logger.end_process(process_id, "completed", "No pending emails to process")
             logger.info("No pending emails to process")
+            automation_state.finish_run()
             return get_automation_status()
         
-        automation_state["email_queue"] = queue.Queue()
-        
-        for email in emails_to_process:
-            automation_state["email_queue"].put(email)
-        
-        automation_state["process_id"] = process_id
-        automation_state["is_running"] = True
-        automation_state["status"] = "running"
-        automation_state["automation_thread"] = threading.Thread(
-            target=_process_email_queue,
-            daemon=True
+        # Journal the run, in queue policy order, so it can be resumed after a restart
+        automation_state.set_queue(
+            create_run_queue(process_id, "auto", template_id, order_emails(emails_to_process))
         )
-        automation_state["automation_thread"].start()
+        started = True
+        _start_processing_thread()
         
-        email_logger.log_info(f"Started email automation with {len(emails_to_process)} pending emails to process", process_id=process_id)
+        email_logger.log_info(f"Started email automation with {len(emails_to_process)} pending emails to process", process_id=process_id, event=LogEvent.PROCESS)
+        publish_status()
         return get_automation_status()
         
     except Exception as e:
-        if 'process_id' in locals():
-            email_logger.end_process(process_id, "error", f"Error starting automation: {str(e)}")
-            
+        email_logger.end_process(process_id, "error", f"Error starting automation: {str(e)}")
         logger.error(f"Error starting email automation: {str(e)}")
-        automation_state["status"] = "error"
-        automation_state["is_running"] = False
+        # Once the thread is started it releases the run slot itself
+        if not started:
+            automation_state.finish_run(error=True)
         return get_automation_status()
 
 
@@ -83,28 +104,34 @@ def stop_automation() -> Dict[str, Any]:
     """Stop the email automation process"""
     automation_state = get_automation_state()
     
-    if not automation_state["is_running"]:
+    if get_settings().AUTOMATION_EXTERNAL_WORKERS:
+        return _stop_worker_run()
+    
+    if not automation_state.request_stop():
         logger.info("Email automation is not running")
         return get_automation_status()
     
-    automation_state["stop_requested"] = True
-    automation_state["status"] = "stopping"
-    
-    if "process_id" in automation_state and automation_state["process_id"]:
-        process_id = automation_state["process_id"]
-        email_logger.log_info(f"Stopping email automation process", process_id=process_id)
+    process_id = automation_state.process_id
+    if process_id:
+        email_logger.log_info(f"Stopping email automation process", process_id=process_id, event=LogEvent.PROCESS)
         email_logger.end_process(process_id, "stopped", "User requested stop")
     
     logger.info("Stopping email automation...")
+    publish_status()
     return get_automation_status()
 
 
-def restart_failed_emails() -> Dict[str, Any]:
-    """Restart processing of FAILED emails only"""
+def restart_failed_emails(template_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Restart processing of FAILED emails only
+    
+    Args:
+        template_id: Optional template for this run instead of the configured one
+    """
     automation_state = get_automation_state()
     
-    if automation_state["is_running"]:
-        email_logger.log_info("Cannot restart failed emails while automation is running")
+    if automation_state.is_running:
+        email_logger.log_info("Cannot restart failed emails while automation is running", event=LogEvent.PROCESS)
         return get_automation_status()
     
     try:
@@ -113,7 +140,7 @@ def restart_failed_emails() -> Dict[str, Any]:
         
         # Start process tracking in the logger with a more descriptive name and emoji
         email_logger.start_process(process_id, "Failed Email Retry Process")
-        email_logger.log_info("🔄 Starting automation process: Failed Email Retry Process", process_id=process_id)
+        email_logger.log_info("🔄 Starting automation process: Failed Email Retry Process", process_id=process_id, event=LogEvent.PROCESS)
         
         # Get failed emails only
         conn = get_db_connection()
@@ -130,11 +157,11 @@ def restart_failed_emails() -> Dict[str, Any]:
         failed_count = cursor.fetchone()[0]
         
         if failed_count == 0:
-            email_logger.log_info("❌ No failed emails to restart", process_id=process_id)
+            email_logger.log_info("❌ No failed emails to restart", process_id=process_id, event=LogEvent.PROCESS)
             email_logger.end_process(process_id, "completed", "No failed emails to restart")
             return get_automation_status()
             
-        email_logger.log_info(f"❌ Found {failed_count} failed emails to restart", process_id=process_id)
+        email_logger.log_info(f"❌ Found {failed_count} failed emails to restart", process_id=process_id, event=LogEvent.PROCESS)
         
         # Get all failed emails
         failed_emails = _load_emails_by_status(EmailStatus.FAILED.value)
@@ -149,63 +176,441 @@ def restart_failed_emails() -> Dict[str, Any]:
         cursor.execute(update_query, [EmailStatus.PENDING.value, EmailStatus.FAILED.value])
         conn.commit()
         
-        # Create a queue specifically for these emails
-        automation_state["email_queue"] = queue.Queue()
-        
-        # Put all previously failed (now pending) emails into the queue
-        for email in failed_emails:
-            # Update the status in our local copy to match what we just did in the database
-            email["Email_Status"] = EmailStatus.PENDING.value
-            automation_state["email_queue"].put(email)
-            
-            # Track this email in the process
-            if 'Email_ID' in email and email['Email_ID']:
-                email_logger.add_email_to_process(process_id, email['Email_ID'])
-        
-        # Store process ID in automation state
-        automation_state["process_id"] = process_id
-        
-        # Update summary counts
-        _update_summary()
-        
-        # Start processing thread
-        automation_state["is_running"] = True
-        automation_state["status"] = "restarting"
-        automation_state["automation_thread"] = threading.Thread(
-            target=_process_email_queue,
-            daemon=True
-        )
-        automation_state["automation_thread"].start()
-        
-        # Enhanced logging with more details and consistent formatting with normal process
-        email_logger.log_info(f"🔄 Started reprocessing of {len(failed_emails)} previously failed emails", process_id=process_id)
+        # With worker processes, the emails are now Pending for them to pick up
+        if settings.AUTOMATION_EXTERNAL_WORKERS:
+            email_logger.end_process(process_id, "success", f"Returned {failed_count} failed emails to the worker processes")
+            return _request_worker_run("retry", template_id)
         
+        _start_retry_run(process_id, failed_emails, template_id)
         return get_automation_status()
             
     except Exception as e:
         error_msg = f"Error restarting failed emails: {str(e)}"
-        email_logger.log_error(f"❌ {error_msg}", process_id=process_id if 'process_id' in locals() else None)
+        email_logger.log_error(f"❌ {error_msg}", process_id=process_id if 'process_id' in locals() else None, event=LogEvent.PROCESS)
         
         # End the process with error if a process_id exists
         if 'process_id' in locals():
             email_logger.end_process(process_id, "error", error_msg)
             
-        automation_state["status"] = "error"
+        automation_state.fail()
         return get_automation_status()
     finally:
         if 'conn' in locals():
             conn.close()
 
 
+def retry_emails(email_ids: List[int], template_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Retry specific failed emails, e.g. those whose scheduled retry is due
+    
+    Args:
+        email_ids: IDs of the failed emails
+        template_id: Optional template for this run instead of the configured one
+    """
+    from ..scheduling.retry_scheduler import get_retry_store
+    
+    automation_state = get_automation_state()
+    
+    if automation_state.is_running:
+        email_logger.log_info("Cannot retry failed emails while automation is running", event=LogEvent.PROCESS)
+        return get_automation_status()
+    
+    try:
+        process_id = f"retry_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        email_logger.start_process(process_id, "Scheduled Email Retry Process")
+        
+        # Only the emails that are still Failed are returned to Pending
+        emails = _requeue_failed_emails(email_ids)
+        
+        # Emails sent or changed meanwhile need no retry
+        requeued = {email["Email_ID"] for email in emails}
+        get_retry_store().discard([email_id for email_id in email_ids if email_id not in requeued])
+        
+        if not emails:
+            email_logger.end_process(process_id, "completed", "No failed emails left to retry")
+            return get_automation_status()
+        
+        email_logger.log_info(f"🔄 Retrying {len(emails)} emails after transient failures", process_id=process_id, event=LogEvent.PROCESS)
+        
+        # With worker processes, the emails are now Pending for them to pick up
+        if get_settings().AUTOMATION_EXTERNAL_WORKERS:
+            email_logger.end_process(process_id, "success", f"Returned {len(emails)} emails to the worker processes")
+            return _request_worker_run("retry", template_id)
+        
+        _start_retry_run(process_id, emails, template_id)
+        return get_automation_status()
+    except Exception as e:
+        error_msg = f"Error retrying failed emails: {str(e)}"
+        email_logger.log_error(f"❌ {error_msg}", process_id=process_id if 'process_id' in locals() else None, event=LogEvent.PROCESS)
+        
+        if 'process_id' in locals():
+            email_logger.end_process(process_id, "error", error_msg)
+            
+        automation_state.fail()
+        return get_automation_status()
+
+
+def _start_retry_run(process_id: str, emails: List[dict], template_id: Optional[str]) -> bool:
+    """
+    Start the run sending emails that were just returned from Failed to Pending
+    
+    Returns:
+        bool: False if another run started first
+    """
+    automation_state = get_automation_state()
+    
+    for email in emails:
+        # Update the status in our local copy to match what we just did in the database
+        email["Email_Status"] = EmailStatus.PENDING.value
+        
+        # Track this email in the process
+        if 'Email_ID' in email and email['Email_ID']:
+            email_logger.add_email_to_process(process_id, email['Email_ID'])
+    
+    # Create a journaled queue specifically for these emails, in queue policy order
+    email_queue = create_run_queue(process_id, "retry", template_id, order_emails(emails))
+    
+    # Claim the automation state for this run
+    if not automation_state.try_begin_run(process_id, email_queue, template_id, restart=True):
+        email_queue.finish(RUN_STOPPED)
+        email_logger.end_process(process_id, "completed", "Another automation run started first")
+        return False
+    
+    # Update summary counts
+    _update_summary()
+    
+    # Start processing thread
+    _start_processing_thread()
+    
+    # Enhanced logging with more details and consistent formatting with normal process
+    email_logger.log_info(f"🔄 Started reprocessing of {len(emails)} previously failed emails", process_id=process_id, event=LogEvent.PROCESS)
+    publish_status()
+    return True
+
+
+def _start_processing_thread():
+    """Start the processing thread of the run that was just begun"""
+    automation_state = get_automation_state()
+    try:
+        automation_state.automation_thread = threading.Thread(
+            target=_process_email_queue,
+            daemon=True
+        )
+        automation_state.automation_thread.start()
+    except Exception:
+        automation_state.finish_run(error=True)
+        raise
+
+
+def resume_interrupted_run() -> bool:
+    """
+    Resume an automation run that was interrupted by a restart of the API.
+
+    The run continues under its original process ID with the emails it had
+    not processed yet. Emails that were claimed but not sent are queued
+    again; outcomes journaled before the database was updated are applied.
+    An email whose send may already have reached SMTP is not sent a second
+    time: if its record is still Pending it is marked Failed, so it is only
+    resent by a deliberate retry.
+
+    Returns:
+        bool: True if a run was resumed
+    """
+    automation_state = get_automation_state()
+
+    if automation_state.is_running:
+        return False
+
+    store = get_run_queue_store()
+    run = store.get_active_run()
+    if run is None:
+        return False
+
+    process_id = run["process_id"]
+    run_queue = RunQueue(store, process_id)
+
+    try:
+        _reconcile_interrupted_emails(run_queue)
+
+        remaining = run_queue.qsize()
+        if remaining == 0:
+            run_queue.finish(RUN_COMPLETED)
+            logger.info(f"Interrupted automation run {process_id} has no emails left to process")
+            return False
+
+        is_retry = run["kind"] == "retry"
+        description = "Failed Email Retry Process" if is_retry else "Email Automation Process"
+        email_logger.start_process(process_id, f"{description} (resumed)")
+
+        if not automation_state.try_begin_run(process_id, run_queue, run["template_id"], restart=is_retry):
+            return False
+        automation_state.summary.set(pending=remaining)
+        _start_processing_thread()
+
+        email_logger.log_info(
+            f"⏯️ Resumed interrupted automation run with {remaining} of {run['total']} emails left to process",
+            process_id=process_id,
+            event=LogEvent.PROCESS
+        )
+        publish_status()
+        return True
+
+    except Exception as e:
+        logger.error(f"Error resuming automation run {process_id}: {str(e)}")
+        automation_state.fail()
+        return False
+
+
+def _reconcile_interrupted_emails(run_queue: RunQueue):
+    """
+    Settle the emails a run was working on when it was interrupted.
+
+    Args:
+        run_queue: Queue of the interrupted run
+
+    Raises:
+        RuntimeError: If the email table cannot be read; the run is then
+            left as it is and resumed on a later startup
+    """
+    from ....services.email import update_email_status as update_status
+
+    in_flight = run_queue.store.get_items(
+        run_queue.process_id, (ITEM_CLAIMED, ITEM_UPLOADING, ITEM_SENDING, ITEM_FINISHED)
+    )
+    for item in in_flight:
+        email_id = item["email_id"]
+
+        # Nothing was sent yet: process the email again
+        if item["state"] in (ITEM_CLAIMED, ITEM_UPLOADING):
+            run_queue.requeue(email_id)
+            continue
+
+        is_pending, current_status = _check_email_status(email_id)
+        if current_status.startswith("Error:"):
+            raise RuntimeError(f"Cannot check email {email_id}: {current_status}")
+
+        # The database record was already updated
+        if not is_pending:
+            run_queue.task_done(email_id, item["outcome"] or OUTCOME_SKIPPED,
+                                item["reason"] or f"Status is {current_status}")
+            continue
+
+        if item["state"] == ITEM_FINISHED:
+            success = item["outcome"] == OUTCOME_SENT
+            reason = item["reason"] or ("Email sent successfully" if success else "Failed to send email")
+        else:
+            success = False
+            reason = "Interrupted while sending; not resent automatically to avoid a duplicate email"
+
+        current_time = datetime.now()
+        update_status(
+            email_id=email_id,
+            status=EmailStatus.SUCCESS.value if success else EmailStatus.FAILED.value,
+            reason=reason,
+            send_date=current_time,
+            date=current_time
+        )
+        run_queue.task_done(email_id, OUTCOME_SENT if success else OUTCOME_FAILED, reason)
+        email_logger.log_info(
+            f"⏯️ Email ID {email_id} from interrupted run recorded as {'Success' if success else 'Failed'}: {reason}",
+            email_id=email_id,
+            process_id=run_queue.process_id,
+            event=LogEvent.PROCESS
+        )
+
+
 def get_automation_status() -> Dict[str, Any]:
     """Get the current status of email automation"""
     automation_state = get_automation_state()
     
-    if not automation_state["is_running"]:
+    if get_settings().AUTOMATION_EXTERNAL_WORKERS:
+        _refresh_worker_run_status()
+    
+    if not automation_state.is_running:
         _update_summary()
     
+    return automation_state.snapshot()
+
+
+def get_recent_emails() -> Dict[str, Any]:
+    """
+    Get the most recent emails of the current or last automation run.
+    
+    Returns:
+        Dict with "process_id" and "emails" (newest last)
+    """
+    automation_state = get_automation_state()
+    with automation_state.lock:
+        process_id = automation_state.process_id
+        history = automation_state.history
+    
+    emails = history.recent()
+    for email in emails:
+        email["process_time"] = email["process_time"].isoformat()
+    return {
+        "process_id": process_id,
+        "emails": emails
+    }
+
+
+def _request_worker_run(kind: str, template_id: Optional[str], preflight: bool = False) -> Dict[str, Any]:
+    """
+    Ask the worker processes to send the Pending emails.
+
+    Args:
+        kind: "auto" or "retry", used as the run ID prefix
+        template_id: Template for the run; defaults to the configured one
+        preflight: Fail the emails that cannot be sent before the workers lease them
+    """
+    automation_state = get_automation_state()
+
+    control = get_run_control()
+    if control and control["Run_State"] == RUN_REQUESTED:
+        logger.info(f"Worker run {control['Run_ID']} is already in progress")
+        return get_automation_status()
+
+    # Workers of a stopping run may still hold leases; their rows are not failed
+    if preflight:
+        run_preflight(_load_emails_by_status(EmailStatus.PENDING.value))
+
+    run_id = f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    template_id = template_id or automation_state.get_settings()["template_id"]
+    if not set_run_control(run_id, RUN_REQUESTED, template_id):
+        logger.error("Could not request a worker run; has database/add_worker_leases.sql been applied?")
+        automation_state.fail()
+        return get_automation_status()
+
+    automation_state.process_id = run_id
+    email_logger.log_info(f"Requested automation run {run_id} from the worker processes",
+                          process_id=run_id, event=LogEvent.PROCESS)
+    status = get_automation_status()
+    publish_status()
+    return status
+
+
+def _stop_worker_run() -> Dict[str, Any]:
+    """Ask the worker processes to stop the current run after their current emails"""
+    control = get_run_control()
+    if not control or control["Run_State"] != RUN_REQUESTED:
+        logger.info("No worker run is in progress")
+        return get_automation_status()
+
+    run_id = control["Run_ID"]
+    set_run_control(run_id, RUN_STOP_REQUESTED, control["Template_ID"], expected_run_id=run_id)
+    email_logger.log_info(f"Stopping automation run {run_id} on the worker processes",
+                          process_id=run_id, event=LogEvent.PROCESS)
+    status = get_automation_status()
+    publish_status()
+    return status
+
+
+def _refresh_worker_run_status():
+    """Reflect the worker run in the automation state"""
+    automation_state = get_automation_state()
+    control = get_run_control()
+    if not control:
+        return
+
+    last_run = None
+    if control["Run_State"] == RUN_DONE and control["Updated_At"]:
+        # The control row is stamped with the database server's UTC clock
+        last_run = control["Updated_At"].replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    was_running = automation_state.status == STATUS_RUNNING
+    automation_state.sync_external_run(control["Run_State"] == RUN_REQUESTED, last_run)
+
+    # Schedule the retries the workers recorded during the run
+    if was_running and control["Run_State"] != RUN_REQUESTED:
+        from ..scheduling.retry_scheduler import sync_retry_job
+        sync_retry_job()
+
+
+def _status_refresh_loop(interval_seconds: int):
+    """Refresh the worker run status every interval and publish it when it changes"""
+    last_status = None
+    while not _status_refresh_stop.is_set():
+        try:
+            _update_summary()
+            status = get_automation_status()
+            if status != last_status:
+                publish_status()
+                last_status = status
+        except Exception as e:
+            logger.error(f"Error refreshing worker run status: {str(e)}")
+        _status_refresh_stop.wait(interval_seconds)
+
+
+def start_worker_status_refresh() -> bool:
+    """
+    Start the thread that follows the worker run if external workers are enabled.
+
+    The workers only report through the database, so without it the status
+    would change only when a client asks for it.
+
+    Returns:
+        bool: True if the thread is running
+    """
+    global _status_refresh_thread
+    settings = get_settings()
+    if not settings.AUTOMATION_EXTERNAL_WORKERS:
+        return False
+
+    if _status_refresh_thread and _status_refresh_thread.is_alive():
+        return True
+
+    _status_refresh_stop.clear()
+    _status_refresh_thread = threading.Thread(
+        target=_status_refresh_loop,
+        args=(settings.WORKER_STATUS_REFRESH_SECONDS,),
+        daemon=True,
+        name="worker-status-refresh"
+    )
+    _status_refresh_thread.start()
+    return True
+
+
+def stop_worker_status_refresh():
+    """Signal the worker status thread to stop"""
+    _status_refresh_stop.set()
+
+
+def get_worker_status() -> Dict[str, Any]:
+    """
+    Get the worker processes, their leases and the requested run.
+
+    Leases held by workers that stopped heartbeating are released first.
+
+    Returns:
+        Dict with "enabled", "run" and "workers"
+    """
+    settings = get_settings()
+    release_expired_leases(settings.WORKER_LEASE_SECONDS)
+
+    workers = []
+    for worker in get_workers():
+        alive = (worker["Status"] not in ("stopped", "dead")
+                 and worker["Heartbeat_Age"] is not None
+                 and worker["Heartbeat_Age"] <= settings.WORKER_LEASE_SECONDS)
+        workers.append({
+            "workerId": worker["Worker_ID"],
+            "host": worker["Host_Name"],
+            "pid": worker["Process_ID"],
+            "status": worker["Status"] if alive or worker["Status"] in ("stopped", "dead") else "unresponsive",
+            "alive": alive,
+            "startedAt": worker["Started_At"].isoformat() if worker["Started_At"] else None,
+            "heartbeatAgeSeconds": worker["Heartbeat_Age"],
+            "leases": worker["Leases"],
+            "processed": worker["Processed"],
+            "successful": worker["Successful"],
+            "failed": worker["Failed"]
+        })
+
+    control = get_run_control()
     return {
-        "status": automation_state["status"],
-        "lastRun": automation_state["last_run"].isoformat() if automation_state["last_run"] else None,
-        "summary": automation_state["summary"]
+        "enabled": settings.AUTOMATION_EXTERNAL_WORKERS,
+        "run": {
+            "runId": control["Run_ID"],
+            "state": control["Run_State"],
+            "templateId": control["Template_ID"]
+        } if control else None,
+        "workers": workers
     }
@@ -0,0 +1,81 @@
+"""
+Compact history of the emails completed in an automation run.
+
+The run's counters live in the summary and its stage timings in the timing
+histogram; this keeps only what is needed on top of them: the IDs of the
+successful and failed emails, packed 8 bytes each in arrays, and a bounded
+ring of the most recent emails for the UI. Memory no longer grows with a
+copy of every email record processed.
+"""
+
+import threading
+from array import array
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from ....core.config import get_settings
+
+
+def format_id_ranges(ids: Iterable[int]) -> str:
+    """
+    Format email IDs compactly, collapsing consecutive IDs into ranges.
+
+    Args:
+        ids: Email IDs in processing order
+
+    Returns:
+        str: e.g. "1-250, 253, 260-261"
+    """
+    parts = []
+    start = end = None
+    for email_id in ids:
+        if start is not None and email_id == end + 1:
+            end = email_id
+            continue
+        if start is not None:
+            parts.append(str(start) if start == end else f"{start}-{end}")
+        start = end = email_id
+    if start is not None:
+        parts.append(str(start) if start == end else f"{start}-{end}")
+    return ", ".join(parts)
+
+
+class RunHistory:
+    """Outcome IDs and recent emails of one automation run"""
+
+    def __init__(self, recent_limit: Optional[int] = None):
+        if recent_limit is None:
+            recent_limit = get_settings().AUTOMATION_RECENT_EMAILS
+        self._lock = threading.Lock()
+        self._successful = array("q")
+        self._failed = array("q")
+        self._recent = deque(maxlen=max(recent_limit, 0))
+
+    def record(self, email_record: Dict[str, Any], success: bool, reason: Optional[str] = None):
+        """Record the outcome of one email"""
+        with self._lock:
+            (self._successful if success else self._failed).append(int(email_record["Email_ID"]))
+            self._recent.append({
+                "Email_ID": email_record["Email_ID"],
+                "Email": email_record.get("Email"),
+                "Subject": email_record.get("Subject"),
+                "success": success,
+                "reason": reason,
+                "process_time": datetime.now()
+            })
+
+    def successful_ids(self) -> array:
+        """Copy of the IDs of the emails sent successfully"""
+        with self._lock:
+            return array("q", self._successful)
+
+    def failed_ids(self) -> array:
+        """Copy of the IDs of the emails that failed"""
+        with self._lock:
+            return array("q", self._failed)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """The most recent emails, newest last"""
+        with self._lock:
+            return [dict(item) for item in self._recent]
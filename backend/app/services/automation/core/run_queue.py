@@ -0,0 +1,505 @@
+"""
+Durable queue of the emails in an automation run.
+
+Every run is journaled in a small SQLite database (WAL): the records queued
+for it, each claim of a record by the processor, the moment its send is
+handed to SMTP and the outcome of each attempt. If the API process stops
+in the middle of a run, the run is resumed on the next startup from the
+first email that had not been claimed, instead of re-scanning every
+Pending row and redoing the work.
+
+Item states:
+    queued    - waiting to be processed
+    claimed   - taken by the processor, nothing sent yet
+    uploading - waiting for its Google Drive upload, nothing sent yet
+    sending   - handed to SMTP; may or may not have been delivered
+    finished  - outcome known, database record may not be updated yet
+    done      - fully processed
+"""
+
+import os
+import json
+import hashlib
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from ....core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+RUN_QUEUE_FILENAME = "automation_queue.db"
+
+# Run states
+RUN_ACTIVE = "running"
+RUN_COMPLETED = "completed"
+RUN_STOPPED = "stopped"
+RUN_ERROR = "error"
+
+# Item states
+ITEM_QUEUED = "queued"
+ITEM_CLAIMED = "claimed"
+ITEM_UPLOADING = "uploading"
+ITEM_SENDING = "sending"
+ITEM_FINISHED = "finished"
+ITEM_DONE = "done"
+
+# Outcomes
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_SKIPPED = "skipped"
+OUTCOME_HANDED_OFF = "handed_off"
+
+# Journals of finished runs are kept this long
+RUN_RETENTION_DAYS = 7
+
+# Columns by which queued records can be claimed together
+_GROUPING_COLUMNS = ("group_key", "recipient")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    process_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    template_id TEXT,
+    state TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_items (
+    process_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    email_id INTEGER NOT NULL,
+    record TEXT,
+    group_key TEXT,
+    recipient TEXT,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT,
+    reason TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (process_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_run_items_state ON run_items (process_id, state, position);
+CREATE INDEX IF NOT EXISTS idx_run_items_email ON run_items (process_id, email_id);
+CREATE TABLE IF NOT EXISTS run_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    process_id TEXT NOT NULL,
+    email_id INTEGER NOT NULL,
+    attempt INTEGER NOT NULL,
+    claimed_at TEXT NOT NULL,
+    finished_at TEXT,
+    outcome TEXT,
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_run_attempts_email ON run_attempts (process_id, email_id);
+"""
+
+
+def group_key(record: Dict[str, Any]) -> str:
+    """
+    Key of the records that may be sent as one message: the same attachment
+    folder and subject. Whether their rendered bodies match is checked when
+    they are claimed.
+    """
+    folder = os.path.normcase(os.path.normpath(record["File_Path"])) if record.get("File_Path") else ""
+    return hashlib.sha1(f"{folder}\n{record.get('Subject') or ''}".encode("utf-8")).hexdigest()
+
+
+def recipient_key(record: Dict[str, Any]) -> str:
+    """Key of the records of one recipient, which may be merged into a digest"""
+    return (record.get("Email") or "").strip().lower()
+
+
+class RunQueueStore:
+    """SQLite journal of automation runs and their queued emails"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store. The database is opened lazily on first use.
+
+        Args:
+            db_path: Path to the SQLite file. Defaults to AUTOMATION_QUEUE_PATH,
+                or automation_queue.db in LOG_DIR_PATH.
+        """
+        self._db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> str:
+        """Resolved path of the SQLite database file"""
+        if not self._db_path:
+            settings = get_settings()
+            self._db_path = os.path.abspath(settings.AUTOMATION_QUEUE_PATH or os.path.join(
+                settings.LOG_DIR_PATH, RUN_QUEUE_FILENAME
+            ))
+        return self._db_path
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller must hold the lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # Journals created before records were grouped lack the grouping columns
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(run_items)")]
+            for column in _GROUPING_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE run_items ADD COLUMN {column} TEXT")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_run_items_{column} "
+                             f"ON run_items (process_id, {column}, state)")
+            self._conn = conn
+        return self._conn
+
+    def create_run(self, process_id: str, kind: str, template_id: Optional[str],
+                   records: List[Dict[str, Any]]):
+        """
+        Journal a new run and enqueue its records in order.
+
+        Args:
+            process_id: ID of the automation process
+            kind: "auto" for Pending runs, "retry" for failed email restarts
+            template_id: Template selected for the run, if any
+            records: Email records to process
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (process_id, position, record["Email_ID"], json.dumps(record, default=str),
+             group_key(record), recipient_key(record), ITEM_QUEUED, now)
+            for position, record in enumerate(records)
+        ]
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                self._purge_finished_runs(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO runs (process_id, kind, template_id, state, total, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (process_id, kind, template_id, RUN_ACTIVE, len(rows), now, now)
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO run_items "
+                    "(process_id, position, email_id, record, group_key, recipient, state, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _purge_finished_runs(self, conn: sqlite3.Connection):
+        """Delete journals of runs that finished more than RUN_RETENTION_DAYS ago"""
+        cutoff = (datetime.now() - timedelta(days=RUN_RETENTION_DAYS)).isoformat()
+        old_runs = "SELECT process_id FROM runs WHERE state != ? AND updated_at < ?"
+        for table in ("run_items", "run_attempts"):
+            conn.execute(f"DELETE FROM {table} WHERE process_id IN ({old_runs})", (RUN_ACTIVE, cutoff))
+        conn.execute("DELETE FROM runs WHERE state != ? AND updated_at < ?", (RUN_ACTIVE, cutoff))
+
+    def finish_run(self, process_id: str, state: str):
+        """
+        Mark a run as no longer active; it will not be resumed.
+
+        The queued record copies are dropped, the outcomes are kept.
+        """
+        now = datetime.now().isoformat()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("UPDATE runs SET state = ?, updated_at = ? WHERE process_id = ?",
+                             (state, now, process_id))
+                conn.execute("UPDATE run_items SET record = NULL WHERE process_id = ?", (process_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Error finishing run {process_id} in the run queue: {str(e)}")
+
+    def get_active_run(self) -> Optional[Dict[str, Any]]:
+        """Get the most recent run that was still active, if any"""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT process_id, kind, template_id, total, created_at FROM runs "
+                    "WHERE state = ? ORDER BY created_at DESC LIMIT 1",
+                    (RUN_ACTIVE,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading the run queue: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return dict(zip(("process_id", "kind", "template_id", "total", "created_at"), row))
+
+    def claim_next(self, process_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim the next queued record of a run and journal the attempt.
+
+        Returns:
+            The email record, or None if nothing is queued
+        """
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT position, email_id, record, attempts FROM run_items "
+                "WHERE process_id = ? AND state = ? ORDER BY position LIMIT 1",
+                (process_id, ITEM_QUEUED)
+            ).fetchall()
+            records = self._claim_rows(conn, process_id, rows)
+        return records[0] if records else None
+
+    def claim_matching(self, process_id: str, column: str, key: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Claim queued records of a run with the given grouping key.
+
+        Args:
+            process_id: ID of the automation process
+            column: Grouping column, 'group_key' or 'recipient'
+            key: Key of the records (see group_key and recipient_key)
+            limit: Most records to claim
+
+        Returns:
+            The email records, in queue order
+        """
+        if column not in _GROUPING_COLUMNS:
+            raise ValueError(f"Unknown grouping column: {column}")
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT position, email_id, record, attempts FROM run_items "
+                f"WHERE process_id = ? AND {column} = ? AND state = ? ORDER BY position LIMIT ?",
+                (process_id, key, ITEM_QUEUED, limit)
+            ).fetchall()
+            return self._claim_rows(conn, process_id, rows)
+
+    def _claim_rows(self, conn: sqlite3.Connection, process_id: str, rows: list) -> List[Dict[str, Any]]:
+        """Mark queued items as claimed and journal the attempts (caller must hold the lock)"""
+        if not rows:
+            return []
+        now = datetime.now().isoformat()
+        conn.execute("BEGIN")
+        try:
+            for position, email_id, _, attempts in rows:
+                conn.execute(
+                    "UPDATE run_items SET state = ?, attempts = ?, updated_at = ? "
+                    "WHERE process_id = ? AND position = ?",
+                    (ITEM_CLAIMED, attempts + 1, now, process_id, position)
+                )
+                conn.execute(
+                    "INSERT INTO run_attempts (process_id, email_id, attempt, claimed_at) VALUES (?, ?, ?, ?)",
+                    (process_id, email_id, attempts + 1, now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [json.loads(record) for _, _, record, _ in rows]
+
+    def set_state(self, process_id: str, email_id: int, state: str,
+                  outcome: Optional[str] = None, reason: Optional[str] = None,
+                  only_unfinished: bool = False):
+        """
+        Move an item to a new state, recording the attempt outcome if given.
+
+        With only_unfinished, items whose outcome is already known are left as they are.
+        """
+        condition = f" AND state NOT IN ('{ITEM_FINISHED}', '{ITEM_DONE}')" if only_unfinished else ""
+        now = datetime.now().isoformat()
+        try:
+            with self._lock:
+                conn = self._connection()
+                if outcome is None:
+                    conn.execute(
+                        "UPDATE run_items SET state = ?, updated_at = ? WHERE process_id = ? AND email_id = ?"
+                        + condition,
+                        (state, now, process_id, email_id)
+                    )
+                    return
+                conn.execute("BEGIN")
+                try:
+                    updated = conn.execute(
+                        "UPDATE run_items SET state = ?, outcome = ?, reason = ?, updated_at = ? "
+                        "WHERE process_id = ? AND email_id = ?" + condition,
+                        (state, outcome, reason, now, process_id, email_id)
+                    ).rowcount
+                    if not updated:
+                        conn.execute("COMMIT")
+                        return
+                    conn.execute(
+                        "UPDATE run_attempts SET finished_at = ?, outcome = ?, reason = ? "
+                        "WHERE id = (SELECT MAX(id) FROM run_attempts WHERE process_id = ? AND email_id = ?)",
+                        (now, outcome, reason, process_id, email_id)
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            logger.error(f"Error updating email {email_id} in the run queue: {str(e)}")
+
+    def count(self, process_id: str, state: str) -> int:
+        """Number of items of a run in the given state"""
+        try:
+            with self._lock:
+                return self._connection().execute(
+                    "SELECT COUNT(*) FROM run_items WHERE process_id = ? AND state = ?",
+                    (process_id, state)
+                ).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading the run queue: {str(e)}")
+            return 0
+
+    def count_outcomes(self, process_id: str) -> Dict[str, int]:
+        """Number of items of a run per recorded outcome"""
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    "SELECT outcome, COUNT(*) FROM run_items "
+                    "WHERE process_id = ? AND outcome IS NOT NULL GROUP BY outcome",
+                    (process_id,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading the run queue: {str(e)}")
+            return {}
+        return dict(rows)
+
+    def get_items(self, process_id: str, states: Iterable[str]) -> List[Dict[str, Any]]:
+        """Get the items of a run in the given states, in queue order"""
+        states = list(states)
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    f"SELECT email_id, state, outcome, reason, record FROM run_items "
+                    f"WHERE process_id = ? AND state IN ({', '.join('?' * len(states))}) ORDER BY position",
+                    (process_id, *states)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading the run queue: {str(e)}")
+            return []
+        return [
+            {
+                "email_id": email_id,
+                "state": state,
+                "outcome": outcome,
+                "reason": reason,
+                "record": json.loads(record) if record else None
+            }
+            for email_id, state, outcome, reason, record in rows
+        ]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RunQueue:
+    """
+    The queue of one automation run, journaled in a RunQueueStore.
+
+    Used by the email processor in place of an in-memory queue.Queue: get()
+    claims the next record, and the processor reports the progress of each
+    email so that an interrupted run can be resumed exactly.
+    """
+
+    def __init__(self, store: RunQueueStore, process_id: str):
+        self.store = store
+        self.process_id = process_id
+
+    def empty(self) -> bool:
+        """Whether no records are left to claim"""
+        return self.store.count(self.process_id, ITEM_QUEUED) == 0
+
+    def qsize(self) -> int:
+        """Number of records left to claim"""
+        return self.store.count(self.process_id, ITEM_QUEUED)
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Claim the next record. Records are only queued when the run starts
+        or put back by the processor, so there is nothing to wait for.
+
+        Raises:
+            queue.Empty: If no records are left
+        """
+        record = self.store.claim_next(self.process_id)
+        if record is None:
+            raise queue.Empty
+        return record
+
+    def claim_group(self, email_record: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Claim up to `limit` queued records with the same attachment folder and subject as a record"""
+        return self.store.claim_matching(self.process_id, "group_key", group_key(email_record), limit)
+
+    def claim_recipient(self, email_record: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Claim up to `limit` queued records with the same recipient as a record"""
+        return self.store.claim_matching(self.process_id, "recipient", recipient_key(email_record), limit)
+
+    def requeue(self, email_id: int):
+        """Put a claimed email back in the queue"""
+        self.store.set_state(self.process_id, email_id, ITEM_QUEUED)
+
+    def mark_uploading(self, email_id: int):
+        """The email waits for its Google Drive upload; nothing has been sent"""
+        self.store.set_state(self.process_id, email_id, ITEM_UPLOADING)
+
+    def mark_sending(self, email_id: int):
+        """The email is about to be handed to SMTP"""
+        self.store.set_state(self.process_id, email_id, ITEM_SENDING)
+
+    def record_result(self, email_id: int, success: bool, reason: Optional[str]):
+        """Journal a send outcome before the database record is updated"""
+        self.store.set_state(self.process_id, email_id, ITEM_FINISHED,
+                             OUTCOME_SENT if success else OUTCOME_FAILED, reason)
+
+    def task_done(self, email_id: int, outcome: str, reason: Optional[str] = None):
+        """The email is fully processed"""
+        self.store.set_state(self.process_id, email_id, ITEM_DONE, outcome, reason)
+
+    def abandon(self, email_id: int, reason: str):
+        """Processing of the email broke off; it is failed unless its outcome is already known"""
+        self.store.set_state(self.process_id, email_id, ITEM_DONE, OUTCOME_FAILED, reason,
+                             only_unfinished=True)
+
+    def finish(self, state: str):
+        """Close the run so it is not resumed"""
+        self.store.finish_run(self.process_id, state)
+
+
+_run_queue_store: Optional[RunQueueStore] = None
+_store_lock = threading.Lock()
+
+
+def get_run_queue_store() -> RunQueueStore:
+    """Get the process-wide run queue store"""
+    global _run_queue_store
+    if _run_queue_store is None:
+        with _store_lock:
+            if _run_queue_store is None:
+                _run_queue_store = RunQueueStore()
+    return _run_queue_store
+
+
+def create_run_queue(process_id: str, kind: str, template_id: Optional[str],
+                     records: List[Dict[str, Any]]) -> RunQueue:
+    """
+    Journal a new run and return its queue.
+
+    Args:
+        process_id: ID of the automation process
+        kind: "auto" for Pending runs, "retry" for failed email restarts
+        template_id: Template selected for the run, if any
+        records: Email records to process, in order
+
+    Returns:
+        RunQueue of the run
+    """
+    store = get_run_queue_store()
+    store.create_run(process_id, kind, template_id, records)
+    return RunQueue(store, process_id)
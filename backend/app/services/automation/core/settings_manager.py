@@ -58,7 +58,7 @@ def get_automation_settings() -> Dict[str, Any]:
     """Get current automation settings"""
     automation_state = get_automation_state()
     return {
-        **automation_state["settings"],
+        **automation_state.get_settings(),
         **_get_smtp_settings()
     }
 
@@ -66,9 +66,4 @@ def get_automation_settings() -> Dict[str, Any]:
 def update_automation_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
     """Update automation settings"""
     automation_state = get_automation_state()
-    
-    for key, value in settings.items():
-        if key in automation_state["settings"]:
-            automation_state["settings"][key] = value
-    
-    return automation_state["settings"]
+    return automation_state.update_settings(settings)
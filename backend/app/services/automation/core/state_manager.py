@@ -1,41 +1,243 @@
-"""State manager for automation process"""
+"""
+State manager for automation process.
+
+The automation state is shared by the API event loop, the scheduler thread,
+the processing thread and the link-later worker. Every compound change
+(starting a run, counting an email, finishing a run) goes through a method
+that holds the state's lock, and readers get copies via snapshot(), so no
+caller ever sees a half-updated state.
+"""
 
 import threading
 from datetime import datetime
-_automation_state = {
-    "is_running": False,
-    "start_time": None,
-    "stop_requested": False,
-    "automation_thread": None,
-    "status": "idle",
-    "last_run": None,
-    "summary": {
-        "processed": 0,
-        "successful": 0,
-        "failed": 0,
-        "pending": 0
-    },
-    "settings": {
-        "retry_on_failure": True,
-        "retry_interval": "15min",
-        "template_id": "default",
-        "sharing_option": "anyone",
-        "specific_emails": []
-    },
-    "schedule": {
-        "enabled": False,
-        "frequency": "daily",
-        "time": "09:00",
-        "days": [],
-        "lastRun": None,
-        "nextRun": None
-    },
-    "email_queue": None,
-    "scheduler_thread": None,
-    "scheduler_running": False
+from typing import Any, Dict, Optional
+
+from ....utils.event_bus import event_bus
+from .run_history import RunHistory
+
+# Run statuses
+STATUS_IDLE = "idle"
+STATUS_RUNNING = "running"
+STATUS_RESTARTING = "restarting"
+STATUS_STOPPING = "stopping"
+STATUS_ERROR = "error"
+
+# Allowed status transitions
+_TRANSITIONS = {
+    STATUS_IDLE: {STATUS_RUNNING, STATUS_RESTARTING, STATUS_ERROR},
+    STATUS_ERROR: {STATUS_RUNNING, STATUS_RESTARTING, STATUS_IDLE},
+    STATUS_RUNNING: {STATUS_STOPPING, STATUS_IDLE, STATUS_ERROR},
+    STATUS_RESTARTING: {STATUS_RUNNING, STATUS_STOPPING, STATUS_IDLE, STATUS_ERROR},
+    STATUS_STOPPING: {STATUS_IDLE, STATUS_ERROR},
 }
 
 
-def get_automation_state() -> dict:
+class RunSummary:
+    """Counters of the current run, updated atomically"""
+
+    FIELDS = ("processed", "successful", "failed", "pending")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def __getitem__(self, field: str) -> int:
+        with self._lock:
+            return self._counts[field]
+
+    def increment(self, field: str, amount: int = 1):
+        """Add to a counter"""
+        with self._lock:
+            self._counts[field] += amount
+
+    def set(self, **counts: int):
+        """Set counters"""
+        with self._lock:
+            for field, value in counts.items():
+                if field not in self._counts:
+                    raise KeyError(field)
+                self._counts[field] = value
+
+    def reset(self):
+        """Zero all counters"""
+        self.set(**dict.fromkeys(self.FIELDS, 0))
+
+    def snapshot(self) -> Dict[str, int]:
+        """Copy of the counters"""
+        with self._lock:
+            return dict(self._counts)
+
+
+class AutomationState:
+    """State of the automation process, shared across threads"""
+
+    def __init__(self):
+        # Guards the run fields and status transitions; re-entrant so that
+        # transitions can be composed
+        self.lock = threading.RLock()
+
+        self.status: str = STATUS_IDLE
+        self.is_running: bool = False
+        self.stop_requested: bool = False
+        self.start_time: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.process_id: Optional[str] = None
+        self.run_template_id: Optional[str] = None
+        self.email_queue: Any = None
+        self.automation_thread: Optional[threading.Thread] = None
+        self.summary = RunSummary()
+        # Replaced with one sized by the settings when a run starts
+        self.history = RunHistory(recent_limit=0)
+
+        self.settings: Dict[str, Any] = {
+            "retry_on_failure": True,
+            "retry_interval": "15min",
+            "template_id": "default",
+            "sharing_option": "anyone",
+            "specific_emails": []
+        }
+        self.schedule: Dict[str, Any] = {
+            "enabled": False,
+            "frequency": "daily",
+            "time": "09:00",
+            "days": [],
+            "lastRun": None,
+            "nextRun": None
+        }
+        self.schedules: Dict[str, Dict[str, Any]] = {}
+        self.scheduler_running: bool = False
+        # Cleared by stop_scheduler, so the scheduler is not started again
+        # on its own when a schedule or retry is added
+        self.scheduler_wanted: bool = True
+
+    def _set_status(self, status: str):
+        """Change the status (caller holds the lock)"""
+        if status != self.status and status not in _TRANSITIONS[self.status]:
+            raise ValueError(f"Invalid automation status transition: {self.status} -> {status}")
+        self.status = status
+
+    def try_begin_run(self, process_id: str, email_queue: Any, template_id: Optional[str] = None,
+                      restart: bool = False) -> bool:
+        """
+        Claim the state for a new run.
+
+        Returns:
+            bool: False if a run is already in progress
+        """
+        with self.lock:
+            if self.is_running:
+                return False
+            self._set_status(STATUS_RESTARTING if restart else STATUS_RUNNING)
+            self.is_running = True
+            self.stop_requested = False
+            self.process_id = process_id
+            self.run_template_id = template_id
+            self.email_queue = email_queue
+            return True
+
+    def set_queue(self, email_queue: Any):
+        """Attach the journaled queue of a run begun before its emails were loaded"""
+        with self.lock:
+            self.email_queue = email_queue
+
+    def start_processing(self) -> bool:
+        """
+        Reset the run counters and history as the processing thread starts.
+
+        Returns:
+            bool: True if the run was started as a restart of failed emails
+        """
+        with self.lock:
+            is_restart = self.status == STATUS_RESTARTING
+            if self.status in (STATUS_RUNNING, STATUS_RESTARTING):
+                self._set_status(STATUS_RUNNING)
+            self.start_time = datetime.now()
+            self.summary.reset()
+            self.history = RunHistory()
+            return is_restart
+
+    def request_stop(self) -> bool:
+        """
+        Ask the running run to stop after its current email.
+
+        Returns:
+            bool: False if no run is in progress
+        """
+        with self.lock:
+            if not self.is_running:
+                return False
+            self.stop_requested = True
+            self._set_status(STATUS_STOPPING)
+            return True
+
+    def finish_run(self, error: bool = False):
+        """End the current run"""
+        with self.lock:
+            self._set_status(STATUS_ERROR if error else STATUS_IDLE)
+            self.is_running = False
+            self.stop_requested = False
+            self.last_run = datetime.now()
+
+    def fail(self):
+        """
+        Record an error outside a run (e.g. a run could not be started).
+
+        A run that is already in progress is left alone.
+        """
+        with self.lock:
+            if not self.is_running:
+                self._set_status(STATUS_ERROR)
+
+    def sync_external_run(self, running: bool, last_run: Optional[datetime]):
+        """Mirror a run carried out by worker processes"""
+        with self.lock:
+            self.status = STATUS_RUNNING if running else STATUS_IDLE
+            if last_run:
+                self.last_run = last_run
+
+    def apply_totals(self, pending: int, successful: int, failed: int):
+        """
+        Apply the email table's status totals to the summary.
+
+        During a run only the pending count is taken over, so the run's own
+        successful and failed counters are not overwritten.
+        """
+        with self.lock:
+            if self.is_running:
+                self.summary.set(pending=pending)
+            else:
+                self.summary.set(pending=pending, successful=successful, failed=failed)
+
+    def update_settings(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Update known automation settings and return a copy of them"""
+        with self.lock:
+            for key, value in settings.items():
+                if key in self.settings:
+                    self.settings[key] = value
+            return dict(self.settings)
+
+    def get_settings(self) -> Dict[str, Any]:
+        """Copy of the automation settings"""
+        with self.lock:
+            return dict(self.settings)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of the status, last run and summary"""
+        with self.lock:
+            return {
+                "status": self.status,
+                "lastRun": self.last_run.isoformat() if self.last_run else None,
+                "summary": self.summary.snapshot()
+            }
+
+
+_automation_state = AutomationState()
+
+
+def get_automation_state() -> AutomationState:
     return _automation_state
 
+
+def publish_status() -> None:
+    """Push the current status and summary counters to event stream subscribers"""
+    event_bus.publish("status", _automation_state.snapshot())
@@ -1,7 +1,8 @@
 """Email repository for database operations"""
 
 import logging
-from typing import List, Tuple
+from datetime import datetime
+from typing import Dict, List, Tuple
 
 from ....utils.db_utils import get_db_connection
 from ....core.config import get_settings
@@ -41,6 +42,110 @@ def _load_emails_by_status(status) -> List[dict]:
             conn.close()
 
 
+def _requeue_failed_emails(email_ids: List[int]) -> List[dict]:
+    """
+    Return the given emails to Pending if they are still Failed
+    
+    Args:
+        email_ids: IDs of the email records
+        
+    Returns:
+        List[dict]: The records that were returned to Pending
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+        
+        # Import here to avoid circular imports
+        from ....models.email import EmailStatus
+        
+        results = []
+        # Stay well below SQL Server's 2100 parameter limit
+        for start in range(0, len(email_ids), 1000):
+            chunk = email_ids[start:start + 1000]
+            query = f"""
+                UPDATE {settings.EMAIL_TABLE}
+                SET Email_Status = ?
+                OUTPUT inserted.Email_ID, inserted.Company_Name, inserted.Email, inserted.Subject,
+                       inserted.File_Path, inserted.Email_Send_Date, inserted.Email_Status,
+                       inserted.Date, inserted.Reason
+                WHERE Email_Status = ? AND Email_ID IN ({", ".join("?" * len(chunk))})
+            """
+            cursor.execute(query, [EmailStatus.PENDING.value, EmailStatus.FAILED.value, *chunk])
+            columns = [column[0] for column in cursor.description]
+            results.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+        conn.commit()
+        
+        # Keep the order the retries were due in
+        order = {email_id: position for position, email_id in enumerate(email_ids)}
+        results.sort(key=lambda record: order.get(record["Email_ID"], 0))
+        return results
+    except Exception as e:
+        logger.error(f"Error returning failed emails to Pending: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return []
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def _fail_pending_emails(failures: Dict[int, str]) -> List[int]:
+    """
+    Mark emails Failed in batched updates, if they are still Pending
+    
+    Args:
+        failures: Failure reason by email ID
+        
+    Returns:
+        List[int]: IDs of the emails that were marked Failed
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+        
+        # Import here to avoid circular imports
+        from ....models.email import EmailStatus
+        
+        # One update per distinct reason
+        by_reason: Dict[str, List[int]] = {}
+        for email_id, reason in failures.items():
+            by_reason.setdefault(reason, []).append(email_id)
+        
+        # Rows leased by a worker that may still be sending them are left
+        # alone; run markers only tell that a finished batch skipped the row
+        lease_condition = ""
+        if settings.AUTOMATION_EXTERNAL_WORKERS:
+            lease_condition = " AND (Lease_Owner IS NULL OR Lease_Owner LIKE 'run:%')"
+        
+        failed = []
+        now = datetime.now()
+        for reason, email_ids in by_reason.items():
+            # Stay well below SQL Server's 2100 parameter limit
+            for start in range(0, len(email_ids), 1000):
+                chunk = email_ids[start:start + 1000]
+                query = f"""
+                    UPDATE {settings.EMAIL_TABLE}
+                    SET Email_Status = ?, Reason = ?, Date = ?
+                    OUTPUT inserted.Email_ID
+                    WHERE Email_Status = ? AND Email_ID IN ({", ".join("?" * len(chunk))}){lease_condition}
+                """
+                cursor.execute(query, [EmailStatus.FAILED.value, reason, now, EmailStatus.PENDING.value, *chunk])
+                failed.extend(row[0] for row in cursor.fetchall())
+        conn.commit()
+        return failed
+    except Exception as e:
+        logger.error(f"Error marking emails as failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return []
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
 def _check_email_status(email_id: int) -> Tuple[bool, str]:
     """
     Check if email status is still Pending to prevent duplicate processing
@@ -0,0 +1,382 @@
+"""
+Lease repository for automation worker processes.
+
+Worker processes (worker.py) share the email table by leasing batches of
+Pending rows: a lease is the worker's ID in Lease_Owner and an expiry time
+in Lease_Expires, renewed by the worker's heartbeat. Rows are leased with
+READPAST, so workers skip each other's locked rows instead of waiting on
+them. Leases of a worker that stops heartbeating expire and are released
+for the others. All times are the database server's UTC clock, so workers
+on different machines agree on expiry.
+
+When a worker has finished a batch, the rows that are still Pending (for
+example skipped ones) keep a "run:<run_id>" marker without an expiry, so
+they are not leased again until the next run. Markers of runs other than
+the one in progress are cleared with the expired leases.
+
+Requires database/add_worker_leases.sql.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from ....models.email import EmailStatus
+from ....utils.db_utils import get_db_connection
+from ....core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+WORKERS_TABLE = "AutomationWorkers"
+CONTROL_TABLE = "AutomationControl"
+
+EMAIL_COLUMNS = (
+    "Email_ID", "Company_Name", "Email", "Subject", "File_Path",
+    "Email_Send_Date", "Email_Status", "Date", "Reason"
+)
+
+# Run states in the control row
+RUN_IDLE = "idle"
+RUN_REQUESTED = "running"
+RUN_STOP_REQUESTED = "stopped"
+RUN_DONE = "completed"
+
+
+def run_marker(run_id: str) -> str:
+    """Lease_Owner value of rows already handled in a run"""
+    return f"run:{run_id}"
+
+
+def acquire_leases(worker_id: str, run_id: str, batch_size: int, lease_seconds: int) -> List[dict]:
+    """
+    Lease up to batch_size Pending rows that are not leased by a live worker
+    and were not handled earlier in the same run.
+
+    Args:
+        worker_id: ID of the leasing worker
+        run_id: ID of the current run
+        batch_size: Maximum number of rows to lease
+        lease_seconds: Lease duration
+
+    Returns:
+        List of leased email records, oldest send date first
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+
+        query = f"""
+            WITH batch AS (
+                SELECT TOP (?) *
+                FROM {settings.EMAIL_TABLE} WITH (UPDLOCK, READPAST, ROWLOCK)
+                WHERE Email_Status = ?
+                  AND (Lease_Owner IS NULL
+                       OR (Lease_Owner <> ? AND (Lease_Expires IS NULL OR Lease_Expires < GETUTCDATE())))
+                ORDER BY Email_Send_Date
+            )
+            UPDATE batch
+            SET Lease_Owner = ?, Lease_Expires = DATEADD(second, ?, GETUTCDATE())
+            OUTPUT {', '.join('inserted.' + column for column in EMAIL_COLUMNS)}
+        """
+
+        cursor.execute(query, [batch_size, EmailStatus.PENDING.value, run_marker(run_id), worker_id, lease_seconds])
+        rows = cursor.fetchall()
+        conn.commit()
+
+        records = [dict(zip(EMAIL_COLUMNS, row)) for row in rows]
+        records.sort(key=lambda record: (record["Email_Send_Date"] is None, record["Email_Send_Date"] or 0))
+        return records
+    except Exception as e:
+        logger.error(f"Error leasing emails for worker {worker_id}: {str(e)}")
+        return []
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def renew_leases(worker_id: str, lease_seconds: int) -> Optional[int]:
+    """
+    Extend the leases held by a worker.
+
+    Returns:
+        Number of leases renewed, or None if the database could not be reached
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+
+        cursor.execute(f"""
+            UPDATE {settings.EMAIL_TABLE}
+            SET Lease_Expires = DATEADD(second, ?, GETUTCDATE())
+            WHERE Lease_Owner = ?
+        """, [lease_seconds, worker_id])
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        logger.error(f"Error renewing leases of worker {worker_id}: {str(e)}")
+        return None
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def release_leases(worker_id: str, run_id: Optional[str] = None) -> int:
+    """
+    Release all leases held by a worker.
+
+    Args:
+        worker_id: ID of the worker
+        run_id: Mark the rows as handled in this run instead of freeing them
+
+    Returns:
+        Number of leases released
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+
+        cursor.execute(f"""
+            UPDATE {settings.EMAIL_TABLE}
+            SET Lease_Owner = ?, Lease_Expires = NULL
+            WHERE Lease_Owner = ?
+        """, [run_marker(run_id) if run_id else None, worker_id])
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        logger.error(f"Error releasing leases of worker {worker_id}: {str(e)}")
+        return 0
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def release_expired_leases(heartbeat_timeout_seconds: int) -> int:
+    """
+    Release the leases of dead workers and mark those workers as dead.
+
+    A worker is dead when its heartbeat is older than the timeout; an
+    expired lease is released whoever holds it. Run markers left by runs
+    that are no longer in progress are cleared as well.
+
+    Args:
+        heartbeat_timeout_seconds: Heartbeat age after which a worker is dead
+
+    Returns:
+        Number of leases released
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+
+        cursor.execute(f"""
+            UPDATE {WORKERS_TABLE}
+            SET Status = 'dead'
+            WHERE Status NOT IN ('stopped', 'dead')
+              AND Last_Heartbeat < DATEADD(second, -?, GETUTCDATE())
+        """, [heartbeat_timeout_seconds])
+
+        cursor.execute(f"""
+            UPDATE {settings.EMAIL_TABLE}
+            SET Lease_Owner = NULL, Lease_Expires = NULL
+            WHERE Lease_Owner IS NOT NULL
+              AND (Lease_Expires < GETUTCDATE()
+                   OR Lease_Owner IN (SELECT Worker_ID FROM {WORKERS_TABLE} WHERE Status IN ('stopped', 'dead')))
+        """)
+        released = cursor.rowcount
+
+        cursor.execute(f"""
+            UPDATE {settings.EMAIL_TABLE}
+            SET Lease_Owner = NULL
+            WHERE Lease_Owner LIKE 'run:%'
+              AND Lease_Owner <> ISNULL(
+                  (SELECT 'run:' + Run_ID FROM {CONTROL_TABLE} WHERE Control_ID = 1 AND Run_State = ?), '')
+        """, [RUN_REQUESTED])
+        cleared = cursor.rowcount
+        conn.commit()
+
+        if released:
+            logger.info(f"Released {released} email lease(s) held by dead workers")
+        if cleared:
+            logger.info(f"Cleared {cleared} run marker(s) of finished runs")
+        return released
+    except Exception as e:
+        logger.error(f"Error releasing expired leases: {str(e)}")
+        return 0
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def count_active_leases() -> int:
+    """Number of unexpired leases on Pending rows"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM {settings.EMAIL_TABLE}
+            WHERE Email_Status = ? AND Lease_Owner IS NOT NULL AND Lease_Expires >= GETUTCDATE()
+        """, [EmailStatus.PENDING.value])
+        return cursor.fetchone()[0]
+    except Exception as e:
+        logger.error(f"Error counting email leases: {str(e)}")
+        return 0
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def register_worker(worker_id: str, host_name: str, process_id: int) -> bool:
+    """
+    Register a worker (or re-register one with the same ID).
+
+    Returns:
+        bool: True if the worker was registered
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            MERGE {WORKERS_TABLE} AS target
+            USING (SELECT ? AS Worker_ID) AS source ON target.Worker_ID = source.Worker_ID
+            WHEN MATCHED THEN UPDATE SET
+                Host_Name = ?, Process_ID = ?, Status = 'idle', Started_At = GETUTCDATE(),
+                Last_Heartbeat = GETUTCDATE(), Processed = 0, Successful = 0, Failed = 0
+            WHEN NOT MATCHED THEN INSERT
+                (Worker_ID, Host_Name, Process_ID, Status, Started_At, Last_Heartbeat)
+                VALUES (?, ?, ?, 'idle', GETUTCDATE(), GETUTCDATE());
+        """, [worker_id, host_name, process_id, worker_id, host_name, process_id])
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error registering worker {worker_id}: {str(e)}")
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def heartbeat_worker(worker_id: str, status: str, processed: int, successful: int, failed: int) -> bool:
+    """
+    Record a worker heartbeat with its status and counters.
+
+    Returns:
+        bool: True if the heartbeat was recorded
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            UPDATE {WORKERS_TABLE}
+            SET Status = ?, Last_Heartbeat = GETUTCDATE(), Processed = ?, Successful = ?, Failed = ?
+            WHERE Worker_ID = ?
+        """, [status, processed, successful, failed, worker_id])
+        conn.commit()
+        return cursor.rowcount > 0
+    except Exception as e:
+        logger.error(f"Error recording heartbeat of worker {worker_id}: {str(e)}")
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def get_workers() -> List[Dict[str, Any]]:
+    """
+    Get all registered workers with the number of leases each holds.
+
+    Returns:
+        List of worker dicts, most recent heartbeat first
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        settings = get_settings()
+
+        cursor.execute(f"""
+            SELECT w.Worker_ID, w.Host_Name, w.Process_ID, w.Status, w.Started_At, w.Last_Heartbeat,
+                   w.Processed, w.Successful, w.Failed,
+                   (SELECT COUNT(*) FROM {settings.EMAIL_TABLE} e WHERE e.Lease_Owner = w.Worker_ID) AS Leases,
+                   DATEDIFF(second, w.Last_Heartbeat, GETUTCDATE()) AS Heartbeat_Age
+            FROM {WORKERS_TABLE} w
+            ORDER BY w.Last_Heartbeat DESC
+        """)
+
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Error loading automation workers: {str(e)}")
+        return []
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def get_run_control() -> Optional[Dict[str, Any]]:
+    """
+    Get the run requested by the API.
+
+    Returns:
+        Dict with Run_ID, Run_State, Template_ID and Updated_At, or None if
+        it cannot be read
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT Run_ID, Run_State, Template_ID, Updated_At FROM {CONTROL_TABLE} WHERE Control_ID = 1")
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return dict(zip(("Run_ID", "Run_State", "Template_ID", "Updated_At"), row))
+    except Exception as e:
+        logger.error(f"Error reading automation run control: {str(e)}")
+        return None
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+def set_run_control(run_id: Optional[str], run_state: str, template_id: Optional[str] = None,
+                    expected_run_id: Optional[str] = None) -> bool:
+    """
+    Request a run state from the workers.
+
+    Args:
+        run_id: ID of the run
+        run_state: RUN_REQUESTED, RUN_STOP_REQUESTED, RUN_DONE or RUN_IDLE
+        template_id: Template for the run
+        expected_run_id: Only update if this run is the current one
+
+    Returns:
+        bool: True if the control row was updated
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        query = f"""
+            UPDATE {CONTROL_TABLE}
+            SET Run_ID = ?, Run_State = ?, Template_ID = ?, Updated_At = GETUTCDATE()
+            WHERE Control_ID = 1
+        """
+        params = [run_id, run_state, template_id]
+        if expected_run_id is not None:
+            query += " AND Run_ID = ?"
+            params.append(expected_run_id)
+
+        cursor.execute(query, params)
+        conn.commit()
+        return cursor.rowcount > 0
+    except Exception as e:
+        logger.error(f"Error updating automation run control: {str(e)}")
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
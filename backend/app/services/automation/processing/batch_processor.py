@@ -16,10 +16,9 @@ def _update_summary():
         
         automation_state = get_automation_state()
         
-        # Always update all counts from the database for accuracy
-        automation_state["summary"]["pending"] = summary["Pending"]
-        automation_state["summary"]["successful"] = summary["Success"]
-        automation_state["summary"]["failed"] = summary["Failed"]
+        # Take the counts from the database; during a run only the pending
+        # count, so the run's own counters are kept
+        automation_state.apply_totals(summary["Pending"], summary["Success"], summary["Failed"])
             
     except Exception as e:
         # Just log at debug level since this is called frequently by polling
@@ -6,21 +6,39 @@ including template processing, validation, sending, and status updates.
 It runs in a separate thread to avoid blocking the main application.
 """
 
+import os
 import logging
 import queue
+import time
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 
+from ....core.config import get_settings
 from ....models.email import EmailStatus
 from ....services.email import EmailSender
-from ....services.templates import get_template_by_id
-from ....utils.email_logger import email_logger
-from ..core.state_manager import get_automation_state
+from ....services.email.core.email_sender import PendingDriveSend
+from ....services.email.core.manifest_cache import get_manifest_size_cache
+from ....services.email.gdrive.gdrive_integration import GDRIVE_UPLOAD_THRESHOLD, SAFE_MAX_SIZE
+from ....services.email.gdrive.upload_pool import get_drive_upload_pool
+from ....services.templates import get_template_by_id, get_compiled_template, build_placeholder_values, CompiledTemplate
+from ....utils.email_logger import email_logger, LogEvent
+from ....utils.stage_timing import (
+    StageTimer, StageHistogram, start_run_timings,
+    STAGE_DB_STATUS_CHECK, STAGE_TEMPLATE_RENDER, STAGE_MAPPING_VALIDATION, STAGE_DB_UPDATE
+)
+from ..core.state_manager import get_automation_state, publish_status
+from ..core.run_history import format_id_ranges
+from ..core.run_queue import (
+    RUN_COMPLETED, RUN_STOPPED, RUN_ERROR,
+    OUTCOME_SENT, OUTCOME_FAILED, OUTCOME_SKIPPED, OUTCOME_HANDED_OFF
+)
 from ..core.settings_manager import _get_smtp_settings
 from ..database.email_repository import _check_email_status
-from ..templates.template_manager import _load_default_template
+from ..templates.template_manager import _get_default_compiled_template
 from ..validation.mapping_validator import _validate_recipient_mapping
+from ..scheduling.retry_scheduler import record_failure, record_success
 from .batch_processor import _update_summary
+from .link_later import get_link_later_service, link_later_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -29,33 +47,29 @@ def _process_email_queue():
     """Process the email queue in a separate thread"""
     automation_state = get_automation_state()
     
-    # Determine if this is a restart process or normal process
-    is_restart = automation_state["status"] == "restarting"
+    # Determine if this is a restart process or normal process, and reset
+    # the summary and processed emails tracking
+    is_restart = automation_state.start_processing()
     process_emoji = "🔄" if is_restart else "🚀"
     
-    automation_state["status"] = "running"
-    automation_state["start_time"] = datetime.now()
+    # Get the process_id and journaled queue from the automation state
+    process_id = automation_state.process_id
+    email_queue = automation_state.email_queue
+    summary = automation_state.summary
     
-    # Get the process_id from the automation state
-    process_id = automation_state.get("process_id")
+    # Per-stage timing histogram for this run
+    run_timings = start_run_timings(process_id or automation_state.start_time.strftime("%Y%m%d_%H%M%S"))
+    publish_status()
     
-    # Reset summary
-    automation_state["summary"] = {
-        "processed": 0,
-        "successful": 0,
-        "failed": 0,
-        "pending": 0
-    }
-    
-    # Initialize processed emails tracking
-    automation_state["processed_emails"] = []
-    
-    # Get template
-    template = None
-    template_id = automation_state["settings"]["template_id"]
+    # Get template, compiled once for the run
+    compiled_template = None
+    run_settings = automation_state.get_settings()
+    template_id = automation_state.run_template_id or run_settings["template_id"]
     if template_id:
         try:
             template = get_template_by_id(template_id)
+            if template:
+                compiled_template = get_compiled_template(template["file_path"])
         except Exception as e:
             logger.warning(f"Could not find template with ID {template_id}, using default template: {str(e)}")
             
@@ -71,8 +85,9 @@ def _process_email_queue():
         if process_id:
             email_logger.end_process(process_id, "error", error_msg)
             
-        automation_state["status"] = "error"
-        automation_state["last_run"] = datetime.now()
+        email_queue.finish(RUN_ERROR)
+        automation_state.finish_run(error=True)
+        publish_status()
         return
 
     try:
@@ -89,25 +104,64 @@ def _process_email_queue():
         # Create the default sender email (from username if not specified)
         sender_email = smtp_settings["sender_email"] or smtp_settings["username"]
         
+        # Large attachments are uploaded to Google Drive by the upload pool;
+        # their emails wait here until the link is ready
+        upload_pool = get_drive_upload_pool()
+        deferred_sends = []
+        
+        # Optionally hand emails too large to attach to the link-later service,
+        # which sends them once their upload is done without holding up the run
+        link_later = get_link_later_service()
+        use_link_later = link_later_enabled()
+        
+        # Emails identical apart from their recipient can go out as one message,
+        # and several emails of one recipient as one digest
+        group_max_recipients = get_settings().AUTOMATION_GROUP_MAX_RECIPIENTS
+        digest_max_emails = get_settings().AUTOMATION_DIGEST_MAX_EMAILS
+        # Emails of a failed digest, sent on their own instead
+        single_send_ids = set()
+        
         # Process emails while queue is not empty and not stopped
-        while not automation_state["stop_requested"] and not automation_state["email_queue"].empty():
+        while not automation_state.stop_requested:
+            deferred_sends = _finish_deferred_sends(email_sender, deferred_sends, run_timings,
+                                                    process_id, process_emoji, wait=False)
+            try:
+                # Get next email from queue
+                email_record = email_queue.get()
+            except queue.Empty:
+                break
+            
             try:
-                # Get next email from queue with a timeout
-                email_record = automation_state["email_queue"].get(timeout=1)
+                timer = StageTimer()
+                
+                # Skip emails already waiting for their Drive link from an earlier run
+                if link_later.is_waiting(email_record["Email_ID"]):
+                    email_logger.log_info(
+                        f"Skipping email ID {email_record['Email_ID']} - waiting for its Google Drive upload",
+                        email_id=email_record["Email_ID"],
+                        process_id=process_id,
+                        event=LogEvent.PROCESS
+                    )
+                    email_queue.task_done(email_record["Email_ID"], OUTCOME_SKIPPED,
+                                          "Waiting for its Google Drive upload")
+                    continue
                 
                 # Check if email is still pending (race condition check)
-                is_pending, current_status = _check_email_status(email_record["Email_ID"])
+                with timer.stage(STAGE_DB_STATUS_CHECK):
+                    is_pending, current_status = _check_email_status(email_record["Email_ID"])
                 if not is_pending:
                     # Log with process_id
                     email_logger.log_info(
                         f"Skipping email ID {email_record['Email_ID']} - " +
                         f"Status changed from Pending to {current_status} (race condition prevention)",
                         email_id=email_record["Email_ID"],
-                        process_id=process_id
+                        process_id=process_id,
+                        event=LogEvent.PROCESS
                     )
                     
                     # Mark task as done and continue to next email
-                    automation_state["email_queue"].task_done()
+                    email_queue.task_done(email_record["Email_ID"], OUTCOME_SKIPPED,
+                                          f"Status changed to {current_status}")
                     continue
                 
                 # Log with process_id and consistent emoji
@@ -116,49 +170,25 @@ def _process_email_queue():
                     email_id=email_record["Email_ID"],
                     recipient=email_record["Email"],
                     subject=email_record["Subject"],
-                    process_id=process_id
+                    process_id=process_id,
+                    event=LogEvent.EMAIL_PROCESSING
                 )
                 
                 # Update processed count
-                automation_state["summary"]["processed"] += 1
+                summary.increment("processed")
+                email_started = time.monotonic()
                 
                 # Generate email body from template if available
-                email_body = _load_default_template()  # Start with default template from file
-                
-                if template:
-                    try:
-                        # Enhanced template processing with more placeholders
-                        placeholders = {
-                            "{{company_name}}": email_record.get("Company_Name", ""),
-                            "{{recipient}}": email_record.get("Email", ""),
-                            "{{subject}}": email_record.get("Subject", ""),
-                            "{{date}}": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "{{file_path}}": email_record.get("File_Path", "")
-                        }
-                        
-                        template_body = template['body_template']
-                        for placeholder, value in placeholders.items():
-                            template_body = template_body.replace(placeholder, str(value))
-                        
-                        # Only override default template if the SQL template is valid
-                        if template_body and len(template_body.strip()) > 0:
-                            email_body = template_body
-                            email_logger.log_info(f"Using template ID {template_id} for email ID {email_record['Email_ID']}")
-                        else:
-                            email_logger.log_info(f"Template ID {template_id} body was empty, using default file template")
-                    except Exception as e:
-                        error_msg = f"Error processing template: {str(e)}, using default file template"
-                        logger.error(error_msg)
-                        email_logger.log_error(error_msg)
-                else:
-                    email_logger.log_info(f"Using default file template for email ID {email_record['Email_ID']}")
+                with timer.stage(STAGE_TEMPLATE_RENDER):
+                    email_body = _render_email_body(email_record, compiled_template, template_id)
                 
                 # Validate recipient mapping before sending
-                is_valid, error_reason = _validate_recipient_mapping(
-                    email_record["Email_ID"],
-                    email_record["Email"],
-                    email_record["File_Path"]
-                )
+                with timer.stage(STAGE_MAPPING_VALIDATION):
+                    is_valid, error_reason = _validate_recipient_mapping(
+                        email_record["Email_ID"],
+                        email_record["Email"],
+                        email_record["File_Path"]
+                    )
                 
                 if not is_valid:
                     error_message = f"ERROR: {error_reason}"
@@ -176,21 +206,48 @@ def _process_email_queue():
                     email_logger.log_info(
                         f"Email processing failed - ID: {email_record['Email_ID']}, "
                         f"To: {email_record['Email']}, Subject: {email_record['Subject']}, "
-                        f"Status: Failed, Reason: {error_message}"
+                        f"Status: Failed, Reason: {error_message}",
+                        email_id=email_record["Email_ID"],
+                        process_id=process_id,
+                        event=LogEvent.SEND_FAILED
                     )
                     
+                    # Not retried; clears any retry scheduled earlier
+                    record_failure(email_record["Email_ID"], error_message)
+                    
                     # Mark task as done and continue to next email
-                    automation_state["email_queue"].task_done()
-                    automation_state["summary"]["failed"] += 1
+                    email_queue.task_done(email_record["Email_ID"], OUTCOME_FAILED, error_message)
+                    summary.increment("failed")
+                    publish_status()
                     continue
                 
-                # Get the sharing options from the automation state
-                sharing_option = automation_state["settings"].get("sharing_option", "anyone")
-                specific_emails = automation_state["settings"].get("specific_emails", [])
+                # Merge this recipient's other queued emails into one digest
+                if digest_max_emails > 1 and email_record["Email_ID"] not in single_send_ids:
+                    digest_records = _claim_digest_records(email_record, digest_max_emails - 1,
+                                                           compiled_template, template_id, timer,
+                                                           single_send_ids)
+                    if digest_records and _send_digest(email_sender, [(email_record, email_body)] + digest_records,
+                                                       sender_email, timer, email_started, run_timings,
+                                                       process_id, process_emoji, single_send_ids):
+                        continue
+                
+                # Send queued emails with the same content in the same message
+                if group_max_recipients > 1:
+                    companions = _claim_email_group(email_record, email_body, group_max_recipients - 1,
+                                                    compiled_template, template_id, timer)
+                    if companions and _send_email_group(email_sender, [email_record] + companions, email_body,
+                                                        sender_email, timer, email_started, run_timings,
+                                                        process_id, process_emoji):
+                        continue
+                
+                # Get the sharing options from the automation settings
+                sharing_option = run_settings.get("sharing_option", "anyone")
+                specific_emails = run_settings.get("specific_emails", [])
                 
                 # Send email using smart attachment logic
                 # This will decide between direct file attachment and ZIP compression
                 # based on the configured file count threshold and allowed extensions
+                email_queue.mark_sending(email_record["Email_ID"])
                 success, reason = email_sender.send_email_smart(
                     recipient=email_record["Email"],
                     subject=email_record["Subject"],
@@ -200,135 +257,116 @@ def _process_email_queue():
                     email_id=email_record["Email_ID"],
                     gdrive_share_type=sharing_option,
                     specific_emails=specific_emails,
-                    use_smart_attachment=True  # Enable smart attachment logic
+                    use_smart_attachment=True,  # Enable smart attachment logic
+                    timer=timer,
+                    upload_pool=upload_pool
                 )
                 
-                # Update status based on result
-                new_status = EmailStatus.SUCCESS if success else EmailStatus.FAILED
-                current_time = datetime.now()
-                
-                # Update the database with current timestamp
-                if success:
-                    # For success, update both Email_Send_Date and Date columns
-                    from ....services.email import update_email_status as update_status
-                    update_status(
-                        email_id=email_record["Email_ID"],
-                        status=new_status.value,
-                        reason=reason or "Email sent successfully",
-                        send_date=current_time,
-                        date=current_time
-                    )
-                    automation_state["summary"]["successful"] += 1
-                else:
-                    from ....services.email import update_email_status as update_status
-                    update_status(
-                        email_id=email_record["Email_ID"],
-                        status=new_status.value,
-                        reason=reason or "Failed to send email",
-                        send_date=current_time,
-                        date=current_time
-                    )
-                    automation_state["summary"]["failed"] += 1
-                
-                # Log the transaction with process_id
-                email_logger.log_email_transaction(
-                    email_id=email_record["Email_ID"],
-                    email=email_record["Email"],
-                    subject=email_record["Subject"],
-                    status=new_status.value,
-                    reason=reason,
-                    process_id=process_id
-                )
+                if isinstance(reason, PendingDriveSend):
+                    # Only the upload was started; nothing has been sent yet
+                    email_queue.mark_uploading(email_record["Email_ID"])
                 
-                # Add detailed log for both success and failures with the process emoji
-                if success:
+                if isinstance(reason, PendingDriveSend) and use_link_later and reason.total_size > SAFE_MAX_SIZE:
+                    # Too large to attach: the record stays Pending and is sent
+                    # with its link by the link-later service
+                    link_later.submit(email_record, reason, process_id, sender_email,
+                                      sharing_option, specific_emails)
                     email_logger.log_info(
-                        f"{process_emoji} ✅ Email ID {email_record['Email_ID']} to {email_record['Email']} SENT SUCCESSFULLY",
-                        email_id=email_record["Email_ID"],
-                        recipient=email_record["Email"],
-                        subject=email_record["Subject"],
-                        process_id=process_id
-                    )
-                else:
-                    email_logger.log_error(
-                        f"{process_emoji} ❌ Email ID {email_record['Email_ID']} to {email_record['Email']} FAILED: {reason}",
+                        f"{process_emoji} ⏳ Email ID {email_record['Email_ID']} to {email_record['Email']} "
+                        f"will be sent once its Google Drive upload finishes",
                         email_id=email_record["Email_ID"],
                         recipient=email_record["Email"],
                         subject=email_record["Subject"],
-                        process_id=process_id
+                        process_id=process_id,
+                        event=LogEvent.GDRIVE
                     )
+                    email_queue.task_done(email_record["Email_ID"], OUTCOME_HANDED_OFF,
+                                          "Sent by the link-later service")
+                    publish_status()
+                    continue
                 
-                # Track this email in processed emails list with success status
-                processed_email = email_record.copy()
-                processed_email["success"] = success
-                processed_email["reason"] = reason
-                processed_email["process_time"] = datetime.now()
-                automation_state["processed_emails"].append(processed_email)
+                if isinstance(reason, PendingDriveSend):
+                    # Attachment is uploading in the background; keep sending
+                    # other emails and complete this one when its link is ready
+                    deferred_sends.append((email_record, reason, email_started))
+                    continue
                 
-                # Mark task as done in queue
-                automation_state["email_queue"].task_done()
+                _complete_email(email_record, success, reason, timer, email_started,
+                                run_timings, process_id, process_emoji)
                 
-            except queue.Empty:
-                # Queue is empty, continue to next loop iteration
-                continue
             except Exception as e:
                 # Log the error with process_id and consistent emoji
                 email_logger.log_error(
                     f"{process_emoji} Error processing email: {str(e)}",
                     email_id=email_record.get("Email_ID"),
-                    process_id=process_id
+                    process_id=process_id,
+                    event=LogEvent.PROCESS
                 )
-                # Continue with next email
+                # Close the email in the journal so the run is not left with it
+                # claimed; its database record is picked up by a later run
+                email_queue.abandon(email_record["Email_ID"], f"ERROR: {str(e)}")
                 continue
         
-        # All emails processed - update status and end the process
-        automation_state["status"] = "idle"
-        automation_state["last_run"] = datetime.now()
-        automation_state["is_running"] = False
-        automation_state["stop_requested"] = False
+        # Send the emails still waiting for their Google Drive uploads
+        _finish_deferred_sends(email_sender, deferred_sends, run_timings,
+                               process_id, process_emoji, wait=True)
+        
+        # Close the journaled run; a stopped run is not resumed either
+        email_queue.finish(RUN_STOPPED if automation_state.stop_requested else RUN_COMPLETED)
+        
+        # All emails processed - take the run's figures before the state is
+        # released to the next run, then update status and end the process
+        counts = summary.snapshot()
+        history = automation_state.history
+        start_time = automation_state.start_time
+        automation_state.finish_run()
+        publish_status()
         
         # End the process with success if a process_id exists
         if process_id:
-            summary = automation_state["summary"]
-            total_time = datetime.now() - automation_state["start_time"]
+            total_time = datetime.now() - start_time
             total_seconds = total_time.total_seconds()
             
-            # Track email IDs for summary
-            successful_emails = []
-            failed_emails = []
-            
-            # Collect email IDs from the queue history
-            for email_record in automation_state.get("processed_emails", []):
-                if email_record.get("success"):
-                    successful_emails.append(email_record.get("Email_ID"))
-                else:
-                    failed_emails.append(email_record.get("Email_ID"))
+            # Email IDs for summary, from the run history
+            successful_emails = history.successful_ids()
+            failed_emails = history.failed_ids()
             
             # Add detailed statistics to the log with consistent emoji
             email_logger.log_info(
                 f"{process_emoji} Email processing statistics: " +
-                f"{summary['successful']} successful, {summary['failed']} failed out of {summary['processed']} emails - " +
+                f"{counts['successful']} successful, {counts['failed']} failed out of {counts['processed']} emails - " +
                 f"Processing time: {total_seconds:.2f}s (Elapsed: {total_seconds:.2f}s)",
-                process_id=process_id
+                process_id=process_id,
+                event=LogEvent.PROCESS
             )
             
+            # Log per-stage latency percentiles for the run
+            if run_timings.summary():
+                email_logger.log_info(
+                    f"{process_emoji} Stage timings: {run_timings.format_summary()}",
+                    process_id=process_id,
+                    event=LogEvent.PROCESS
+                )
+            
             # Log successful email IDs if any
             if successful_emails:
                 email_logger.log_info(
-                    f"{process_emoji} ✅ Successfully sent emails with IDs: {', '.join(map(str, successful_emails))}",
-                    process_id=process_id
+                    f"{process_emoji} ✅ Successfully sent emails with IDs: {format_id_ranges(successful_emails)}",
+                    process_id=process_id,
+                    event=LogEvent.PROCESS
                 )
             
             # Log failed email IDs if any
             if failed_emails:
                 email_logger.log_warning(
-                    f"{process_emoji} ❌ Failed to send emails with IDs: {', '.join(map(str, failed_emails))}",
-                    process_id=process_id
+                    f"{process_emoji} ❌ Failed to send emails with IDs: {format_id_ranges(failed_emails)}",
+                    process_id=process_id,
+                    event=LogEvent.PROCESS
                 )
             
             # End the process with a summary description
-            description = (f"Processed {summary['processed']} emails: " +
-                          f"{summary['successful']} successful, {summary['failed']} failed")
+            description = (f"Processed {counts['processed']} emails: " +
+                          f"{counts['successful']} successful, {counts['failed']} failed")
             email_logger.end_process(process_id, "success", description)
         
         # Update pending count after finishing
@@ -341,7 +379,458 @@ def _process_email_queue():
         if process_id:
             email_logger.end_process(process_id, "error", error_msg)
             
-        automation_state["status"] = "error"
-        automation_state["last_run"] = datetime.now()
-        automation_state["is_running"] = False
-        automation_state["stop_requested"] = False
+        email_queue.finish(RUN_ERROR)
+        automation_state.finish_run(error=True)
+        publish_status()
+
+
+def _render_email_body(email_record: dict, compiled_template: Optional[CompiledTemplate],
+                       template_id: Optional[str]) -> str:
+    """
+    Render the body of one email.
+    
+    The selected template is used when it renders to a non-empty body,
+    otherwise the default file template. Any column of the email record can
+    be used as a {{placeholder}}.
+    
+    Args:
+        email_record: The queued email record
+        compiled_template: Compiled template selected for the run, if any
+        template_id: ID of the selected template
+        
+    Returns:
+        str: The rendered HTML body
+    """
+    values = build_placeholder_values(email_record)
+    
+    if compiled_template:
+        try:
+            template_body = compiled_template.render(values)
+            
+            # Only override default template if the SQL template is valid
+            if template_body and len(template_body.strip()) > 0:
+                email_logger.log_info(f"Using template ID {template_id} for email ID {email_record['Email_ID']}", event=LogEvent.TEMPLATE)
+                return template_body
+            email_logger.log_info(f"Template ID {template_id} body was empty, using default file template", event=LogEvent.TEMPLATE)
+        except Exception as e:
+            error_msg = f"Error processing template: {str(e)}, using default file template"
+            logger.error(error_msg)
+            email_logger.log_error(error_msg, event=LogEvent.TEMPLATE)
+    else:
+        email_logger.log_info(f"Using default file template for email ID {email_record['Email_ID']}", event=LogEvent.TEMPLATE)
+    
+    default_template = _get_default_compiled_template()
+    return default_template.render(values) if default_template else ""
+
+
+def _claim_email_group(email_record: dict, email_body: str, limit: int,
+                       compiled_template: Optional[CompiledTemplate], template_id: Optional[str],
+                       timer: StageTimer) -> List[dict]:
+    """
+    Claim the queued emails that can be sent in one message with an email.
+    
+    Candidates share the email's attachment folder and subject; those whose
+    body renders differently, that repeat a recipient of the group or that
+    fail validation are returned to the queue and sent on their own. Emails
+    needing a Google Drive upload are never grouped.
+    
+    Args:
+        email_record: The email leading the group, already validated
+        email_body: Its rendered body
+        limit: Most emails to add to the group
+        compiled_template: Compiled template selected for the run, if any
+        template_id: ID of the selected template
+        timer: Stage timer of the group
+        
+    Returns:
+        List[dict]: The claimed email records, counted as processed
+    """
+    if get_manifest_size_cache().get_size(email_record["File_Path"]) > GDRIVE_UPLOAD_THRESHOLD:
+        return []
+    
+    automation_state = get_automation_state()
+    email_queue = automation_state.email_queue
+    link_later = get_link_later_service()
+    recipients = {(email_record["Email"] or "").strip().lower()}
+    companions = []
+    
+    for record in email_queue.claim_group(email_record, limit):
+        email_id = record["Email_ID"]
+        with timer.stage(STAGE_DB_STATUS_CHECK):
+            is_pending, current_status = _check_email_status(email_id)
+        if not is_pending:
+            email_queue.task_done(email_id, OUTCOME_SKIPPED, f"Status changed to {current_status}")
+            continue
+        
+        recipient = (record["Email"] or "").strip().lower()
+        if recipient in recipients or link_later.is_waiting(email_id):
+            email_queue.requeue(email_id)
+            continue
+        with timer.stage(STAGE_TEMPLATE_RENDER):
+            body = _render_email_body(record, compiled_template, template_id)
+        if body != email_body:
+            email_queue.requeue(email_id)
+            continue
+        with timer.stage(STAGE_MAPPING_VALIDATION):
+            is_valid, _ = _validate_recipient_mapping(email_id, record["Email"], record["File_Path"])
+        if not is_valid:
+            # Failed on its own, with its reason
+            email_queue.requeue(email_id)
+            continue
+        
+        recipients.add(recipient)
+        companions.append(record)
+    
+    automation_state.summary.increment("processed", len(companions))
+    return companions
+
+
+def _send_email_group(email_sender: EmailSender, email_records: List[dict], email_body: str,
+                      sender_email: str, timer: StageTimer, email_started: float,
+                      run_timings: StageHistogram, process_id: Optional[str], process_emoji: str) -> bool:
+    """
+    Send a group of emails as one message and record each one's result.
+    
+    Args:
+        email_sender: Sender of the run
+        email_records: The emails of the group, the leading one first
+        email_body: Their rendered body
+        sender_email: Sender address
+        timer: Stage timer of the group
+        email_started: time.monotonic() when processing of the group started
+        run_timings: Timing histogram of the current run
+        process_id: ID of the current automation process
+        process_emoji: Emoji prefix used for this run's log lines
+        
+    Returns:
+        bool: False if the group could not be sent as one message; the other
+            emails are back in the queue and the leading one is left to the caller
+    """
+    automation_state = get_automation_state()
+    email_queue = automation_state.email_queue
+    leader = email_records[0]
+    
+    for record in email_records:
+        email_queue.mark_sending(record["Email_ID"])
+    email_logger.log_info(
+        f"{process_emoji} 📨 Sending email IDs {format_id_ranges(sorted(r['Email_ID'] for r in email_records))} "
+        f"as one message to {len(email_records)} recipients",
+        email_id=leader["Email_ID"],
+        subject=leader["Subject"],
+        process_id=process_id,
+        event=LogEvent.EMAIL_PROCESSING
+    )
+    
+    results = email_sender.send_email_to_group(
+        recipients=[record["Email"] for record in email_records],
+        subject=leader["Subject"],
+        body=email_body,
+        folder_path=leader["File_Path"],
+        sender=sender_email,
+        email_ids=[record["Email_ID"] for record in email_records],
+        timer=timer
+    )
+    if results is None:
+        # The attachments need Google Drive or splitting: send one at a time
+        for record in email_records[1:]:
+            email_queue.requeue(record["Email_ID"])
+        automation_state.summary.increment("processed", 1 - len(email_records))
+        return False
+    
+    for record, (success, reason) in zip(email_records, results):
+        _complete_email(record, success, reason, timer, email_started,
+                        run_timings, process_id, process_emoji, record_timings=False)
+    # One message was sent, so the group is one sample of the histogram
+    run_timings.add(timer.timings, total=time.monotonic() - email_started)
+    return True
+
+
+def _claim_digest_records(email_record: dict, limit: int,
+                          compiled_template: Optional[CompiledTemplate], template_id: Optional[str],
+                          timer: StageTimer, single_send_ids: set) -> List[Tuple[dict, str]]:
+    """
+    Claim the recipient's other queued emails to merge into a digest with an email.
+    
+    Emails are added while their attachment folders fit in one archive below
+    the Google Drive threshold; the rest, and emails with missing or empty
+    folders, that fail validation or that were in a failed digest, are
+    returned to the queue and sent on their own.
+    
+    Args:
+        email_record: The email leading the digest, already validated
+        limit: Most emails to add to the digest
+        compiled_template: Compiled template selected for the run, if any
+        template_id: ID of the selected template
+        timer: Stage timer of the digest
+        single_send_ids: IDs of the emails to send on their own
+        
+    Returns:
+        List of (email record, rendered body) claimed, counted as processed
+    """
+    size_cache = get_manifest_size_cache()
+    
+    def attachment_size(record: dict) -> Optional[int]:
+        """Size of a record's attachments, or None if its folder cannot be merged"""
+        if not record["File_Path"]:
+            return 0
+        if not os.path.isdir(record["File_Path"]):
+            return None
+        return size_cache.get_size(record["File_Path"]) or None
+    
+    leader_size = attachment_size(email_record)
+    if leader_size is None or leader_size > GDRIVE_UPLOAD_THRESHOLD:
+        return []
+    budget = GDRIVE_UPLOAD_THRESHOLD - leader_size
+    
+    automation_state = get_automation_state()
+    email_queue = automation_state.email_queue
+    link_later = get_link_later_service()
+    digest_records = []
+    
+    for record in email_queue.claim_recipient(email_record, limit):
+        email_id = record["Email_ID"]
+        with timer.stage(STAGE_DB_STATUS_CHECK):
+            is_pending, current_status = _check_email_status(email_id)
+        if not is_pending:
+            email_queue.task_done(email_id, OUTCOME_SKIPPED, f"Status changed to {current_status}")
+            continue
+        
+        size = attachment_size(record)
+        if size is None or size > budget or email_id in single_send_ids or link_later.is_waiting(email_id):
+            email_queue.requeue(email_id)
+            continue
+        with timer.stage(STAGE_MAPPING_VALIDATION):
+            is_valid, _ = _validate_recipient_mapping(email_id, record["Email"], record["File_Path"])
+        if not is_valid:
+            # Failed on its own, with its reason
+            email_queue.requeue(email_id)
+            continue
+        
+        with timer.stage(STAGE_TEMPLATE_RENDER):
+            body = _render_email_body(record, compiled_template, template_id)
+        budget -= size
+        digest_records.append((record, body))
+    
+    automation_state.summary.increment("processed", len(digest_records))
+    return digest_records
+
+
+def _send_digest(email_sender: EmailSender, digest_records: List[Tuple[dict, str]], sender_email: str,
+                 timer: StageTimer, email_started: float, run_timings: StageHistogram,
+                 process_id: Optional[str], process_emoji: str, single_send_ids: set) -> bool:
+    """
+    Send several emails of one recipient as one digest and record each one's result.
+    
+    The digest's subject is the first email's, followed by the number of
+    other emails; its body is the emails' bodies one after another. If the
+    digest fails, only the leading email is failed; the others go back to
+    the queue to be sent on their own.
+    
+    Args:
+        email_sender: Sender of the run
+        digest_records: List of (email record, rendered body), the leading one first
+        sender_email: Sender address
+        timer: Stage timer of the digest
+        email_started: time.monotonic() when processing of the digest started
+        run_timings: Timing histogram of the current run
+        process_id: ID of the current automation process
+        process_emoji: Emoji prefix used for this run's log lines
+        single_send_ids: IDs of the emails to send on their own; the other
+            emails of a failed digest are added
+        
+    Returns:
+        bool: False if the digest could not be built; the other emails are back
+            in the queue and the leading one is left to the caller
+    """
+    automation_state = get_automation_state()
+    email_queue = automation_state.email_queue
+    email_records = [record for record, _ in digest_records]
+    leader = email_records[0]
+    email_ids = [record["Email_ID"] for record in email_records]
+    
+    for email_id in email_ids:
+        email_queue.mark_sending(email_id)
+    email_logger.log_info(
+        f"{process_emoji} 📨 Sending email IDs {format_id_ranges(sorted(email_ids))} "
+        f"to {leader['Email']} as one digest",
+        email_id=leader["Email_ID"],
+        recipient=leader["Email"],
+        process_id=process_id,
+        event=LogEvent.EMAIL_PROCESSING
+    )
+    
+    result = email_sender.send_digest(
+        recipient=leader["Email"],
+        subject=f"{leader['Subject']} (+{len(email_records) - 1} more)",
+        body="<hr>".join(body for _, body in digest_records),
+        folders=[(f"{record['Email_ID']}_{os.path.basename(os.path.normpath(record['File_Path']))}",
+                  record["File_Path"])
+                 for record in email_records if record["File_Path"]],
+        sender=sender_email,
+        email_ids=email_ids,
+        timer=timer
+    )
+    if result is None:
+        # The combined archive is too large: send one at a time
+        for email_id in email_ids[1:]:
+            email_queue.requeue(email_id)
+        automation_state.summary.increment("processed", 1 - len(email_records))
+        return False
+    
+    success, reason = result
+    if not success:
+        # Not the other emails' failure: send them on their own
+        for email_id in email_ids[1:]:
+            email_queue.requeue(email_id)
+            single_send_ids.add(email_id)
+        automation_state.summary.increment("processed", 1 - len(email_records))
+        email_records = email_records[:1]
+    
+    for record in email_records:
+        _complete_email(record, success, reason, timer, email_started,
+                        run_timings, process_id, process_emoji, record_timings=False)
+    # One message was sent, so the digest is one sample of the histogram
+    run_timings.add(timer.timings, total=time.monotonic() - email_started)
+    return True
+
+
+def _complete_email(email_record: dict, success: bool, reason: Optional[str], timer: StageTimer,
+                    email_started: float, run_timings: StageHistogram,
+                    process_id: Optional[str], process_emoji: str, record_timings: bool = True):
+    """
+    Record the result of one send: update the database and summary, log the
+    transaction and mark the queue item done.
+    
+    Args:
+        email_record: The queued email record
+        success: Whether the email was sent
+        reason: Result message from the sender
+        timer: Stage timer of this email
+        email_started: time.monotonic() when processing of the email started
+        run_timings: Timing histogram of the current run
+        process_id: ID of the current automation process
+        process_emoji: Emoji prefix used for this run's log lines
+        record_timings: Add the timer's stages to the run's histogram; False
+            for emails sent together, whose shared timings are added once
+    """
+    automation_state = get_automation_state()
+    email_queue = automation_state.email_queue
+    
+    # Journal the outcome first, so a restart before the database update
+    # applies it instead of sending the email again
+    email_queue.record_result(email_record["Email_ID"], success, reason)
+    
+    # Update status based on result
+    new_status = EmailStatus.SUCCESS if success else EmailStatus.FAILED
+    current_time = datetime.now()
+    
+    # Update the database with current timestamp
+    with timer.stage(STAGE_DB_UPDATE):
+        if success:
+            # For success, update both Email_Send_Date and Date columns
+            from ....services.email import update_email_status as update_status
+            update_status(
+                email_id=email_record["Email_ID"],
+                status=new_status.value,
+                reason=reason or "Email sent successfully",
+                send_date=current_time,
+                date=current_time
+            )
+            automation_state.summary.increment("successful")
+        else:
+            from ....services.email import update_email_status as update_status
+            update_status(
+                email_id=email_record["Email_ID"],
+                status=new_status.value,
+                reason=reason or "Failed to send email",
+                send_date=current_time,
+                date=current_time
+            )
+            automation_state.summary.increment("failed")
+    
+    # Retry transient failures later; a sent email needs no more retries
+    if success:
+        record_success(email_record["Email_ID"])
+    else:
+        record_failure(email_record["Email_ID"], reason)
+    
+    if record_timings:
+        run_timings.add(timer.timings, total=time.monotonic() - email_started)
+    
+    # Log the transaction with process_id; the sender already logged the
+    # send's timings, so they are not recorded a second time
+    email_logger.log_email_transaction(
+        email_id=email_record["Email_ID"],
+        email=email_record["Email"],
+        subject=email_record["Subject"],
+        status=new_status.value,
+        reason=reason,
+        process_id=process_id
+    )
+    
+    # Add detailed log for both success and failures with the process emoji
+    if success:
+        email_logger.log_info(
+            f"{process_emoji} ✅ Email ID {email_record['Email_ID']} to {email_record['Email']} SENT SUCCESSFULLY",
+            email_id=email_record["Email_ID"],
+            recipient=email_record["Email"],
+            subject=email_record["Subject"],
+            process_id=process_id,
+            event=LogEvent.SEND_SUCCESS
+        )
+    else:
+        email_logger.log_error(
+            f"{process_emoji} ❌ Email ID {email_record['Email_ID']} to {email_record['Email']} FAILED: {reason}",
+            email_id=email_record["Email_ID"],
+            recipient=email_record["Email"],
+            subject=email_record["Subject"],
+            process_id=process_id,
+            event=LogEvent.SEND_FAILED
+        )
+    
+    # Track this email's outcome in the run history
+    automation_state.history.record(email_record, success, reason)
+    
+    # Mark task as done in queue
+    email_queue.task_done(email_record["Email_ID"], OUTCOME_SENT if success else OUTCOME_FAILED, reason)
+    publish_status()
+
+
+def _finish_deferred_sends(email_sender: EmailSender, deferred_sends: list, run_timings: StageHistogram,
+                           process_id: Optional[str], process_emoji: str, wait: bool) -> list:
+    """
+    Complete emails whose Google Drive uploads have finished.
+    
+    Args:
+        email_sender: Sender that queued the uploads
+        deferred_sends: List of (email_record, PendingDriveSend, email_started)
+        run_timings: Timing histogram of the current run
+        process_id: ID of the current automation process
+        process_emoji: Emoji prefix used for this run's log lines
+        wait: Block until every upload has finished instead of only
+            completing those that are already done
+        
+    Returns:
+        list: The deferred sends that are still waiting
+    """
+    still_waiting = []
+    for email_record, pending, email_started in deferred_sends:
+        if not wait and not pending.done():
+            still_waiting.append((email_record, pending, email_started))
+            continue
+        
+        try:
+            get_automation_state().email_queue.mark_sending(email_record["Email_ID"])
+            success, reason = email_sender.finish_deferred_send(pending)
+            _complete_email(email_record, success, reason, pending.timer, email_started,
+                            run_timings, process_id, process_emoji)
+        except Exception as e:
+            email_logger.log_error(
+                f"{process_emoji} Error processing email: {str(e)}",
+                email_id=email_record.get("Email_ID"),
+                process_id=process_id,
+                event=LogEvent.PROCESS
+            )
+            # Do not leave the email claimed as sending in the journal
+            get_automation_state().email_queue.abandon(email_record["Email_ID"], f"ERROR: {str(e)}")
+    return still_waiting
@@ -0,0 +1,460 @@
+"""
+"Link-later" sending of emails with oversized attachments.
+
+When LARGE_ATTACHMENT_LINK_LATER is enabled, an email whose archive is too
+large to attach is handed to this service once its Google Drive upload has
+been queued. The automation run moves on to the next email straight away;
+the record stays Pending in the database while it waits, and is sent with
+the Drive link by the service's follow-up worker when the upload and
+sharing have finished.
+
+Waiting emails are recorded in a small SQLite store so that uploads
+interrupted by a restart are queued again on startup (resumable sessions
+and the upload cache make the second attempt cheap).
+
+Link-later is not used with external workers: the store is shared by every
+process that opens it, and a worker's leased rows go back to the pool when
+its batch ends, so another run could send a waiting email a second time.
+Workers send oversized emails with their Drive link before moving on.
+"""
+
+import os
+import json
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ....core.config import get_settings
+from ....models.email import EmailStatus
+from ....services.email.core.attachment_manager import format_size
+from ....services.email.core.email_sender import EmailSender, PendingDriveSend
+from ....services.email.gdrive.upload_pool import get_drive_upload_pool
+from ....utils.email_logger import email_logger, LogEvent
+from ..core.settings_manager import _get_smtp_settings
+from ..core.state_manager import publish_status
+from ..database.email_repository import _check_email_status
+from .batch_processor import _update_summary
+
+logger = logging.getLogger(__name__)
+
+LINK_LATER_STORE_FILENAME = "link_later.db"
+
+# Job states
+JOB_UPLOADING = "uploading"
+JOB_SENT = "sent"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS link_later_jobs (
+    email_id INTEGER PRIMARY KEY,
+    process_id TEXT,
+    recipient TEXT NOT NULL,
+    subject TEXT,
+    body TEXT,
+    folder_path TEXT,
+    zip_path TEXT NOT NULL,
+    total_size INTEGER,
+    original_size INTEGER,
+    sender TEXT,
+    share_type TEXT,
+    specific_emails TEXT,
+    state TEXT NOT NULL,
+    reason TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_link_later_state ON link_later_jobs (state);
+"""
+
+_JOB_COLUMNS = (
+    "email_id", "process_id", "recipient", "subject", "body", "folder_path", "zip_path",
+    "total_size", "original_size", "sender", "share_type", "specific_emails"
+)
+
+
+class LinkLaterStore:
+    """Persistent record of emails waiting for their Drive upload, backed by SQLite (WAL)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store. The database is opened lazily on first use.
+
+        Args:
+            db_path: Path to the SQLite file. Defaults to LINK_LATER_STORE_PATH,
+                or link_later.db in LOG_DIR_PATH.
+        """
+        self._db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> str:
+        """Resolved path of the SQLite database file"""
+        if not self._db_path:
+            settings = get_settings()
+            self._db_path = os.path.abspath(settings.LINK_LATER_STORE_PATH or os.path.join(
+                settings.LOG_DIR_PATH, LINK_LATER_STORE_FILENAME
+            ))
+        return self._db_path
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller must hold the lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def add(self, job: Dict[str, Any]):
+        """Record (or replace) a job in the uploading state"""
+        now = datetime.now().isoformat()
+        values = [job.get(column) for column in _JOB_COLUMNS]
+        values[_JOB_COLUMNS.index("specific_emails")] = json.dumps(job.get("specific_emails") or [])
+        try:
+            with self._lock:
+                self._connection().execute(
+                    f"INSERT OR REPLACE INTO link_later_jobs ({', '.join(_JOB_COLUMNS)}, "
+                    f"state, reason, created_at, updated_at) "
+                    f"VALUES ({', '.join('?' * len(_JOB_COLUMNS))}, ?, NULL, ?, ?)",
+                    (*values, JOB_UPLOADING, now, now)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error writing link-later job: {str(e)}")
+
+    def finish(self, email_id: int, state: str, reason: Optional[str] = None):
+        """Move a job to a final state"""
+        try:
+            with self._lock:
+                self._connection().execute(
+                    "UPDATE link_later_jobs SET state = ?, reason = ?, updated_at = ? WHERE email_id = ?",
+                    (state, reason, datetime.now().isoformat(), email_id)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating link-later job: {str(e)}")
+
+    def get_open_jobs(self) -> List[Dict[str, Any]]:
+        """Get the jobs still waiting for their upload, oldest first"""
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    f"SELECT {', '.join(_JOB_COLUMNS)} FROM link_later_jobs "
+                    f"WHERE state = ? ORDER BY created_at",
+                    (JOB_UPLOADING,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading link-later jobs: {str(e)}")
+            return []
+
+        jobs = []
+        for row in rows:
+            job = dict(zip(_JOB_COLUMNS, row))
+            job["specific_emails"] = json.loads(job["specific_emails"] or "[]")
+            jobs.append(job)
+        return jobs
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class LinkLaterService:
+    """Sends emails with oversized attachments once their Drive upload has finished"""
+
+    def __init__(self, store: Optional[LinkLaterStore] = None):
+        self.store = store or LinkLaterStore()
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Tuple[PendingDriveSend, Dict[str, Any]]] = {}
+        self._ready: "queue.Queue[int]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._email_sender: Optional[EmailSender] = None
+        self._recovered = False
+
+    def start(self):
+        """Start the follow-up worker and re-queue jobs interrupted by a restart"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._worker_loop, daemon=True, name="link-later")
+            self._thread.start()
+            recover = not self._recovered
+            self._recovered = True
+
+        if recover:
+            self._recover()
+
+    def stop(self):
+        """Signal the follow-up worker to stop; waiting jobs are recovered on next start"""
+        self._stop.set()
+
+    def is_waiting(self, email_id: int) -> bool:
+        """Whether an email is waiting for its Drive upload in this service"""
+        with self._lock:
+            return email_id in self._pending
+
+    def waiting_count(self) -> int:
+        """Number of emails currently waiting for their Drive upload"""
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, email_record: Dict[str, Any], pending: PendingDriveSend,
+               process_id: Optional[str], sender: Optional[str], share_type: str,
+               specific_emails: Optional[List[str]]):
+        """
+        Take over an email whose Drive upload has been queued.
+
+        Args:
+            email_record: The queued email record
+            pending: Pending send returned by EmailSender.send_email_smart
+            process_id: ID of the automation process that queued the email
+            sender: Sender address used for the email
+            share_type: Google Drive sharing type
+            specific_emails: Emails to grant access when sharing with specific people
+        """
+        job = {
+            "email_id": email_record["Email_ID"],
+            "process_id": process_id,
+            "recipient": pending.recipient,
+            "subject": pending.subject,
+            "body": pending.email_body,
+            "folder_path": pending.folder_path,
+            "zip_path": pending.zip_path,
+            "total_size": pending.total_size,
+            "original_size": pending.original_size,
+            "sender": sender,
+            "share_type": share_type,
+            "specific_emails": specific_emails
+        }
+        # Start (and recover earlier jobs) before recording this one
+        self.start()
+        self.store.add(job)
+        self._track(job, pending)
+
+    def _track(self, job: Dict[str, Any], pending: PendingDriveSend):
+        """Remember a pending send and wake the worker when its upload finishes"""
+        email_id = job["email_id"]
+        with self._lock:
+            self._pending[email_id] = (pending, job)
+        pending.future.add_done_callback(lambda _: self._ready.put(email_id))
+
+    def _get_email_sender(self) -> EmailSender:
+        """Create the sender used for follow-up sends on first use"""
+        if self._email_sender is None:
+            smtp_settings = _get_smtp_settings()
+            self._email_sender = EmailSender(
+                smtp_server=smtp_settings["smtp_server"],
+                port=smtp_settings["port"],
+                username=smtp_settings["username"],
+                password=smtp_settings["password"],
+                use_tls=smtp_settings["use_tls"],
+                archive_path=smtp_settings["archive_path"]
+            )
+        return self._email_sender
+
+    def _worker_loop(self):
+        """Send each email as soon as its upload has finished"""
+        while not self._stop.is_set():
+            try:
+                email_id = self._ready.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                pending, job = self._pending.get(email_id, (None, None))
+            if pending is None:
+                continue
+
+            try:
+                self._complete(pending, job)
+            except Exception as e:
+                logger.error(f"Error completing link-later email {email_id}: {str(e)}")
+                self.store.finish(email_id, JOB_FAILED, str(e))
+            finally:
+                with self._lock:
+                    self._pending.pop(email_id, None)
+
+    def _complete(self, pending: PendingDriveSend, job: Dict[str, Any]):
+        """Send one email with its Drive link and record the result"""
+        email_id = job["email_id"]
+        process_id = job["process_id"]
+
+        # The record may have been changed while the upload was running
+        is_pending, current_status = _check_email_status(email_id)
+        if not is_pending:
+            email_logger.log_info(
+                f"Skipping link-later email ID {email_id} - Status changed from Pending to {current_status}",
+                email_id=email_id,
+                process_id=process_id,
+                event=LogEvent.PROCESS
+            )
+            self.store.finish(email_id, JOB_CANCELLED, f"Status changed to {current_status}")
+            return
+
+        upload_error = None
+        if pending.future.exception() is None:
+            upload_success, _, upload_message, _ = pending.future.result()
+            if not upload_success:
+                upload_error = upload_message or "unknown error"
+
+        split_result = None
+        if upload_error:
+            # Too large to attach the archive; try sending the files in parts
+            split_result = self._get_email_sender().send_in_parts(
+                pending.recipient, pending.subject, pending.email_body, pending.folder_path,
+                job["sender"], email_id, pending.original_size, pending.timer
+            )
+
+        if split_result:
+            success, reason = split_result
+        elif upload_error:
+            success = False
+            reason = (f"ERROR: Attachment too large ({format_size(pending.total_size)}) "
+                      f"and Google Drive upload failed: {upload_error}")
+            email_logger.log_email_transaction(
+                email_id=email_id,
+                email=pending.recipient,
+                subject=pending.subject,
+                file_path=pending.folder_path,
+                status="Failed",
+                reason=reason,
+                process_id=process_id
+            )
+        else:
+            success, reason = self._get_email_sender().finish_deferred_send(pending)
+
+        current_time = datetime.now()
+        from ....services.email import update_email_status as update_status
+        update_status(
+            email_id=email_id,
+            status=(EmailStatus.SUCCESS if success else EmailStatus.FAILED).value,
+            reason=reason,
+            send_date=current_time,
+            date=current_time
+        )
+        self.store.finish(email_id, JOB_SENT if success else JOB_FAILED, reason)
+
+        if success:
+            email_logger.log_info(
+                f"✅ Email ID {email_id} to {pending.recipient} SENT SUCCESSFULLY with its Google Drive link",
+                email_id=email_id,
+                recipient=pending.recipient,
+                subject=pending.subject,
+                process_id=process_id,
+                event=LogEvent.SEND_SUCCESS
+            )
+        else:
+            email_logger.log_error(
+                f"❌ Email ID {email_id} to {pending.recipient} FAILED: {reason}",
+                email_id=email_id,
+                recipient=pending.recipient,
+                subject=pending.subject,
+                process_id=process_id,
+                event=LogEvent.SEND_FAILED
+            )
+
+        _update_summary()
+        publish_status()
+
+    def _recover(self):
+        """Re-queue the uploads of jobs left waiting by a previous run of the service"""
+        jobs = self.store.get_open_jobs()
+        if not jobs:
+            return
+
+        try:
+            email_sender = self._get_email_sender()
+            upload_pool = get_drive_upload_pool()
+        except Exception as e:
+            logger.error(f"Cannot recover link-later emails: {str(e)}")
+            for job in jobs:
+                # Left Pending in the database, so the next run sends them again
+                self.store.finish(job["email_id"], JOB_CANCELLED, f"Not recovered: {str(e)}")
+            return
+
+        for job in jobs:
+            email_id = job["email_id"]
+            if not job["zip_path"] or not os.path.exists(job["zip_path"]):
+                self.store.finish(email_id, JOB_CANCELLED, "Archive no longer exists")
+                continue
+
+            try:
+                pending = email_sender.queue_drive_send(
+                    upload_pool, job["recipient"], job["subject"], job["body"] or "",
+                    job["folder_path"], job["zip_path"], job["total_size"], job["original_size"],
+                    sender=job["sender"], email_id=email_id,
+                    gdrive_share_type=job["share_type"] or "anyone",
+                    specific_emails=job["specific_emails"]
+                )
+            except Exception as e:
+                logger.error(f"Error re-queuing link-later email {email_id}: {str(e)}")
+                self.store.finish(email_id, JOB_CANCELLED, f"Not recovered: {str(e)}")
+                continue
+            self._track(job, pending)
+
+        email_logger.log_info(
+            f"Re-queued {len(jobs)} link-later email(s) waiting for Google Drive uploads",
+            event=LogEvent.GDRIVE
+        )
+
+
+_link_later_service: Optional[LinkLaterService] = None
+_service_lock = threading.Lock()
+_disabled = False
+
+
+def disable_link_later():
+    """Turn link-later off for this process (used by external workers)"""
+    global _disabled
+    _disabled = True
+
+
+def link_later_enabled() -> bool:
+    """Whether emails too large to attach are handed to the link-later service"""
+    settings = get_settings()
+    return settings.LARGE_ATTACHMENT_LINK_LATER and not settings.AUTOMATION_EXTERNAL_WORKERS and not _disabled
+
+
+def get_link_later_service() -> LinkLaterService:
+    """Get the process-wide link-later service"""
+    global _link_later_service
+    if _link_later_service is None:
+        with _service_lock:
+            if _link_later_service is None:
+                _link_later_service = LinkLaterService()
+    return _link_later_service
+
+
+def start_link_later_service() -> bool:
+    """
+    Start the link-later service if enabled in settings.
+
+    Returns:
+        bool: True if the service is running
+    """
+    if not link_later_enabled():
+        if get_settings().LARGE_ATTACHMENT_LINK_LATER:
+            logger.warning("LARGE_ATTACHMENT_LINK_LATER is ignored with external workers")
+        return False
+    try:
+        get_link_later_service().start()
+        return True
+    except Exception as e:
+        logger.error(f"Error starting link-later service: {str(e)}")
+        return False
+
+
+def stop_link_later_service():
+    """Signal the link-later service to stop"""
+    if _link_later_service is not None:
+        _link_later_service.stop()
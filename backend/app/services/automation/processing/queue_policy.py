@@ -0,0 +1,123 @@
+"""
+Ordering of the emails in an automation run.
+
+Policies (AUTOMATION_QUEUE_POLICY):
+    send_date      - by Email_Send_Date, as the records are loaded (default)
+    smallest_first - smallest attachment folders first, so one large folder
+                     does not hold up many small emails. Every hour a record
+                     has been waiting takes AUTOMATION_QUEUE_AGING_MB_PER_HOUR
+                     off its size, so large records are not starved.
+
+If AUTOMATION_DRIVE_LANE_INTERVAL is set, records whose folder is over the
+Google Drive threshold go in a separate lane; one of them follows every N
+emails of the main lane, so their uploads run alongside the small sends
+instead of piling up at one end of the run. Folder sizes come from the manifest size cache.
+
+Sizing walks every uncached folder, so it is bounded by
+AUTOMATION_QUEUE_SIZING_SECONDS: once that is spent, folders whose size is
+not cached count as empty.
+"""
+
+import time
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from ....core.config import get_settings
+from ....services.email.core.manifest_cache import get_manifest_size_cache
+from ....services.email.gdrive.gdrive_integration import GDRIVE_UPLOAD_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+POLICY_SEND_DATE = "send_date"
+POLICY_SMALLEST_FIRST = "smallest_first"
+QUEUE_POLICIES = (POLICY_SEND_DATE, POLICY_SMALLEST_FIRST)
+
+MB_TO_BYTES = 1024 * 1024
+
+
+def _waiting_hours(record: dict, now: datetime) -> float:
+    """Hours since the record was last updated (or due to be sent)"""
+    since = record.get("Date") or record.get("Email_Send_Date")
+    if not isinstance(since, datetime):
+        return 0.0
+    return max((now - since).total_seconds() / 3600, 0.0)
+
+
+def _interleave(main_lane: List[dict], drive_lane: List[dict], interval: int) -> List[dict]:
+    """Take one record of the Drive lane after every `interval` records of the main lane"""
+    ordered = []
+    drive_records = iter(drive_lane)
+    for position, record in enumerate(main_lane, 1):
+        ordered.append(record)
+        if position % interval == 0:
+            drive_record = next(drive_records, None)
+            if drive_record is not None:
+                ordered.append(drive_record)
+    ordered.extend(drive_records)
+    return ordered
+
+
+def _folder_sizes(records: List[dict], budget_seconds: float) -> List[int]:
+    """Attachment folder size of each record, walking folders for at most budget_seconds"""
+    size_cache = get_manifest_size_cache()
+    deadline = time.monotonic() + budget_seconds
+    sizes = []
+    unsized = 0
+    for record in records:
+        folder_path = record.get("File_Path")
+        if time.monotonic() < deadline:
+            sizes.append(size_cache.get_size(folder_path))
+            continue
+        size = size_cache.get_cached_size(folder_path)
+        if size is None:
+            unsized += 1
+        sizes.append(size or 0)
+    if unsized:
+        logger.warning(f"Sizing attachment folders took over {budget_seconds}s; "
+                       f"{unsized} folders not sized yet are ordered as empty")
+    return sizes
+
+
+def order_emails(records: List[dict], policy: Optional[str] = None,
+                 now: Optional[datetime] = None) -> List[dict]:
+    """
+    Order the email records of a run for sending.
+
+    Args:
+        records: Email records, in send date order
+        policy: Queue policy (defaults to AUTOMATION_QUEUE_POLICY)
+        now: Reference time for aging (defaults to now)
+
+    Returns:
+        List[dict]: The records in the order they should be sent
+    """
+    settings = get_settings()
+    policy = policy or settings.AUTOMATION_QUEUE_POLICY
+    lane_interval = settings.AUTOMATION_DRIVE_LANE_INTERVAL
+
+    if policy not in QUEUE_POLICIES:
+        logger.warning(f"Unknown queue policy '{policy}', sending in send date order")
+        policy = POLICY_SEND_DATE
+    if policy == POLICY_SEND_DATE and lane_interval <= 0:
+        return list(records)
+
+    try:
+        sizes = _folder_sizes(records, settings.AUTOMATION_QUEUE_SIZING_SECONDS)
+        sized = [(position, size, record) for position, (size, record) in enumerate(zip(sizes, records))]
+
+        if policy == POLICY_SMALLEST_FIRST:
+            now = now or datetime.now()
+            aging_bytes = settings.AUTOMATION_QUEUE_AGING_MB_PER_HOUR * MB_TO_BYTES
+            # Ties keep send date order
+            sized.sort(key=lambda item: (item[1] - aging_bytes * _waiting_hours(item[2], now), item[0]))
+
+        if lane_interval <= 0:
+            return [record for _, _, record in sized]
+
+        main_lane = [record for _, size, record in sized if size <= GDRIVE_UPLOAD_THRESHOLD]
+        drive_lane = [record for _, size, record in sized if size > GDRIVE_UPLOAD_THRESHOLD]
+        return _interleave(main_lane, drive_lane, lane_interval)
+    except Exception as e:
+        logger.error(f"Error ordering the email queue, sending in send date order: {str(e)}")
+        return list(records)
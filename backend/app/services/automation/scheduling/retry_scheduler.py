@@ -0,0 +1,316 @@
+"""
+Automatic retries of failed emails.
+
+When a send fails, its reason is classified as transient (SMTP 4xx replies,
+timeouts and dropped connections, Google Drive rate limits) or permanent
+(bad addresses, missing folders, 5xx replies and anything unrecognised).
+Transient failures are scheduled for another attempt with jittered
+exponential backoff, starting from the configured retry interval, and each
+email's attempts are counted in a small SQLite database (WAL) so they
+survive restarts. A timer job of the automation scheduler then returns only
+the due emails to Pending and sends them in a retry run, instead of
+reprocessing every failed email.
+"""
+
+import os
+import re
+import random
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from ....core.config import get_settings
+from ....services.email.gdrive.upload_pool import QUOTA_ERROR_MARKERS
+from ..core.settings_manager import _interval_to_seconds
+from ..core.state_manager import get_automation_state, STATUS_RUNNING, STATUS_RESTARTING, STATUS_STOPPING
+from .scheduler import RETRY_JOB, _sync_scheduler
+from .timer_scheduler import ScheduledJob, get_timer_scheduler
+
+logger = logging.getLogger(__name__)
+
+RETRY_STORE_FILENAME = "automation_retries.db"
+
+# Failure classes
+ERROR_TRANSIENT = "transient"
+ERROR_PERMANENT = "permanent"
+
+# Fragments (lower case) of failure reasons that are worth retrying
+TRANSIENT_ERROR_MARKERS = (
+    "timed out", "timeout", "temporarily", "temporary failure", "try again",
+    "connection refused", "connection reset", "connection aborted",
+    "connection unexpectedly closed", "network is unreachable",
+    "smtpserverdisconnected", "smtpconnecterror", "connectionerror",
+) + tuple(marker.lower() for marker in QUOTA_ERROR_MARKERS)
+
+# SMTP replies as they appear in exception messages, e.g. "(421, b'...')",
+# or as enhanced status codes, e.g. "4.7.0"
+_SMTP_TRANSIENT_REPLY = re.compile(r"\(4\d\d,|\b4\.\d{1,3}\.\d{1,3}\b")
+_SMTP_PERMANENT_REPLY = re.compile(r"\(5\d\d,|\b5\.\d{1,3}\.\d{1,3}\b")
+
+# How long a due retry waits while another automation run is in progress
+RETRY_BUSY_DELAY_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retries (
+    email_id INTEGER PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    next_attempt_at TEXT NOT NULL,
+    reason TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_retries_due ON retries (next_attempt_at);
+"""
+
+
+def classify_failure(reason: Optional[str]) -> str:
+    """
+    Classify a send failure by its reason.
+
+    Args:
+        reason: Failure reason returned by the email sender
+
+    Returns:
+        str: ERROR_TRANSIENT or ERROR_PERMANENT
+    """
+    if not reason:
+        return ERROR_PERMANENT
+    if _SMTP_PERMANENT_REPLY.search(reason):
+        return ERROR_PERMANENT
+    if _SMTP_TRANSIENT_REPLY.search(reason):
+        return ERROR_TRANSIENT
+    text = reason.lower()
+    if any(marker in text for marker in TRANSIENT_ERROR_MARKERS):
+        return ERROR_TRANSIENT
+    return ERROR_PERMANENT
+
+
+def backoff_seconds(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """
+    Delay before a retry: the base doubled for every earlier attempt, capped,
+    then jittered between half and the full delay so emails that failed
+    together are not all retried at the same moment.
+
+    Args:
+        attempt: Number of the failed attempt (1 for the first failure)
+        base_seconds: Delay after the first failure
+        max_seconds: Upper bound of the delay
+    """
+    delay = min(base_seconds * 2 ** (attempt - 1), max_seconds)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryStore:
+    """SQLite store of the emails scheduled for another attempt"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store. The database is opened lazily on first use.
+
+        Args:
+            db_path: Path to the SQLite file. Defaults to RETRY_STORE_PATH,
+                or automation_retries.db in LOG_DIR_PATH.
+        """
+        self._db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> str:
+        """Resolved path of the SQLite database file"""
+        if not self._db_path:
+            settings = get_settings()
+            self._db_path = os.path.abspath(settings.RETRY_STORE_PATH or os.path.join(
+                settings.LOG_DIR_PATH, RETRY_STORE_FILENAME
+            ))
+        return self._db_path
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller must hold the lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_attempts(self, email_id: int) -> int:
+        """Number of failed attempts recorded for an email"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT attempts FROM retries WHERE email_id = ?", (email_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def schedule(self, email_id: int, attempts: int, next_attempt_at: datetime, reason: Optional[str]):
+        """Schedule an email's next attempt"""
+        with self._lock:
+            self._connection().execute(
+                """
+                INSERT INTO retries (email_id, attempts, next_attempt_at, reason, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(email_id) DO UPDATE SET
+                    attempts = excluded.attempts,
+                    next_attempt_at = excluded.next_attempt_at,
+                    reason = excluded.reason,
+                    updated_at = excluded.updated_at
+                """,
+                (email_id, attempts, next_attempt_at.isoformat(), reason, datetime.now().isoformat())
+            )
+
+    def discard(self, email_ids: Iterable[int]):
+        """Stop retrying emails"""
+        with self._lock:
+            self._connection().executemany(
+                "DELETE FROM retries WHERE email_id = ?", [(email_id,) for email_id in email_ids]
+            )
+
+    def due(self, now: datetime) -> List[int]:
+        """IDs of the emails whose next attempt is due, earliest first"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT email_id FROM retries WHERE next_attempt_at <= ? ORDER BY next_attempt_at",
+                (now.isoformat(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def next_due(self) -> Optional[datetime]:
+        """Time of the earliest scheduled attempt"""
+        with self._lock:
+            row = self._connection().execute("SELECT MIN(next_attempt_at) FROM retries").fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All scheduled retries, earliest first"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT email_id, attempts, next_attempt_at, reason FROM retries ORDER BY next_attempt_at"
+            ).fetchall()
+        return [
+            {"email_id": email_id, "attempts": attempts, "next_attempt_at": next_attempt_at, "reason": reason}
+            for email_id, attempts, next_attempt_at, reason in rows
+        ]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_retry_store: Optional[RetryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_retry_store() -> RetryStore:
+    """Get the process-wide retry store"""
+    global _retry_store
+    if _retry_store is None:
+        with _store_lock:
+            if _retry_store is None:
+                _retry_store = RetryStore()
+    return _retry_store
+
+
+def record_failure(email_id: int, reason: Optional[str]) -> Optional[datetime]:
+    """
+    Schedule another attempt of a failed email if its failure is transient.
+
+    Args:
+        email_id: ID of the email record
+        reason: Failure reason
+
+    Returns:
+        Time of the next attempt, or None if the email will not be retried
+    """
+    try:
+        store = get_retry_store()
+        automation_settings = get_automation_state().get_settings()
+        if not automation_settings.get("retry_on_failure") or classify_failure(reason) == ERROR_PERMANENT:
+            store.discard([email_id])
+            return None
+
+        attempts = store.get_attempts(email_id) + 1
+        max_attempts = get_settings().RETRY_MAX_ATTEMPTS
+        if attempts > max_attempts:
+            store.discard([email_id])
+            logger.warning(f"Email ID {email_id} failed {attempts} times, not retrying again: {reason}")
+            return None
+
+        delay = backoff_seconds(attempts,
+                                _interval_to_seconds(automation_settings.get("retry_interval")),
+                                get_settings().RETRY_MAX_BACKOFF_SECONDS)
+        next_attempt_at = datetime.now() + timedelta(seconds=delay)
+        store.schedule(email_id, attempts, next_attempt_at, reason)
+        logger.info(f"Email ID {email_id} will be retried at {next_attempt_at:%Y-%m-%d %H:%M:%S} "
+                    f"(attempt {attempts} of {max_attempts})")
+
+        # Worker processes only record retries; the API schedules them
+        if not get_settings().AUTOMATION_EXTERNAL_WORKERS:
+            sync_retry_job()
+        return next_attempt_at
+    except Exception as e:
+        logger.error(f"Error scheduling retry of email ID {email_id}: {str(e)}")
+        return None
+
+
+def record_success(email_id: int):
+    """Forget the retries of an email that has been sent"""
+    try:
+        get_retry_store().discard([email_id])
+    except Exception as e:
+        logger.error(f"Error clearing retries of email ID {email_id}: {str(e)}")
+
+
+def get_scheduled_retries() -> List[Dict[str, Any]]:
+    """
+    Get the emails scheduled for another attempt
+
+    Returns:
+        List of email_id, attempts, next_attempt_at and reason, earliest first
+    """
+    return get_retry_store().list()
+
+
+def _automation_busy() -> bool:
+    """Whether an automation run is in progress"""
+    return get_automation_state().status in (STATUS_RUNNING, STATUS_RESTARTING, STATUS_STOPPING)
+
+
+def _next_retry_run(after: datetime) -> Optional[datetime]:
+    """Due time of the retry job: the earliest scheduled attempt"""
+    due = get_retry_store().next_due()
+    if due is None:
+        return None
+    if _automation_busy():
+        return max(due, after + timedelta(seconds=RETRY_BUSY_DELAY_SECONDS))
+    return max(due, after)
+
+
+def _run_due_retries():
+    """Send the emails whose next attempt is due"""
+    # Import here to avoid circular imports
+    from ..core.automation_manager import get_automation_status, retry_emails
+
+    get_automation_status()
+    if _automation_busy():
+        logger.info("Email retries are due but automation is running, retrying when it finishes")
+        return
+
+    email_ids = get_retry_store().due(datetime.now())
+    if email_ids:
+        retry_emails(email_ids)
+
+
+def sync_retry_job():
+    """Schedule the retry job for the earliest scheduled attempt, if any"""
+    scheduler = get_timer_scheduler()
+    if get_retry_store().next_due() is not None:
+        scheduler.add_job(ScheduledJob(RETRY_JOB, next_run=_next_retry_run, action=_run_due_retries))
+    else:
+        scheduler.remove_job(RETRY_JOB)
+    _sync_scheduler()
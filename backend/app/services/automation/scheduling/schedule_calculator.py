@@ -3,6 +3,7 @@ Schedule calculator for calculating next run time based on schedule settings
 """
 
 from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
 import logging
 
 from ..core.state_manager import get_automation_state
@@ -11,10 +12,25 @@ logger = logging.getLogger(__name__)
 
 
 def _calculate_next_run() -> None:
-    automation_state = get_automation_state()
-    now = datetime.now()
-    frequency = automation_state["schedule"]["frequency"]
-    time_str = automation_state["schedule"]["time"]
+    """Calculate the next run of the default schedule and store it in the automation state"""
+    schedule = get_automation_state().schedule
+    schedule["nextRun"] = compute_next_run(schedule)
+
+
+def compute_next_run(schedule: Dict[str, Any], now: Optional[datetime] = None) -> datetime:
+    """
+    Calculate the next run time of a schedule.
+    
+    Args:
+        schedule: Schedule settings (frequency, time, days)
+        now: Time to calculate from (defaults to the current time)
+        
+    Returns:
+        datetime: The next run time after ``now``
+    """
+    now = now or datetime.now()
+    frequency = schedule["frequency"]
+    time_str = schedule["time"]
     
     try:
         # Parse the time string (HH:MM)
@@ -30,7 +46,7 @@ def _calculate_next_run() -> None:
                 
         elif frequency == "weekly":
             # Get the target days of the week (0-6, where 0 is Monday in our case)
-            days = automation_state["schedule"]["days"]
+            days = schedule.get("days")
             
             if not days:
                 # Default to Monday if no days specified
@@ -55,7 +71,7 @@ def _calculate_next_run() -> None:
             
         elif frequency == "monthly":
             # Get the target days of the month (1-31)
-            days = automation_state["schedule"]["days"]
+            days = schedule.get("days")
             
             if not days:
                 # Default to the 1st of the month if no days specified
@@ -65,7 +81,7 @@ def _calculate_next_run() -> None:
             current_day = now.day
             
             # Sort days in ascending order
-            days.sort()
+            days = sorted(days)
             
             # Find the next day in the current month
             next_day = None
@@ -94,10 +110,10 @@ def _calculate_next_run() -> None:
             if next_run <= now:
                 next_run += timedelta(days=1)
         
-        automation_state["schedule"]["nextRun"] = next_run
+        return next_run
         
     except Exception as e:
         logger.error(f"Error calculating next run time: {str(e)}")
         # Set a default next run time (1 hour from now)
-        automation_state["schedule"]["nextRun"] = now + timedelta(hours=1)
+        return now + timedelta(hours=1)
 
@@ -1,94 +1,88 @@
-"""Main scheduler component for automation scheduling"""
+"""
+Main scheduler component for automation scheduling.
+
+The default schedule and any named schedules are jobs of the event-driven
+timer scheduler, which starts each run exactly when it is due and is woken
+immediately when a schedule changes.
+"""
 
 import logging
-import time
-import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any
 
+from ....models.email import EmailStatus
+from ....utils.event_bus import event_bus
 from ..core.state_manager import get_automation_state
-from .schedule_calculator import _calculate_next_run
+from .schedule_calculator import compute_next_run
+from .timer_scheduler import ScheduledJob, get_timer_scheduler
 
 logger = logging.getLogger(__name__)
 
 
-def _schedule_next_run():
-    """Schedule the next run time based on current settings"""
+DEFAULT_SCHEDULE = "default"
+# Timer job of the automatic retries of failed emails
+RETRY_JOB = "retries"
+
+
+def _publish_schedule():
+    """Push the current schedule (including next run) to event stream subscribers"""
+    event_bus.publish("schedule", get_schedule_settings())
+
+
+def _publish_named_schedules():
+    """Push the named schedules to event stream subscribers"""
+    event_bus.publish("schedules", get_named_schedules())
+
+
+def _run_schedule(name: str, schedule: Dict[str, Any]) -> None:
+    """Start the automation run of a due schedule"""
     automation_state = get_automation_state()
+    with automation_state.lock:
+        schedule["lastRun"] = datetime.now()
     
-    if not automation_state["schedule"]["enabled"]:
+    if automation_state.is_running:
+        logger.info(f"Schedule '{name}' is due but automation is already running, skipping this run")
         return
     
-    try:
-        frequency = automation_state["schedule"]["frequency"]
-        current_time = datetime.now()
-        next_run = None
-        
-        if frequency == "minute":
-            next_run = current_time + timedelta(minutes=int(automation_state["schedule"]["interval"]))
-        elif frequency == "hour":
-            next_run = current_time + timedelta(hours=int(automation_state["schedule"]["interval"]))
-        elif frequency == "daily":
-            next_run = current_time.replace(hour=int(automation_state["schedule"]["time"].split(":")[0]), 
-                                             minute=int(automation_state["schedule"]["time"].split(":")[1]), 
-                                             second=0, microsecond=0)
-            # If the time has already passed today, schedule for tomorrow
-            if next_run < current_time:
-                next_run += timedelta(days=1)
-        elif frequency == "weekly":
-            # Schedule for the next specified day of the week
-            today = current_time.weekday()  # Monday is 0, Sunday is 6
-            days_ahead = (automation_state["schedule"]["days"][(current_time.weekday() + 1) % 7] - today) % 7
-            if days_ahead == 0:
-                # If the day is today, schedule for the next hour
-                next_run = current_time.replace(hour=int(automation_state["schedule"]["time"].split(":")[0]), 
-                                                 minute=int(automation_state["schedule"]["time"].split(":")[1]), 
-                                                 second=0, microsecond=0)
-                # If the time has already passed, schedule for next week
-                if next_run < current_time:
-                    next_run += timedelta(weeks=1)
-            else:
-                next_run = current_time + timedelta(days=days_ahead)
-        elif frequency == "monthly":
-            # Schedule for the next month on the same day
-            next_run = current_time.replace(day=1) + timedelta(days=32)  # Go to next month
-            next_run = next_run.replace(day=int(automation_state["schedule"]["time"]))
-            # If the day is in the past, schedule for next month
-            if next_run < current_time:
-                next_run = next_run + timedelta(days=32)
-        
-        automation_state["schedule"]["nextRun"] = next_run
-        logger.info(f"Next run scheduled at {next_run}")
-        
-    except Exception as e:
-        logger.error(f"Error scheduling next run: {str(e)}")
+    # Import here to avoid circular imports
+    from ..core.automation_manager import start_automation, restart_failed_emails
+    if schedule.get("status_filter") == EmailStatus.FAILED.value:
+        restart_failed_emails(template_id=schedule.get("template_id"))
+    else:
+        start_automation(template_id=schedule.get("template_id"))
 
 
-def _scheduler_thread():
-    """Thread function for the scheduler"""
+def _make_job(name: str, schedule: Dict[str, Any], publish) -> ScheduledJob:
+    """Create the scheduler job of a schedule; its next run is kept in the schedule dict"""
+    def on_scheduled(next_run):
+        with get_automation_state().lock:
+            schedule["nextRun"] = next_run
+        if next_run:
+            logger.info(f"Next run of schedule '{name}' at {next_run}")
+        publish()
+    
+    return ScheduledJob(
+        name,
+        next_run=lambda after: compute_next_run(schedule, after),
+        action=lambda: _run_schedule(name, schedule),
+        on_scheduled=on_scheduled
+    )
+
+
+def _sync_scheduler() -> None:
+    """
+    Run the scheduler thread only while at least one job is registered, unless
+    the scheduler was stopped with stop_scheduler
+    """
     automation_state = get_automation_state()
+    scheduler = get_timer_scheduler()
     
-    while automation_state["scheduler_running"]:
-        try:
-            # Check if it's time to run the automation
-            current_time = datetime.now()
-            
-            if automation_state["schedule"]["nextRun"] and current_time >= automation_state["schedule"]["nextRun"]:
-                logger.info("Scheduled time reached, starting automation")
-                
-                # Import here to avoid circular imports
-                from ..core.automation_manager import start_automation
-                start_automation()
-                
-                # Schedule the next run
-                _schedule_next_run()
-            else:
-                # Sleep for a while before checking again
-                time.sleep(10)
-        
-        except Exception as e:
-            logger.error(f"Error in scheduler thread: {str(e)}")
-            time.sleep(60)  # Wait before retrying
+    if scheduler.job_names():
+        if automation_state.scheduler_wanted:
+            scheduler.start()
+    else:
+        scheduler.stop()
+    automation_state.scheduler_running = scheduler.is_running
 
 
 def start_scheduler() -> Dict[str, Any]:
@@ -99,23 +93,17 @@ def start_scheduler() -> Dict[str, Any]:
         Current automation state
     """
     automation_state = get_automation_state()
+    scheduler = get_timer_scheduler()
+    automation_state.scheduler_wanted = True
     
-    if automation_state["scheduler_running"]:
+    if scheduler.is_running:
         logger.info("Scheduler is already running")
-        from ..core.automation_manager import get_automation_status
-        return get_automation_status()
-    
-    # Set the scheduler to running
-    automation_state["scheduler_running"] = True
-    
-    # Start the scheduler thread
-    automation_state["scheduler_thread"] = threading.Thread(
-        target=_scheduler_thread,
-        daemon=True
-    )
-    automation_state["scheduler_thread"].start()
+    else:
+        if automation_state.schedule["enabled"] and DEFAULT_SCHEDULE not in scheduler.job_names():
+            scheduler.add_job(_make_job(DEFAULT_SCHEDULE, automation_state.schedule, _publish_schedule))
+        scheduler.start()
+        automation_state.scheduler_running = True
     
-    logger.info("Started email automation scheduler")
     from ..core.automation_manager import get_automation_status
     return get_automation_status()
 
@@ -128,16 +116,15 @@ def stop_scheduler() -> Dict[str, Any]:
         Current automation state
     """
     automation_state = get_automation_state()
+    scheduler = get_timer_scheduler()
+    automation_state.scheduler_wanted = False
     
-    if not automation_state["scheduler_running"]:
+    if not scheduler.is_running:
         logger.info("Scheduler is not running")
-        from ..core.automation_manager import get_automation_status
-        return get_automation_status()
-    
-    # Set the scheduler to not running
-    automation_state["scheduler_running"] = False
+    else:
+        scheduler.stop()
+        automation_state.scheduler_running = False
     
-    logger.info("Stopped email automation scheduler")
     from ..core.automation_manager import get_automation_status
     return get_automation_status()
 
@@ -155,20 +142,22 @@ def update_schedule_settings(schedule_settings: Dict[str, Any]) -> Dict[str, Any
     automation_state = get_automation_state()
     
     # Update only valid keys
-    for key, value in schedule_settings.items():
-        if key in automation_state["schedule"]:
-            automation_state["schedule"][key] = value
+    with automation_state.lock:
+        for key, value in schedule_settings.items():
+            if key in automation_state.schedule:
+                automation_state.schedule[key] = value
+        enabled = automation_state.schedule["enabled"]
+        if not enabled:
+            automation_state.schedule["nextRun"] = None
             
-    # Calculate next run time if schedule is enabled
-    if automation_state["schedule"]["enabled"]:
-        _calculate_next_run()
-        
-        # Start the scheduler if it's not already running
-        if not automation_state.get("scheduler_running", False):
-            _start_scheduler()
+    # (Re)schedule the default job; the scheduler thread wakes up immediately
+    scheduler = get_timer_scheduler()
+    if enabled:
+        scheduler.add_job(_make_job(DEFAULT_SCHEDULE, automation_state.schedule, _publish_schedule))
     else:
-        # Stop the scheduler if it's running
-        _stop_scheduler()
+        scheduler.remove_job(DEFAULT_SCHEDULE)
+        _publish_schedule()
+    _sync_scheduler()
     
     return get_schedule_settings()
 
@@ -178,71 +167,95 @@ def get_schedule_settings() -> Dict[str, Any]:
     Get the current schedule settings
     
     Returns:
-        Dictionary with current schedule settings
+        Copy of the current schedule settings
     """
     automation_state = get_automation_state()
-    return automation_state["schedule"]
+    with automation_state.lock:
+        return dict(automation_state.schedule)
 
 
-def _start_scheduler() -> None:
-    """Start the scheduler thread"""
+def get_named_schedules() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the named schedules
+    
+    Returns:
+        Copy of the schedules, by schedule name
+    """
     automation_state = get_automation_state()
+    with automation_state.lock:
+        return {name: dict(schedule) for name, schedule in automation_state.schedules.items()}
+
+
+def update_named_schedule(name: str, schedule_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create or update a named schedule.
     
-    if automation_state.get("scheduler_running", False):
-        return
+    Named schedules run alongside the default schedule, each with its own
+    timing and optionally its own template and status filter (Pending, or
+    Failed to retry failed emails).
+    
+    Args:
+        name: Schedule name
+        schedule_settings: Schedule settings (enabled, frequency, time, days,
+            template_id, status_filter)
         
-    logger.info("Starting email automation scheduler")
+    Returns:
+        The schedule's settings including its next run
+        
+    Raises:
+        ValueError: If the name is empty or reserved
+    """
+    if not name or name in (DEFAULT_SCHEDULE, RETRY_JOB):
+        raise ValueError(f"Invalid schedule name: '{name}'")
     
-    automation_state["scheduler_running"] = True
-    automation_state["scheduler_thread"] = threading.Thread(
-        target=_run_scheduler,
-        daemon=True
-    )
-    automation_state["scheduler_thread"].start()
-
-
-def _stop_scheduler() -> None:
-    """Stop the scheduler thread"""
     automation_state = get_automation_state()
+    with automation_state.lock:
+        schedule = automation_state.schedules.get(name) or {
+            "enabled": False,
+            "frequency": "daily",
+            "time": "09:00",
+            "days": [],
+            "template_id": None,
+            "status_filter": EmailStatus.PENDING.value,
+            "lastRun": None,
+            "nextRun": None
+        }
+        for key, value in schedule_settings.items():
+            if key in schedule and key not in ("lastRun", "nextRun"):
+                schedule[key] = value
+        enabled = schedule["enabled"]
+        if not enabled:
+            schedule["nextRun"] = None
+        automation_state.schedules[name] = schedule
+    
+    scheduler = get_timer_scheduler()
+    if enabled:
+        scheduler.add_job(_make_job(name, schedule, _publish_named_schedules))
+    else:
+        scheduler.remove_job(name)
+        _publish_named_schedules()
+    _sync_scheduler()
     
-    logger.info("Stopping email automation scheduler")
-    automation_state["scheduler_running"] = False
+    with automation_state.lock:
+        return dict(schedule)
 
 
-def _run_scheduler() -> None:
-    """Run the scheduler loop"""
-    automation_state = get_automation_state()
+def remove_named_schedule(name: str) -> bool:
+    """
+    Delete a named schedule
     
-    while automation_state.get("scheduler_running", False):
-        try:
-            # Check if scheduler is enabled
-            if not automation_state["schedule"]["enabled"]:
-                break
-                
-            now = datetime.now()
-            next_run = automation_state["schedule"].get("nextRun")
-            
-            if next_run and now >= next_run:
-                # It's time to run the automation
-                logger.info("Scheduled automation starting")
-                
-                # Update last run time
-                automation_state["schedule"]["lastRun"] = now
-                
-                # Start the automation
-                if not automation_state["is_running"]:
-                    from ..core.automation_manager import start_automation
-                    start_automation()
-                
-                # Calculate the next run time
-                _calculate_next_run()
-                
-                # Log the next scheduled run
-                logger.info(f"Next scheduled run: {automation_state['schedule']['nextRun']}")
-        except Exception as e:
-            logger.error(f"Error in scheduler loop: {str(e)}")
-            
-        # Sleep for a minute before checking again
-        time.sleep(60)
+    Args:
+        name: Schedule name
+        
+    Returns:
+        bool: True if the schedule existed
+    """
+    automation_state = get_automation_state()
+    with automation_state.lock:
+        if automation_state.schedules.pop(name, None) is None:
+            return False
     
-    logger.info("Scheduler thread stopped")
+    get_timer_scheduler().remove_job(name)
+    _sync_scheduler()
+    _publish_named_schedules()
+    return True
@@ -0,0 +1,205 @@
+"""
+Event-driven scheduler core.
+
+Scheduled jobs are kept in a min-heap ordered by their next due time. One
+thread waits on a condition variable until the earliest job is due, runs
+it and computes its next time. Adding, changing or removing a job notifies
+the condition, so the thread re-evaluates immediately instead of noticing
+on its next poll, and an idle scheduler does not wake up at all until a
+job is due.
+"""
+
+import heapq
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on a single wait, so wall-clock adjustments (DST, NTP steps)
+# are picked up within this many seconds
+MAX_WAIT_SECONDS = 3600
+
+NextRunFunction = Callable[[datetime], Optional[datetime]]
+
+
+class ScheduledJob:
+    """A named job and the function computing its next due time"""
+
+    def __init__(self, name: str, next_run: NextRunFunction, action: Callable[[], None],
+                 on_scheduled: Optional[Callable[[Optional[datetime]], None]] = None):
+        """
+        Args:
+            name: Unique job name
+            next_run: Returns the next due time after the given time, or None
+                to stop scheduling the job
+            action: Called on the scheduler thread when the job is due
+            on_scheduled: Optional callback receiving each newly computed due time
+        """
+        self.name = name
+        self.next_run = next_run
+        self.action = action
+        self.on_scheduled = on_scheduled
+        self.due: Optional[datetime] = None
+        # Sequence number of the job's live timer; older heap entries are stale
+        self.timer_id = 0
+
+
+class TimerScheduler:
+    """Runs named jobs at their due times from a heap of timers"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._sequence = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the scheduler thread if it is not running"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            # A thread that is stopping but has not exited yet carries on
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="automation-scheduler")
+                self._thread.start()
+        logger.info("Started email automation scheduler")
+
+    def stop(self):
+        """Stop the scheduler thread; jobs are kept and resume on the next start"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        logger.info("Stopped email automation scheduler")
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the scheduler thread is running"""
+        with self._condition:
+            return self._running
+
+    def add_job(self, job: ScheduledJob) -> Optional[datetime]:
+        """
+        Add a job, or replace the job with the same name, and schedule it.
+
+        Returns:
+            The job's first due time, or None if it has none
+        """
+        with self._condition:
+            self._jobs[job.name] = job
+            due = self._schedule(job, datetime.now())
+            self._condition.notify_all()
+        return due
+
+    def remove_job(self, name: str) -> bool:
+        """
+        Remove a job; its pending timer is discarded.
+
+        Returns:
+            bool: True if the job existed
+        """
+        with self._condition:
+            job = self._jobs.pop(name, None)
+            if job:
+                self._condition.notify_all()
+        return job is not None
+
+    def next_due(self, name: str) -> Optional[datetime]:
+        """Get the next due time of a job"""
+        with self._condition:
+            job = self._jobs.get(name)
+            return job.due if job else None
+
+    def job_names(self) -> List[str]:
+        """Names of the scheduled jobs"""
+        with self._condition:
+            return list(self._jobs)
+
+    def _schedule(self, job: ScheduledJob, after: datetime) -> Optional[datetime]:
+        """Compute a job's next due time and push its timer (caller holds the lock)"""
+        try:
+            job.due = job.next_run(after)
+        except Exception as e:
+            logger.error(f"Error calculating next run of schedule '{job.name}': {str(e)}")
+            job.due = None
+
+        self._sequence += 1
+        job.timer_id = self._sequence
+        if job.due is not None:
+            heapq.heappush(self._heap, (job.due, job.timer_id, job.name))
+
+        if job.on_scheduled:
+            try:
+                job.on_scheduled(job.due)
+            except Exception as e:
+                logger.error(f"Error publishing schedule '{job.name}': {str(e)}")
+        return job.due
+
+    def _pop_due_job(self) -> Optional[ScheduledJob]:
+        """
+        Wait until a job is due and return it (caller holds the lock).
+
+        Returns None when the scheduler is stopped.
+        """
+        while self._running:
+            # Discard timers of removed or rescheduled jobs
+            while self._heap:
+                _, timer_id, name = self._heap[0]
+                job = self._jobs.get(name)
+                if job and job.timer_id == timer_id:
+                    break
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._condition.wait()
+                continue
+
+            wait_seconds = (self._heap[0][0] - datetime.now()).total_seconds()
+            if wait_seconds <= 0:
+                _, _, name = heapq.heappop(self._heap)
+                return self._jobs[name]
+            self._condition.wait(min(wait_seconds, MAX_WAIT_SECONDS))
+        self._thread = None
+        return None
+
+    def _run(self):
+        """Scheduler thread: run each job when it is due"""
+        while True:
+            with self._condition:
+                job = self._pop_due_job()
+                if job is None:
+                    break
+                timer_id = job.timer_id
+
+            logger.info(f"Schedule '{job.name}' is due, starting automation")
+            try:
+                job.action()
+            except Exception as e:
+                logger.error(f"Error running schedule '{job.name}': {str(e)}")
+
+            with self._condition:
+                # Skip if the job was changed or removed while it ran
+                if self._jobs.get(job.name) is job and job.timer_id == timer_id:
+                    self._schedule(job, datetime.now())
+
+        logger.info("Scheduler thread stopped")
+
+
+_timer_scheduler: Optional[TimerScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_timer_scheduler() -> TimerScheduler:
+    """Get the process-wide scheduler"""
+    global _timer_scheduler
+    if _timer_scheduler is None:
+        with _scheduler_lock:
+            if _timer_scheduler is None:
+                _timer_scheduler = TimerScheduler()
+    return _timer_scheduler
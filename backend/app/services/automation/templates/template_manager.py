@@ -2,40 +2,54 @@
 
 import os
 import logging
+from typing import Optional
 
 from ....core.config import get_settings
+from ....services.templates.core.template_cache import get_template_file_cache
+from ....services.templates.core.template_compiler import CompiledTemplate, get_compiled_template
 
 logger = logging.getLogger(__name__)
 
 
+def _get_default_template_path() -> Optional[str]:
+    """Resolve the absolute path of the default email template file"""
+    settings = get_settings()
+    template_path = settings.DEFAULT_EMAIL_TEMPLATE_PATH
+    
+    if not template_path:
+        logger.warning("DEFAULT_EMAIL_TEMPLATE_PATH not configured")
+        return None
+    
+    # Convert relative path to absolute path if needed
+    if not os.path.isabs(template_path):
+        # Use current working directory as base for relative paths
+        template_path = os.path.join(os.getcwd(), template_path)
+    
+    # Normalize the path to handle any path separators correctly
+    return os.path.normpath(template_path)
+
+
+def _get_default_compiled_template() -> Optional[CompiledTemplate]:
+    """Get the compiled default email template (recompiled when the file changes)"""
+    template_path = _get_default_template_path()
+    if not template_path:
+        return None
+    return get_compiled_template(template_path)
+
+
 def _load_default_template() -> str:
     """Load the default email template from file"""
     try:
-        settings = get_settings()
-        template_path = settings.DEFAULT_EMAIL_TEMPLATE_PATH
-        
+        template_path = _get_default_template_path()
         if not template_path:
-            logger.warning("DEFAULT_EMAIL_TEMPLATE_PATH not configured")
             return ""
         
-        # Convert relative path to absolute path if needed
-        if not os.path.isabs(template_path):
-            # Use current working directory as base for relative paths
-            template_path = os.path.join(os.getcwd(), template_path)
-        
-        # Normalize the path to handle any path separators correctly
-        template_path = os.path.normpath(template_path)
-        
-        # Check if the file exists
-        if not os.path.isfile(template_path):
+        template_file = get_template_file_cache().get(template_path)
+        if template_file is None:
             logger.warning(f"Default template file not found at {template_path}")
             return ""
         
-        with open(template_path, "r", encoding="utf-8") as file:
-            template_content = file.read()
-        
-        logger.info(f"Loaded default template from {template_path}")
-        return template_content
+        return template_file.content
     
     except Exception as e:
         logger.error(f"Error loading default template: {str(e)}")
@@ -0,0 +1,144 @@
+"""
+Pre-flight validation of the emails of an automation run.
+
+Bad addresses, missing folders and empty folders used to be found one email
+at a time, after each record had been dequeued, logged and checked against
+the database. Before a run starts, all its records are now checked in bulk:
+addresses with the sender's precompiled pattern, and every distinct
+attachment folder in parallel, which also warms the manifest size cache
+used to order the queue. Records that would certainly
+fail are marked Failed in batched updates, with the reasons the sender
+would have given, and only the sendable records are queued.
+
+Folder sizes only predict how emails will be sent (attached, or through
+Google Drive); whether a large email fails depends on Drive at send time, so
+they are reported, not failed.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ....core.config import get_settings
+from ....services.email.core.manifest_cache import get_manifest_size_cache
+from ....services.email.core.smart_attachment import get_smart_attachment_handler
+from ....services.email.core.validation_utils import EMAIL_PATTERN
+from ....services.email.gdrive.gdrive_integration import GDRIVE_UPLOAD_THRESHOLD, SAFE_MAX_SIZE
+from ....utils.email_logger import email_logger, LogEvent
+from ..database.email_repository import _fail_pending_emails
+
+logger = logging.getLogger(__name__)
+
+# Failure reasons, as given by the email sender
+REASON_INVALID_EMAIL = "ERROR: Invalid email format"
+REASON_MISSING_FOLDER = "ERROR: Attachment path does not exist or is not a directory"
+REASON_EMPTY_FOLDER = "ERROR: Folder is empty or contains no matching files"
+
+
+def _domain_is_valid(domain: str) -> bool:
+    """Whether a domain could be delivered to: no whitespace or empty labels"""
+    if any(char.isspace() for char in domain):
+        return False
+    try:
+        domain.encode("idna")
+    except UnicodeError:
+        return False
+    return True
+
+
+def _check_address(email: Optional[str]) -> Optional[str]:
+    """Failure reason of a recipient address, or None if it can be sent to"""
+    if not email or not EMAIL_PATTERN.match(email):
+        return REASON_INVALID_EMAIL
+    if not _domain_is_valid(email.rsplit("@", 1)[1].strip().lower()):
+        return REASON_INVALID_EMAIL
+    return None
+
+
+def _check_folder(folder_path: str) -> Tuple[Optional[str], int]:
+    """Failure reason of an attachment folder (or None) and its size"""
+    if not os.path.isdir(folder_path):
+        return REASON_MISSING_FOLDER, 0
+    size = get_manifest_size_cache().get_size(folder_path)
+    if size == 0 and not get_smart_attachment_handler().get_matching_files(folder_path):
+        return REASON_EMPTY_FOLDER, 0
+    return None, size
+
+
+def run_preflight(records: List[dict], process_id: Optional[str] = None) -> List[dict]:
+    """
+    Validate the records of a run in bulk and fail those that cannot be sent.
+
+    Args:
+        records: Pending email records
+        process_id: ID of the automation process, for logging
+
+    Returns:
+        List[dict]: The records that were not failed, in their original order
+    """
+    settings = get_settings()
+    if not settings.AUTOMATION_PREFLIGHT or not records:
+        return records
+
+    try:
+        # Every distinct folder is checked once, in parallel
+        folders = {record["File_Path"] for record in records if record.get("File_Path")}
+        with ThreadPoolExecutor(max_workers=max(settings.AUTOMATION_PREFLIGHT_WORKERS, 1)) as executor:
+            folder_results: Dict[str, Tuple[Optional[str], int]] = dict(
+                zip(folders, executor.map(_check_folder, folders))
+            )
+
+        failures: Dict[int, str] = {}
+        drive_count = oversize_count = 0
+        for record in records:
+            reason = _check_address(record.get("Email"))
+            size = 0
+            if reason is None and record.get("File_Path"):
+                reason, size = folder_results[record["File_Path"]]
+            if reason:
+                failures[record["Email_ID"]] = reason
+            elif size > SAFE_MAX_SIZE:
+                oversize_count += 1
+            elif size > GDRIVE_UPLOAD_THRESHOLD:
+                drive_count += 1
+
+        if drive_count or oversize_count:
+            email_logger.log_info(
+                f"🔍 Pre-flight: {drive_count + oversize_count} emails will likely need a Google Drive upload "
+                f"({oversize_count} too large to attach if Drive is unavailable)",
+                process_id=process_id,
+                event=LogEvent.PROCESS
+            )
+        if not failures:
+            return records
+
+        # Records changed meanwhile are not touched, and are sent or skipped as usual
+        failed_ids = set(_fail_pending_emails(failures))
+        email_records = {record["Email_ID"]: record for record in records}
+        for email_id in failed_ids:
+            record = email_records[email_id]
+            email_logger.log_email_transaction(
+                email_id=email_id,
+                email=record.get("Email"),
+                subject=record.get("Subject"),
+                file_path=record.get("File_Path"),
+                status="Failed",
+                reason=failures[email_id],
+                process_id=process_id
+            )
+
+        if failed_ids:
+            # Permanent failures: drop any retries scheduled earlier
+            from ..scheduling.retry_scheduler import get_retry_store
+            get_retry_store().discard(failed_ids)
+
+            email_logger.log_warning(
+                f"🔍 Pre-flight: failed {len(failed_ids)} of {len(records)} emails that cannot be sent",
+                process_id=process_id,
+                event=LogEvent.PROCESS
+            )
+        return [record for record in records if record["Email_ID"] not in failed_ids]
+    except Exception as e:
+        logger.error(f"Error in pre-flight validation, sending every email: {str(e)}")
+        return records
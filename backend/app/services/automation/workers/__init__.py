@@ -0,0 +1,7 @@
+"""
+Worker processes for scaling automation across cores and machines
+"""
+
+from .email_worker import EmailWorker
+
+__all__ = ['EmailWorker']
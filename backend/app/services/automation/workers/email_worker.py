@@ -0,0 +1,213 @@
+"""
+Automation worker process.
+
+A worker (started with worker.py, any number of times on any number of
+machines) follows the run requested by the API in the AutomationControl
+row. While a run is requested it leases batches of Pending rows from the
+email table and sends them with the same processor as the in-process
+automation, so templates, attachments, Drive uploads and status updates
+behave identically. A heartbeat thread renews the worker's leases and
+reports its counters; when the run is stopped, or the leases can no
+longer be renewed, the worker stops after the current email.
+
+Each worker journals its batches in its own run queue file, so a worker
+restarted under the same --name settles the emails it was sending when
+it stopped instead of leaving them for another worker to send again.
+"""
+
+import os
+import re
+import socket
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from ....core.config import get_settings
+from ....utils.email_logger import email_logger, LogEvent
+from ..core.run_queue import RunQueue, RunQueueStore, RUN_STOPPED, ITEM_QUEUED, OUTCOME_SENT, OUTCOME_FAILED
+from ..core.state_manager import get_automation_state, STATUS_IDLE, STATUS_ERROR
+from ..database.lease_repository import (
+    acquire_leases, renew_leases, release_leases, release_expired_leases, count_active_leases,
+    register_worker, heartbeat_worker, get_run_control, set_run_control,
+    RUN_REQUESTED, RUN_DONE
+)
+from ..processing.link_later import disable_link_later
+from ..processing.queue_policy import order_emails
+
+logger = logging.getLogger(__name__)
+
+WORKER_JOURNAL_DIR = "workers"
+
+# Results of processing one batch
+BATCH_COMPLETE = "complete"
+BATCH_PARTIAL = "partial"
+BATCH_ERROR = "error"
+
+
+class EmailWorker:
+    """Leases and sends Pending emails for the run requested by the API"""
+
+    def __init__(self, worker_id: Optional[str] = None, batch_size: Optional[int] = None):
+        """
+        Initialize the worker.
+
+        Args:
+            worker_id: Unique, preferably stable worker name
+                (defaults to <host>-<pid>)
+            batch_size: Rows leased at a time (defaults to WORKER_BATCH_SIZE)
+        """
+        settings = get_settings()
+        self.host_name = socket.gethostname()
+        self.worker_id = worker_id or f"{self.host_name}-{os.getpid()}"
+        self.batch_size = batch_size or settings.WORKER_BATCH_SIZE
+        self.lease_seconds = settings.WORKER_LEASE_SECONDS
+        self.heartbeat_seconds = settings.WORKER_HEARTBEAT_SECONDS
+        self.poll_seconds = settings.WORKER_POLL_SECONDS
+
+        journal_name = re.sub(r"[^A-Za-z0-9_.-]", "_", self.worker_id)
+        self.store = RunQueueStore(os.path.join(
+            settings.LOG_DIR_PATH, WORKER_JOURNAL_DIR, f"{journal_name}.db"
+        ))
+
+        self.processed = 0
+        self.successful = 0
+        self.failed = 0
+
+        self._stop = threading.Event()
+        self._run_id: Optional[str] = None
+        self._last_renewed = time.monotonic()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+        # Leased rows return to the pool when a batch ends, so emails are not
+        # left waiting for their Drive link after it
+        disable_link_later()
+
+    def run(self):
+        """Process requested runs until stop() is called"""
+        if not register_worker(self.worker_id, self.host_name, os.getpid()):
+            raise RuntimeError("Cannot register the worker; has database/add_worker_leases.sql been applied?")
+
+        logger.info(f"Worker {self.worker_id} started (batch size {self.batch_size})")
+        self._settle_interrupted_batches()
+
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True,
+                                                  name="worker-heartbeat")
+        self._heartbeat_thread.start()
+
+        try:
+            while not self._stop.is_set():
+                control = get_run_control()
+                if not control or control["Run_State"] != RUN_REQUESTED:
+                    self._run_id = None
+                    self._stop.wait(self.poll_seconds)
+                    continue
+
+                run_id = control["Run_ID"]
+                self._run_id = run_id
+                release_expired_leases(self.lease_seconds)
+
+                batch = acquire_leases(self.worker_id, run_id, self.batch_size, self.lease_seconds)
+                if not batch:
+                    # The run is complete once no worker holds a lease either
+                    if count_active_leases() == 0 and set_run_control(
+                            run_id, RUN_DONE, control["Template_ID"], expected_run_id=run_id):
+                        email_logger.log_info(f"Automation run {run_id} completed by the workers",
+                                              process_id=run_id, event=LogEvent.PROCESS)
+                    self._stop.wait(self.poll_seconds)
+                    continue
+
+                self._last_renewed = time.monotonic()
+                result = BATCH_ERROR
+                try:
+                    result = self._process_batch(run_id, control["Template_ID"], batch)
+                finally:
+                    # Rows of a fully processed batch that are still Pending are
+                    # not leased again in this run; the rest go back to the pool
+                    release_leases(self.worker_id, run_id if result == BATCH_COMPLETE else None)
+                if result == BATCH_ERROR:
+                    logger.error(f"Worker {self.worker_id} could not process its batch, stopping")
+                    self._stop.set()
+        finally:
+            release_leases(self.worker_id)
+            heartbeat_worker(self.worker_id, "stopped", self.processed, self.successful, self.failed)
+            self.store.close()
+            logger.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self):
+        """Stop after the current email"""
+        self._stop.set()
+        get_automation_state().request_stop()
+
+    def _process_batch(self, run_id: str, template_id: Optional[str], batch: list) -> str:
+        """
+        Send one leased batch with the automation processor.
+
+        Returns:
+            str: BATCH_COMPLETE, BATCH_PARTIAL if the batch was stopped early,
+            or BATCH_ERROR if the processor failed (e.g. incomplete SMTP settings)
+        """
+        from ..processing.email_processor import _process_email_queue
+
+        automation_state = get_automation_state()
+        process_id = f"{run_id}_{self.worker_id}_{datetime.now().strftime('%H%M%S%f')}"
+
+        email_logger.start_process(process_id, f"Email Automation Worker {self.worker_id}")
+        self.store.create_run(process_id, "worker", template_id, order_emails(batch))
+
+        if not automation_state.try_begin_run(process_id, RunQueue(self.store, process_id), template_id):
+            logger.error(f"Worker {self.worker_id} is already processing a batch")
+            return BATCH_ERROR
+        if self._stop.is_set():
+            automation_state.request_stop()
+
+        _process_email_queue()
+
+        outcomes = self.store.count_outcomes(process_id)
+        self.processed += sum(outcomes.values())
+        self.successful += outcomes.get(OUTCOME_SENT, 0)
+        self.failed += outcomes.get(OUTCOME_FAILED, 0)
+
+        if automation_state.status == STATUS_ERROR:
+            return BATCH_ERROR
+        if self.store.count(process_id, ITEM_QUEUED):
+            return BATCH_PARTIAL
+        return BATCH_COMPLETE
+
+    def _settle_interrupted_batches(self):
+        """Settle the emails of batches this worker was processing when it stopped"""
+        from ..core.automation_manager import _reconcile_interrupted_emails
+
+        while True:
+            run = self.store.get_active_run()
+            if run is None:
+                return
+            run_queue = RunQueue(self.store, run["process_id"])
+            try:
+                _reconcile_interrupted_emails(run_queue)
+            except Exception as e:
+                logger.error(f"Error settling interrupted batch {run['process_id']}: {str(e)}")
+                return
+            # Emails not sent yet go back to the shared pool
+            run_queue.finish(RUN_STOPPED)
+            logger.info(f"Settled interrupted batch {run['process_id']}")
+
+    def _heartbeat_loop(self):
+        """Renew leases, report counters and follow stop requests"""
+        automation_state = get_automation_state()
+        while not self._stop.wait(self.heartbeat_seconds):
+            if automation_state.is_running:
+                if renew_leases(self.worker_id, self.lease_seconds) is not None:
+                    self._last_renewed = time.monotonic()
+                elif time.monotonic() - self._last_renewed > self.lease_seconds * 0.8:
+                    # Another worker may take over these rows soon
+                    logger.error(f"Worker {self.worker_id} could not renew its leases, stopping the batch")
+                    automation_state.request_stop()
+
+                control = get_run_control()
+                if control and (control["Run_State"] != RUN_REQUESTED or control["Run_ID"] != self._run_id):
+                    automation_state.request_stop()
+
+            status = automation_state.status if automation_state.is_running else STATUS_IDLE
+            heartbeat_worker(self.worker_id, status, self.processed, self.successful, self.failed)
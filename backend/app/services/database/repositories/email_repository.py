@@ -7,7 +7,7 @@ from datetime import datetime
 
 from ....utils.db_utils import get_db_connection
 from ....core.config import get_settings
-from ....utils.log_parser import calculate_avg_processing_time, get_log_metrics_from_logs, get_daily_trends_from_logs
+from ....utils.event_store import send_event_store
 
 logger = logging.getLogger(__name__)
 
@@ -315,10 +315,10 @@ def get_dashboard_metrics(start_date: Optional[datetime] = None, end_date: Optio
             elif status_key.lower() == "failed":
                 status_results["Failed"] = count
         
-        # Get log-based metrics for processed count (more accurate for rate calculations)
-        log_metrics = get_log_metrics_from_logs(start_date, end_date)
+        # Get send-event metrics for processed count (more accurate for rate calculations)
+        log_metrics = send_event_store.get_metrics(start_date, end_date)
         
-        # Calculate delivery/bounce rates from LOG data (actual processed emails)
+        # Calculate delivery/bounce rates from send events (actual processed emails)
         # This is more accurate than database counts which include pending
         processed_total = log_metrics.get('total_processed', 0)
         if processed_total > 0:
@@ -334,13 +334,12 @@ def get_dashboard_metrics(start_date: Optional[datetime] = None, end_date: Optio
                 delivery_rate = 0
                 bounce_rate = 0
         
-        # Get average processing time from Email_Logs (parsed from log files)
-        # This provides accurate elapsed times from the automation process
-        time_metrics = calculate_avg_processing_time(start_date, end_date)
+        # Get average processing time from the structured send-event store
+        time_metrics = send_event_store.get_processing_time_stats(start_date, end_date)
         avg_processing_time = time_metrics.get('avg_seconds', 0)
         
         # Log the result for debugging
-        logger.debug(f"Average processing time from logs: {avg_processing_time}s (from {log_metrics.get('total_emails', 0)} emails)")
+        logger.debug(f"Average processing time from send events: {avg_processing_time}s (from {time_metrics.get('total_emails', 0)} emails)")
         
         # Get daily trends for the last 7 days or specified date range
         # Adjust the WHERE clause for trend query based on date filter
@@ -398,8 +397,7 @@ def get_dashboard_metrics(start_date: Optional[datetime] = None, end_date: Optio
                 change_pct = ((last_day_total - first_day_total) / first_day_total) * 100
                 weekly_change = f"{'+' if change_pct >= 0 else ''}{change_pct:.1f}%"
         
-        # Get log-based metrics for processed count and accurate success/failed counts
-        log_metrics = get_log_metrics_from_logs(start_date, end_date)
+        # Success/failed counts from send events (unique email IDs, success takes precedence)
         log_success = log_metrics.get('success_count', 0)
         log_failed = log_metrics.get('failed_count', 0)
         
@@ -416,11 +414,11 @@ def get_dashboard_metrics(start_date: Optional[datetime] = None, end_date: Optio
             },
             "statusSummary": {
                 "pending": status_results["Pending"],
-                "success": log_success,  # Use log-based count for consistency
-                "failed": log_failed,    # Use log-based count for consistency
+                "success": log_success,  # Use send-event count for consistency
+                "failed": log_failed,    # Use send-event count for consistency
                 "total": log_success + log_failed + status_results["Pending"]
             },
-            "trends": get_daily_trends_from_logs(start_date, end_date),  # Use log-based trends
+            "trends": send_event_store.get_daily_trends(start_date, end_date),  # Use send-event trends
             "last_updated": datetime.now().isoformat()
         }
     except Exception as e:
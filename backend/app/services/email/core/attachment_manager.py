@@ -10,6 +10,7 @@ from pathlib import Path
 from ....core.config import get_settings
 from ....utils.email_logger import email_logger
 from ....utils.file_utils import format_file_size
+from ....utils.stage_timing import StageTimer, STAGE_FOLDER_SCAN, STAGE_COMPRESSION
 
 logger = logging.getLogger(__name__)
 
@@ -149,7 +150,8 @@ class AttachmentManager:
         else:
             return False, "Attachment path does not exist or is not a directory"
     
-    def prepare_smart_attachments(self, folder_path: str) -> Tuple[List[str], Optional[str], Optional[int], bool]:
+    def prepare_smart_attachments(self, folder_path: str,
+                                  timer: Optional[StageTimer] = None) -> Tuple[List[str], Optional[str], Optional[int], bool]:
         """
         Prepare attachments using smart logic based on file count and type.
         
@@ -158,6 +160,7 @@ class AttachmentManager:
         
         Args:
             folder_path: Path to the folder containing attachments.
+            timer: Optional stage timer for the folder scan and compression stages.
             
         Returns:
             Tuple containing:
@@ -168,20 +171,23 @@ class AttachmentManager:
         """
         from .smart_attachment import get_smart_attachment_handler
         
+        timer = timer or StageTimer()
         handler = get_smart_attachment_handler()
-        should_compress, file_count, matching_files = handler.should_compress(folder_path)
-        
-        if not matching_files:
-            logger.warning(f"No matching files found in {folder_path}")
-            return [], None, 0, False
-        
-        # Calculate total size
-        total_size = sum(os.path.getsize(f) for f in matching_files if os.path.isfile(f))
+        with timer.stage(STAGE_FOLDER_SCAN):
+            should_compress, file_count, matching_files = handler.should_compress(folder_path)
+            
+            if not matching_files:
+                logger.warning(f"No matching files found in {folder_path}")
+                return [], None, 0, False
+            
+            # Calculate total size
+            total_size = sum(os.path.getsize(f) for f in matching_files if os.path.isfile(f))
         
         if should_compress:
             # Compress to ZIP
             logger.info(f"File count ({file_count}) exceeds threshold ({handler.file_count_threshold}), compressing to ZIP")
-            zip_path, compressed_size = self.compress_folder(folder_path)
+            with timer.stage(STAGE_COMPRESSION):
+                zip_path, compressed_size = self.compress_folder(folder_path)
             return [], zip_path, compressed_size, True
         else:
             # Return files for direct attachment
@@ -227,3 +233,47 @@ class AttachmentManager:
         except Exception as e:
             logger.error(f"Error compressing files: {str(e)}")
             return None, None
+    
+    def compress_folders(self, folders: List[Tuple[str, str]],
+                         archive_name: str) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Compress the matching files of several folders into one ZIP archive,
+        each folder's files in a directory of their own.
+        
+        Args:
+            folders: List of (directory name in the archive, folder path).
+            archive_name: Name for the archive (without extension).
+            
+        Returns:
+            Tuple of (archive_path, compressed_size) or (None, None) on failure.
+        """
+        from .smart_attachment import get_smart_attachment_handler
+        
+        try:
+            handler = get_smart_attachment_handler()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            zip_filename = f"{archive_name}_{timestamp}.zip"
+            archive_file_path = os.path.join(self.archive_path, zip_filename)
+            
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_zip_path = os.path.join(temp_dir, zip_filename)
+                
+                files_found = False
+                with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    for directory, folder_path in folders:
+                        for file_path in handler.get_matching_files(folder_path):
+                            files_found = True
+                            arcname = os.path.relpath(file_path, os.path.normpath(folder_path))
+                            zipf.write(file_path, os.path.join(directory, arcname))
+                
+                if not files_found:
+                    return None, None
+                
+                shutil.move(temp_zip_path, archive_file_path)
+                compressed_size = os.path.getsize(archive_file_path)
+                
+                return archive_file_path, compressed_size
+                
+        except Exception as e:
+            logger.error(f"Error compressing folders: {str(e)}")
+            return None, None
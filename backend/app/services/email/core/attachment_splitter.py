@@ -0,0 +1,64 @@
+"""
+Splitting of oversized attachment sets across several emails.
+
+When a folder is too large for one email and Google Drive cannot be used,
+its files are bin-packed into parts that each stay under the safe email
+size, so the record can be delivered as "part i of n" messages instead of
+failing.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Allowance for the MIME headers of each attached file
+MIME_FILE_OVERHEAD = 1024
+
+# Allowance per message for the body, message headers and ZIP directory
+PART_HEADROOM = 64 * 1024
+
+
+def plan_attachment_parts(manifest: List[Tuple[str, int]], capacity: int,
+                          max_parts: int) -> Tuple[Optional[List[List[str]]], Optional[str]]:
+    """
+    Bin-pack files into as few parts as possible, each at most ``capacity`` bytes.
+
+    Uses first-fit decreasing: files are placed largest first into the
+    first part with room for them, which keeps the part count close to the
+    minimum for typical attachment folders.
+
+    Args:
+        manifest: List of (file_path, size_in_bytes) tuples
+        capacity: Maximum attachment bytes per part
+        max_parts: Maximum number of parts allowed
+
+    Returns:
+        Tuple of (parts, error). parts is a list of file path lists in the
+        order they should be sent; error explains why the files cannot be
+        split (parts is None then).
+    """
+    if not manifest:
+        return None, "No files to split"
+
+    part_files: List[List[str]] = []
+    part_free: List[int] = []
+
+    for file_path, size in sorted(manifest, key=lambda item: item[1], reverse=True):
+        needed = size + MIME_FILE_OVERHEAD
+        if needed > capacity:
+            return None, f"File {file_path} ({size} bytes) is larger than one email can carry"
+
+        for index, free in enumerate(part_free):
+            if needed <= free:
+                part_files[index].append(file_path)
+                part_free[index] -= needed
+                break
+        else:
+            if len(part_files) >= max_parts:
+                return None, f"Files need more than {max_parts} emails"
+            part_files.append([file_path])
+            part_free.append(capacity - needed)
+
+    logger.info(f"Split {len(manifest)} files into {len(part_files)} parts")
+    return part_files, None
@@ -17,18 +17,55 @@ from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from email.mime.base import MIMEBase
 from email import encoders
+from concurrent.futures import Future
 from typing import Dict, List, Optional, Any, Tuple, Union
 
 from ....core.config import get_settings
-from ....utils.email_logger import email_logger
+from ....utils.email_logger import email_logger, LogEvent
 from ....utils.file_utils import format_file_size
 from .validation_utils import ValidationUtils
 from .attachment_manager import AttachmentManager, format_size
 from .smtp_manager import SMTPManager
+from .smart_attachment import get_smart_attachment_handler
+from .attachment_splitter import plan_attachment_parts, PART_HEADROOM
+from ....utils.stage_timing import (
+    StageTimer, STAGE_SMTP_CHECK, STAGE_GDRIVE_CHECK, STAGE_GDRIVE_UPLOAD, STAGE_MIME_BUILD,
+    STAGE_FOLDER_SCAN, STAGE_COMPRESSION
+)
 from ..gdrive.gdrive_integration import GDriveIntegration, GDRIVE_UPLOAD_THRESHOLD, SAFE_MAX_SIZE
 
 logger = logging.getLogger(__name__)
 
+
+class PendingDriveSend:
+    """
+    An email whose message is built but whose attachment is still being
+    uploaded to Google Drive by the upload pool.
+    
+    Returned by ``EmailSender.send_email_smart`` when an upload pool is
+    given; pass it to ``EmailSender.finish_deferred_send`` to send it.
+    """
+    
+    def __init__(self, future: Future, msg: MIMEMultipart, email_body: str,
+                 recipient: str, subject: str, folder_path: str, email_id: Optional[int],
+                 zip_path: str, total_size: int, original_size: Optional[int], timer: StageTimer):
+        self.future = future
+        self.msg = msg
+        self.email_body = email_body
+        self.recipient = recipient
+        self.subject = subject
+        self.folder_path = folder_path
+        self.email_id = email_id
+        self.zip_path = zip_path
+        self.total_size = total_size
+        self.original_size = original_size
+        self.timer = timer
+    
+    def done(self) -> bool:
+        """Whether the upload has finished and the send can complete without blocking"""
+        return self.future.done()
+
+
 class EmailSender:
     """
     Comprehensive email sending service with attachment and Google Drive integration.
@@ -158,25 +195,17 @@ class EmailSender:
                     if not is_available:
                         formatted_size = format_size(compressed_size)
                         
-                        # For very large files that exceed safe limits, fail immediately if GDrive is not available
+                        # Files that exceed safe limits are sent in parts if GDrive is not available
                         if compressed_size > SAFE_MAX_SIZE:
                             reason = f"ERROR: Attachment too large ({formatted_size}) - exceeds limit of {format_size(SAFE_MAX_SIZE)} and Google Drive is not available"
-                            email_logger.log_error(f"Cannot send email: {reason}")
-                            email_logger.log_email_transaction(
-                                email_id=email_id,
-                                email=recipient,
-                                subject=subject,
-                                file_path=folder_path,
-                                status="Failed",
-                                reason=reason,
-                                original_size=original_size,
-                                compressed_size=compressed_size
+                            return self._send_in_parts_or_fail(
+                                reason, recipient, subject, body, folder_path, sender, email_id,
+                                original_size, compressed_size=compressed_size
                             )
-                            return False, reason
                             
                         # For files that are large but within safe limits, we can try direct attachment
                         warning_msg = f"Google Drive not available: {gdrive_error}. Will try regular attachment ({formatted_size})."
-                        email_logger.log_warning(warning_msg)
+                        email_logger.log_warning(warning_msg, email_id=email_id, event=LogEvent.GDRIVE)
                     else:
                         try:
                             upload_success, drive_link, success_msg = self.gdrive_integration.handle_large_file_upload(
@@ -192,70 +221,45 @@ class EmailSender:
                                 
                                 formatted_size = format_size(compressed_size)
                                 success_reason = f"Large attachment handled via Google Drive sharing ({formatted_size})"
-                                email_logger.log_info(success_reason)
+                                email_logger.log_info(success_reason, email_id=email_id, event=LogEvent.GDRIVE)
                             else:
-                                email_logger.log_warning(f"Google Drive upload failed: {success_msg}. Attempting regular attachment.")
+                                email_logger.log_warning(f"Google Drive upload failed: {success_msg}. Attempting regular attachment.",
+                                                         email_id=email_id, event=LogEvent.GDRIVE)
                                 if compressed_size > SAFE_MAX_SIZE:
                                     reason = f"ERROR: File too large ({format_size(compressed_size)}) - GDrive upload failed: {success_msg}"
-                                    email_logger.log_email_transaction(
-                                        email_id=email_id,
-                                        email=recipient,
-                                        subject=subject,
-                                        file_path=folder_path,
-                                        status="Failed",
-                                        reason=reason,
-                                        original_size=original_size,
-                                        compressed_size=compressed_size
+                                    return self._send_in_parts_or_fail(
+                                        reason, recipient, subject, body, folder_path, sender, email_id,
+                                        original_size, compressed_size=compressed_size
                                     )
-                                    return False, reason
                         except Exception as e:
                             error_message = f"Error using Google Drive for large file: {str(e)}"
-                            email_logger.log_error(error_message)
+                            email_logger.log_error(error_message, email_id=email_id, event=LogEvent.GDRIVE)
                             
                             if compressed_size > SAFE_MAX_SIZE:
                                 reason = f"Attachment too large: {compressed_size} bytes exceeds safe limit of {SAFE_MAX_SIZE} bytes and Google Drive integration failed"
-                                email_logger.log_email_transaction(
-                                    email_id=email_id,
-                                    email=recipient,
-                                    subject=subject,
-                                    file_path=folder_path,
-                                    status="Failed",
-                                    reason=reason,
-                                    original_size=original_size,
-                                    compressed_size=compressed_size
+                                return self._send_in_parts_or_fail(
+                                    reason, recipient, subject, body, folder_path, sender, email_id,
+                                    original_size, compressed_size=compressed_size
                                 )
-                                return False, reason
                 
                 if attachment_path and not used_gdrive:
                     if compressed_size > SAFE_MAX_SIZE:
                         formatted_size = format_size(compressed_size)
                         safe_limit = format_size(SAFE_MAX_SIZE)
                         
-                        # More descriptive error message with advice
-                        reason = f"ERROR: Attachment too large ({formatted_size}) - exceeds email limit of {safe_limit}. Please split the files into smaller batches."
-                        
-                        # Log a more detailed error message with clear error icon
-                        error_message = f"⚠️ ATTACHMENT TOO LARGE: {formatted_size} exceeds {safe_limit} limit and Google Drive upload is not available. Email not sent."
-                        email_logger.log_error(error_message, email_id=email_id)
-                        
-                        email_logger.log_email_transaction(
-                            email_id=email_id,
-                            email=recipient,
-                            subject=subject,
-                            file_path=folder_path,
-                            status="Failed",
-                            reason=reason,
-                            original_size=original_size,
-                            compressed_size=compressed_size
+                        # Sent in parts; this is the reason if the files cannot be split
+                        reason = f"ERROR: Attachment too large ({formatted_size}) - exceeds email limit of {safe_limit} and could not be split into smaller emails"
+                        return self._send_in_parts_or_fail(
+                            reason, recipient, subject, body, folder_path, sender, email_id,
+                            original_size, compressed_size=compressed_size
                         )
-                        return False, reason
                     
                     filename = os.path.basename(attachment_path)
                     formatted_size = format_size(compressed_size)
                     
                     # Log that we're attaching the file directly
-                    direct_attach_msg = f"📎 Attaching file directly: {filename} ({formatted_size})"
-                    email_logger.log_info(direct_attach_msg, email_id=email_id)
+                    direct_attach_msg = f"Attaching file directly: {filename} ({formatted_size})"
+                    email_logger.log_info(direct_attach_msg, email_id=email_id, event=LogEvent.ATTACHMENT)
                     logger.info(direct_attach_msg)
                     
                     with open(attachment_path, 'rb') as file:
@@ -391,7 +395,7 @@ class EmailSender:
                         
                         if estimated_compressed_size > SAFE_MAX_SIZE:
                             reason = f"ERROR: Attachment likely too large (est. {format_size(estimated_compressed_size)}) - exceeds limit of {format_size(SAFE_MAX_SIZE)} and Google Drive is not available"
-                            email_logger.log_error(f"Pre-validation failed: {reason}")
+                            email_logger.log_error(f"Pre-validation failed: {reason}", email_id=email_id, event=LogEvent.ATTACHMENT)
                             email_logger.log_email_transaction(
                                 email_id=email_id,
                                 email=recipient,
@@ -403,7 +407,8 @@ class EmailSender:
                             )
                             return False, reason
                             
-                        email_logger.log_warning(f"Google Drive not available: {gdrive_error}. Will try regular attachment.")
+                        email_logger.log_warning(f"Google Drive not available: {gdrive_error}. Will try regular attachment.",
+                                                 email_id=email_id, event=LogEvent.GDRIVE)
             
             return self.send_email(recipient, subject, body, folder_path, sender, email_id, gdrive_share_type, specific_emails)
                 
@@ -503,7 +508,9 @@ class EmailSender:
                          email_id: Optional[int] = None,
                          gdrive_share_type: str = 'anyone',
                          specific_emails: Optional[Any] = None,
-                         use_smart_attachment: bool = True) -> Tuple[bool, Optional[str]]:
+                         use_smart_attachment: bool = True,
+                         timer: Optional[StageTimer] = None,
+                         upload_pool: Optional[Any] = None) -> Tuple[Optional[bool], Union[str, PendingDriveSend, None]]:
         """
         Send an email using smart attachment logic.
         
@@ -524,10 +531,16 @@ class EmailSender:
             gdrive_share_type: Google Drive sharing type.
             specific_emails: Specific emails for restricted sharing.
             use_smart_attachment: Whether to use smart attachment logic.
+            timer: Optional stage timer collecting per-stage durations.
+            upload_pool: Optional DriveUploadPool. When given, Google Drive
+                uploads run in the background instead of blocking this call.
             
         Returns:
-            Tuple of (success, message).
+            Tuple of (success, message). When the attachment is being uploaded
+            through upload_pool, returns (None, PendingDriveSend) instead; the
+            caller completes it with finish_deferred_send.
         """
+        timer = timer or StageTimer()
         if not use_smart_attachment:
             # Fall back to legacy behavior
             return self.send_email(recipient, subject, body, folder_path, sender, 
@@ -549,7 +562,8 @@ class EmailSender:
                 return False, error_message
             
             # Check SMTP connection
-            is_connected, error_reason = self.smtp_manager.check_smtp_connection()
+            with timer.stage(STAGE_SMTP_CHECK):
+                is_connected, error_reason = self.smtp_manager.check_smtp_connection()
             if not is_connected:
                 error_message = f"ERROR: {error_reason}"
                 email_logger.log_email_transaction(
@@ -563,10 +577,7 @@ class EmailSender:
                 return False, error_message
             
             # Create message
-            msg = MIMEMultipart()
-            msg['From'] = sender or self.smtp_manager.username
-            msg['To'] = recipient
-            msg['Subject'] = subject
+            msg = self._new_message(recipient, subject, sender)
             
             email_body = body
             original_size = None
@@ -592,7 +603,7 @@ class EmailSender:
                 
                 # Use smart attachment logic
                 direct_files, zip_path, total_size, was_compressed = \
-                    self.attachment_manager.prepare_smart_attachments(folder_path)
+                    self.attachment_manager.prepare_smart_attachments(folder_path, timer=timer)
                 
                 # Check if folder is empty or has no matching files
                 if not direct_files and not zip_path:
@@ -628,103 +639,558 @@ class EmailSender:
                     
                     # Check if need Google Drive for large files
                     if total_size > GDRIVE_UPLOAD_THRESHOLD:
-                        is_available, gdrive_error = self.gdrive_integration.check_gdrive_availability()
+                        with timer.stage(STAGE_GDRIVE_CHECK):
+                            is_available, gdrive_error = self.gdrive_integration.check_gdrive_availability()
                         
-                        if is_available:
+                        if is_available and upload_pool is not None:
+                            # Upload in the background so other emails can be sent meanwhile
+                            return None, self.queue_drive_send(
+                                upload_pool, recipient, subject, email_body, folder_path, zip_path,
+                                total_size, original_size, sender=sender, email_id=email_id,
+                                gdrive_share_type=gdrive_share_type, specific_emails=specific_emails,
+                                timer=timer
+                            )
+                        elif is_available:
                             try:
-                                upload_success, drive_link, success_msg = self.gdrive_integration.handle_large_file_upload(
-                                    zip_path, gdrive_share_type, specific_emails, recipient
-                                )
-                                
-                                if upload_success and drive_link:
-                                    used_gdrive = True
-                                    link_html = self.gdrive_integration.create_drive_link_html(drive_link, zip_path)
-                                    email_body += link_html
-                                    attachment_info = f"Google Drive link - {os.path.basename(zip_path)} ({format_size(total_size)})"
+                                with timer.stage(STAGE_GDRIVE_UPLOAD):
+                                    upload_success, drive_link, upload_msg = self.gdrive_integration.handle_large_file_upload(
+                                        zip_path, gdrive_share_type, specific_emails, recipient
+                                    )
                             except Exception as e:
                                 logger.error(f"Google Drive upload failed: {str(e)}")
-                                if total_size > SAFE_MAX_SIZE:
-                                    reason = f"ERROR: File too large ({format_size(total_size)}) and Google Drive failed"
-                                    email_logger.log_email_transaction(
-                                        email_id=email_id,
-                                        email=recipient,
-                                        subject=subject,
-                                        file_path=folder_path,
-                                        status="Failed",
-                                        reason=reason
-                                    )
-                                    return False, reason
+                                upload_success, drive_link, upload_msg = False, None, str(e)
+                            
+                            if upload_success and drive_link:
+                                used_gdrive = True
+                                link_html = self.gdrive_integration.create_drive_link_html(drive_link, zip_path)
+                                email_body += link_html
+                                attachment_info = f"Google Drive link - {os.path.basename(zip_path)} ({format_size(total_size)})"
+                            elif total_size > SAFE_MAX_SIZE:
+                                # Too large to attach: split, or fail
+                                return self._send_in_parts_or_fail(
+                                    f"ERROR: File too large ({format_size(total_size)}) and Google Drive failed: {upload_msg}",
+                                    recipient, subject, body, folder_path, sender, email_id, original_size, timer
+                                )
                         elif total_size > SAFE_MAX_SIZE:
-                            reason = f"ERROR: Attachment too large ({format_size(total_size)}) and Google Drive unavailable"
-                            email_logger.log_email_transaction(
-                                email_id=email_id,
-                                email=recipient,
-                                subject=subject,
-                                file_path=folder_path,
-                                status="Failed",
-                                reason=reason
+                            return self._send_in_parts_or_fail(
+                                f"ERROR: Attachment too large ({format_size(total_size)}) and Google Drive unavailable",
+                                recipient, subject, body, folder_path, sender, email_id, original_size, timer
                             )
-                            return False, reason
                     
                     # Attach ZIP if not using Google Drive
                     if not used_gdrive:
-                        filename = os.path.basename(zip_path)
-                        with open(zip_path, 'rb') as file:
-                            attach = MIMEApplication(file.read(), _subtype='zip')
-                            attach.add_header('Content-Disposition', f'attachment; filename="{filename}"')
-                            msg.attach(attach)
-                        attachment_info = f"ZIP attachment - {filename} ({format_size(total_size)})"
-                        email_logger.log_info(f"📎 Attached ZIP: {filename} ({format_size(total_size)})", email_id=email_id)
+                        attachment_info = self._attach_zip(msg, zip_path, total_size, email_id, timer)
                 else:
-                    # Direct file attachment
+                    # Direct file attachment; files too large for one email go out in parts
+                    if direct_files and total_size > SAFE_MAX_SIZE:
+                        split_result = self.send_in_parts(recipient, subject, body, folder_path,
+                                                          sender, email_id, original_size, timer)
+                        if split_result:
+                            return split_result
                     if direct_files:
-                        attachment_size = self._attach_individual_files(msg, direct_files)
+                        with timer.stage(STAGE_MIME_BUILD):
+                            attachment_size = self._attach_individual_files(msg, direct_files)
                         file_count = len(direct_files)
                         attachment_info = f"{file_count} files attached directly ({format_size(attachment_size)})"
-                        email_logger.log_info(f"📎 Attached {file_count} files directly ({format_size(attachment_size)})", email_id=email_id)
+                        email_logger.log_info(f"Attached {file_count} files directly ({format_size(attachment_size)})",
+                                              email_id=email_id, event=LogEvent.ATTACHMENT)
             
-            # Add HTML body
-            html_part = MIMEText(email_body, 'html')
-            html_part.add_header('Content-Type', 'text/html; charset=utf-8')
-            msg.attach(html_part)
+            return self._deliver_smart_message(
+                msg, email_body, recipient, subject, folder_path, email_id,
+                original_size, attachment_size if used_compression else None,
+                attachment_info, used_gdrive, timer
+            )
             
-            # Send email
-            self.smtp_manager.send_message(msg)
+        except Exception as e:
+            return self._log_send_exception(e, recipient, subject, folder_path, email_id)
+    
+    def send_email_to_group(self, recipients: List[str], subject: str, body: str,
+                            folder_path: Optional[str] = None, sender: Optional[str] = None,
+                            email_ids: Optional[List[Optional[int]]] = None,
+                            timer: Optional[StageTimer] = None) -> Optional[List[Tuple[bool, str]]]:
+        """
+        Send one message to several recipients in a single SMTP transaction.
+        
+        For emails that are identical apart from their recipient: the
+        attachments are prepared, the message built and its data transmitted
+        once for the whole group. The recipients are envelope recipients only
+        (like BCC), so they do not see each other; the To header is
+        "undisclosed-recipients:;".
+        
+        Args:
+            recipients: Email recipient addresses.
+            subject: Email subject.
+            body: Email body (HTML).
+            folder_path: Path to folder containing attachments.
+            sender: Sender email address (optional).
+            email_ids: Database email IDs for logging, one per recipient.
+            timer: Optional stage timer collecting per-stage durations.
             
-            # Build success message
-            if used_gdrive:
-                success_reason = f"SUCCESS: Email sent with {attachment_info}"
-            elif attachment_info:
-                success_reason = f"SUCCESS: Email sent with {attachment_info}"
+        Returns:
+            List of (success, message), one per recipient, or None if the
+            attachments need Google Drive or splitting into parts; the caller
+            then sends the emails one at a time with send_email_smart.
+        """
+        timer = timer or StageTimer()
+        email_ids = email_ids or [None] * len(recipients)
+        results: List[Optional[Tuple[bool, str]]] = [None] * len(recipients)
+        original_size = None
+        compressed_size = None
+        
+        # Invalid addresses fail on their own without holding up the group
+        envelope = []
+        for index, recipient in enumerate(recipients):
+            is_valid, error_reason = self.validation_utils.validate_email(recipient)
+            if is_valid:
+                envelope.append(index)
             else:
-                success_reason = "SUCCESS: Email sent without attachments"
+                results[index] = (False, f"ERROR: {error_reason}")
+        
+        try:
+            group_error = None
+            attachment_info = ""
+            msg = self._new_message("undisclosed-recipients:;", subject, sender)
             
+            if envelope and folder_path:
+                is_valid, error_reason = self.attachment_manager.validate_attachment_path(folder_path)
+                if not is_valid:
+                    group_error = f"ERROR: {error_reason}"
+                else:
+                    direct_files, zip_path, total_size, was_compressed = \
+                        self.attachment_manager.prepare_smart_attachments(folder_path, timer=timer)
+                    if not direct_files and not zip_path:
+                        group_error = "ERROR: Folder is empty or contains no matching files"
+                    elif was_compressed and (not zip_path or not total_size):
+                        group_error = "ERROR: Failed to compress attachment folder"
+                    elif total_size > (GDRIVE_UPLOAD_THRESHOLD if was_compressed else SAFE_MAX_SIZE):
+                        return None
+                    else:
+                        original_size = self.attachment_manager.get_folder_size(folder_path)
+                        if was_compressed:
+                            compressed_size = total_size
+                            attachment_info = self._attach_zip(msg, zip_path, total_size, email_ids[0], timer)
+                        else:
+                            with timer.stage(STAGE_MIME_BUILD):
+                                attachment_size = self._attach_individual_files(msg, direct_files)
+                            attachment_info = f"{len(direct_files)} files attached directly ({format_size(attachment_size)})"
+            
+            if envelope and not group_error:
+                with timer.stage(STAGE_MIME_BUILD):
+                    html_part = MIMEText(body, 'html')
+                    html_part.add_header('Content-Type', 'text/html; charset=utf-8')
+                    msg.attach(html_part)
+                
+                refused = self.smtp_manager.send_message_to(msg, [recipients[index] for index in envelope], timer=timer)
+                success_reason = (f"SUCCESS: Email sent with {attachment_info}" if attachment_info
+                                  else "SUCCESS: Email sent without attachments")
+                success_reason += f" (one message to {len(envelope)} recipients)"
+                for index in envelope:
+                    refusal = refused.get(recipients[index])
+                    results[index] = ((False, f"ERROR: Recipient refused - {refusal}") if refusal
+                                      else (True, success_reason))
+                logger.info(f"Email sent to {len(envelope) - len(refused)} of {len(envelope)} recipients in one message")
+        except Exception as e:
+            logger.error(f"Failed to send email to a group of {len(envelope)} recipients: {str(e)}")
+            group_error = f"ERROR: {e.__class__.__name__} - {str(e)}"
+        
+        if group_error:
+            for index in envelope:
+                results[index] = (False, group_error)
+        
+        # The group's timings are recorded once, with the first recipient, so
+        # one transaction does not count as one sample per recipient
+        elapsed_seconds = timer.elapsed()
+        for index, (success, reason) in enumerate(results):
             email_logger.log_email_transaction(
-                email_id=email_id,
-                email=recipient,
+                email_id=email_ids[index],
+                email=recipients[index],
                 subject=subject,
                 file_path=folder_path,
-                status="Success",
-                reason=success_reason,
-                original_size=original_size,
-                compressed_size=attachment_size if used_compression else None
+                status="Success" if success else "Failed",
+                reason=reason,
+                original_size=original_size if success else None,
+                compressed_size=compressed_size if success else None,
+                elapsed_seconds=elapsed_seconds if index == 0 else None,
+                stage_timings=timer.timings if index == 0 else None
             )
+        return results
+    
+    def send_digest(self, recipient: str, subject: str, body: str, folders: List[Tuple[str, str]],
+                    sender: Optional[str] = None, email_ids: Optional[List[Optional[int]]] = None,
+                    timer: Optional[StageTimer] = None) -> Optional[Tuple[bool, str]]:
+        """
+        Send several emails of one recipient as a single digest message.
+        
+        The attachment folders of all the emails are combined into one ZIP
+        archive, each folder in a directory of its own.
+        
+        Args:
+            recipient: Email recipient address.
+            subject: Subject of the digest.
+            body: Body of the digest (HTML).
+            folders: List of (directory name in the archive, folder path).
+            sender: Sender email address (optional).
+            email_ids: Database email IDs of the merged emails, for logging.
+            timer: Optional stage timer collecting per-stage durations.
             
-            logger.info(f"Email sent successfully to {recipient}")
-            return True, success_reason
-            
-        except Exception as e:
-            error_message = f"Failed to send email to {recipient}: {str(e)}"
-            logger.error(error_message)
-            
-            formatted_reason = f"ERROR: {e.__class__.__name__} - {str(e)}"
+        Returns:
+            Tuple of (success, message) shared by the merged emails, or None
+            if the combined archive is too large to attach; the caller then
+            sends the emails one at a time with send_email_smart. A failure
+            is logged for the first email only, as the caller sends the
+            others on their own.
+        """
+        timer = timer or StageTimer()
+        email_ids = email_ids or [None]
+        original_size = None
+        compressed_size = None
+        
+        is_valid, error_reason = self.validation_utils.validate_email(recipient)
+        if is_valid:
+            try:
+                msg = self._new_message(recipient, subject, sender)
+                attachment_info = ""
+                result = None
+                
+                if folders:
+                    with timer.stage(STAGE_COMPRESSION):
+                        zip_path, compressed_size = self.attachment_manager.compress_folders(
+                            folders, f"digest_{email_ids[0]}"
+                        )
+                    if not zip_path:
+                        result = (False, "ERROR: Failed to compress attachment folders")
+                    elif compressed_size > GDRIVE_UPLOAD_THRESHOLD:
+                        os.remove(zip_path)
+                        return None
+                    else:
+                        original_size = sum(self.attachment_manager.get_folder_size(folder_path)
+                                            for _, folder_path in folders)
+                        attachment_info = self._attach_zip(msg, zip_path, compressed_size, email_ids[0], timer)
+                
+                if result is None:
+                    with timer.stage(STAGE_MIME_BUILD):
+                        html_part = MIMEText(body, 'html')
+                        html_part.add_header('Content-Type', 'text/html; charset=utf-8')
+                        msg.attach(html_part)
+                    self.smtp_manager.send_message(msg, timer=timer)
+                    
+                    success_reason = (f"SUCCESS: Email sent with {attachment_info}" if attachment_info
+                                      else "SUCCESS: Email sent without attachments")
+                    result = (True, f"{success_reason} (digest of {len(email_ids)} emails)")
+                    logger.info(f"Digest of {len(email_ids)} emails sent successfully to {recipient}")
+            except Exception as e:
+                logger.error(f"Failed to send digest to {recipient}: {str(e)}")
+                result = (False, f"ERROR: {e.__class__.__name__} - {str(e)}")
+        else:
+            result = (False, f"ERROR: {error_reason}")
+        
+        # The digest's timings are recorded once, with the first email
+        success, reason = result
+        elapsed_seconds = timer.elapsed()
+        for index, email_id in enumerate(email_ids if success else email_ids[:1]):
             email_logger.log_email_transaction(
                 email_id=email_id,
                 email=recipient,
                 subject=subject,
-                file_path=folder_path,
-                status="Failed",
-                reason=formatted_reason
+                file_path=", ".join(folder_path for _, folder_path in folders) or None,
+                status="Success" if success else "Failed",
+                reason=reason,
+                original_size=original_size if success else None,
+                compressed_size=compressed_size if success else None,
+                elapsed_seconds=elapsed_seconds if index == 0 else None,
+                stage_timings=timer.timings if index == 0 else None
             )
+        return result
+    
+    def queue_drive_send(self, upload_pool: Any, recipient: str, subject: str, body: str,
+                         folder_path: str, zip_path: str, total_size: int,
+                         original_size: Optional[int], sender: Optional[str] = None,
+                         email_id: Optional[int] = None, gdrive_share_type: str = 'anyone',
+                         specific_emails: Optional[Union[List[str], str]] = None,
+                         timer: Optional[StageTimer] = None) -> PendingDriveSend:
+        """
+        Queue the Google Drive upload of a prepared ZIP and return the pending send.
+        
+        Used by send_email_smart, and to re-queue emails whose upload was
+        interrupted (e.g. by a restart) from their stored details.
+        
+        Args:
+            upload_pool: DriveUploadPool to run the upload on.
+            recipient: Email recipient.
+            subject: Email subject.
+            body: Email body (HTML); the Drive link is appended on completion.
+            folder_path: Attachment folder the ZIP was built from.
+            zip_path: Path to the ZIP archive to upload.
+            total_size: Size of the ZIP archive in bytes.
+            original_size: Size of the attachment folder in bytes.
+            sender: Email sender (defaults to the SMTP username).
+            email_id: Database ID of the email.
+            gdrive_share_type: Google Drive sharing type.
+            specific_emails: Emails to grant access when sharing with specific people.
+            timer: Optional StageTimer of the email.
             
-            return False, formatted_reason
+        Returns:
+            PendingDriveSend: Pass to finish_deferred_send once the upload is done.
+        """
+        msg = self._new_message(recipient, subject, sender)
+        
+        future = upload_pool.submit(zip_path, gdrive_share_type, specific_emails, recipient)
+        email_logger.log_info(
+            f"Queued Google Drive upload of {os.path.basename(zip_path)} ({format_size(total_size)})",
+            email_id=email_id,
+            event=LogEvent.GDRIVE
+        )
+        return PendingDriveSend(
+            future, msg, body, recipient, subject, folder_path, email_id,
+            zip_path, total_size, original_size, timer or StageTimer()
+        )
+    
+    def finish_deferred_send(self, pending: PendingDriveSend) -> Tuple[bool, str]:
+        """
+        Complete an email whose Google Drive upload was queued by send_email_smart.
+        
+        Blocks until the upload has finished. If the upload failed, the ZIP is
+        attached directly, or sent in parts if it is too large to attach, the
+        same as when uploading inline.
+        
+        Args:
+            pending: The pending send returned by send_email_smart.
+            
+        Returns:
+            Tuple of (success, message).
+        """
+        try:
+            email_body = pending.email_body
+            used_gdrive = False
+            
+            try:
+                upload_success, drive_link, upload_msg, upload_seconds = pending.future.result()
+                pending.timer.record(STAGE_GDRIVE_UPLOAD, upload_seconds)
+            except Exception as e:
+                logger.error(f"Google Drive upload failed: {str(e)}")
+                upload_success, drive_link, upload_msg = False, None, str(e)
+            
+            if upload_success and drive_link:
+                used_gdrive = True
+                email_body += self.gdrive_integration.create_drive_link_html(drive_link, pending.zip_path)
+                attachment_info = f"Google Drive link - {os.path.basename(pending.zip_path)} ({format_size(pending.total_size)})"
+            elif pending.total_size > SAFE_MAX_SIZE:
+                # Too large to attach: split, or fail
+                return self._send_in_parts_or_fail(
+                    f"ERROR: File too large ({format_size(pending.total_size)}) and Google Drive failed: {upload_msg}",
+                    pending.recipient, pending.subject, pending.email_body, pending.folder_path,
+                    pending.msg['From'], pending.email_id, pending.original_size, pending.timer
+                )
+            else:
+                attachment_info = self._attach_zip(pending.msg, pending.zip_path, pending.total_size,
+                                                   pending.email_id, pending.timer)
+            
+            return self._deliver_smart_message(
+                pending.msg, email_body, pending.recipient, pending.subject, pending.folder_path,
+                pending.email_id, pending.original_size, pending.total_size,
+                attachment_info, used_gdrive, pending.timer
+            )
+            
+        except Exception as e:
+            return self._log_send_exception(e, pending.recipient, pending.subject,
+                                            pending.folder_path, pending.email_id)
+    
+    def send_in_parts(self, recipient: str, subject: str, body: str, folder_path: str,
+                      sender: Optional[str] = None, email_id: Optional[int] = None,
+                      original_size: Optional[int] = None,
+                      timer: Optional[StageTimer] = None) -> Optional[Tuple[bool, str]]:
+        """
+        Send a folder too large for one email as several "part i of n" emails.
+        
+        The folder's matching files are bin-packed into parts under the safe
+        email size. Parts with more files than the attachment threshold are
+        sent as a ZIP, the others as direct attachments. All parts are sent
+        in one SMTP session, and the email only succeeds if every part is
+        delivered.
+        
+        Args:
+            recipient: Email recipient.
+            subject: Email subject; each part gets a "(part i of n)" suffix.
+            body: Email body (HTML), sent with every part.
+            folder_path: Attachment folder.
+            sender: Email sender (defaults to the SMTP username).
+            email_id: Database ID of the email.
+            original_size: Size of the attachment folder in bytes.
+            timer: Optional StageTimer of the email.
+            
+        Returns:
+            Tuple of (success, message), or None if splitting is disabled or
+            the files cannot be split (the caller keeps its own failure).
+        """
+        settings = get_settings()
+        if not settings.ATTACHMENT_SPLIT_ENABLED:
+            return None
+        
+        timer = timer or StageTimer()
+        handler = get_smart_attachment_handler()
+        with timer.stage(STAGE_FOLDER_SCAN):
+            manifest = handler.get_manifest(folder_path)
+        
+        parts, split_error = plan_attachment_parts(
+            manifest, SAFE_MAX_SIZE - PART_HEADROOM, settings.ATTACHMENT_SPLIT_MAX_PARTS
+        )
+        if not parts:
+            email_logger.log_warning(f"Cannot split attachments into several emails: {split_error}",
+                                     email_id=email_id, event=LogEvent.ATTACHMENT)
+            return None
+        
+        part_count = len(parts)
+        folder_name = os.path.basename(os.path.normpath(folder_path))
+        attached_sizes = []
+        email_logger.log_info(
+            f"Sending {len(manifest)} files in {part_count} emails of up to {format_size(SAFE_MAX_SIZE)}",
+            email_id=email_id,
+            event=LogEvent.ATTACHMENT
+        )
+        
+        def build_parts():
+            # Each part is built only when the previous one has been sent
+            for index, part_files in enumerate(parts, 1):
+                msg = self._new_message(recipient, f"{subject} (part {index} of {part_count})", sender)
+                if len(part_files) > handler.file_count_threshold:
+                    with timer.stage(STAGE_COMPRESSION):
+                        zip_path, zip_size = self.attachment_manager.compress_specific_files(
+                            part_files, f"{folder_name}_part{index}of{part_count}"
+                        )
+                    if not zip_path:
+                        raise IOError(f"Failed to compress part {index} of {part_count}")
+                    self._attach_zip(msg, zip_path, zip_size, email_id, timer)
+                    attached_sizes.append(zip_size)
+                else:
+                    with timer.stage(STAGE_MIME_BUILD):
+                        attached_sizes.append(self._attach_individual_files(msg, part_files))
+                
+                with timer.stage(STAGE_MIME_BUILD):
+                    part_note = (f"<p><em>Part {index} of {part_count}</em> - the attachments of this "
+                                 f"email were split across {part_count} messages.</p>")
+                    html_part = MIMEText(part_note + body, 'html')
+                    html_part.add_header('Content-Type', 'text/html; charset=utf-8')
+                    msg.attach(html_part)
+                yield msg
+        
+        sent, send_error = self.smtp_manager.send_messages(build_parts(), timer=timer)
+        
+        if sent == part_count:
+            reason = f"SUCCESS: Email sent in {part_count} parts ({format_size(sum(attached_sizes))} attached)"
+            status = "Success"
+            logger.info(f"Email sent successfully to {recipient} in {part_count} parts")
+        else:
+            reason = f"ERROR: Only {sent} of {part_count} parts sent - {send_error}"
+            status = "Failed"
+            logger.error(f"Failed to send all parts to {recipient}: {send_error}")
+        
+        email_logger.log_email_transaction(
+            email_id=email_id,
+            email=recipient,
+            subject=subject,
+            file_path=folder_path,
+            status=status,
+            reason=reason,
+            original_size=original_size,
+            compressed_size=sum(attached_sizes),
+            elapsed_seconds=timer.elapsed(),
+            stage_timings=timer.timings
+        )
+        return status == "Success", reason
+    
+    def _send_in_parts_or_fail(self, reason: str, recipient: str, subject: str, body: str,
+                               folder_path: str, sender: Optional[str], email_id: Optional[int],
+                               original_size: Optional[int], timer: Optional[StageTimer] = None,
+                               compressed_size: Optional[int] = None) -> Tuple[bool, str]:
+        """Send an email too large to attach in parts, or log and return `reason` if it cannot be split"""
+        split_result = self.send_in_parts(recipient, subject, body, folder_path,
+                                          sender, email_id, original_size, timer)
+        if split_result:
+            return split_result
+        email_logger.log_email_transaction(
+            email_id=email_id,
+            email=recipient,
+            subject=subject,
+            file_path=folder_path,
+            status="Failed",
+            reason=reason,
+            original_size=original_size,
+            compressed_size=compressed_size
+        )
+        return False, reason
+    
+    def _new_message(self, recipient: str, subject: str, sender: Optional[str] = None) -> MIMEMultipart:
+        """Create an empty message with the From, To and Subject headers set"""
+        msg = MIMEMultipart()
+        msg['From'] = sender or self.smtp_manager.username
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        return msg
+    
+    def _attach_zip(self, msg: MIMEMultipart, zip_path: str, total_size: int,
+                    email_id: Optional[int], timer: StageTimer) -> str:
+        """Attach a ZIP archive to the message and return the attachment description"""
+        filename = os.path.basename(zip_path)
+        with timer.stage(STAGE_MIME_BUILD), open(zip_path, 'rb') as file:
+            attach = MIMEApplication(file.read(), _subtype='zip')
+            attach.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+            msg.attach(attach)
+        email_logger.log_info(f"Attached ZIP: {filename} ({format_size(total_size)})", email_id=email_id,
+                              event=LogEvent.ATTACHMENT)
+        return f"ZIP attachment - {filename} ({format_size(total_size)})"
+    
+    def _deliver_smart_message(self, msg: MIMEMultipart, email_body: str, recipient: str,
+                               subject: str, folder_path: Optional[str], email_id: Optional[int],
+                               original_size: Optional[int], compressed_size: Optional[int],
+                               attachment_info: str, used_gdrive: bool,
+                               timer: StageTimer) -> Tuple[bool, str]:
+        """Add the HTML body, send the message and log the successful transaction"""
+        with timer.stage(STAGE_MIME_BUILD):
+            html_part = MIMEText(email_body, 'html')
+            html_part.add_header('Content-Type', 'text/html; charset=utf-8')
+            msg.attach(html_part)
+        
+        # Send email
+        self.smtp_manager.send_message(msg, timer=timer)
+        
+        # Build success message
+        if used_gdrive:
+            success_reason = f"SUCCESS: Email sent with {attachment_info}"
+        elif attachment_info:
+            success_reason = f"SUCCESS: Email sent with {attachment_info}"
+        else:
+            success_reason = "SUCCESS: Email sent without attachments"
+        
+        email_logger.log_email_transaction(
+            email_id=email_id,
+            email=recipient,
+            subject=subject,
+            file_path=folder_path,
+            status="Success",
+            reason=success_reason,
+            original_size=original_size,
+            compressed_size=compressed_size,
+            elapsed_seconds=timer.elapsed(),
+            stage_timings=timer.timings
+        )
+        
+        logger.info(f"Email sent successfully to {recipient}")
+        return True, success_reason
+    
+    def _log_send_exception(self, e: Exception, recipient: str, subject: str,
+                            folder_path: Optional[str], email_id: Optional[int]) -> Tuple[bool, str]:
+        """Log a failed send caused by an exception and return the failure result"""
+        error_message = f"Failed to send email to {recipient}: {str(e)}"
+        logger.error(error_message)
+        
+        formatted_reason = f"ERROR: {e.__class__.__name__} - {str(e)}"
+        email_logger.log_email_transaction(
+            email_id=email_id,
+            email=recipient,
+            subject=subject,
+            file_path=folder_path,
+            status="Failed",
+            reason=formatted_reason
+        )
+        
+        return False, formatted_reason
@@ -0,0 +1,138 @@
+"""
+In-memory cache of attachment folder sizes.
+
+Ordering a send queue by size needs the total size of every record's
+folder, which means walking the folder and stat-ing each matching file.
+The total is cached per folder and reused while the folder's own mtime is
+unchanged (one stat call), so repeated runs over the same records do not
+walk them again. Changes deep inside a folder do not touch its mtime, so
+entries are also recomputed after MANIFEST_CACHE_TTL_SECONDS.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from ....core.config import get_settings
+from .smart_attachment import get_smart_attachment_handler
+
+logger = logging.getLogger(__name__)
+
+# Most folders kept; the least recently used are dropped first
+MANIFEST_CACHE_MAX_ENTRIES = 100000
+
+
+class ManifestSizeCache:
+    """Total size of the matching files of a folder, keyed by absolute path"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = MANIFEST_CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a cached size is trusted while the folder's
+                mtime is unchanged (defaults to MANIFEST_CACHE_TTL_SECONDS)
+            max_entries: Most folders kept
+        """
+        self.ttl_seconds = get_settings().MANIFEST_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # path -> (time computed, mtime_ns, size)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._handler = None
+
+    def get_size(self, folder_path: Optional[str]) -> int:
+        """
+        Get the total size of the files that would be attached from a folder.
+
+        Args:
+            folder_path: Folder (or single file) of an email record
+
+        Returns:
+            int: Size in bytes; 0 if there is no path or it does not exist
+        """
+        if not folder_path:
+            return 0
+        path = os.path.abspath(os.path.normpath(folder_path))
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[1] == mtime_ns and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(path)
+                return entry[2]
+
+        size = sum(file_size for _, file_size in self._get_handler().get_manifest(path))
+
+        with self._lock:
+            self._entries[path] = (now, mtime_ns, size)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return size
+
+    def get_cached_size(self, folder_path: Optional[str]) -> Optional[int]:
+        """
+        Get a folder's size only if it is cached and still valid, without walking it.
+
+        Args:
+            folder_path: Folder (or single file) of an email record
+
+        Returns:
+            Optional[int]: Size in bytes, or None if it would have to be computed
+        """
+        if not folder_path:
+            return 0
+        path = os.path.abspath(os.path.normpath(folder_path))
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[1] == mtime_ns and time.monotonic() - entry[0] < self.ttl_seconds:
+                return entry[2]
+        return None
+
+    def invalidate(self, folder_path: Optional[str] = None):
+        """
+        Drop a cached size so the next access computes it again.
+
+        Args:
+            folder_path: Folder to drop; all folders, and the extension filter,
+                if omitted
+        """
+        with self._lock:
+            if folder_path is None:
+                self._entries.clear()
+                self._handler = None
+            else:
+                self._entries.pop(os.path.abspath(os.path.normpath(folder_path)), None)
+
+    def _get_handler(self):
+        """Attachment handler applying the configured extension filter"""
+        if self._handler is None:
+            self._handler = get_smart_attachment_handler()
+        return self._handler
+
+
+_manifest_size_cache: Optional[ManifestSizeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_manifest_size_cache() -> ManifestSizeCache:
+    """Get the process-wide folder size cache"""
+    global _manifest_size_cache
+    if _manifest_size_cache is None:
+        with _cache_lock:
+            if _manifest_size_cache is None:
+                _manifest_size_cache = ManifestSizeCache()
+    return _manifest_size_cache
@@ -142,6 +142,24 @@ class SmartAttachmentHandler:
         file_ext = os.path.splitext(file_path)[1].lower()
         return file_ext in extension_list
     
+    def get_manifest(self, folder_path: str) -> List[Tuple[str, int]]:
+        """
+        List the matching files of a folder with their sizes.
+        
+        Args:
+            folder_path: Path to the folder.
+            
+        Returns:
+            List of (file_path, size_in_bytes) tuples.
+        """
+        manifest = []
+        for file_path in self.get_matching_files(folder_path):
+            try:
+                manifest.append((file_path, os.path.getsize(file_path)))
+            except OSError:
+                logger.warning(f"Skipping unreadable file: {file_path}")
+        return manifest
+    
     def analyze_folder(self, folder_path: str) -> Dict:
         """
         Analyze a folder and determine the attachment strategy.
@@ -5,7 +5,10 @@ This module provides SMTP connection management and email sending functionality.
 """
 
 import smtplib
-from typing import Tuple
+from email.message import Message
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ....utils.stage_timing import StageTimer, STAGE_SMTP_CONNECT, STAGE_SMTP_DATA
 
 class SMTPManager:
     """
@@ -42,18 +45,93 @@ class SMTPManager:
         except Exception as e:
             return False, str(e)
     
-    def send_message(self, msg):
+    def send_message(self, msg, timer: Optional[StageTimer] = None):
         """
         Send email message via SMTP.
         
         Args:
             msg: Email message object to send
+            timer: Optional stage timer; connect/TLS/auth and DATA are timed separately
             
         Raises:
             smtplib.SMTPException: If sending fails
         """
-        with smtplib.SMTP(self.smtp_server, self.port) as server:
-            if self.use_tls:
-                server.starttls()
-            server.login(self.username, self.password)
-            server.send_message(msg)
+        timer = timer or StageTimer()
+        with timer.stage(STAGE_SMTP_CONNECT):
+            server = smtplib.SMTP(self.smtp_server, self.port)
+        with server:
+            with timer.stage(STAGE_SMTP_CONNECT):
+                if self.use_tls:
+                    server.starttls()
+                server.login(self.username, self.password)
+            with timer.stage(STAGE_SMTP_DATA):
+                server.send_message(msg)
+    
+    def send_message_to(self, msg, recipients: List[str],
+                        timer: Optional[StageTimer] = None) -> Dict[str, Tuple[int, bytes]]:
+        """
+        Send one message to several envelope recipients in a single DATA transmission.
+        
+        The recipients are given as RCPT TO only, like BCC; the message's own
+        To header is not used for delivery.
+        
+        Args:
+            msg: Email message object to send
+            recipients: Envelope recipient addresses
+            timer: Optional stage timer; connect/TLS/auth and DATA are timed separately
+            
+        Returns:
+            Dict of the refused recipients -> (SMTP code, server response);
+            empty if the message was accepted for every recipient
+            
+        Raises:
+            smtplib.SMTPException: If sending fails for a reason other than
+                refused recipients
+        """
+        timer = timer or StageTimer()
+        with timer.stage(STAGE_SMTP_CONNECT):
+            server = smtplib.SMTP(self.smtp_server, self.port)
+        with server:
+            with timer.stage(STAGE_SMTP_CONNECT):
+                if self.use_tls:
+                    server.starttls()
+                server.login(self.username, self.password)
+            with timer.stage(STAGE_SMTP_DATA):
+                try:
+                    return server.send_message(msg, to_addrs=recipients)
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Raised only when every recipient was refused
+                    return e.recipients
+    
+    def send_messages(self, messages: Iterable[Message],
+                      timer: Optional[StageTimer] = None) -> Tuple[int, Optional[str]]:
+        """
+        Send several messages over a single SMTP session.
+        
+        Messages are taken from the iterable one at a time, so a generator can
+        build each message only when it is about to be sent.
+        
+        Args:
+            messages: Email message objects to send, in order
+            timer: Optional stage timer; connect/TLS/auth and DATA are timed separately
+            
+        Returns:
+            Tuple of (number of messages sent, error message or None)
+        """
+        timer = timer or StageTimer()
+        sent = 0
+        try:
+            with timer.stage(STAGE_SMTP_CONNECT):
+                server = smtplib.SMTP(self.smtp_server, self.port)
+            with server:
+                with timer.stage(STAGE_SMTP_CONNECT):
+                    if self.use_tls:
+                        server.starttls()
+                    server.login(self.username, self.password)
+                for msg in messages:
+                    with timer.stage(STAGE_SMTP_DATA):
+                        server.send_message(msg)
+                    sent += 1
+            return sent, None
+        except Exception as e:
+            return sent, f"{e.__class__.__name__} - {str(e)}"
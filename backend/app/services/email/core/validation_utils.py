@@ -1,6 +1,9 @@
 import re
 from typing import Tuple
 
+# Compiled once; shared with the automation's pre-flight validation
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
 class ValidationUtils:
     def validate_email(self, email: str) -> Tuple[bool, str]:
         """
@@ -12,7 +15,7 @@ class ValidationUtils:
         Returns:
             Tuple[bool, str]: (True, "") if valid, (False, error message) if invalid
         """
-        if re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        if EMAIL_PATTERN.match(email):
             return True, ""
         else:
             return False, "Invalid email format"
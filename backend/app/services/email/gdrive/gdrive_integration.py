@@ -10,7 +10,7 @@ from ....utils.file_utils import format_file_size
 SERVER_ENV = os.environ.get('SERVER_ENV', '').lower() == 'true'
 
 try:
-    from ...storage import GoogleDriveService
+    from ...storage import get_drive_client_holder
     GDRIVE_AVAILABLE = True
     
     if SERVER_ENV:
@@ -50,11 +50,11 @@ class GDriveIntegration:
         settings = get_settings()
         creds_path = os.path.abspath(settings.GDRIVE_CREDENTIALS_PATH)
         
-        # If we have valid OAuth credentials and a valid credential file exists
-        if os.path.exists(creds_path):
+        # If we have valid OAuth credentials and a valid credential file exists,
+        # or an alternative API endpoint that needs none
+        if os.path.exists(creds_path) or settings.GDRIVE_API_BASE_URL:
             try:
-                gdrive = GoogleDriveService()
-                if gdrive.is_authenticated:
+                if get_drive_client_holder().is_available():
                     return True, "Google Drive service is available"
                 else:
                     # Enable mock mode for testing in non-interactive environments
@@ -79,7 +79,7 @@ class GDriveIntegration:
             return False, None, "Google Drive service not available"
         
         try:
-            gdrive = GoogleDriveService()
+            gdrive = get_drive_client_holder().get_thread_client()
             logger.info("Using Google Drive account for file upload")
             
             file_size_bytes = os.path.getsize(attachment_path)
@@ -109,22 +109,17 @@ class GDriveIntegration:
                     elif isinstance(specific_emails, list):
                         email_list = specific_emails
                     
-                    for email in email_list:
-                        if email != recipient:
-                            try:
-                                file_id = drive_link.split('/')[-2]
-                                permission = {
-                                    'type': 'user',
-                                    'role': 'reader',
-                                    'emailAddress': email
-                                }
-                                gdrive.drive_service.permissions().create(
-                                    fileId=file_id,
-                                    body=permission
-                                ).execute()
-                                email_logger.log_info(f"Added specific access for {email}")
-                            except Exception as e:
-                                email_logger.log_warning(f"Failed to share with {email}: {str(e)}")
+                    extra_emails = [email for email in email_list if email != recipient]
+                    if extra_emails:
+                        file_id = drive_link.split('/')[-2]
+                        grants = gdrive.grant_permissions(file_id, extra_emails)
+                        
+                        granted = [email for email, error in grants.items() if error is None]
+                        if granted:
+                            email_logger.log_info(f"Added specific access for {len(granted)} address(es): {', '.join(granted)}")
+                        for email, error in grants.items():
+                            if error is not None:
+                                email_logger.log_warning(f"Failed to share with {email}: {error}")
             else:
                 upload_success, drive_link, error_msg = gdrive.upload_and_get_link(attachment_path)
             
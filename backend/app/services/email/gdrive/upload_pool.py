@@ -0,0 +1,124 @@
+"""
+Bounded pool for Google Drive uploads.
+
+Large attachments are uploaded by a small number of worker threads so the
+send loop can keep delivering emails whose attachments are ready while
+other uploads are still running. All workers share one Drive account, so
+the pool size is the per-account concurrency cap, and a quota error from
+any worker pauses every worker with exponential backoff.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+from ....core.config import get_settings
+from ....utils.email_logger import email_logger, LogEvent
+from .gdrive_integration import GDriveIntegration
+
+logger = logging.getLogger(__name__)
+
+# Error fragments Drive returns when the account is being rate limited
+QUOTA_ERROR_MARKERS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded", "429")
+
+MAX_BACKOFF_SECONDS = 64
+
+
+def _is_quota_error(message: Optional[str]) -> bool:
+    """Whether an upload error message indicates Drive rate limiting"""
+    return bool(message) and any(marker in message for marker in QUOTA_ERROR_MARKERS)
+
+
+class DriveUploadPool:
+    """Runs Drive uploads on a bounded set of worker threads"""
+
+    def __init__(self, max_workers: Optional[int] = None, quota_retries: Optional[int] = None):
+        """
+        Initialize the upload pool.
+
+        Args:
+            max_workers: Concurrent uploads for the Drive account
+                (defaults to GDRIVE_UPLOAD_CONCURRENCY)
+            quota_retries: Retries after a rate-limit error
+                (defaults to GDRIVE_UPLOAD_QUOTA_RETRIES)
+        """
+        settings = get_settings()
+        self.max_workers = max(1, max_workers or settings.GDRIVE_UPLOAD_CONCURRENCY)
+        self.quota_retries = settings.GDRIVE_UPLOAD_QUOTA_RETRIES if quota_retries is None else quota_retries
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gdrive-upload")
+        self._gdrive = GDriveIntegration()
+        self._backoff_lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def submit(self, attachment_path: str, gdrive_share_type: str = 'anyone',
+               specific_emails: Optional[Union[List[str], str]] = None,
+               recipient: Optional[str] = None) -> Future:
+        """
+        Queue an upload.
+
+        Returns:
+            Future resolving to (success, drive_link, message, upload_seconds)
+        """
+        return self._executor.submit(
+            self._upload, attachment_path, gdrive_share_type, specific_emails, recipient
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting uploads and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
+
+    def _upload(self, attachment_path: str, gdrive_share_type: str,
+                specific_emails: Optional[Union[List[str], str]],
+                recipient: Optional[str]) -> Tuple[bool, Optional[str], Optional[str], float]:
+        """Worker: upload one file, backing off while the account is rate limited"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self._wait_for_quota()
+            success, drive_link, message = self._gdrive.handle_large_file_upload(
+                attachment_path, gdrive_share_type, specific_emails, recipient
+            )
+            if success or not _is_quota_error(message) or attempt >= self.quota_retries:
+                return success, drive_link, message, time.monotonic() - started
+
+            delay = self._back_off(attempt)
+            attempt += 1
+            email_logger.log_warning(
+                f"Google Drive rate limit hit, retrying upload in {delay:.1f}s "
+                f"(attempt {attempt}/{self.quota_retries})",
+                event=LogEvent.GDRIVE
+            )
+
+    def _wait_for_quota(self):
+        """Block until any account-wide backoff has passed"""
+        while True:
+            with self._backoff_lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _back_off(self, attempt: int) -> float:
+        """Pause all workers with exponential backoff plus jitter; returns the delay"""
+        delay = min(MAX_BACKOFF_SECONDS, 2 ** attempt) + random.uniform(0, 1)
+        with self._backoff_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+
+_upload_pool: Optional[DriveUploadPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_drive_upload_pool() -> DriveUploadPool:
+    """Get the process-wide Drive upload pool"""
+    global _upload_pool
+    if _upload_pool is None:
+        with _pool_lock:
+            if _upload_pool is None:
+                _upload_pool = DriveUploadPool()
+    return _upload_pool
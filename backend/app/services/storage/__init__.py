@@ -5,9 +5,10 @@ This module provides storage service integrations:
 - gdrive: Google Drive integration with OAuth 2.0 authentication
 """
 
-from .gdrive import GoogleDriveClient, GoogleDriveService
+from .gdrive import GoogleDriveClient, GoogleDriveService, get_drive_client_holder
 
 __all__ = [
     'GoogleDriveClient',
-    'GoogleDriveService'
+    'GoogleDriveService',
+    'get_drive_client_holder'
 ]
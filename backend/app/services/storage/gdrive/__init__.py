@@ -5,6 +5,10 @@ This module provides Google Drive integration with a refactored structure:
 - authentication.py: Handles OAuth 2.0 authentication
 - file_operations.py: Handles file uploads and link generation
 - gdrive_client.py: Main client using composition pattern
+- client_holder.py: Process-wide cached client with proactive token refresh
+- upload_sessions.py: Persisted resumable upload sessions
+- upload_cache.py: Content hash -> Drive file deduplication cache
+- fake_drive_server.py: Local Drive API stand-in for offline benchmarking
 
 For backward compatibility, GoogleDriveClient is exported as GoogleDriveService.
 """
@@ -12,6 +16,7 @@ For backward compatibility, GoogleDriveClient is exported as GoogleDriveService.
 from .gdrive_client import GoogleDriveClient
 from .authentication import GoogleDriveAuthenticator
 from .file_operations import GoogleDriveFileOperations
+from .client_holder import DriveClientHolder, get_drive_client_holder
 
 # Backward compatibility - export GoogleDriveClient as GoogleDriveService
 GoogleDriveService = GoogleDriveClient
@@ -20,5 +25,7 @@ __all__ = [
     'GoogleDriveClient',
     'GoogleDriveService',  # Backward compatibility
     'GoogleDriveAuthenticator',
-    'GoogleDriveFileOperations'
+    'GoogleDriveFileOperations',
+    'DriveClientHolder',
+    'get_drive_client_holder'
 ]
@@ -1,8 +1,12 @@
 import os
+import json
 import logging
 import pickle
+from datetime import datetime, timedelta
 from typing import Optional
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from google.auth.credentials import AnonymousCredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from ....core.config import get_settings
@@ -29,6 +33,20 @@ class GoogleDriveAuthenticator:
         self.credentials_file = credentials_file or os.environ.get('GDRIVE_CREDENTIALS_FILE', settings.GDRIVE_CREDENTIALS_PATH)
         self.token_file = token_file or os.environ.get('GDRIVE_TOKEN_FILE', settings.GDRIVE_TOKEN_PATH)
         
+        # Credentials of the last successful authentication and the HTTP
+        # transport used to refresh them, kept so refreshes reuse one session
+        self.credentials = None
+        self._refresh_request = None
+        
+        # Alternative API endpoint, e.g. the local fake Drive server
+        self.api_base_url = settings.GDRIVE_API_BASE_URL
+        
+    def _get_refresh_request(self) -> Request:
+        """Get the (reused) transport request used for token refreshes"""
+        if self._refresh_request is None:
+            self._refresh_request = Request()
+        return self._refresh_request
+        
     def authenticate(self) -> Optional[object]:
         """
         Authenticate with Google Drive API using OAuth 2.0
@@ -37,6 +55,9 @@ class GoogleDriveAuthenticator:
         Returns:
             Google Drive service object if authentication was successful, None otherwise
         """
+        if self.api_base_url:
+            return self._authenticate_local_endpoint()
+        
         try:
             creds = None
             
@@ -57,7 +78,7 @@ class GoogleDriveAuthenticator:
                 if creds and creds.expired and creds.refresh_token:
                     try:
                         logger.info("Refreshing expired credentials...")
-                        creds.refresh(Request())
+                        creds.refresh(self._get_refresh_request())
                     except Exception as e:
                         logger.error(f"Failed to refresh credentials: {str(e)}")
                         email_logger.log_error(f"Failed to refresh Google Drive credentials: {str(e)}")
@@ -100,24 +121,12 @@ class GoogleDriveAuthenticator:
                         return None
                 
                 # Save the credentials securely for the next run
-                try:
-                    # Ensure credentials directory exists
-                    os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
-                    
-                    with open(self.token_file, 'wb') as token:
-                        pickle.dump(creds, token)
-                    logger.info(f"Credentials saved to {self.token_file}")
-                    
-                    # Set more restrictive permissions on Windows if possible
-                    self._set_file_permissions()
-                    
-                except Exception as e:
-                    logger.error(f"Failed to save credentials: {str(e)}")
-                    email_logger.log_error(f"Failed to save Google Drive credentials: {str(e)}")
-                    # We can still continue with the current session even if saving fails
+                self._save_credentials(creds)
+            
+            self.credentials = creds
             
             # Build the Drive service
-            drive_service = build('drive', 'v3', credentials=creds)
+            drive_service = self.build_service()
             
             # Verify the authentication works by making a simple API call
             try:
@@ -135,6 +144,90 @@ class GoogleDriveAuthenticator:
             logger.error(f"Failed to authenticate with Google Drive: {str(e)}")
             return None
     
+    def build_service(self) -> Optional[object]:
+        """
+        Build a Drive service with its own HTTP transport from the loaded credentials.
+        
+        httplib2 transports are not thread-safe, so each thread that talks to
+        Drive needs its own service object; the credentials are shared.
+        
+        Returns:
+            Google Drive service object, or None if not authenticated yet
+        """
+        if not self.credentials:
+            return None
+        if self.api_base_url:
+            # Point every URL of the discovery document (API, upload, batch) at the endpoint
+            document = json.loads(get_static_doc('drive', 'v3'))
+            root_url = self.api_base_url.rstrip('/') + '/'
+            document['rootUrl'] = root_url
+            document['baseUrl'] = root_url + document['servicePath']
+            return build_from_document(document, credentials=self.credentials)
+        return build('drive', 'v3', credentials=self.credentials)
+    
+    def _authenticate_local_endpoint(self) -> Optional[object]:
+        """Connect to the configured API endpoint without OAuth (fake Drive server)"""
+        try:
+            self.credentials = AnonymousCredentials()
+            drive_service = self.build_service()
+            about = drive_service.about().get(fields="user").execute()
+            logger.info(f"Using Google Drive API endpoint {self.api_base_url} as {about.get('user', {}).get('emailAddress')}")
+            return drive_service
+        except Exception as e:
+            logger.error(f"Failed to connect to Google Drive API endpoint {self.api_base_url}: {str(e)}")
+            self.credentials = None
+            return None
+    
+    def refresh_if_expiring(self, margin_seconds: int) -> bool:
+        """
+        Refresh the current credentials if they expire within the margin.
+        
+        The Drive service built from these credentials holds a reference to
+        the same object, so a refresh here takes effect without rebuilding it.
+        
+        Args:
+            margin_seconds: Refresh when fewer than this many seconds remain
+            
+        Returns:
+            bool: False if a needed refresh failed, True otherwise
+        """
+        creds = self.credentials
+        if not creds or not getattr(creds, 'refresh_token', None):
+            return True
+        
+        # google-auth stores expiry as a naive UTC datetime
+        expiry = getattr(creds, 'expiry', None)
+        if expiry and expiry - timedelta(seconds=margin_seconds) > datetime.utcnow():
+            return True
+        
+        try:
+            logger.info("Proactively refreshing Google Drive credentials before expiry")
+            creds.refresh(self._get_refresh_request())
+            self._save_credentials(creds)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to refresh credentials: {str(e)}")
+            email_logger.log_error(f"Failed to refresh Google Drive credentials: {str(e)}")
+            return False
+    
+    def _save_credentials(self, creds):
+        """Save the credentials securely for the next run"""
+        try:
+            # Ensure credentials directory exists
+            os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
+            
+            with open(self.token_file, 'wb') as token:
+                pickle.dump(creds, token)
+            logger.info(f"Credentials saved to {self.token_file}")
+            
+            # Set more restrictive permissions on Windows if possible
+            self._set_file_permissions()
+            
+        except Exception as e:
+            logger.error(f"Failed to save credentials: {str(e)}")
+            email_logger.log_error(f"Failed to save Google Drive credentials: {str(e)}")
+            # We can still continue with the current session even if saving fails
+    
     def _set_file_permissions(self):
         """Set restrictive permissions on the token file (Windows-specific)"""
         if os.name == 'nt':
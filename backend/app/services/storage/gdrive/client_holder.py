@@ -0,0 +1,140 @@
+"""
+Process-wide Google Drive client holder.
+
+Building a ``GoogleDriveClient`` unpickles the token file, may refresh the
+credentials, runs API discovery and verifies the account with an API call.
+The holder does that once per process, refreshes the token proactively
+before it expires, and caches the availability result so that checking
+whether Drive can be used is cheap enough to do for every large email.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+from ....core.config import get_settings
+from .gdrive_client import GoogleDriveClient
+
+logger = logging.getLogger(__name__)
+
+
+class DriveClientHolder:
+    """Holds one authenticated Google Drive client shared by all senders"""
+
+    def __init__(self):
+        settings = get_settings()
+        self.refresh_margin_seconds = settings.GDRIVE_TOKEN_REFRESH_MARGIN_SECONDS
+        self.availability_ttl_seconds = settings.GDRIVE_AVAILABILITY_TTL_SECONDS
+
+        self._lock = threading.RLock()
+        # Serializes authentication, which runs outside _lock so that cached
+        # availability checks never wait on the network
+        self._auth_lock = threading.Lock()
+        self._local = threading.local()
+        self._client: Optional[GoogleDriveClient] = None
+        self._checked_at: Optional[float] = None
+        self._available = False
+
+    def get_client(self) -> GoogleDriveClient:
+        """
+        Get the shared Drive client, authenticating on first use.
+
+        Credentials close to expiry are refreshed in place; if that fails the
+        client is rebuilt from the token file.
+
+        Returns:
+            GoogleDriveClient: Shared client (check ``is_authenticated``)
+        """
+        with self._auth_lock:
+            with self._lock:
+                client = self._client
+                rebuild = client is None or self._is_stale()
+
+            if client is not None and client.is_authenticated:
+                if client.authenticator.refresh_if_expiring(self.refresh_margin_seconds):
+                    return client
+                logger.warning("Google Drive token refresh failed, re-authenticating")
+                rebuild = True
+            if not rebuild:
+                return client
+
+            client = GoogleDriveClient()
+            with self._lock:
+                self._client = client
+                self._available = client.is_authenticated
+                self._checked_at = time.monotonic()
+            return client
+
+    def get_thread_client(self) -> GoogleDriveClient:
+        """
+        Get a Drive client that is safe to use from the calling thread.
+
+        Each thread gets its own service and HTTP transport built from the
+        shared credentials, so parallel uploads do not share a connection.
+
+        Returns:
+            GoogleDriveClient: Client owned by the calling thread
+        """
+        shared = self.get_client()
+        if not shared.is_authenticated:
+            return shared
+
+        client = getattr(self._local, 'client', None)
+        if client is None or client.authenticator is not shared.authenticator:
+            client = GoogleDriveClient.from_authenticator(shared.authenticator)
+            self._local.client = client
+        return client
+
+    def is_available(self) -> bool:
+        """
+        Cached check whether an authenticated Drive client is available.
+
+        A failed authentication is remembered for the availability TTL so
+        that a missing or revoked token does not cost a full auth attempt
+        on every large email.
+
+        Returns:
+            bool: True if the shared client is authenticated
+        """
+        with self._lock:
+            if self._checked_at is not None and not self._is_stale():
+                return self._available
+        return self.get_client().is_authenticated
+
+    def invalidate(self):
+        """Drop the shared client, e.g. after the token was revoked"""
+        with self._lock:
+            self._client = None
+            self._checked_at = None
+            self._available = False
+
+    def status(self) -> Tuple[bool, Optional[float]]:
+        """Get the cached availability and its age in seconds without authenticating"""
+        with self._lock:
+            if self._checked_at is None:
+                return False, None
+            return self._available, time.monotonic() - self._checked_at
+
+    def _is_stale(self) -> bool:
+        """Whether a failed availability result is older than the TTL"""
+        if self._checked_at is None:
+            return True
+        if self._available:
+            # Authenticated clients stay valid; token expiry is handled by refresh
+            return False
+        return time.monotonic() - self._checked_at >= self.availability_ttl_seconds
+
+
+_drive_client_holder: Optional[DriveClientHolder] = None
+_holder_lock = threading.Lock()
+
+
+def get_drive_client_holder() -> DriveClientHolder:
+    """Get the process-wide Drive client holder"""
+    global _drive_client_holder
+    if _drive_client_holder is None:
+        with _holder_lock:
+            if _drive_client_holder is None:
+                _drive_client_holder = DriveClientHolder()
+    return _drive_client_holder
@@ -0,0 +1,354 @@
+"""
+Local stand-in for the Google Drive v3 API.
+
+Implements the endpoints the project uses - ``files.create`` (multipart and
+resumable uploads), ``files.get``, ``permissions.create``, ``about.get`` and
+batch requests - with configurable latency, bandwidth and error injection,
+so upload concurrency and chunking can be benchmarked without network
+access or a Google account. Files are kept in memory as size and MD5 only.
+
+Run it from the backend directory::
+
+    python -m app.services.storage.gdrive.fake_drive_server --port 8765 --latency-ms 80 --bandwidth-kbps 20000 --error-rate 0.02
+
+and point the application at it with ``GDRIVE_API_BASE_URL=http://127.0.0.1:8765/``.
+"""
+
+import json
+import time
+import uuid
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Error reasons Drive uses for the statuses that can be injected
+ERROR_REASONS = {
+    403: "userRateLimitExceeded",
+    429: "rateLimitExceeded",
+    500: "backendError",
+    503: "backendError"
+}
+
+
+class FakeDriveState:
+    """In-memory files, permissions, upload sessions and fault settings"""
+
+    def __init__(self, latency_ms: int = 0, bandwidth_kbps: int = 0,
+                 error_rate: float = 0.0, error_status: int = 503):
+        """
+        Args:
+            latency_ms: Delay added to every response
+            bandwidth_kbps: Cap on request body throughput in KB/s (0 = unlimited)
+            error_rate: Probability (0-1) that a request or batch part fails
+            error_status: HTTP status returned for injected failures
+        """
+        self.latency_ms = latency_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self.lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "bytes_received": 0, "injected_errors": 0}
+
+    def should_fail(self) -> bool:
+        """Decide whether to inject an error into the current request"""
+        if self.error_rate and random.random() < self.error_rate:
+            with self.lock:
+                self.stats["injected_errors"] += 1
+            return True
+        return False
+
+    def create_file(self, metadata: Dict[str, Any], md5: str, size: int) -> Dict[str, Any]:
+        """Store a new file and return its resource"""
+        file_id = uuid.uuid4().hex
+        resource = {
+            "id": file_id,
+            "name": metadata.get("name", "untitled"),
+            "parents": metadata.get("parents", []),
+            "md5Checksum": md5,
+            "size": str(size),
+            "trashed": False,
+            "webViewLink": f"https://drive.google.com/file/d/{file_id}/view",
+            "webContentLink": f"https://drive.google.com/uc?id={file_id}&export=download",
+            "permissions": []
+        }
+        with self.lock:
+            self.files[file_id] = resource
+        return resource
+
+
+def _error_body(status: int, message: str) -> Dict[str, Any]:
+    """Drive-style JSON error body"""
+    reason = ERROR_REASONS.get(status, "error")
+    return {"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}}
+
+
+def _select_fields(resource: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    """Apply a simple comma-separated ``fields`` selector"""
+    if not fields:
+        return {key: resource[key] for key in ("id", "name") if key in resource}
+    return {key: resource[key] for key in fields.replace(" ", "").split(",") if key in resource}
+
+
+class FakeDriveHandler(BaseHTTPRequestHandler):
+    """Request handler dispatching Drive API paths to the shared state"""
+
+    protocol_version = "HTTP/1.1"
+    state: FakeDriveState = None
+
+    def log_message(self, format, *args):
+        logger.debug("fake drive: " + format, *args)
+
+    # HTTP verbs
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def _handle(self, method: str):
+        body = self._read_body()
+        with self.state.lock:
+            self.state.stats["requests"] += 1
+            self.state.stats["bytes_received"] += len(body)
+
+        if self.state.latency_ms:
+            time.sleep(self.state.latency_ms / 1000.0)
+
+        if self.state.should_fail():
+            status = self.state.error_status
+            self._send(status, {}, json.dumps(_error_body(status, "Injected error")).encode())
+            return
+
+        status, headers, payload = self.dispatch(method, self.path, dict(self.headers), body)
+        self._send(status, headers, payload)
+
+    def _read_body(self) -> bytes:
+        """Read the request body, throttled to the configured bandwidth"""
+        remaining = int(self.headers.get("Content-Length") or 0)
+        chunks = []
+        bytes_per_second = self.state.bandwidth_kbps * 1024
+        while remaining > 0:
+            started = time.monotonic()
+            chunk = self.rfile.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            if bytes_per_second:
+                delay = len(chunk) / bytes_per_second - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+        return b"".join(chunks)
+
+    def _send(self, status: int, headers: Dict[str, str], payload: bytes):
+        self.send_response(status)
+        headers = dict(headers)
+        headers.setdefault("Content-Type", "application/json; charset=UTF-8")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    # Routing
+
+    def dispatch(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Route one (possibly batched) request; returns (status, headers, body)"""
+        headers = {name.lower(): value for name, value in headers.items()}
+        url = urlsplit(path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        if url.path.rstrip("/") == "/batch/drive/v3" and method == "POST":
+            return self._batch(headers, body)
+        if parts[:4] == ["upload", "drive", "v3", "files"]:
+            if method == "POST" and query.get("uploadType") == "resumable":
+                return self._start_resumable(query, headers, body)
+            if method == "POST" and query.get("uploadType") == "multipart":
+                return self._multipart_upload(query, headers, body)
+            if method == "PUT" and "upload_id" in query:
+                return self._resumable_chunk(query, headers, body)
+        if parts[:3] == ["drive", "v3", "about"] and method == "GET":
+            return self._json(200, {"user": {"emailAddress": "fake-drive@localhost", "displayName": "Fake Drive"}})
+        if parts[:3] == ["drive", "v3", "files"] and len(parts) >= 4:
+            file_id = parts[3]
+            if len(parts) == 5 and parts[4] == "permissions" and method == "POST":
+                return self._create_permission(file_id, body)
+            if len(parts) == 4 and method == "GET":
+                return self._get_file(file_id, query)
+
+        return self._json(404, _error_body(404, f"Not found: {method} {url.path}"))
+
+    def _json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        return status, headers or {}, json.dumps(data).encode()
+
+    # Endpoints
+
+    def _multipart_upload(self, query, headers, body):
+        message = message_from_bytes(
+            f"Content-Type: {headers.get('content-type', '')}\r\n\r\n".encode() + body
+        )
+        parts = message.get_payload()
+        if not isinstance(parts, list) or len(parts) < 2:
+            return self._json(400, _error_body(400, "Malformed multipart upload"))
+        metadata = json.loads(parts[0].get_payload(decode=True) or b"{}")
+        media = parts[1].get_payload(decode=True) or b""
+        resource = self.state.create_file(metadata, hashlib.md5(media).hexdigest(), len(media))
+        return self._json(200, _select_fields(resource, query.get("fields")))
+
+    def _start_resumable(self, query, headers, body):
+        upload_id = uuid.uuid4().hex
+        total = headers.get("x-upload-content-length")
+        with self.state.lock:
+            self.state.sessions[upload_id] = {
+                "metadata": json.loads(body or b"{}"),
+                "received": 0,
+                "total": int(total) if total else None,
+                "md5": hashlib.md5(),
+                "fields": query.get("fields")
+            }
+        host = headers.get("host", "127.0.0.1")
+        location = f"http://{host}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+        return self._json(200, {}, {"Location": location})
+
+    def _resumable_chunk(self, query, headers, body):
+        session = self.state.sessions.get(query["upload_id"])
+        if session is None:
+            return self._json(404, _error_body(404, "Upload session not found"))
+
+        content_range = headers.get("content-range", "")
+        # "bytes start-end/total" for data, "bytes */total" for a status query
+        spec, _, total = content_range.replace("bytes ", "").partition("/")
+        if total and total != "*":
+            session["total"] = int(total)
+
+        if spec != "*" and body:
+            start = int(spec.split("-")[0])
+            if start != session["received"]:
+                # Client resent from an older offset - keep only the new bytes
+                skip = session["received"] - start
+                if skip < 0:
+                    return self._json(400, _error_body(400, "Chunk starts after the committed offset"))
+                body = body[skip:]
+            session["md5"].update(body)
+            session["received"] += len(body)
+
+        if session["total"] is not None and session["received"] >= session["total"]:
+            with self.state.lock:
+                self.state.sessions.pop(query["upload_id"], None)
+            resource = self.state.create_file(session["metadata"], session["md5"].hexdigest(), session["received"])
+            return self._json(200, _select_fields(resource, session["fields"]))
+
+        range_headers = {"Range": f"bytes=0-{session['received'] - 1}"} if session["received"] else {}
+        return 308, range_headers, b""
+
+    def _get_file(self, file_id, query):
+        resource = self.state.files.get(file_id)
+        if resource is None:
+            return self._json(404, _error_body(404, f"File not found: {file_id}"))
+        return self._json(200, _select_fields(resource, query.get("fields")))
+
+    def _create_permission(self, file_id, body):
+        resource = self.state.files.get(file_id)
+        if resource is None:
+            return self._json(404, _error_body(404, f"File not found: {file_id}"))
+        permission = dict(json.loads(body or b"{}"), id=uuid.uuid4().hex[:12])
+        with self.state.lock:
+            resource["permissions"].append(permission)
+        return self._json(200, {key: permission[key] for key in ("id", "type", "role") if key in permission})
+
+    def _batch(self, headers, body):
+        message = message_from_bytes(f"Content-Type: {headers.get('content-type', '')}\r\n\r\n".encode() + body)
+        boundary = uuid.uuid4().hex
+        out = []
+
+        for part in message.get_payload() or []:
+            raw = part.get_payload(decode=True) or b""
+            separator = b"\r\n\r\n" if b"\r\n\r\n" in raw else b"\n\n"
+            head, _, sub_body = raw.partition(separator)
+            lines = head.decode("utf-8", "replace").splitlines()
+            sub_method, sub_path = lines[0].split(" ")[:2]
+            sub_headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+
+            if self.state.should_fail():
+                status = self.state.error_status
+                sub_status, sub_payload = status, json.dumps(_error_body(status, "Injected error")).encode()
+            else:
+                sub_status, _, sub_payload = self.dispatch(sub_method, sub_path, sub_headers, sub_body)
+
+            content_id = (part.get("Content-ID") or "").strip("<>")
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {sub_status} {self.responses.get(sub_status, ('',))[0]}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(sub_payload)}\r\n\r\n".encode() + sub_payload + b"\r\n"
+            )
+
+        payload = b"".join(out) + f"--{boundary}--\r\n".encode()
+        return 200, {"Content-Type": f"multipart/mixed; boundary={boundary}"}, payload
+
+
+def create_fake_drive_server(host: str = "127.0.0.1", port: int = 8765,
+                             state: Optional[FakeDriveState] = None) -> ThreadingHTTPServer:
+    """
+    Create (but do not start) a fake Drive server.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        state: Shared state and fault settings (defaults to no faults)
+
+    Returns:
+        ThreadingHTTPServer: Call serve_forever() or run it in a thread
+    """
+    handler = type("BoundFakeDriveHandler", (FakeDriveHandler,), {"state": state or FakeDriveState()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Local fake Google Drive API for offline upload benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every response")
+    parser.add_argument("--bandwidth-kbps", type=int, default=0, help="Upload throughput cap in KB/s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability (0-1) of injecting an error")
+    parser.add_argument("--error-status", type=int, default=503, choices=sorted(ERROR_REASONS),
+                        help="HTTP status used for injected errors")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    state = FakeDriveState(args.latency_ms, args.bandwidth_kbps, args.error_rate, args.error_status)
+    server = create_fake_drive_server(args.host, args.port, state)
+    logger.info(f"Fake Google Drive API listening on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Fake Drive stats: {state.stats}")
+
+
+if __name__ == "__main__":
+    main()
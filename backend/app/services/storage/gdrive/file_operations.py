@@ -1,10 +1,33 @@
 import os
+import json
+import time
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from ....core.config import get_settings
-from ....utils.email_logger import email_logger
-from ....utils.file_utils import get_formatted_file_size
+from ....utils.email_logger import email_logger, LogEvent
+from ....utils.file_utils import get_formatted_file_size, format_file_size, compute_file_md5
+from .upload_cache import get_upload_cache
+from .upload_sessions import get_upload_session_store
+
+# Drive requires resumable chunks to be a multiple of 256 KB
+CHUNK_SIZE_UNIT = 256 * 1024
+
+# Maximum number of calls Drive accepts in one batch request
+BATCH_REQUEST_LIMIT = 100
+
+# Retry rounds for permission grants that failed with a transient error
+PERMISSION_GRANT_RETRIES = 3
+
+# HTTP statuses worth retrying: rate limiting and server errors. Drive also
+# reports rate limiting as 403 with a rateLimitExceeded reason.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(status: int, message: str) -> bool:
+    """Whether a failed Drive call is transient and worth retrying"""
+    return status in RETRYABLE_STATUSES or (status == 403 and 'ratelimitexceeded' in message.lower())
 
 logger = logging.getLogger(__name__)
 
@@ -64,20 +87,7 @@ class GoogleDriveFileOperations:
             else:
                 logger.info("GDrive Upload - No folder ID specified, using root folder")
             
-            # Create media file upload object
-            media = MediaFileUpload(
-                file_path,
-                mimetype='application/zip',
-                resumable=True
-            )
-            
-            # Execute the upload
-            file = self.drive_service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id'
-            ).execute()
-            
+            file = self._upload_resumable(file_path, file_metadata, size_bytes)
             file_id = file.get('id')
             success_message = f"Successfully uploaded file {file_name} ({formatted_size}) to Google Drive with ID: {file_id}"
             logger.info(success_message)
@@ -90,6 +100,112 @@ class GoogleDriveFileOperations:
             logger.error(error_message)
             return False, None, error_message
     
+    def _upload_resumable(self, file_path: str, file_metadata: dict, size_bytes: int) -> dict:
+        """
+        Upload a file in chunks through a resumable session.
+        
+        The session URI and confirmed offset are persisted after every chunk,
+        so if the upload is interrupted a later call for the same file
+        (same path, size and modification time) resumes from that offset.
+        
+        Args:
+            file_path: Path to the file to upload
+            file_metadata: Drive file metadata (name, parents)
+            size_bytes: File size, used for progress reporting
+            
+        Returns:
+            dict: Drive API response containing the file ID
+        """
+        settings = get_settings()
+        chunk_size = max(1, settings.GDRIVE_UPLOAD_CHUNK_SIZE_MB * 1024 * 1024 // CHUNK_SIZE_UNIT) * CHUNK_SIZE_UNIT
+        file_name = os.path.basename(file_path)
+        sessions = get_upload_session_store()
+        
+        media = MediaFileUpload(
+            file_path,
+            mimetype='application/zip',
+            chunksize=chunk_size,
+            resumable=True
+        )
+        request = self.drive_service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id'
+        )
+        
+        response = None
+        saved = sessions.get(file_path)
+        if saved:
+            # Ask Drive for the committed offset before sending more data, as
+            # bytes after the last persisted offset may or may not have arrived
+            try:
+                offset, response = self._query_upload_offset(request.http, saved["session_uri"], media.size())
+                request.resumable_uri = saved["session_uri"]
+                request.resumable_progress = offset
+                email_logger.log_info(
+                    f"Resuming Google Drive upload of {file_name} from {format_file_size(offset)}",
+                    event=LogEvent.GDRIVE
+                )
+            except HttpError as e:
+                if e.resp.status not in (404, 410):
+                    raise
+                # The saved session has expired on Drive's side - start over
+                logger.warning(f"Upload session for {file_name} expired, restarting upload")
+                sessions.remove(file_path)
+        
+        last_reported = -1
+        while response is None:
+            status, response = request.next_chunk(num_retries=settings.GDRIVE_UPLOAD_MAX_RETRIES)
+            
+            if status is not None:
+                sessions.save(file_path, request.resumable_uri, status.resumable_progress, size_bytes)
+                percent = int(status.progress() * 100)
+                # Report progress in 10% steps
+                if percent // 10 > last_reported:
+                    last_reported = percent // 10
+                    email_logger.log_info(
+                        f"Uploading {file_name}: {percent}% "
+                        f"({format_file_size(status.resumable_progress)} of {format_file_size(size_bytes)})",
+                        event=LogEvent.GDRIVE
+                    )
+        
+        sessions.remove(file_path)
+        return response
+    
+    @staticmethod
+    def _query_upload_offset(http, session_uri: str, total_size: int) -> Tuple[int, Optional[dict]]:
+        """
+        Ask Drive how many bytes of a resumable upload it has committed.
+        
+        Sends the empty "bytes */<total>" request of the resumable upload
+        protocol.
+        
+        Args:
+            http: Authorized HTTP object of the upload request
+            session_uri: Resumable session URI
+            total_size: Size of the file being uploaded
+            
+        Returns:
+            Tuple of (committed offset, Drive API response if the upload had
+            already completed, else None)
+            
+        Raises:
+            HttpError: If Drive rejects the query, e.g. 404 for an expired session
+        """
+        resp, content = http.request(
+            session_uri,
+            method='PUT',
+            body='',
+            headers={'Content-Range': f'bytes */{total_size}', 'Content-Length': '0'}
+        )
+        if resp.status in (200, 201):
+            return total_size, json.loads(content)
+        if resp.status == 308:
+            # "Range: bytes=0-<last byte received>", absent if nothing was received
+            committed = resp.get('range')
+            return (int(committed.rsplit('-', 1)[1]) + 1 if committed else 0), None
+        raise HttpError(resp, content, uri=session_uri)
+    
     def generate_shareable_link(self, file_id: str, share_type: str = 'anyone', recipient_email: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[str]]:
         """
         Generate a shareable link for a file in Google Drive with specified permissions
@@ -157,6 +273,84 @@ class GoogleDriveFileOperations:
             logger.error(error_message)
             return False, None, error_message
     
+    def grant_permissions(self, file_id: str, emails: List[str], role: str = 'reader') -> Dict[str, Optional[str]]:
+        """
+        Grant several users access to a file using batch requests
+        
+        Grants are sent in batches of up to BATCH_REQUEST_LIMIT. Grants that
+        fail with a transient error (rate limit, server error) are retried
+        on their own with backoff; the others are reported as failed.
+        
+        Args:
+            file_id: ID of the file in Google Drive
+            emails: Email addresses to grant access to
+            role: Permission role to grant
+            
+        Returns:
+            Dict[str, Optional[str]]: email -> None if granted, error message if not
+        """
+        results: Dict[str, Optional[str]] = {}
+        pending = list(dict.fromkeys(emails))
+        
+        for attempt in range(PERMISSION_GRANT_RETRIES + 1):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))
+            
+            retryable = []
+            for start in range(0, len(pending), BATCH_REQUEST_LIMIT):
+                chunk = pending[start:start + BATCH_REQUEST_LIMIT]
+                for email, error in self._execute_permission_batch(file_id, chunk, role).items():
+                    if error is None:
+                        results[email] = None
+                    else:
+                        status, message = error
+                        results[email] = message
+                        if _is_retryable(status, message):
+                            retryable.append(email)
+            
+            if not retryable:
+                break
+            logger.info(f"Retrying {len(retryable)} failed permission grant(s) for file {file_id}")
+            pending = retryable
+        
+        return results
+    
+    def _execute_permission_batch(self, file_id: str, emails: List[str], role: str) -> Dict[str, Optional[Tuple[int, str]]]:
+        """
+        Send one batch of permission grants
+        
+        Returns:
+            Dict mapping each email to None on success or (HTTP status, message) on failure
+        """
+        outcome: Dict[str, Optional[Tuple[int, str]]] = {}
+        
+        def _callback(request_id, response, exception):
+            email = emails[int(request_id)]
+            if exception is None:
+                outcome[email] = None
+            else:
+                status = getattr(getattr(exception, 'resp', None), 'status', 0)
+                outcome[email] = (int(status or 0), str(exception))
+        
+        batch = self.drive_service.new_batch_http_request(callback=_callback)
+        for index, email in enumerate(emails):
+            batch.add(
+                self.drive_service.permissions().create(
+                    fileId=file_id,
+                    body={'type': 'user', 'role': role, 'emailAddress': email}
+                ),
+                request_id=str(index)
+            )
+        
+        try:
+            batch.execute()
+        except Exception as e:
+            # The whole batch failed (e.g. connection error) - retry every grant
+            for email in emails:
+                outcome.setdefault(email, (503, str(e)))
+        
+        return outcome
+    
     def upload_and_get_link(self, file_path: str, folder_id: Optional[str] = None, share_type: str = 'anyone', recipient_email: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[str]]:
         """
         Upload a file to Google Drive and generate a shareable link with specified permissions
@@ -180,11 +374,26 @@ class GoogleDriveFileOperations:
         logger.info(process_start_message)
         email_logger.log_info(process_start_message)
         
-        # Upload the file
-        upload_success, file_id, upload_error = self.upload_file(file_path, folder_id)
-        
-        if not upload_success:
-            return False, None, upload_error
+        if get_settings().GDRIVE_UPLOAD_DEDUP_ENABLED:
+            # Reuse an earlier upload of identical content if Drive still has it
+            content_md5 = compute_file_md5(file_path)
+            with get_upload_cache().content_lock(content_md5):
+                file_id = self._find_cached_upload(content_md5)
+                if file_id:
+                    email_logger.log_info(f"Reusing existing Google Drive upload of {file_name} ({formatted_size})", event=LogEvent.GDRIVE)
+                else:
+                    upload_success, file_id, upload_error = self.upload_file(file_path, folder_id)
+                    if not upload_success:
+                        return False, None, upload_error
+                    get_upload_cache().put(content_md5, file_id, None, size_bytes)
+        else:
+            content_md5 = None
+            
+            # Upload the file
+            upload_success, file_id, upload_error = self.upload_file(file_path, folder_id)
+            
+            if not upload_success:
+                return False, None, upload_error
         
         # Log progress
         email_logger.log_info(f"Generating shareable link for {file_name}...")
@@ -195,9 +404,51 @@ class GoogleDriveFileOperations:
         if not link_success:
             return False, None, link_error
         
+        if content_md5:
+            get_upload_cache().touch(content_md5, shareable_link)
+        
         # Log completion of the entire process - only to internal logger, not email_logger
         # This prevents duplicate messages as email_sender.py also logs a success message
         complete_message = f"File {file_name} ({formatted_size}) successfully uploaded and shared on Google Drive"
         logger.info(complete_message)
         
         return True, shareable_link, None
+    
+    def _find_cached_upload(self, content_md5: str) -> Optional[str]:
+        """
+        Find a Drive file already holding this content
+        
+        The cache entry is only trusted if Drive still has the file, it is not
+        trashed and its md5Checksum matches; otherwise the entry is dropped.
+        
+        Args:
+            content_md5: MD5 hex digest of the local file
+            
+        Returns:
+            Optional[str]: Drive file ID to reuse, or None
+        """
+        cache = get_upload_cache()
+        cached = cache.get(content_md5)
+        if not cached:
+            return None
+        
+        try:
+            metadata = self.drive_service.files().get(
+                fileId=cached["file_id"],
+                fields='md5Checksum,trashed'
+            ).execute()
+        except HttpError as e:
+            logger.info(f"Cached Drive file {cached['file_id']} is no longer available: {str(e)}")
+            cache.remove(content_md5)
+            return None
+        except Exception as e:
+            # Could not validate (e.g. network error) - upload again rather than guess
+            logger.warning(f"Could not validate cached Drive file {cached['file_id']}: {str(e)}")
+            return None
+        
+        if metadata.get('trashed') or metadata.get('md5Checksum') != content_md5:
+            logger.info(f"Cached Drive file {cached['file_id']} changed or was trashed, uploading again")
+            cache.remove(content_md5)
+            return None
+        
+        return cached["file_id"]
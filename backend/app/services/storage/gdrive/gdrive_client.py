@@ -6,7 +6,7 @@ composing authentication and file operations into a unified client.
 """
 
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from .authentication import GoogleDriveAuthenticator
 from .file_operations import GoogleDriveFileOperations
 
@@ -34,6 +34,23 @@ class GoogleDriveClient:
         except Exception as e:
             logger.warning(f"Initial authentication attempt failed: {str(e)}")
         
+    @classmethod
+    def from_authenticator(cls, authenticator: GoogleDriveAuthenticator) -> 'GoogleDriveClient':
+        """
+        Create a client with its own transport that shares already-loaded credentials
+        
+        Args:
+            authenticator: Authenticator of an authenticated client
+            
+        Returns:
+            GoogleDriveClient: New client; no token file read or verification call
+        """
+        client = cls.__new__(cls)
+        client.authenticator = authenticator
+        client.drive_service = authenticator.build_service()
+        client.file_operations = GoogleDriveFileOperations(client.drive_service) if client.drive_service else None
+        return client
+    
     def authenticate(self) -> bool:
         """
         Authenticate with Google Drive API using OAuth 2.0
@@ -84,6 +101,24 @@ class GoogleDriveClient:
         
         return self.file_operations.generate_shareable_link(file_id, share_type, recipient_email)
     
+    def grant_permissions(self, file_id: str, emails: List[str], role: str = 'reader') -> Dict[str, Optional[str]]:
+        """
+        Grant several users access to a file using batched requests
+        
+        Args:
+            file_id: ID of the file in Google Drive
+            emails: Email addresses to grant access to
+            role: Permission role to grant
+            
+        Returns:
+            Dict[str, Optional[str]]: email -> None if granted, error message if not
+        """
+        if not self.file_operations:
+            if not self.authenticate():
+                return {email: "Failed to authenticate with Google Drive" for email in emails}
+        
+        return self.file_operations.grant_permissions(file_id, emails, role)
+    
     @property
     def is_authenticated(self) -> bool:
         """Check if we're authenticated with Google Drive"""
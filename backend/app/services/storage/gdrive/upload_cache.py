@@ -0,0 +1,158 @@
+"""
+Deduplication cache for Google Drive uploads.
+
+Maps the MD5 of an uploaded file's contents to the Drive file it was
+uploaded as. When the same archive is sent again - to another recipient or
+on a retry, in this run or a later one - the existing Drive file is reused
+and only the new recipient's permission is added. Entries are checked
+against the file's Drive metadata (md5Checksum, trashed) before reuse.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ....core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CACHE_FILENAME = "upload_cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drive_uploads (
+    content_md5 TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    link TEXT,
+    size INTEGER,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class UploadCache:
+    """Persistent content hash -> Drive file mapping backed by SQLite (WAL)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the cache. The database is opened lazily on first use.
+
+        Args:
+            db_path: Path to the SQLite file. Defaults to GDRIVE_UPLOAD_CACHE_PATH,
+                or upload_cache.db next to the Drive token file.
+        """
+        self._db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._content_locks: Dict[str, threading.Lock] = {}
+
+    @property
+    def db_path(self) -> str:
+        """Resolved path of the SQLite database file"""
+        if not self._db_path:
+            settings = get_settings()
+            self._db_path = os.path.abspath(settings.GDRIVE_UPLOAD_CACHE_PATH or os.path.join(
+                os.path.dirname(settings.GDRIVE_TOKEN_PATH), UPLOAD_CACHE_FILENAME
+            ))
+        return self._db_path
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller must hold the lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def content_lock(self, content_md5: str) -> threading.Lock:
+        """
+        Lock serializing uploads of the same content, so that concurrent
+        sends of one archive upload it once and reuse the result
+        """
+        with self._lock:
+            return self._content_locks.setdefault(content_md5, threading.Lock())
+
+    def get(self, content_md5: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a previous upload of the same content
+
+        Returns:
+            dict with file_id, link and size, or None
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT file_id, link, size FROM drive_uploads WHERE content_md5 = ?",
+                    (content_md5,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading Drive upload cache: {str(e)}")
+            return None
+
+        if not row:
+            return None
+        return {"file_id": row[0], "link": row[1], "size": row[2]}
+
+    def put(self, content_md5: str, file_id: str, link: Optional[str], size: int):
+        """Record (or replace) the Drive file holding this content"""
+        now = datetime.now().isoformat()
+        try:
+            with self._lock:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO drive_uploads "
+                    "(content_md5, file_id, link, size, created_at, last_used_at, use_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (content_md5, file_id, link, size, now, now)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error writing Drive upload cache: {str(e)}")
+
+    def touch(self, content_md5: str, link: Optional[str] = None):
+        """Mark a cached upload as reused, updating its link if one is given"""
+        try:
+            with self._lock:
+                self._connection().execute(
+                    "UPDATE drive_uploads SET last_used_at = ?, use_count = use_count + 1, "
+                    "link = COALESCE(?, link) WHERE content_md5 = ?",
+                    (datetime.now().isoformat(), link, content_md5)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating Drive upload cache: {str(e)}")
+
+    def remove(self, content_md5: str):
+        """Forget a cached upload (file deleted, trashed or changed on Drive)"""
+        try:
+            with self._lock:
+                self._connection().execute(
+                    "DELETE FROM drive_uploads WHERE content_md5 = ?", (content_md5,)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error removing Drive upload cache entry: {str(e)}")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_upload_cache: Optional[UploadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache() -> UploadCache:
+    """Get the process-wide Drive upload cache"""
+    global _upload_cache
+    if _upload_cache is None:
+        with _cache_lock:
+            if _upload_cache is None:
+                _upload_cache = UploadCache()
+    return _upload_cache
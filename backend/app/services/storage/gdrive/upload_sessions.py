@@ -0,0 +1,136 @@
+"""
+Persisted Google Drive resumable upload sessions.
+
+A resumable upload is identified by a session URI returned by Drive. Storing
+that URI together with the confirmed byte offset lets a retry - in the same
+process or after a restart - continue an interrupted upload instead of
+sending the whole file again.
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ....core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STATE_FILENAME = "upload_sessions.json"
+
+# Drive keeps resumable sessions for about a week; drop ours a bit earlier
+SESSION_MAX_AGE_SECONDS = 6 * 24 * 3600
+
+
+def _file_key(file_path: str) -> str:
+    """Key identifying a file's content version: path, size and modification time"""
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}|{stat.st_size}|{int(stat.st_mtime)}"
+
+
+class UploadSessionStore:
+    """JSON file of in-progress upload sessions keyed by file version"""
+
+    def __init__(self, state_path: Optional[str] = None):
+        """
+        Initialize the session store.
+
+        Args:
+            state_path: Path to the JSON state file. Defaults to
+                GDRIVE_UPLOAD_STATE_PATH, or upload_sessions.json next to the
+                Drive token file when that is not configured.
+        """
+        if not state_path:
+            settings = get_settings()
+            state_path = settings.GDRIVE_UPLOAD_STATE_PATH or os.path.join(
+                os.path.dirname(settings.GDRIVE_TOKEN_PATH), UPLOAD_STATE_FILENAME
+            )
+        self.state_path = os.path.abspath(state_path)
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the saved session for a file, if it is still usable.
+
+        Returns:
+            dict with session_uri, offset and total_size, or None
+        """
+        key = _file_key(file_path)
+        with self._lock:
+            sessions = self._load()
+            session = sessions.get(key)
+            if session and time.time() - session.get("created_at", 0) > SESSION_MAX_AGE_SECONDS:
+                sessions.pop(key)
+                self._write(sessions)
+                return None
+            return session
+
+    def save(self, file_path: str, session_uri: str, offset: int, total_size: int):
+        """Save or update the session URI and confirmed offset for a file"""
+        key = _file_key(file_path)
+        with self._lock:
+            sessions = self._load()
+            created_at = sessions.get(key, {}).get("created_at", time.time())
+            sessions[key] = {
+                "session_uri": session_uri,
+                "offset": offset,
+                "total_size": total_size,
+                "created_at": created_at,
+                "updated_at": time.time()
+            }
+            self._write(sessions)
+
+    def remove(self, file_path: str):
+        """Forget the session for a file (upload finished or session expired)"""
+        key = _file_key(file_path)
+        with self._lock:
+            sessions = self._load()
+            if sessions.pop(key, None) is not None:
+                self._write(sessions)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the state file, treating a missing or corrupt file as empty"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring unreadable upload session state {self.state_path}: {str(e)}")
+            return {}
+
+    def _write(self, sessions: Dict[str, Dict[str, Any]]):
+        """Atomically replace the state file"""
+        tmp_path = None
+        try:
+            state_dir = os.path.dirname(self.state_path)
+            os.makedirs(state_dir, exist_ok=True)
+            # A unique temporary file, so processes sharing the state file
+            # never write to the same one
+            fd, tmp_path = tempfile.mkstemp(dir=state_dir, prefix=UPLOAD_STATE_FILENAME, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(sessions, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+            tmp_path = None
+        except OSError as e:
+            logger.error(f"Failed to save upload session state: {str(e)}")
+        finally:
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+_upload_session_store: Optional[UploadSessionStore] = None
+
+
+def get_upload_session_store() -> UploadSessionStore:
+    """Get the process-wide upload session store"""
+    global _upload_session_store
+    if _upload_session_store is None:
+        _upload_session_store = UploadSessionStore()
+    return _upload_session_store
@@ -4,6 +4,7 @@ Email Template Service Module.
 This module provides a comprehensive email template management system including:
 - Template CRUD operations
 - Template loading and caching
+- Compiled template rendering
 - Template validation
 - Template metadata management
 
@@ -23,7 +24,12 @@ from .core import (
     clear_template_cache,
     clear_metadata_cache,
     clear_all_caches,
-    get_template_metadata
+    get_template_metadata,
+    CompiledTemplate,
+    compile_template,
+    get_compiled_template,
+    clear_compiled_templates,
+    build_placeholder_values
 )
 
 # Template validation
@@ -48,6 +54,13 @@ __all__ = [
     'clear_metadata_cache',
     'clear_all_caches',
     'get_template_metadata',
+    'clear_compiled_templates',
+    
+    # Template rendering
+    'CompiledTemplate',
+    'compile_template',
+    'get_compiled_template',
+    'build_placeholder_values',
     
     # Template validation
     'TemplateValidator',
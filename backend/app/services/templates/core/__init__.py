@@ -4,6 +4,7 @@ Template core module.
 This module provides core functionality for email template management including:
 - Template CRUD operations
 - Template loading and caching
+- Template compilation and rendering
 - Template metadata management
 """
 
@@ -23,6 +24,14 @@ from .template_loader import (
     get_template_metadata
 )
 
+from .template_compiler import (
+    CompiledTemplate,
+    compile_template,
+    get_compiled_template,
+    clear_compiled_templates,
+    build_placeholder_values
+)
+
 __all__ = [
     'TEMPLATE_MAPPINGS',
     'get_email_templates',
@@ -33,5 +42,10 @@ __all__ = [
     'clear_template_cache',
     'clear_metadata_cache',
     'clear_all_caches',
-    'get_template_metadata'
+    'get_template_metadata',
+    'CompiledTemplate',
+    'compile_template',
+    'get_compiled_template',
+    'clear_compiled_templates',
+    'build_placeholder_values'
 ]
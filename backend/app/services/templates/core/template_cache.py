@@ -0,0 +1,137 @@
+"""
+In-memory cache of template files.
+
+Each template file is read once and kept with its timestamps and compiled
+form. A cached file is revalidated against the file system (one stat call)
+at most every TEMPLATE_CACHE_TTL_SECONDS, so sending emails and listing
+templates do no file I/O in between. Template writes through the API clear
+the entry straight away.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from ....core.config import get_settings
+from .template_compiler import CompiledTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateFile:
+    """Contents and metadata of one template file"""
+
+    def __init__(self, path: str, content: str, stat: os.stat_result):
+        self.path = path
+        self.content = content
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.created_date = datetime.fromtimestamp(stat.st_ctime).isoformat()
+        self.modified_date = datetime.fromtimestamp(stat.st_mtime).isoformat()
+        self._compiled: Optional[CompiledTemplate] = None
+
+    @property
+    def compiled(self) -> CompiledTemplate:
+        """Compiled form of the template, built on first use"""
+        if self._compiled is None:
+            self._compiled = CompiledTemplate(self.content)
+        return self._compiled
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Whether the file on disk is unchanged since it was loaded"""
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+
+class TemplateFileCache:
+    """Template files keyed by absolute path, revalidated by mtime after a TTL"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a cached file is trusted before it is checked
+                again (defaults to TEMPLATE_CACHE_TTL_SECONDS)
+        """
+        self.ttl_seconds = get_settings().TEMPLATE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._lock = threading.Lock()
+        # path -> (time checked, file or None if missing)
+        self._entries: Dict[str, tuple] = {}
+
+    def get(self, file_path: str) -> Optional[TemplateFile]:
+        """
+        Get a template file, loading or reloading it if needed.
+
+        Args:
+            file_path: Path to the template file
+
+        Returns:
+            TemplateFile, or None if the file does not exist or cannot be read
+        """
+        path = os.path.abspath(file_path)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and now - entry[0] < self.ttl_seconds:
+            return entry[1]
+
+        cached = entry[1] if entry else None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            template_file = None
+        else:
+            if cached and cached.matches(stat):
+                template_file = cached
+            else:
+                template_file = self._load(path, stat)
+
+        with self._lock:
+            self._entries[path] = (now, template_file)
+        return template_file
+
+    def exists(self, file_path: str) -> bool:
+        """Whether a template file exists (cached like its contents)"""
+        return self.get(file_path) is not None
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """
+        Drop a cached file so the next access reads it again.
+
+        Args:
+            file_path: File to drop; all files if omitted
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(file_path), None)
+
+    def _load(self, path: str, stat: os.stat_result) -> Optional[TemplateFile]:
+        """Read a template file from disk"""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                content = file.read()
+        except Exception as e:
+            logger.error(f"Error reading template file {path}: {str(e)}")
+            return None
+        logger.info(f"Loaded template file {path}")
+        return TemplateFile(path, content, stat)
+
+
+_template_file_cache: Optional[TemplateFileCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_template_file_cache() -> TemplateFileCache:
+    """Get the process-wide template file cache"""
+    global _template_file_cache
+    if _template_file_cache is None:
+        with _cache_lock:
+            if _template_file_cache is None:
+                _template_file_cache = TemplateFileCache()
+    return _template_file_cache
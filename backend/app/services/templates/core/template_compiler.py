@@ -0,0 +1,157 @@
+"""
+Compiled email templates.
+
+A template is parsed once into alternating literal and placeholder
+segments, so rendering an email is a single join of the literals with the
+record's values instead of one full copy of the body per placeholder.
+Compiled file templates are kept in the template file cache and rebuilt
+when the file changes; inline templates (such as subjects) are cached by
+their text.
+"""
+
+import re
+import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# {{name}} markers; names are matched case-insensitively against the values
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class CompiledTemplate:
+    """A template parsed into literal text and placeholder slots"""
+
+    def __init__(self, source: str):
+        """
+        Parse a template.
+
+        Args:
+            source: Template text containing {{name}} placeholders
+        """
+        self.source = source
+        self._literals: List[str] = []
+        self._slots: List[Tuple[str, str]] = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self._literals.append(source[position:match.start()])
+            self._slots.append((match.group(1).lower(), match.group(0)))
+            position = match.end()
+        self._literals.append(source[position:])
+
+    @property
+    def placeholders(self) -> List[str]:
+        """Names of the placeholders used, in order of first use"""
+        return list(dict.fromkeys(name for name, _ in self._slots))
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """
+        Substitute placeholder values.
+
+        Args:
+            values: Placeholder values keyed by lowercase name. Placeholders
+                without a value are left in the output unchanged.
+
+        Returns:
+            The rendered text
+        """
+        if not self._slots:
+            return self.source
+
+        parts = [self._literals[0]]
+        for (name, marker), literal in zip(self._slots, self._literals[1:]):
+            value = values.get(name, marker)
+            parts.append("" if value is None else str(value))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def get_compiled_template(file_path: str) -> Optional[CompiledTemplate]:
+    """
+    Get the compiled form of a template file.
+
+    Uses the template file cache, so the file is only read and parsed again
+    after it has changed on disk.
+
+    Args:
+        file_path: Path to the template file
+
+    Returns:
+        CompiledTemplate, or None if the file cannot be read
+    """
+    from .template_cache import get_template_file_cache
+
+    template_file = get_template_file_cache().get(file_path)
+    if template_file is None:
+        logger.warning(f"Template file not available at {file_path}")
+        return None
+    return template_file.compiled
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str) -> CompiledTemplate:
+    """
+    Compile inline template text, e.g. a subject line.
+
+    Args:
+        source: Template text
+
+    Returns:
+        CompiledTemplate (cached by text)
+    """
+    return CompiledTemplate(source)
+
+
+def clear_compiled_templates():
+    """Clear the compiled template caches."""
+    from .template_cache import get_template_file_cache
+
+    get_template_file_cache().invalidate()
+    compile_template.cache_clear()
+
+
+_timestamp_lock = threading.Lock()
+_timestamp_cache: Tuple[int, str] = (-1, "")
+
+
+def current_timestamp() -> str:
+    """The current time formatted for the {{date}} placeholder, formatted at most once per second"""
+    global _timestamp_cache
+    now = datetime.now()
+    second = int(now.timestamp())
+    with _timestamp_lock:
+        if _timestamp_cache[0] != second:
+            _timestamp_cache = (second, now.strftime(DATE_FORMAT))
+        return _timestamp_cache[1]
+
+
+def build_placeholder_values(record: Optional[Mapping[str, Any]] = None, **extra: Any) -> Dict[str, Any]:
+    """
+    Build the placeholder values for one email.
+
+    Every column of the record is available under its lowercase name (for
+    example ``Company_Name`` as ``{{company_name}}``), along with
+    ``{{recipient}}`` (the Email column) and ``{{date}}``.
+
+    Args:
+        record: Email record (column name -> value)
+        **extra: Additional or overriding values
+
+    Returns:
+        Dict of placeholder values keyed by lowercase name
+    """
+    values: Dict[str, Any] = {}
+    if record:
+        for column, value in record.items():
+            values[column.lower()] = value
+        values["recipient"] = record.get("Email", "")
+    values["date"] = current_timestamp()
+    for name, value in extra.items():
+        values[name.lower()] = value
+    return values
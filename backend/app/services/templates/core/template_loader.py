@@ -6,7 +6,6 @@ metadata management, and template content preprocessing.
 """
 
 import logging
-import os
 from typing import Dict, Optional
 from functools import lru_cache
 
@@ -35,9 +34,17 @@ def load_template_content(template_id: str) -> str:
     return ""
 
 
-def clear_template_cache():
-    """Clear the template content cache."""
+def clear_template_cache(file_path: Optional[str] = None):
+    """
+    Clear the template content cache.
+    
+    Args:
+        file_path: Template file that changed; all cached files are
+            dropped if omitted
+    """
+    from .template_cache import get_template_file_cache
     load_template_content.cache_clear()
+    get_template_file_cache().invalidate(file_path)
 
 
 def _get_template_name(template_id: str) -> str:
@@ -93,10 +100,12 @@ def _get_template_preview(file_path: str, max_length: int = 100) -> str:
     Returns:
         Template preview
     """
+    from .template_cache import get_template_file_cache
+    
     try:
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as file:
-                content = file.read()
+        template_file = get_template_file_cache().get(file_path)
+        if template_file is not None:
+            content = template_file.content
                 
             if len(content) > max_length:
                 return content[:max_length] + "..."
@@ -131,5 +140,7 @@ def clear_metadata_cache():
 
 def clear_all_caches():
     """Clear all template caches."""
+    from .template_compiler import clear_compiled_templates
     clear_template_cache()
     clear_metadata_cache()
+    clear_compiled_templates()
@@ -12,10 +12,10 @@ This module provides comprehensive template management including:
 import logging
 import os
 from typing import List, Dict, Any, Optional
-from datetime import datetime
 from pathlib import Path
 
 from ....core.config import get_settings
+from .template_cache import get_template_file_cache
 
 logger = logging.getLogger(__name__)
 
@@ -46,11 +46,13 @@ def get_email_templates(
     templates = []
     settings = get_settings()
     template_dir = os.path.dirname(settings.DEFAULT_EMAIL_TEMPLATE_PATH)
+    file_cache = get_template_file_cache()
     
     # Add predefined templates
     for template_id, filename in TEMPLATE_MAPPINGS.items():
         file_path = os.path.join(template_dir, filename)
-        template_exists = os.path.exists(file_path)
+        template_file = file_cache.get(file_path)
+        template_exists = template_file is not None
         
         # Create template info
         template = {
@@ -60,8 +62,8 @@ def get_email_templates(
             "body": _get_template_preview(file_path) if template_exists else "Template file not found",
             "file_path": file_path,
             "exists": template_exists,
-            "created_date": datetime.fromtimestamp(os.path.getctime(file_path)).isoformat() if template_exists else None,
-            "modified_date": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat() if template_exists else None
+            "created_date": template_file.created_date if template_exists else None,
+            "modified_date": template_file.modified_date if template_exists else None
         }
         
         templates.append(template)
@@ -102,8 +104,9 @@ def get_template_by_id(template_id: str) -> Optional[Dict[str, Any]]:
     filename = TEMPLATE_MAPPINGS[template_id]
     file_path = os.path.join(template_dir, filename)
     
-    # Check if the file exists
-    if not os.path.exists(file_path):
+    # Read the template (cached; re-read only when the file has changed)
+    template_file = get_template_file_cache().get(file_path)
+    if template_file is None:
         # If the requested template doesn't exist, fall back to default
         if template_id != "default":
             logger.warning(f"Template {template_id} not found, falling back to default")
@@ -112,23 +115,15 @@ def get_template_by_id(template_id: str) -> Optional[Dict[str, Any]]:
             logger.error(f"Default template not found at {file_path}")
             return None
     
-    # Read the template content
-    try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            body_template = file.read()
-            
-        return {
-            "id": template_id,
-            "name": _get_template_name(template_id),
-            "subject": _get_template_subject(template_id),
-            "body_template": body_template,
-            "file_path": file_path,
-            "created_date": datetime.fromtimestamp(os.path.getctime(file_path)).isoformat(),
-            "modified_date": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-        }
-    except Exception as e:
-        logger.error(f"Error reading template file: {str(e)}")
-        return None
+    return {
+        "id": template_id,
+        "name": _get_template_name(template_id),
+        "subject": _get_template_subject(template_id),
+        "body_template": template_file.content,
+        "file_path": file_path,
+        "created_date": template_file.created_date,
+        "modified_date": template_file.modified_date
+    }
 
 
 def create_email_template(template_data: Dict[str, Any]) -> str:
@@ -154,6 +149,9 @@ def create_email_template(template_data: Dict[str, Any]) -> str:
         with open(file_path, "w", encoding="utf-8") as file:
             file.write(template_data.get("body", ""))
         
+        from .template_loader import clear_template_cache
+        clear_template_cache(file_path)
+        
         return template_id
     except Exception as e:
         logger.error(f"Error creating email template: {str(e)}")
@@ -188,6 +186,9 @@ def update_email_template(template_id: str, template_data: Dict[str, Any]) -> bo
         with open(file_path, "w", encoding="utf-8") as file:
             file.write(template_data.get("body", ""))
         
+        from .template_loader import clear_template_cache
+        clear_template_cache(file_path)
+        
         return True
     except Exception as e:
         logger.error(f"Error updating email template {template_id}: {str(e)}")
@@ -3,9 +3,12 @@ import logging
 import json
 import uuid
 from datetime import datetime
+from enum import Enum
 from logging.handlers import RotatingFileHandler
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, FrozenSet, NamedTuple
 from .file_utils import format_file_size
+from .event_store import send_event_store
+from .event_bus import event_bus
 import time
 from ..core.config import get_settings
 
@@ -30,24 +33,98 @@ except ImportError:
     print("To enable colored output, install colorama: pip install colorama")
     print("---------------------------------------------------------------")
 
-class AutomationLogFilter(logging.Filter):
-    """Filter for automation logs"""
+class LogEvent(str, Enum):
+    """Explicit event types carried by email automation log records"""
+    PROCESS = "process"                          # Automation lifecycle (start, finish, statistics, schedule)
+    EMAIL_PROCESSING = "email_processing"        # Per-email "processing" progress line
+    SEND_SUCCESS = "send_success"                # Final per-email success outcome
+    SEND_FAILED = "send_failed"                  # Final per-email failure outcome
+    TRANSACTION_SUCCESS = "transaction_success"  # log_email_transaction with status Success
+    TRANSACTION_FAILED = "transaction_failed"    # log_email_transaction with any other status
+    ATTACHMENT = "attachment"
+    GDRIVE = "gdrive"
+    TEMPLATE = "template"
+    DB = "db"
+    AUTH = "auth"
+    GENERAL = "general"
+
+
+class LogRoute(NamedTuple):
+    """Routing and console formatting for a log event type"""
+    category: str
+    color: str
+    emoji: str
+    sinks: FrozenSet[str]
+    console: bool = True
+    show_pid: bool = False
+
+
+# Sinks are the filtered log files; the error file is level-based and the
+# full email_automation log receives every record.
+AUTOMATION_SINK = "automation"
+SUCCESS_SINK = "success"
+
+LOG_ROUTES: Dict[LogEvent, LogRoute] = {
+    LogEvent.PROCESS: LogRoute("PROCESS", Fore.GREEN, "", frozenset({AUTOMATION_SINK}), show_pid=True),
+    LogEvent.EMAIL_PROCESSING: LogRoute("EMAIL", Fore.BLUE, "", frozenset({AUTOMATION_SINK}), console=False),
+    LogEvent.SEND_SUCCESS: LogRoute("EMAIL", Fore.BLUE + Style.BRIGHT, "", frozenset({AUTOMATION_SINK, SUCCESS_SINK})),
+    LogEvent.SEND_FAILED: LogRoute("EMAIL", Fore.BLUE, "", frozenset({AUTOMATION_SINK}), show_pid=True),
+    LogEvent.TRANSACTION_SUCCESS: LogRoute("EMAIL", Fore.BLUE + Style.BRIGHT, "✅ ", frozenset({SUCCESS_SINK})),
+    LogEvent.TRANSACTION_FAILED: LogRoute("EMAIL", Fore.BLUE, "❌ ", frozenset()),
+    LogEvent.ATTACHMENT: LogRoute("ATTACHMENT", Fore.BLUE, "📎 ", frozenset()),
+    LogEvent.GDRIVE: LogRoute("GDRIVE", Fore.MAGENTA, "📤 ", frozenset(), show_pid=True),
+    LogEvent.TEMPLATE: LogRoute("TEMPLATE", Fore.CYAN, "📝 ", frozenset()),
+    LogEvent.DB: LogRoute("DB", Fore.YELLOW, "🔄 ", frozenset()),
+    LogEvent.AUTH: LogRoute("AUTH", Fore.RED, "🔐 ", frozenset(), show_pid=True),
+    LogEvent.GENERAL: LogRoute("EMAIL", Fore.BLUE, "", frozenset()),
+}
+
+_PROCESS_KEYWORDS = ("process", "automation", "trigger", "start", "finish", "completed", "scheduled")
+
+
+def _classify_message(message: str, level: int) -> LogEvent:
+    """
+    Infer an event type for a log call that did not pass one.
+    Runs once per record; typed call sites skip it entirely.
+    """
+    lowered = message.lower()
+    if "google drive" in lowered or "gdrive" in lowered:
+        return LogEvent.GDRIVE
+    if "sent successfully" in lowered and level < logging.ERROR:
+        return LogEvent.SEND_SUCCESS
+    if "failed:" in lowered and level >= logging.ERROR:
+        return LogEvent.SEND_FAILED
+    if "processing email" in lowered:
+        return LogEvent.EMAIL_PROCESSING
+    if "template" in lowered:
+        return LogEvent.TEMPLATE
+    if "compress" in lowered or "attachment" in lowered:
+        return LogEvent.ATTACHMENT
+    if "updated" in lowered and "status" in lowered:
+        return LogEvent.DB
+    if "authenticat" in lowered:
+        return LogEvent.AUTH
+    if any(keyword in lowered for keyword in _PROCESS_KEYWORDS):
+        return LogEvent.PROCESS
+    return LogEvent.GENERAL
+
+
+class EventSinkFilter(logging.Filter):
+    """Pass only records whose event route targets the given sink"""
+    sink = None
+
     def filter(self, record):
-        msg = record.getMessage().lower()
-        return ("process" in msg or 
-                "automation" in msg or 
-                "trigger" in msg or 
-                "start" in msg or
-                "finish" in msg or
-                "started" in msg or
-                "completed" in msg or
-                "scheduled" in msg)
+        return self.sink in getattr(record, "log_sinks", ())
 
-class SuccessLogFilter(logging.Filter):
+
+class AutomationLogFilter(EventSinkFilter):
+    """Filter for automation logs"""
+    sink = AUTOMATION_SINK
+
+
+class SuccessLogFilter(EventSinkFilter):
     """Filter for success logs"""
-    def filter(self, record):
-        return ("success" in record.getMessage().lower() and 
-                record.levelno < logging.ERROR)
+    sink = SUCCESS_SINK
 
 class EmailLogger:
     """Enhanced logger for email transactions with detailed information"""
@@ -144,11 +221,16 @@ class EmailLogger:
     def log_info(self, message: str, email_id: Optional[int] = None, recipient: Optional[str] = None, 
                   subject: Optional[str] = None, status: Optional[str] = None, 
                   file_name: Optional[str] = None, file_path: Optional[str] = None,
-                  process_id: Optional[str] = None):
+                  process_id: Optional[str] = None, event: Optional[LogEvent] = None):
         """Log an informational message with additional email-specific data"""
+        event = event or _classify_message(message, logging.INFO)
+        process_scoped = False
+        
         # Add process information if available
         if process_id:
             if process_id in self._active_processes:
+                process_scoped = True
+                
                 # Get process information
                 process_info = self._active_processes[process_id]
                 
@@ -160,16 +242,22 @@ class EmailLogger:
                 if not "Start" in message and not "Starting" in message and not "automation process" in message.lower():
                     message = f"[Process: {process_info.get('description', 'Unknown')}] {message} (Elapsed: {elapsed_formatted})"
         
-        self._log_with_data(logging.INFO, message, email_id, recipient, subject, status, file_name, file_path)
+        self._log_with_data(logging.INFO, message, email_id, recipient, subject, status, file_name, file_path,
+                            event=event, process_scoped=process_scoped)
         
     def log_warning(self, message: str, email_id: Optional[int] = None, recipient: Optional[str] = None,
                    subject: Optional[str] = None, status: Optional[str] = None, 
                    file_name: Optional[str] = None, file_path: Optional[str] = None,
-                   process_id: Optional[str] = None):
+                   process_id: Optional[str] = None, event: Optional[LogEvent] = None):
         """Log a warning message with additional email-specific data"""
+        event = event or _classify_message(message, logging.WARNING)
+        process_scoped = False
+        
         # Add process information if available
         if process_id:
             if process_id in self._active_processes:
+                process_scoped = True
+                
                 # Get process information
                 process_info = self._active_processes[process_id]
                 
@@ -180,16 +268,22 @@ class EmailLogger:
                 # Add process info to message
                 message = f"[Process: {process_info.get('description', 'Unknown')}] WARNING: {message} (Elapsed: {elapsed_formatted})"
             
-        self._log_with_data(logging.WARNING, message, email_id, recipient, subject, status, file_name, file_path)
+        self._log_with_data(logging.WARNING, message, email_id, recipient, subject, status, file_name, file_path,
+                            event=event, process_scoped=process_scoped)
         
     def log_error(self, message: str, email_id: Optional[int] = None, recipient: Optional[str] = None,
                  subject: Optional[str] = None, status: Optional[str] = None, 
                  file_name: Optional[str] = None, file_path: Optional[str] = None,
-                 process_id: Optional[str] = None):
+                 process_id: Optional[str] = None, event: Optional[LogEvent] = None):
         """Log an error message with additional email-specific data"""
+        event = event or _classify_message(message, logging.ERROR)
+        process_scoped = False
+        
         # Add process information if available
         if process_id:
             if process_id in self._active_processes:
+                process_scoped = True
+                
                 # Get process information
                 process_info = self._active_processes[process_id]
                 
@@ -200,11 +294,11 @@ class EmailLogger:
                 # Add process info to message
                 message = f"[Process: {process_info.get('description', 'Unknown')}] ❌ {message} (Elapsed: {elapsed_formatted})"
             
-        self._log_with_data(logging.ERROR, message, email_id, recipient, subject, status, file_name, file_path)
+        self._log_with_data(logging.ERROR, message, email_id, recipient, subject, status, file_name, file_path,
+                            event=event, process_scoped=process_scoped)
     
     def _is_duplicate_message(self, message: str, email_id: Optional[int] = None) -> bool:
         """Check if this message is a duplicate of a recent message"""
-        import time
         current_time = time.time()
         
         # Clean up old messages (older than 30 seconds)
@@ -228,24 +322,36 @@ class EmailLogger:
         self._recent_messages[message_key] = current_time
         return False
     
+    def _emit(self, level: int, log_data: Dict[str, Any], event: LogEvent, process_scoped: bool = False):
+        """
+        Write a structured record to the file handlers.
+        
+        The event route decides which filtered log files receive the record;
+        the structured data travels on the record so formatters never have to
+        re-parse the JSON text.
+        """
+        route = LOG_ROUTES[event]
+        sinks = route.sinks | {AUTOMATION_SINK} if process_scoped else route.sinks
+        self.logger.log(level, json.dumps(log_data), extra={
+            "event_type": event.value,
+            "log_sinks": sinks,
+            "log_data": log_data,
+            "log_category": route.category,
+            "log_emoji": route.emoji
+        })
+    
     def _log_with_data(self, level: int, message: str, email_id: Optional[int] = None, recipient: Optional[str] = None,
                       subject: Optional[str] = None, status: Optional[str] = None, 
-                      file_name: Optional[str] = None, file_path: Optional[str] = None):
+                      file_name: Optional[str] = None, file_path: Optional[str] = None,
+                      event: LogEvent = LogEvent.GENERAL, process_scoped: bool = False):
         """Internal method to log with additional structured data"""
-        # Add emoji prefix for key message types to make them more visible
-        if "direct attachment" in message.lower() and level == logging.INFO:
-            if not message.startswith("📎"):
-                message = f"📎 {message}"
-        elif "success" in message.lower() and level == logging.INFO:
-            if not message.startswith("✅"):
-                message = f"✅ {message}"
-                
         # Check for duplicate messages to reduce spam
         if self._is_duplicate_message(message, email_id):
             return  # Skip duplicate messages
         log_data = {
             "timestamp": datetime.now().isoformat(),
             "message": message,
+            "event": event.value,
             "process_id": self._current_process_id
         }
         
@@ -267,115 +373,36 @@ class EmailLogger:
         if file_path is not None:
             log_data["file_path"] = file_path
             
-        # Convert to JSON for structured logging
-        json_data = json.dumps(log_data)
+        # Log to our file logger (as JSON), routed by event type
+        self._emit(level, log_data, event, process_scoped)
+        
+        # Also log to the console with colorful formatting
+        route = LOG_ROUTES[event]
+        process_info = ""
+        if self._current_process_id and (route.show_pid or level >= logging.WARNING):
+            process_info = f"{Fore.YELLOW}[PID:{self._current_process_id[-6:]}]{Style.RESET_ALL} "
         
-        # Also log to console with colorful formatting
         if level == logging.INFO:
-            # Log to our file logger (as JSON)
-            self.logger.info(json_data)
-            
-            # Also log to the console as a formatted string
-            # Add category prefix with color
-            prefix = ""
-            emoji = ""
-            
-            # Add category prefix with color
-            if "Google Drive" in message or "GDrive" in message:
-                prefix = f"{Fore.MAGENTA}[GDRIVE]{Style.RESET_ALL} "
-            elif "Email transaction" in message or "Email sent" in message:
-                # Use brighter coloring for email transactions
-                if "Success" in message or "success" in message.lower():
-                    prefix = f"{Fore.BLUE}{Style.BRIGHT}[EMAIL]{Style.RESET_ALL} "
-                else:
-                    prefix = f"{Fore.BLUE}[EMAIL]{Style.RESET_ALL} "
-            elif "template" in message.lower():
-                prefix = f"{Fore.CYAN}[TEMPLATE]{Style.RESET_ALL} "
-            elif "compressed" in message.lower() or "attachment" in message.lower():
-                prefix = f"{Fore.BLUE}[ATTACHMENT]{Style.RESET_ALL} "
-            elif "updated" in message.lower() and "status" in message.lower():
-                prefix = f"{Fore.YELLOW}[DB]{Style.RESET_ALL} "
-            elif "authenticated" in message.lower() or "authentication" in message.lower():
-                prefix = f"{Fore.RED}[AUTH]{Style.RESET_ALL} "
-            elif "process" in message.lower() or "automation" in message.lower():
-                prefix = f"{Fore.GREEN}[PROCESS]{Style.RESET_ALL} "
-            else:
-                prefix = f"{Fore.BLUE}[EMAIL]{Style.RESET_ALL} "
-                
-            # Add emoji based on message content
-            if "SUCCESS:" in message or ("Success" in message and "status" in message.lower()):
-                emoji = "✅ "
-            elif "ERROR:" in message or "Failed" in message or "Error" in message:
-                emoji = "❌ "
-            elif "uploaded to Google Drive" in message:
-                emoji = "📤 "
-            elif "compressed successfully" in message:
-                emoji = "🗜️ "
-            elif "authenticated with Google Drive" in message:
-                emoji = "🔐 "
-            elif "Using template" in message:
-                emoji = "📝 "
-            elif "Email sent" in message:
-                emoji = "📧 "
-            elif "Updated email" in message and "Success" in message:
-                emoji = "🔄 "
-            elif "Email processing result" in message:
-                emoji = "📊 "
-            elif "Logs cleared" in message:
-                emoji = "🧹 "
-            elif "Starting" in message or "started" in message:
-                emoji = "🚀 "
-            elif "completed" in message or "Completed" in message or "finished" in message:
-                emoji = "🏁 "
-            
-            # Add process ID if available - but only for important messages
-            process_info = ""
-            if (self._current_process_id and 
-                ("Starting" in message or "started" in message or 
-                 "completed" in message or "failed" in message or 
-                 "statistics" in message or "authentication" in message or 
-                 "Google Drive" in message)):
-                process_info = f"{Fore.YELLOW}[PID:{self._current_process_id[-6:]}]{Style.RESET_ALL} "
-            
-            # Only print to console if it's not a redundant process message
-            if not ("[Process:" in message and "Processing email" in message):
-                # Make success messages more prominent with bold formatting and separator line
-                if "Success" in message or "success" in message.lower():
-                    # Add a distinctive success banner for successful email sends
-                    if status == "Success":
-                        print(f"\n{Fore.GREEN}{Style.BRIGHT}{'*' * 30} EMAIL SENT SUCCESSFULLY {'*' * 30}{Style.RESET_ALL}")
-                        print(f"{Fore.GREEN}{Style.BRIGHT}▶ RECIPIENT: {log_data.get('recipient', 'N/A')}{Style.RESET_ALL}")
-                        print(f"{Fore.GREEN}{Style.BRIGHT}▶ SUBJECT: {log_data.get('subject', 'N/A')}{Style.RESET_ALL}")
-                        print(f"{Fore.GREEN}{Style.BRIGHT}▶ {message}{Style.RESET_ALL}")
-                        print(f"{Fore.GREEN}{Style.BRIGHT}{'*' * 80}{Style.RESET_ALL}\n")
-                    else:
-                        print(f"EMAIL AUTOMATION: {process_info}{prefix}{Style.BRIGHT}{emoji}{message}{Style.RESET_ALL}")
-                else:
-                    print(f"EMAIL AUTOMATION: {process_info}{prefix}{emoji}{message}")
+            if route.console and event == LogEvent.SEND_SUCCESS and status == "Success":
+                # Add a distinctive success banner for successful email sends
+                print(f"\n{Fore.GREEN}{Style.BRIGHT}{'*' * 30} EMAIL SENT SUCCESSFULLY {'*' * 30}{Style.RESET_ALL}")
+                print(f"{Fore.GREEN}{Style.BRIGHT}▶ RECIPIENT: {log_data.get('recipient', 'N/A')}{Style.RESET_ALL}")
+                print(f"{Fore.GREEN}{Style.BRIGHT}▶ SUBJECT: {log_data.get('subject', 'N/A')}{Style.RESET_ALL}")
+                print(f"{Fore.GREEN}{Style.BRIGHT}▶ {message}{Style.RESET_ALL}")
+                print(f"{Fore.GREEN}{Style.BRIGHT}{'*' * 80}{Style.RESET_ALL}\n")
+            elif route.console:
+                prefix = f"{route.color}[{route.category}]{Style.RESET_ALL} "
+                print(f"EMAIL AUTOMATION: {process_info}{prefix}{route.emoji}{message}")
                 
         elif level == logging.ERROR:
-            self.logger.error(json_data)
-            
-            # Add process ID if available
-            process_info = ""
-            if self._current_process_id:
-                process_info = f"{Fore.YELLOW}[PID:{self._current_process_id[-6:]}]{Style.RESET_ALL} "
-            
             print(f"EMAIL AUTOMATION ERROR: {process_info}{Fore.RED}❌ {message}{Style.RESET_ALL}")
                 
         elif level == logging.WARNING:
-            self.logger.warning(json_data)
-            
-            # Add process ID if available
-            process_info = ""
-            if self._current_process_id:
-                process_info = f"{Fore.YELLOW}[PID:{self._current_process_id[-6:]}]{Style.RESET_ALL} "
-            
             print(f"EMAIL AUTOMATION WARNING: {process_info}{Fore.YELLOW}⚠️ {message}{Style.RESET_ALL}")
-                
-        else:
-            self.logger.debug(json_data)
             
+        # Push to live event stream subscribers
+        event_bus.publish("log", log_data)
+        
         # Add to in-memory cache for quick retrieval
         self._log_entries.append(log_data)
         
@@ -537,7 +564,8 @@ class EmailLogger:
                              subject: Optional[str] = None, file_path: Optional[str] = None,
                              status: Optional[str] = None, reason: Optional[str] = None,
                              original_size: Optional[int] = None, compressed_size: Optional[int] = None,
-                             process_id: Optional[str] = None):
+                             process_id: Optional[str] = None, elapsed_seconds: Optional[float] = None,
+                             stage_timings: Optional[Dict[str, float]] = None):
         """
         Log an email transaction with detailed information
         
@@ -551,6 +579,8 @@ class EmailLogger:
             original_size: Original size of attachment in bytes
             compressed_size: Compressed size of attachment in bytes
             process_id: Optional ID of the current automation process
+            elapsed_seconds: Optional total processing time of the email in seconds
+            stage_timings: Optional per-stage durations in seconds
         """
         # Use current process ID if one is active and none was provided
         if not process_id and self._current_process_id:
@@ -590,18 +620,38 @@ class EmailLogger:
             else:
                 message += f" (Size: {original_size_formatted})"
         
+        if elapsed_seconds is not None:
+            log_data["elapsed_seconds"] = round(elapsed_seconds, 3)
+        if stage_timings:
+            log_data["stage_timings"] = {stage: round(seconds, 3) for stage, seconds in stage_timings.items()}
+        
         # Track this email in the process if a process_id was provided
         if process_id and email_id is not None:
             self.add_email_to_process(process_id, email_id)
-            
-        # Convert to JSON for structured logging
-        json_data = json.dumps(log_data)
         
-        # Log using the appropriate level based on status
+        # Append a structured event for metrics queries (dashboard, analytics)
+        if status:
+            send_event_store.append(
+                email_id=email_id,
+                status=status,
+                process_id=process_id,
+                reason=reason,
+                original_size=original_size,
+                compressed_size=compressed_size,
+                elapsed_seconds=elapsed_seconds,
+                stage_timings=stage_timings
+            )
+            
+        # Log using the appropriate level and event type based on status
         if status == "Success":
-            self.logger.info(json_data)
+            log_data["event"] = LogEvent.TRANSACTION_SUCCESS.value
+            self._emit(logging.INFO, log_data, LogEvent.TRANSACTION_SUCCESS)
         else:
-            self.logger.error(json_data)
+            log_data["event"] = LogEvent.TRANSACTION_FAILED.value
+            self._emit(logging.ERROR, log_data, LogEvent.TRANSACTION_FAILED)
+        
+        # Push to live event stream subscribers
+        event_bus.publish("log", log_data)
             
         # Add to in-memory cache for quick retrieval
         self._log_entries.append(log_data)
@@ -637,7 +687,7 @@ class EmailLogger:
         self._current_process_id = process_id
         
         # Log the start of the process
-        self.log_info(f"Starting automation process: {description}", process_id=process_id)
+        self.log_info(f"Starting automation process: {description}", process_id=process_id, event=LogEvent.PROCESS)
         
         return process_id
         
@@ -672,9 +722,9 @@ class EmailLogger:
             
             # Log completion based on status
             if status.lower() == "success" or status.lower() == "completed":
-                self.log_info(message, process_id=process_id)
+                self.log_info(message, process_id=process_id, event=LogEvent.PROCESS)
             else:
-                self.log_error(message, process_id=process_id)
+                self.log_error(message, process_id=process_id, event=LogEvent.PROCESS)
                 
             # Clean up
             del self._active_processes[process_id]
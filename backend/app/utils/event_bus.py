@@ -0,0 +1,137 @@
+"""
+In-process event bus for pushing automation updates to connected clients.
+
+Publishers (the email logger, the queue processor, the scheduler) run in
+worker threads and call ``event_bus.publish``. Subscribers are asyncio
+consumers - the server-sent events endpoint - fed through
+``loop.call_soon_threadsafe``. Recent events are kept in a ring buffer with
+increasing IDs so a reconnecting client can resume from its last event ID.
+Event IDs are prefixed with an epoch chosen when the process starts, so an
+ID from before a restart is never taken for one of this process's events.
+"""
+import asyncio
+import logging
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RING_BUFFER_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 500
+
+
+class EventBus:
+    """Thread-safe publish/subscribe bus with a replay ring buffer"""
+
+    def __init__(self, buffer_size: int = RING_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=buffer_size)
+        self._next_id = 1
+        self.epoch = uuid.uuid4().hex[:8]
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """
+        Publish an event to all subscribers. Safe to call from any thread.
+
+        Args:
+            event_type: Event name (status, log, schedule)
+            data: JSON-serializable payload
+
+        Returns:
+            int: ID assigned to the event
+        """
+        with self._lock:
+            event = {
+                "id": self._next_id,
+                "type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "data": data
+            }
+            self._next_id += 1
+            self._buffer.append(event)
+            subscribers = list(self._subscribers.items())
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                # Event loop already closed - drop the stale subscriber
+                self.unsubscribe(queue)
+
+        return event["id"]
+
+    def format_id(self, event_id: int) -> str:
+        """Event ID as sent to clients, prefixed with this process's epoch"""
+        return f"{self.epoch}-{event_id}"
+
+    def _parse_id(self, event_id: str) -> Optional[int]:
+        """Event ID sent by a client, or None if it is not one of this process's"""
+        epoch, _, number = event_id.partition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[asyncio.Queue, List[Dict[str, Any]]]:
+        """
+        Register a subscriber on the running event loop.
+
+        Args:
+            last_event_id: ID of the last event the client saw, if resuming
+
+        Returns:
+            Tuple of (queue receiving new events, backlog of buffered events
+            after last_event_id). When the requested ID is older than the
+            buffer or from another process, the backlog starts with a "resync"
+            event telling the client to reload its state.
+        """
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._subscribers[queue] = loop
+            backlog = []
+            if last_event_id is not None:
+                oldest_id = self._buffer[0]["id"] if self._buffer else self._next_id
+                resume_id = self._parse_id(last_event_id)
+                if resume_id is None or resume_id >= self._next_id:
+                    # Not an event of this process: replay all it has
+                    resume_id = -1
+                if resume_id < oldest_id - 1:
+                    backlog.append({
+                        "id": oldest_id - 1,
+                        "type": "resync",
+                        "timestamp": datetime.now().isoformat(),
+                        "data": {}
+                    })
+                backlog.extend(event for event in self._buffer if event["id"] > resume_id)
+
+        return queue, backlog
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers"""
+        with self._lock:
+            return len(self._subscribers)
+
+
+def _deliver(queue: asyncio.Queue, event: Dict[str, Any]):
+    """Put an event on a subscriber queue, dropping the oldest one if it is full"""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(event)
+
+
+# Create a singleton instance
+event_bus = EventBus()
@@ -0,0 +1,342 @@
+"""
+Structured send-event store.
+
+Every email transaction logged through ``email_logger`` is also appended to an
+embedded SQLite database running in WAL mode. Dashboard and analytics queries
+aggregate these typed rows instead of regex-mining the human-readable log
+files, so metrics no longer depend on the wording of log messages.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EVENT_STORE_FILENAME = "send_events.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS send_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    day TEXT NOT NULL,
+    email_id INTEGER,
+    process_id TEXT,
+    status TEXT NOT NULL,
+    reason TEXT,
+    original_size INTEGER,
+    compressed_size INTEGER,
+    elapsed_seconds REAL,
+    stage_timings TEXT,
+    source TEXT NOT NULL DEFAULT 'live'
+);
+CREATE INDEX IF NOT EXISTS ix_send_events_day ON send_events (day);
+CREATE INDEX IF NOT EXISTS ix_send_events_email ON send_events (email_id);
+CREATE INDEX IF NOT EXISTS ix_send_events_process ON send_events (process_id);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _day_filter(start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[str, list]:
+    """Build an inclusive day-range WHERE fragment for the given dates"""
+    conditions = []
+    params = []
+
+    if start_date:
+        conditions.append("day >= ?")
+        params.append(start_date.date().isoformat())
+    if end_date:
+        conditions.append("day <= ?")
+        params.append(end_date.date().isoformat())
+
+    return (" AND ".join(conditions) if conditions else "1 = 1"), params
+
+
+class SendEventStore:
+    """Append-only store of structured email send events backed by SQLite (WAL)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store. The database is opened lazily on first use.
+
+        Args:
+            db_path: Path to the SQLite file. Defaults to EVENT_STORE_PATH, or
+                send_events.db inside LOG_DIR_PATH when that is not configured.
+        """
+        self._db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> str:
+        """Resolved path of the SQLite database file"""
+        if not self._db_path:
+            settings = get_settings()
+            if settings.EVENT_STORE_PATH:
+                self._db_path = os.path.abspath(settings.EVENT_STORE_PATH)
+            else:
+                self._db_path = os.path.join(os.path.abspath(settings.LOG_DIR_PATH), EVENT_STORE_FILENAME)
+        return self._db_path
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller must hold the lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # Events logged from now on are appended live; older ones are left to the backfill
+            conn.execute(
+                "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('created_at', ?)",
+                [datetime.now().isoformat(timespec="seconds")]
+            )
+            self._conn = conn
+        return self._conn
+
+    def append(self, email_id: Optional[int], status: str, process_id: Optional[str] = None,
+               reason: Optional[str] = None, original_size: Optional[int] = None,
+               compressed_size: Optional[int] = None, elapsed_seconds: Optional[float] = None,
+               stage_timings: Optional[Dict[str, float]] = None,
+               timestamp: Optional[datetime] = None, source: str = "live") -> bool:
+        """
+        Append a single send event
+
+        Args:
+            email_id: Database ID of the email
+            status: Outcome of the transaction (Success/Failed)
+            process_id: ID of the automation process that handled the email
+            reason: Reason for success or failure
+            original_size: Original attachment size in bytes
+            compressed_size: Compressed attachment size in bytes
+            elapsed_seconds: Total processing time of the email in seconds
+            stage_timings: Per-stage durations in seconds
+            timestamp: Event time (defaults to now)
+            source: 'live' for events recorded as they happen, 'log' for backfilled ones
+
+        Returns:
+            bool: True if the event was stored
+        """
+        ts = timestamp or datetime.now()
+        row = (
+            ts.isoformat(),
+            ts.date().isoformat(),
+            email_id,
+            process_id,
+            status,
+            reason,
+            original_size,
+            compressed_size,
+            elapsed_seconds,
+            json.dumps(stage_timings) if stage_timings else None,
+            source
+        )
+
+        try:
+            with self._lock:
+                self._connection().execute(
+                    """
+                    INSERT INTO send_events (ts, day, email_id, process_id, status, reason,
+                                             original_size, compressed_size, elapsed_seconds,
+                                             stage_timings, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    row
+                )
+            return True
+        except Exception as e:
+            logger.warning(f"Could not append send event for email {email_id}: {str(e)}")
+            return False
+
+    def _query(self, sql: str, params: list) -> list:
+        """Run a read query"""
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def backfill(self) -> int:
+        """
+        Import outcomes from plain-text logs written before the store existed.
+
+        Runs once per database: the logs are scanned without holding the
+        store, and the import is committed in an immediate transaction that
+        re-checks whether another process (the API or a worker) has already
+        done it. Log lines from after the store was created were appended
+        live and are skipped, so backfilled and live events never overlap.
+
+        Returns:
+            int: Number of imported events
+        """
+        # Import here to avoid a circular import (log_parser is a consumer of settings only)
+        from .log_parser import iter_outcomes_from_logs
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                if conn.execute("SELECT 1 FROM store_meta WHERE key = 'log_backfill'").fetchone():
+                    return 0
+                created_at = conn.execute("SELECT value FROM store_meta WHERE key = 'created_at'").fetchone()[0]
+
+            rows = [
+                (outcome["timestamp"], outcome["day"], outcome["email_id"], outcome["status"])
+                for outcome in iter_outcomes_from_logs()
+                if outcome["timestamp"] < created_at
+            ]
+
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if conn.execute("SELECT 1 FROM store_meta WHERE key = 'log_backfill'").fetchone():
+                        conn.execute("COMMIT")
+                        return 0
+                    conn.executemany(
+                        """
+                        INSERT INTO send_events (ts, day, email_id, status, source)
+                        VALUES (?, ?, ?, ?, 'log')
+                        """,
+                        rows
+                    )
+                    conn.execute(
+                        "INSERT INTO store_meta (key, value) VALUES ('log_backfill', ?)",
+                        [datetime.now().isoformat()]
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.warning(f"Could not backfill send events from log files: {str(e)}")
+            return 0
+
+        if rows:
+            logger.info(f"Backfilled {len(rows)} send events from existing log files")
+        return len(rows)
+
+    def get_metrics(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Get processed/success/failed counts and delivery rate for a date range.
+
+        Emails are counted once by ID; an email that eventually succeeded is
+        counted as a success even if earlier attempts failed.
+
+        Returns:
+            dict with total_processed, success_count, failed_count,
+            delivery_rate and avg_processing_time
+        """
+        where, params = _day_filter(start_date, end_date)
+
+        rows = self._query(
+            f"""
+            SELECT COALESCE(SUM(ok), 0), COALESCE(SUM(1 - ok), 0)
+            FROM (
+                SELECT email_id, MAX(CASE WHEN status = 'Success' THEN 1 ELSE 0 END) AS ok
+                FROM send_events
+                WHERE email_id IS NOT NULL AND {where}
+                GROUP BY email_id
+            )
+            """,
+            params
+        )
+        success_count, failed_count = rows[0]
+        total_processed = success_count + failed_count
+        delivery_rate = (success_count / total_processed * 100) if total_processed > 0 else 0
+
+        timing = self.get_processing_time_stats(start_date, end_date)
+
+        return {
+            'total_processed': total_processed,
+            'success_count': success_count,
+            'failed_count': failed_count,
+            'delivery_rate': round(delivery_rate, 1),
+            'avg_processing_time': timing['avg_seconds']
+        }
+
+    def get_processing_time_stats(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Get processing time statistics for successful sends in a date range.
+
+        Each email counts once, with the time of its latest timed success,
+        even if the send was logged more than once.
+
+        Returns:
+            dict with avg_seconds, total_emails, min_seconds and max_seconds
+        """
+        where, params = _day_filter(start_date, end_date)
+
+        rows = self._query(
+            f"""
+            SELECT AVG(elapsed_seconds), COUNT(*), MIN(elapsed_seconds), MAX(elapsed_seconds)
+            FROM send_events
+            WHERE id IN (
+                SELECT MAX(id)
+                FROM send_events
+                WHERE status = 'Success' AND elapsed_seconds > 0 AND {where}
+                GROUP BY COALESCE(email_id, -id)
+            )
+            """,
+            params
+        )
+        avg_seconds, total_emails, min_seconds, max_seconds = rows[0]
+
+        return {
+            'avg_seconds': avg_seconds or 0,
+            'total_emails': total_emails or 0,
+            'min_seconds': min_seconds or 0,
+            'max_seconds': max_seconds or 0
+        }
+
+    def get_daily_trends(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Get per-day success and failed counts for a date range.
+
+        Returns:
+            dict with dates, success, failed and pending lists
+            (pending is always zero - it comes from the database, not send events)
+        """
+        where, params = _day_filter(start_date, end_date)
+
+        rows = self._query(
+            f"""
+            SELECT day, COALESCE(SUM(ok), 0), COALESCE(SUM(1 - ok), 0)
+            FROM (
+                SELECT day, email_id, MAX(CASE WHEN status = 'Success' THEN 1 ELSE 0 END) AS ok
+                FROM send_events
+                WHERE email_id IS NOT NULL AND {where}
+                GROUP BY day, email_id
+            )
+            GROUP BY day
+            ORDER BY day
+            """,
+            params
+        )
+
+        return {
+            'dates': [row[0] for row in rows],
+            'success': [row[1] for row in rows],
+            'failed': [row[2] for row in rows],
+            'pending': [0 for _ in rows]
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Create a singleton instance
+send_event_store = SendEventStore()
+
+
+def start_backfill():
+    """Backfill the send-event store from the log files in a background thread"""
+    threading.Thread(target=send_event_store.backfill, daemon=True, name="send-event-backfill").start()
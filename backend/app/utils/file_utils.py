@@ -2,8 +2,13 @@
 File utilities for handling file operations and size conversions
 """
 import os
+import mmap
+import hashlib
 from typing import Tuple, Union
 
+# Bytes hashed per step when computing content checksums
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
 def get_file_size(file_path: str) -> int:
     """
     Get the size of a file in bytes
@@ -61,3 +66,26 @@ def get_formatted_file_size(file_path: str) -> Tuple[int, str]:
     size_bytes = get_file_size(file_path)
     formatted = format_file_size(size_bytes)
     return size_bytes, formatted
+
+def compute_file_md5(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Compute the MD5 hex digest of a file using a memory-mapped, chunked read
+    
+    MD5 matches the md5Checksum that Google Drive reports for uploaded files.
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes fed to the hash per step
+        
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be memory-mapped
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            for offset in range(0, len(view), chunk_size):
+                digest.update(view[offset:offset + chunk_size])
+    return digest.hexdigest()
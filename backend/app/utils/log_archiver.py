@@ -0,0 +1,405 @@
+"""
+Compressed, indexed archival of closed daily log files.
+
+Once a day is over, its automation/success/error/email_automation log files
+(including rotated backups) are rewritten into a single
+``<type>_<YYYYMMDD>.log.gz`` made of independently compressed gzip members
+("blocks"). A sidecar ``.idx.json`` records each block's byte offset, time
+range, email IDs and status counts, so readers can seek straight to the
+blocks they need instead of decompressing a whole day.
+
+The archive is a valid multi-member gzip file, so ``zcat`` still works on it.
+"""
+import os
+import re
+import gzip
+import json
+import logging
+import threading
+import time
+from datetime import datetime, date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LOG_TYPES = ("automation", "success", "error", "email_automation")
+ARCHIVE_SUFFIX = ".log.gz"
+INDEX_SUFFIX = ".log.idx.json"
+INDEX_VERSION = 1
+
+# email_automation_YYYYMMDD.log[.N] - the type may itself contain an underscore
+_LOG_FILE_PATTERN = re.compile(r'^(?P<type>[a-z_]+)_(?P<date>\d{8})\.log(?:\.(?P<backup>\d+))?$')
+
+
+def _parse_log_line(line: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Split a "YYYY-MM-DD HH:MM:SS - LEVEL - JSON" log line.
+
+    Returns:
+        Tuple of (timestamp string or None, decoded JSON data or empty dict)
+    """
+    parts = line.split(" - ", 2)
+    if len(parts) < 3:
+        return None, {}
+    try:
+        data = json.loads(parts[2])
+        return parts[0], data if isinstance(data, dict) else {}
+    except ValueError:
+        return parts[0], {}
+
+
+def _active_log_files() -> set:
+    """Paths currently open by the email_automation logger's file handlers"""
+    return {
+        os.path.abspath(handler.baseFilename)
+        for handler in logging.getLogger('email_automation').handlers
+        if isinstance(handler, logging.FileHandler)
+    }
+
+
+def _recently_modified(files: List[str], cutoff: float) -> bool:
+    """Whether any of the files was written to after the cutoff (a time.time() value)"""
+    for file_path in files:
+        try:
+            if os.path.getmtime(file_path) > cutoff:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+class _BlockBuilder:
+    """Accumulates lines and index metadata for one archive block"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.size = 0
+        self.start: Optional[str] = None
+        self.end: Optional[str] = None
+        self.email_ids = set()
+        self.status_counts: Dict[str, int] = {}
+
+    def add(self, line: str):
+        timestamp, data = _parse_log_line(line)
+        if timestamp:
+            self.start = self.start or timestamp
+            self.end = timestamp
+
+        email_id = data.get("email_id")
+        if email_id is not None:
+            self.email_ids.add(email_id)
+
+        status = data.get("status")
+        if status:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+        self.lines.append(line)
+        self.size += len(line)
+
+
+class LogArchiver:
+    """Compresses closed log days into block-indexed gzip archives"""
+
+    def __init__(self, logs_dir: Optional[str] = None, block_size_kb: Optional[int] = None):
+        settings = get_settings()
+        self.logs_dir = os.path.abspath(logs_dir or settings.LOG_DIR_PATH)
+        self.block_size = (block_size_kb or settings.LOG_ARCHIVE_BLOCK_SIZE_KB) * 1024
+        self.quiet_seconds = settings.LOG_ARCHIVE_QUIET_MINUTES * 60
+        self._lock = threading.Lock()
+
+    def archive_path(self, log_type: str, day: date) -> str:
+        """Path of the compressed archive for a log type and day"""
+        return os.path.join(self.logs_dir, f"{log_type}_{day.strftime('%Y%m%d')}{ARCHIVE_SUFFIX}")
+
+    def index_path(self, log_type: str, day: date) -> str:
+        """Path of the sidecar index for a log type and day"""
+        return os.path.join(self.logs_dir, f"{log_type}_{day.strftime('%Y%m%d')}{INDEX_SUFFIX}")
+
+    def find_plain_files(self, log_type: Optional[str] = None) -> Dict[Tuple[str, date], List[str]]:
+        """
+        Find plain-text log files grouped by (log type, day).
+
+        Files for each day are ordered oldest first: rotated backups
+        (.log.10 ... .log.1) followed by the live .log file.
+        """
+        grouped: Dict[Tuple[str, date], List[Tuple[int, str]]] = {}
+        if not os.path.isdir(self.logs_dir):
+            return {}
+
+        for file_name in os.listdir(self.logs_dir):
+            match = _LOG_FILE_PATTERN.match(file_name)
+            if not match or match.group("type") not in LOG_TYPES:
+                continue
+            if log_type and match.group("type") != log_type:
+                continue
+            try:
+                day = datetime.strptime(match.group("date"), "%Y%m%d").date()
+            except ValueError:
+                continue
+            backup = int(match.group("backup") or 0)
+            grouped.setdefault((match.group("type"), day), []).append(
+                (backup, os.path.join(self.logs_dir, file_name))
+            )
+
+        return {
+            key: [path for _, path in sorted(files, key=lambda item: -item[0])]
+            for key, files in grouped.items()
+        }
+
+    def archive_closed_days(self) -> int:
+        """
+        Archive every log day before today that is still stored as plain text.
+
+        Days with a file written to in the last LOG_ARCHIVE_QUIET_MINUTES are
+        left for a later pass: worker processes name their log files after
+        the day they started and keep writing to them, and their handlers
+        are not visible from this process.
+
+        Returns:
+            int: Number of (log type, day) pairs archived
+        """
+        today = datetime.now().date()
+        active_files = _active_log_files()
+        quiet_cutoff = time.time() - self.quiet_seconds
+        archived = 0
+
+        with self._lock:
+            for (log_type, day), files in sorted(self.find_plain_files().items()):
+                if day >= today:
+                    continue
+                # A long-running server keeps writing to the file it opened at startup
+                if active_files.intersection(files):
+                    continue
+                # Another process may still be writing to it
+                if _recently_modified(files, quiet_cutoff):
+                    continue
+                try:
+                    self._archive_day(log_type, day, files)
+                    archived += 1
+                except Exception as e:
+                    logger.error(f"Error archiving {log_type} logs for {day}: {str(e)}")
+
+        if archived:
+            logger.info(f"Archived {archived} closed log day(s) in {self.logs_dir}")
+        return archived
+
+    def _archive_day(self, log_type: str, day: date, files: List[str]):
+        """Compress one day's files into a block archive and remove the originals"""
+        archive_path = self.archive_path(log_type, day)
+        index_path = self.index_path(log_type, day)
+
+        # Append to an existing archive if late files for the day show up
+        index = self.load_index(log_type, day) or {
+            "version": INDEX_VERSION,
+            "log_type": log_type,
+            "date": day.isoformat(),
+            "blocks": []
+        }
+        offset = os.path.getsize(archive_path) if os.path.exists(archive_path) else 0
+
+        temp_archive = archive_path + ".tmp"
+        temp_index = index_path + ".tmp"
+        if offset:
+            with open(archive_path, "rb") as src, open(temp_archive, "wb") as dst:
+                dst.write(src.read())
+
+        with open(temp_archive, "ab") as out:
+            for block in self._build_blocks(files):
+                payload = gzip.compress("".join(block.lines).encode("utf-8"))
+                out.write(payload)
+                index["blocks"].append({
+                    "offset": offset,
+                    "length": len(payload),
+                    "lines": len(block.lines),
+                    "start": block.start,
+                    "end": block.end,
+                    "email_ids": sorted(block.email_ids, key=str),
+                    "status_counts": block.status_counts
+                })
+                offset += len(payload)
+
+        with open(temp_index, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+
+        # Publish the archive before the index so the index never points past the data
+        os.replace(temp_archive, archive_path)
+        os.replace(temp_index, index_path)
+
+        for file_path in files:
+            os.remove(file_path)
+
+    def _build_blocks(self, files: List[str]) -> Iterator[_BlockBuilder]:
+        """Split the lines of the given files into blocks of roughly block_size bytes"""
+        block = _BlockBuilder()
+        for file_path in files:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    block.add(line)
+                    if block.size >= self.block_size:
+                        yield block
+                        block = _BlockBuilder()
+        if block.lines:
+            yield block
+
+    def load_index(self, log_type: str, day: date) -> Optional[Dict[str, Any]]:
+        """Load the sidecar index for an archived day, or None if not archived"""
+        index_path = self.index_path(log_type, day)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read log archive index {index_path}: {str(e)}")
+            return None
+
+    def archived_days(self, log_type: str) -> List[date]:
+        """List the days that have an archive for the given log type"""
+        days = []
+        if not os.path.isdir(self.logs_dir):
+            return days
+        prefix = f"{log_type}_"
+        for file_name in os.listdir(self.logs_dir):
+            if file_name.startswith(prefix) and file_name.endswith(INDEX_SUFFIX):
+                date_part = file_name[len(prefix):-len(INDEX_SUFFIX)]
+                try:
+                    days.append(datetime.strptime(date_part, "%Y%m%d").date())
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def read_archived_lines(self, log_type: str, day: date,
+                            block_filter: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Iterator[str]:
+        """
+        Yield lines from an archived day, decompressing only matching blocks.
+
+        Args:
+            log_type: automation, success, error or email_automation
+            day: Archived day
+            block_filter: Optional predicate on a block's index entry; blocks for
+                which it returns False are skipped without being read
+        """
+        index = self.load_index(log_type, day)
+        if not index:
+            return
+
+        with open(self.archive_path(log_type, day), "rb") as f:
+            for block in index.get("blocks", []):
+                if block_filter and not block_filter(block):
+                    continue
+                f.seek(block["offset"])
+                content = gzip.decompress(f.read(block["length"])).decode("utf-8")
+                yield from content.splitlines(keepends=True)
+
+    def iter_day_contents(self, log_type: str, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          block_filter: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Iterator[Tuple[date, str]]:
+        """
+        Yield (day, text) for every day of a log type in the date range,
+        reading archived days through their index and plain days directly.
+        """
+        plain = {day: files for (_, day), files in self.find_plain_files(log_type).items()}
+        days = set(plain) | set(self.archived_days(log_type))
+
+        for day in sorted(days):
+            if start_date and day < start_date.date():
+                continue
+            if end_date and day > end_date.date():
+                continue
+
+            chunks = []
+            try:
+                chunks.extend(self.read_archived_lines(log_type, day, block_filter))
+                for file_path in plain.get(day, []):
+                    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                        chunks.append(f.read())
+            except Exception as e:
+                logger.warning(f"Error reading {log_type} logs for {day}: {str(e)}")
+                continue
+
+            yield day, "".join(chunks)
+
+    def query_entries(self, log_type: str, day: date, email_id: Optional[int] = None,
+                      status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Return decoded log entries for an archived day, using the index to
+        skip blocks that cannot contain the requested email ID or status.
+        """
+        def block_filter(block: Dict[str, Any]) -> bool:
+            if email_id is not None and email_id not in block.get("email_ids", []):
+                return False
+            if status and not block.get("status_counts", {}).get(status):
+                return False
+            return True
+
+        entries = []
+        for line in self.read_archived_lines(log_type, day, block_filter):
+            _, data = _parse_log_line(line)
+            if not data:
+                continue
+            if email_id is not None and data.get("email_id") != email_id:
+                continue
+            if status and data.get("status") != status:
+                continue
+            entries.append(data)
+            if len(entries) >= limit:
+                break
+        return entries
+
+
+_log_archiver: Optional[LogArchiver] = None
+_archiver_thread: Optional[threading.Thread] = None
+_archiver_stop = threading.Event()
+
+
+def get_log_archiver() -> LogArchiver:
+    """Get the shared LogArchiver, created from settings on first use"""
+    global _log_archiver
+    if _log_archiver is None:
+        _log_archiver = LogArchiver()
+    return _log_archiver
+
+
+def _archiver_loop(interval_seconds: int):
+    """Archive closed days now and then every interval until stopped"""
+    while not _archiver_stop.is_set():
+        try:
+            get_log_archiver().archive_closed_days()
+        except Exception as e:
+            logger.error(f"Error in log archiver: {str(e)}")
+        _archiver_stop.wait(interval_seconds)
+
+
+def start_log_archiver() -> bool:
+    """
+    Start the background log archiver thread if enabled in settings.
+
+    Returns:
+        bool: True if the archiver is running
+    """
+    global _archiver_thread
+    settings = get_settings()
+    if not settings.LOG_ARCHIVE_ENABLED:
+        logger.info("Log archiver disabled (LOG_ARCHIVE_ENABLED=false)")
+        return False
+
+    if _archiver_thread and _archiver_thread.is_alive():
+        return True
+
+    _archiver_stop.clear()
+    _archiver_thread = threading.Thread(
+        target=_archiver_loop,
+        args=(settings.LOG_ARCHIVE_INTERVAL_MINUTES * 60,),
+        daemon=True,
+        name="log-archiver"
+    )
+    _archiver_thread.start()
+    logger.info("Log archiver started")
+    return True
+
+
+def stop_log_archiver():
+    """Signal the background log archiver thread to stop"""
+    _archiver_stop.set()
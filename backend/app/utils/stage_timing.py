@@ -0,0 +1,140 @@
+"""
+Per-stage timing instrumentation for the email send pipeline.
+
+A ``StageTimer`` measures named stages of one email with a monotonic clock.
+Each automation run owns a ``StageHistogram`` that aggregates the timers of
+all its emails into per-stage percentiles (p50/p95/p99), exposed through the
+API and the process summary log.
+"""
+import math
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Stage names, in pipeline order
+STAGE_DB_STATUS_CHECK = "db_status_check"
+STAGE_MAPPING_VALIDATION = "mapping_validation"
+STAGE_TEMPLATE_RENDER = "template_render"
+STAGE_SMTP_CHECK = "smtp_check"
+STAGE_FOLDER_SCAN = "folder_scan"
+STAGE_COMPRESSION = "compression"
+STAGE_GDRIVE_CHECK = "gdrive_check"
+STAGE_GDRIVE_UPLOAD = "gdrive_upload"
+STAGE_MIME_BUILD = "mime_build"
+STAGE_SMTP_CONNECT = "smtp_connect"
+STAGE_SMTP_DATA = "smtp_data"
+STAGE_DB_UPDATE = "db_update"
+STAGE_TOTAL = "total"
+
+# Number of recent runs whose histograms are kept in memory
+MAX_TRACKED_RUNS = 20
+
+
+class StageTimer:
+    """Collects monotonic durations of named pipeline stages for one email"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block; repeated stages accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """Add a measured duration to a stage"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        """Seconds since the timer was created"""
+        return time.perf_counter() - self._started
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values), math.ceil(percentile / 100 * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+class StageHistogram:
+    """Aggregates stage timings of all emails in one automation run"""
+
+    def __init__(self, process_id: Optional[str] = None):
+        self.process_id = process_id
+        self._samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, timings: Dict[str, float], total: Optional[float] = None):
+        """Add one email's stage timings (and optionally its total time)"""
+        with self._lock:
+            for stage, seconds in timings.items():
+                self._samples.setdefault(stage, []).append(seconds)
+            if total is not None:
+                self._samples.setdefault(STAGE_TOTAL, []).append(total)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-stage statistics.
+
+        Returns:
+            dict of stage -> {count, p50, p95, p99, max, total} in seconds
+        """
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+
+        return {
+            stage: {
+                "count": len(values),
+                "p50": round(_percentile(values, 50), 4),
+                "p95": round(_percentile(values, 95), 4),
+                "p99": round(_percentile(values, 99), 4),
+                "max": round(values[-1], 4),
+                "total": round(sum(values), 4)
+            }
+            for stage, values in samples.items()
+        }
+
+    def format_summary(self) -> str:
+        """One-line human readable p50/p95/p99 summary for the process log"""
+        parts = []
+        for stage, stats in self.summary().items():
+            parts.append(f"{stage} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s")
+        return "; ".join(parts)
+
+
+_runs: "OrderedDict[str, StageHistogram]" = OrderedDict()
+_runs_lock = threading.Lock()
+
+
+def start_run_timings(process_id: str) -> StageHistogram:
+    """Create (or reset) the timing histogram for an automation run"""
+    histogram = StageHistogram(process_id)
+    with _runs_lock:
+        _runs.pop(process_id, None)
+        _runs[process_id] = histogram
+        while len(_runs) > MAX_TRACKED_RUNS:
+            _runs.popitem(last=False)
+    return histogram
+
+
+def get_run_timings(process_id: Optional[str] = None) -> Optional[StageHistogram]:
+    """Get the histogram for a run, or for the most recent run when no ID is given"""
+    with _runs_lock:
+        if process_id:
+            return _runs.get(process_id)
+        return next(reversed(_runs.values()), None)
+
+
+def list_timed_runs() -> List[str]:
+    """Process IDs of the runs with timing data, most recent last"""
+    with _runs_lock:
+        return list(_runs.keys())
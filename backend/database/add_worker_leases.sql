@@ -0,0 +1,65 @@
+-- Schema for running automation on separate worker processes (worker.py)
+-- Workers lease batches of Pending rows through Lease_Owner/Lease_Expires,
+-- register and heartbeat in AutomationWorkers, and follow the run requested
+-- by the API in AutomationControl.
+USE EmailDB;
+GO
+
+IF NOT EXISTS (
+    SELECT 1
+FROM sys.columns c
+    JOIN sys.tables t ON c.object_id = t.object_id
+WHERE t.name = 'EmailRecords'
+    AND c.name = 'Lease_Owner'
+)
+BEGIN
+    PRINT 'Adding lease columns to EmailRecords...';
+
+    ALTER TABLE EmailRecords ADD
+        Lease_Owner NVARCHAR(100) NULL,
+        Lease_Expires DATETIME NULL;
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EmailRecords_Lease')
+BEGIN
+    CREATE INDEX IX_EmailRecords_Lease ON EmailRecords (Email_Status, Lease_Expires) INCLUDE (Lease_Owner);
+END
+GO
+
+-- One row per worker process
+IF OBJECT_ID('AutomationWorkers', 'U') IS NULL
+BEGIN
+    CREATE TABLE AutomationWorkers
+    (
+        Worker_ID NVARCHAR(100) PRIMARY KEY,
+        Host_Name NVARCHAR(255) NOT NULL,
+        Process_ID INT NOT NULL,
+        Status NVARCHAR(50) NOT NULL,
+        Started_At DATETIME NOT NULL,
+        Last_Heartbeat DATETIME NOT NULL,
+        Processed INT NOT NULL DEFAULT 0,
+        Successful INT NOT NULL DEFAULT 0,
+        Failed INT NOT NULL DEFAULT 0
+    );
+END
+GO
+
+-- The run the API has requested; a single row with Control_ID = 1
+IF OBJECT_ID('AutomationControl', 'U') IS NULL
+BEGIN
+    CREATE TABLE AutomationControl
+    (
+        Control_ID INT PRIMARY KEY,
+        Run_ID NVARCHAR(100) NULL,
+        Run_State NVARCHAR(50) NOT NULL,
+        Template_ID NVARCHAR(100) NULL,
+        Updated_At DATETIME NOT NULL
+    );
+
+    INSERT INTO AutomationControl (Control_ID, Run_ID, Run_State, Template_ID, Updated_At)
+    VALUES (1, NULL, 'idle', NULL, GETUTCDATE());
+END
+GO
+
+PRINT 'Worker lease schema is ready.';
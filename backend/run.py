@@ -37,6 +37,10 @@ class ColoredFormatter(logging.Formatter):
         'SERVER': Fore.GREEN + Style.BRIGHT,
         'CONFIG': Fore.CYAN,
         'AUTOMATION': Fore.BLUE,
+        'PROCESS': Fore.GREEN,
+        'TEMPLATE': Fore.CYAN,
+        'ATTACHMENT': Fore.BLUE,
+        'AUTH': Fore.RED + Style.BRIGHT,
     }
     
     def __init__(self, detailed=False):
@@ -55,107 +59,57 @@ class ColoredFormatter(logging.Formatter):
         level_color = self.COLORS.get(record.levelname, Fore.WHITE)
         record.levelname = f"{level_color}{record.levelname}{Style.RESET_ALL}"
         
-        # Special handling for email_automation logger
-        if record.name == 'email_automation':
-            # Parse JSON if present
-            if isinstance(record.msg, str) and record.msg.startswith('{"timestamp":'):
-                try:
-                    # Extract message from JSON string using regex
-                    message_match = re.search(r'"message":\s*"([^"]*)"', record.msg)
-                    if message_match:
-                        clean_message = message_match.group(1)
-                        
-                        # Extract additional fields if they exist
-                        email_id_match = re.search(r'"email_id":\s*(\d+)', record.msg)
-                        recipient_match = re.search(r'"recipient":\s*"([^"]*)"', record.msg)
-                        subject_match = re.search(r'"subject":\s*"([^"]*)"', record.msg)
-                        status_match = re.search(r'"status":\s*"([^"]*)"', record.msg)
-                        file_path_match = re.search(r'"file_path":\s*"([^"]*)"', record.msg)
-                        
-                        # Identify category for coloring
-                        category_color = Fore.WHITE
-                        prefix = ""
-                        
-                        # Try to identify log category based on content
-                        if "Google Drive" in clean_message or "GDrive" in clean_message or "Drive upload" in clean_message:
-                            category_color = self.CATEGORY_COLORS['GDRIVE']
-                            prefix = f"{category_color}[GDRIVE]{Style.RESET_ALL} "
-                        elif "Email transaction" in clean_message or "Email sent" in clean_message or "email processing result" in clean_message:
-                            category_color = self.CATEGORY_COLORS['EMAIL']
-                            prefix = f"{category_color}[EMAIL]{Style.RESET_ALL} "
-                        elif "template" in clean_message.lower():
-                            category_color = self.CATEGORY_COLORS['EMAIL']
-                            prefix = f"{category_color}[TEMPLATE]{Style.RESET_ALL} "
-                        elif "compressed" in clean_message.lower() or "attachment" in clean_message.lower():
-                            category_color = self.CATEGORY_COLORS['EMAIL']
-                            prefix = f"{category_color}[ATTACHMENT]{Style.RESET_ALL} "
-                        elif "authentication" in clean_message.lower() or "authenticated" in clean_message.lower():
-                            category_color = self.CATEGORY_COLORS['SECURITY']
-                            prefix = f"{category_color}[AUTH]{Style.RESET_ALL} "
-                        elif "updated" in clean_message.lower() and "status" in clean_message.lower():
-                            category_color = self.CATEGORY_COLORS['DB']
-                            prefix = f"{category_color}[DB]{Style.RESET_ALL} "
+        # Special handling for email_automation logger: records carry their
+        # structured data and event route, so no JSON re-parsing is needed
+        log_data = getattr(record, 'log_data', None)
+        if record.name == 'email_automation' and log_data is not None:
+            try:
+                category = getattr(record, 'log_category', '')
+                category_color = self.CATEGORY_COLORS.get(category, Fore.WHITE)
+                prefix = f"{category_color}[{category}]{Style.RESET_ALL} " if category else ""
+                
+                clean_message = log_data.get("message", "")
+                status = log_data.get("status")
+                if status == "Success":
+                    clean_message = f"{Fore.GREEN}{getattr(record, 'log_emoji', '')}{clean_message}{Style.RESET_ALL}"
+                elif status == "Failed":
+                    clean_message = f"{Fore.RED}{getattr(record, 'log_emoji', '')}{clean_message}{Style.RESET_ALL}"
+                else:
+                    clean_message = f"{getattr(record, 'log_emoji', '')}{clean_message}"
+                
+                display = f"{prefix}{clean_message}"
+                
+                # Add details for email transactions if available and detailed mode is on
+                if self.detailed and log_data.get("email_id") is not None:
+                    details = f"\n    ID: {log_data['email_id']}"
+                    
+                    if log_data.get("recipient"):
+                        details += f" | To: {log_data['recipient']}"
+                    
+                    if log_data.get("subject"):
+                        details += f" | Subject: {log_data['subject']}"
                         
-                        # Format the message more nicely with emojis
-                        if "SUCCESS:" in clean_message:
-                            success_part = clean_message.split("SUCCESS:")[1].strip()
-                            clean_message = f"{Fore.GREEN}✅ SUCCESS:{Style.RESET_ALL} {success_part}"
-                        elif "ERROR:" in clean_message:
-                            error_part = clean_message.split("ERROR:")[1].strip()
-                            clean_message = f"{Fore.RED}❌ ERROR:{Style.RESET_ALL} {error_part}"
-                        elif "uploaded to Google Drive" in clean_message:
-                            clean_message = f"{Fore.MAGENTA}📤 {clean_message}{Style.RESET_ALL}"
-                        elif "compressed successfully" in clean_message:
-                            clean_message = f"{Fore.BLUE}🗜️ {clean_message}{Style.RESET_ALL}"
-                        elif "authenticated with Google Drive" in clean_message:
-                            clean_message = f"{Fore.MAGENTA}🔐 {clean_message}{Style.RESET_ALL}"
-                        elif "Using template" in clean_message:
-                            clean_message = f"{Fore.CYAN}📝 {clean_message}{Style.RESET_ALL}"
-                        elif "Email sent" in clean_message:
-                            clean_message = f"{Fore.GREEN}📧 {clean_message}{Style.RESET_ALL}"
-                        elif "Email transaction" in clean_message and "Success" in clean_message:
-                            clean_message = f"{Fore.GREEN}✅ {clean_message}{Style.RESET_ALL}"
-                        elif "Email transaction" in clean_message and "Failed" in clean_message:
-                            clean_message = f"{Fore.RED}❌ {clean_message}{Style.RESET_ALL}"
-                        elif "Updated email" in clean_message and "Success" in clean_message:
-                            clean_message = f"{Fore.GREEN}🔄 {clean_message}{Style.RESET_ALL}"
-                        elif "Updated email" in clean_message and "Failed" in clean_message:
-                            clean_message = f"{Fore.RED}🔄 {clean_message}{Style.RESET_ALL}"
-                        elif "Email processing result" in clean_message and "Success" in clean_message:
-                            clean_message = f"{Fore.GREEN}✅ {clean_message}{Style.RESET_ALL}"
-                        elif "Email processing result" in clean_message and "Failed" in clean_message:
-                            clean_message = f"{Fore.RED}❌ {clean_message}{Style.RESET_ALL}"
-                        elif status_match and "Success" in status_match.group(1):
-                            clean_message = f"{Fore.GREEN}✅ {clean_message}{Style.RESET_ALL}"
-                        elif status_match and "Failed" in status_match.group(1):
-                            clean_message = f"{Fore.RED}❌ {clean_message}{Style.RESET_ALL}"
+                    if status:
+                        status_color = Fore.GREEN if "Success" in status else Fore.RED
+                        details += f" | Status: {status_color}{status}{Style.RESET_ALL}"
                         
-                        record.msg = f"{prefix}{clean_message}"
+                    if log_data.get("file_path"):
+                        details += f" | File: {log_data['file_path']}"
                         
-                        # Add details for email transactions if available and detailed mode is on
-                        if self.detailed and email_id_match:
-                            details = f"\n    ID: {email_id_match.group(1)}"
-                            
-                            if recipient_match:
-                                details += f" | To: {recipient_match.group(1)}"
-                            
-                            if subject_match:
-                                details += f" | Subject: {subject_match.group(1)}"
-                                
-                            if status_match:
-                                status = status_match.group(1)
-                                status_color = Fore.GREEN if "Success" in status else Fore.RED
-                                details += f" | Status: {status_color}{status}{Style.RESET_ALL}"
-                                
-                            if file_path_match:
-                                details += f" | File: {file_path_match.group(1)}"
-                                
-                            record.msg += details
-                except Exception as e:
-                    # If parsing fails, just use the original message
-                    print(f"Error parsing JSON log: {e}")
-                    pass
-            return super().format(record)
+                    display += details
+                
+                # Format a copy so other handlers still see the original record
+                display_record = logging.makeLogRecord(record.__dict__)
+                display_record.msg = display
+                display_record.args = None
+                result = super().format(display_record)
+            except Exception as e:
+                # If formatting fails, just use the original message
+                print(f"Error formatting structured log: {e}")
+                result = super().format(record)
+            
+            record.levelname = original_level
+            return result
             
         # Handle Uvicorn HTTP logs
         if hasattr(record, 'scope') or 'HTTP' in getattr(record, 'msg', ''):
@@ -0,0 +1,88 @@
+"""
+Shared pytest setup for the backend tests.
+
+The settings require database credentials and paths. Tests get dummy
+credentials, and every file the services write (logs, SQLite stores, upload
+state) goes to a temporary directory. These variables are set before any app
+module is imported. Tests never connect to the database; functions that would
+are replaced with monkeypatch.
+
+Run from the backend directory:
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="emailmanagement_tests_")
+
+os.environ.update({
+    "DB_SERVER": "localhost",
+    "DB_NAME": "EmailManagementTest",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_DRIVER": "ODBC Driver 17 for SQL Server",
+    "EMAIL_TABLE": "EmailRecords",
+    "EMAIL_ARCHIVE_PATH": os.path.join(TEST_DATA_DIR, "archive"),
+    "LOG_DIR_PATH": os.path.join(TEST_DATA_DIR, "logs"),
+    "EVENT_STORE_PATH": os.path.join(TEST_DATA_DIR, "send_events.db"),
+    "AUTOMATION_QUEUE_PATH": os.path.join(TEST_DATA_DIR, "automation_queue.db"),
+    "RETRY_STORE_PATH": os.path.join(TEST_DATA_DIR, "automation_retries.db"),
+    "GDRIVE_TOKEN_PATH": os.path.join(TEST_DATA_DIR, "gdrive", "token.pickle"),
+    "GDRIVE_CREDENTIALS_PATH": os.path.join(TEST_DATA_DIR, "gdrive", "credentials.json"),
+    "GDRIVE_UPLOAD_STATE_PATH": os.path.join(TEST_DATA_DIR, "gdrive", "upload_sessions.json"),
+    "GDRIVE_UPLOAD_CACHE_PATH": os.path.join(TEST_DATA_DIR, "gdrive", "upload_cache.db"),
+})
+os.makedirs(os.environ["LOG_DIR_PATH"], exist_ok=True)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Remove the temporary data directory"""
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """
+    The application settings. Use settings.set(NAME=value) to change a
+    setting for one test.
+    """
+    from app.core.config import get_settings
+
+    current = get_settings()
+
+    class _Settings:
+        def __getattr__(self, name):
+            return getattr(current, name)
+
+        def set(self, **values):
+            for name, value in values.items():
+                monkeypatch.setattr(current, name, value)
+
+    return _Settings()
+
+
+def make_record(email_id: int, **fields) -> dict:
+    """An email record as loaded from the email table"""
+    record = {
+        "Email_ID": email_id,
+        "Company_Name": f"Company {email_id}",
+        "Email": f"user{email_id}@example.com",
+        "Subject": f"Subject {email_id}",
+        "File_Path": "",
+        "Email_Send_Date": None,
+        "Email_Status": "Pending",
+        "Date": None,
+        "Reason": None,
+    }
+    record.update(fields)
+    return record
@@ -0,0 +1,52 @@
+"""Tests for splitting oversized attachment sets across emails"""
+
+from app.services.email.core.attachment_splitter import MIME_FILE_OVERHEAD, plan_attachment_parts
+
+MB = 1024 * 1024
+
+
+def test_files_are_packed_first_fit_decreasing():
+    manifest = [("a", 6 * MB), ("b", 3 * MB), ("c", 5 * MB), ("d", 4 * MB), ("e", 2 * MB)]
+
+    parts, error = plan_attachment_parts(manifest, 10 * MB, max_parts=5)
+
+    assert error is None
+    # d does not fit next to a once the per-file overhead is counted
+    assert parts == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_every_part_stays_within_capacity():
+    sizes = dict(("f%d" % i, (i % 7 + 1) * 700 * 1024) for i in range(30))
+    capacity = 8 * MB
+
+    parts, error = plan_attachment_parts(list(sizes.items()), capacity, max_parts=20)
+
+    assert error is None
+    assert sorted(path for part in parts for path in part) == sorted(sizes)
+    for part in parts:
+        assert sum(sizes[path] + MIME_FILE_OVERHEAD for path in part) <= capacity
+
+
+def test_per_file_overhead_counts_against_capacity():
+    parts, error = plan_attachment_parts([("a", MB), ("b", MB)], 2 * MB, max_parts=5)
+
+    assert error is None
+    assert len(parts) == 2
+
+
+def test_file_larger_than_one_email_is_rejected():
+    parts, error = plan_attachment_parts([("small", MB), ("huge", 30 * MB)], 20 * MB, max_parts=5)
+
+    assert parts is None
+    assert "huge" in error
+
+
+def test_too_many_parts_is_rejected():
+    parts, error = plan_attachment_parts([("a", 6 * MB), ("b", 6 * MB), ("c", 6 * MB)], 10 * MB, max_parts=2)
+
+    assert parts is None
+    assert "more than 2 emails" in error
+
+
+def test_empty_manifest_is_rejected():
+    assert plan_attachment_parts([], 10 * MB, max_parts=5) == (None, "No files to split")
@@ -0,0 +1,129 @@
+"""Tests for the shared Google Drive client holder"""
+
+import threading
+
+import pytest
+
+from app.services.storage.gdrive import client_holder
+from app.services.storage.gdrive.client_holder import DriveClientHolder
+
+
+class _Authenticator:
+    def __init__(self, refreshes=True):
+        self.refreshes = refreshes
+        self.refresh_calls = 0
+
+    def refresh_if_expiring(self, margin_seconds):
+        self.refresh_calls += 1
+        return self.refreshes
+
+
+class _FakeClient:
+    """Stands in for GoogleDriveClient, counting how often one is built"""
+    built = []
+    authenticated = True
+
+    def __init__(self, authenticator=None):
+        self.authenticator = authenticator or _Authenticator()
+        self.is_authenticated = type(self).authenticated
+        type(self).built.append(self)
+
+    @classmethod
+    def from_authenticator(cls, authenticator):
+        return cls(authenticator)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client_class = type("FakeClient", (_FakeClient,), {"built": [], "authenticated": True})
+    monkeypatch.setattr(client_holder, "GoogleDriveClient", client_class)
+    return client_class
+
+
+def test_client_is_built_once_and_refreshed_in_place(fake_client):
+    holder = DriveClientHolder()
+
+    client = holder.get_client()
+
+    assert holder.get_client() is client
+    assert holder.is_available()
+    assert len(fake_client.built) == 1
+    assert client.authenticator.refresh_calls == 1
+
+
+def test_failed_refresh_rebuilds_the_client(fake_client):
+    holder = DriveClientHolder()
+    first = holder.get_client()
+    first.authenticator.refreshes = False
+
+    second = holder.get_client()
+
+    assert second is not first
+    assert len(fake_client.built) == 2
+
+
+def test_failed_authentication_is_remembered_for_the_ttl(fake_client):
+    fake_client.authenticated = False
+    holder = DriveClientHolder()
+    holder.availability_ttl_seconds = 3600
+
+    assert not holder.is_available()
+    assert not holder.is_available()
+    assert len(fake_client.built) == 1
+    available, age = holder.status()
+    assert not available and age >= 0
+
+
+def test_authentication_is_retried_after_the_ttl(fake_client):
+    fake_client.authenticated = False
+    holder = DriveClientHolder()
+    holder.availability_ttl_seconds = 0
+    assert not holder.is_available()
+
+    fake_client.authenticated = True
+
+    assert holder.is_available()
+    assert len(fake_client.built) == 2
+
+
+def test_invalidate_drops_the_client(fake_client):
+    holder = DriveClientHolder()
+    first = holder.get_client()
+    holder.invalidate()
+
+    assert holder.status() == (False, None)
+    assert holder.get_client() is not first
+
+
+def test_each_thread_gets_its_own_client_on_the_shared_credentials(fake_client):
+    holder = DriveClientHolder()
+    shared = holder.get_client()
+    clients = []
+
+    def take_client():
+        clients.append(holder.get_thread_client())
+        clients.append(holder.get_thread_client())
+
+    threads = [threading.Thread(target=take_client) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    first, first_again, second, second_again = clients
+    assert first is first_again and second is second_again
+    assert first is not second
+    assert all(client.authenticator is shared.authenticator for client in clients)
+
+
+def test_concurrent_first_use_authenticates_once(fake_client):
+    holder = DriveClientHolder()
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(holder.get_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake_client.built) == 1
+    assert all(client is clients[0] for client in clients)
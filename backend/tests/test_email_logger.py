@@ -0,0 +1,90 @@
+"""Tests for the event-typed routing of email automation logs"""
+
+import logging
+
+import pytest
+
+from app.utils import email_logger as email_logger_module
+from app.utils.email_logger import (
+    AUTOMATION_SINK, SUCCESS_SINK, AutomationLogFilter, LogEvent, SuccessLogFilter, _classify_message,
+    email_logger
+)
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    collector = _RecordCollector()
+    email_logger.logger.addHandler(collector)
+    yield collector.records
+    email_logger.logger.removeHandler(collector)
+
+
+@pytest.fixture
+def no_classifier(monkeypatch):
+    """Fail the test if a message is classified by its text"""
+    def classify(message, level):
+        raise AssertionError(f"Message was classified by substring: {message}")
+
+    monkeypatch.setattr(email_logger_module, "_classify_message", classify)
+
+
+@pytest.mark.parametrize("message, level, event", [
+    ("Uploading report.zip to Google Drive", logging.INFO, LogEvent.GDRIVE),
+    ("Email ID 4 to a@example.com SENT SUCCESSFULLY", logging.INFO, LogEvent.SEND_SUCCESS),
+    ("Email ID 4 to a@example.com FAILED: timeout", logging.ERROR, LogEvent.SEND_FAILED),
+    # A failure logged as a warning is not a send outcome
+    ("Email ID 4 to a@example.com FAILED: timeout", logging.WARNING, LogEvent.GENERAL),
+    ("Processing email 4", logging.INFO, LogEvent.EMAIL_PROCESSING),
+    ("Compressing 12 files", logging.INFO, LogEvent.ATTACHMENT),
+    ("Automation finished", logging.INFO, LogEvent.PROCESS),
+    ("Something else", logging.INFO, LogEvent.GENERAL),
+])
+def test_untyped_messages_are_classified(message, level, event):
+    assert _classify_message(message, level) == event
+
+
+def test_typed_messages_route_to_their_sinks_without_classification(records, no_classifier):
+    email_logger.log_info("Attached ZIP: report.zip (2 MB)", email_id=101, event=LogEvent.ATTACHMENT)
+    email_logger.log_info("Email ID 101 SENT SUCCESSFULLY", email_id=101, status="Success",
+                          event=LogEvent.SEND_SUCCESS)
+    email_logger.log_info("Automation run started", event=LogEvent.PROCESS)
+
+    events = [(record.event_type, record.log_sinks) for record in records]
+    assert events == [
+        (LogEvent.ATTACHMENT.value, frozenset()),
+        (LogEvent.SEND_SUCCESS.value, frozenset({AUTOMATION_SINK, SUCCESS_SINK})),
+        (LogEvent.PROCESS.value, frozenset({AUTOMATION_SINK})),
+    ]
+    assert records[0].log_data["email_id"] == 101
+
+
+def test_sink_filters_follow_the_route(records):
+    email_logger.log_info("Email ID 102 SENT SUCCESSFULLY", email_id=102, event=LogEvent.SEND_SUCCESS)
+    email_logger.log_info("Automation run finished", event=LogEvent.PROCESS)
+    success, process = records
+
+    assert SuccessLogFilter().filter(success) and AutomationLogFilter().filter(success)
+    assert not SuccessLogFilter().filter(process)
+    assert AutomationLogFilter().filter(process)
+
+
+def test_transactions_are_typed_by_status(records, no_classifier, monkeypatch):
+    monkeypatch.setattr(email_logger_module.send_event_store, "append", lambda *args, **kwargs: True)
+
+    email_logger.log_email_transaction(email_id=103, email="a@example.com", subject="Report", status="Success",
+                                       reason="Email sent successfully")
+    email_logger.log_email_transaction(email_id=104, email="b@example.com", subject="Report", status="Failed",
+                                       reason="ERROR: Invalid email format")
+
+    types = [record.event_type for record in records]
+    assert LogEvent.TRANSACTION_SUCCESS.value in types
+    assert LogEvent.TRANSACTION_FAILED.value in types
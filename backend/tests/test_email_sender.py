@@ -0,0 +1,114 @@
+"""Tests for group sends and digests"""
+
+import pytest
+
+from app.services.email.core import email_sender as email_sender_module
+from app.services.email.core.email_sender import EmailSender
+
+
+class _FakeSMTP:
+    """Stands in for SMTPManager, recording the messages sent"""
+
+    username = "sender@example.com"
+
+    def __init__(self, refused=None, error=None):
+        self.refused = refused or {}
+        self.error = error
+        self.sent = []
+
+    def send_message_to(self, msg, recipients, timer=None):
+        if self.error:
+            raise self.error
+        self.sent.append((msg, list(recipients)))
+        return {recipient: self.refused[recipient] for recipient in recipients if recipient in self.refused}
+
+    def send_message(self, msg, timer=None):
+        if self.error:
+            raise self.error
+        self.sent.append((msg, [msg["To"]]))
+
+
+@pytest.fixture
+def transactions(monkeypatch):
+    logged = []
+    monkeypatch.setattr(email_sender_module.email_logger, "log_email_transaction",
+                        lambda **fields: logged.append(fields))
+    return logged
+
+
+@pytest.fixture
+def sender(tmp_path):
+    sender = EmailSender("smtp.example.com", 587, "user", "password", archive_path=str(tmp_path / "archive"))
+    sender.smtp_manager = _FakeSMTP()
+    return sender
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "reports"
+    folder.mkdir()
+    (folder / "report.pdf").write_bytes(b"%PDF" + b"0" * 2000)
+    return str(folder)
+
+
+def test_group_is_sent_as_one_message(sender, transactions, folder):
+    sender.smtp_manager.refused = {"c@example.com": (550, b"No such user")}
+    recipients = ["a@example.com", "not-an-address", "b@example.com", "c@example.com"]
+
+    results = sender.send_email_to_group(recipients, "Report", "<p>Hello</p>", folder, email_ids=[1, 2, 3, 4])
+
+    assert len(sender.smtp_manager.sent) == 1
+    msg, envelope = sender.smtp_manager.sent[0]
+    assert envelope == ["a@example.com", "b@example.com", "c@example.com"]
+    assert msg["To"] == "undisclosed-recipients:;"
+    assert [success for success, _ in results] == [True, False, True, False]
+    assert "one message to 3 recipients" in results[0][1]
+    assert "Recipient refused" in results[3][1]
+    assert [fields["email_id"] for fields in transactions] == [1, 2, 3, 4]
+
+
+def test_group_timings_are_recorded_once(sender, transactions):
+    sender.send_email_to_group(["a@example.com", "b@example.com", "c@example.com"], "Report", "<p>Hello</p>",
+                               email_ids=[1, 2, 3])
+
+    timed = [fields for fields in transactions if fields["elapsed_seconds"] is not None]
+    assert [fields["email_id"] for fields in timed] == [1]
+    assert all(fields["stage_timings"] is None for fields in transactions[1:])
+
+
+def test_group_error_fails_every_recipient(sender, transactions):
+    sender.smtp_manager.error = ConnectionError("connection reset")
+
+    results = sender.send_email_to_group(["a@example.com", "b@example.com"], "Report", "<p>Hello</p>",
+                                         email_ids=[1, 2])
+
+    assert results == [(False, "ERROR: ConnectionError - connection reset")] * 2
+    assert [fields["status"] for fields in transactions] == ["Failed", "Failed"]
+
+
+def test_digest_combines_the_folders_into_one_message(sender, transactions, tmp_path, folder):
+    other = tmp_path / "invoices"
+    other.mkdir()
+    (other / "invoice.pdf").write_bytes(b"%PDF" + b"1" * 2000)
+
+    success, reason = sender.send_digest("a@example.com", "Your documents", "<p>Hello</p>",
+                                         [("reports", folder), ("invoices", str(other))], email_ids=[1, 2])
+
+    assert success
+    assert "digest of 2 emails" in reason
+    msg, envelope = sender.smtp_manager.sent[0]
+    assert envelope == ["a@example.com"]
+    attachments = [part.get_filename() for part in msg.walk() if part.get_filename()]
+    assert len(attachments) == 1 and attachments[0].startswith("digest_1")
+    assert [fields["email_id"] for fields in transactions] == [1, 2]
+    assert [fields["elapsed_seconds"] is not None for fields in transactions] == [True, False]
+
+
+def test_failed_digest_is_logged_for_its_first_email_only(sender, transactions, folder):
+    sender.smtp_manager.error = ConnectionError("connection reset")
+
+    result = sender.send_digest("a@example.com", "Your documents", "<p>Hello</p>", [("reports", folder)],
+                                email_ids=[1, 2, 3])
+
+    assert result == (False, "ERROR: ConnectionError - connection reset")
+    assert [fields["email_id"] for fields in transactions] == [1]
@@ -0,0 +1,141 @@
+"""Tests for the external worker's lease handling and the API's view of worker runs"""
+
+import pytest
+
+from app.services.automation.core import automation_manager, state_manager
+from app.services.automation.core.state_manager import STATUS_IDLE, STATUS_RUNNING
+from app.services.automation.database.lease_repository import RUN_DONE, RUN_REQUESTED, run_marker
+from app.services.automation.scheduling import retry_scheduler
+from app.services.automation.workers import email_worker
+from app.services.automation.workers.email_worker import BATCH_COMPLETE, BATCH_PARTIAL, EmailWorker
+
+from conftest import make_record
+
+
+class _Database:
+    """Stands in for the lease repository, recording the lease calls"""
+
+    def __init__(self, batches, active_leases=0):
+        self.batches = list(batches)
+        self.active_leases = active_leases
+        self.control = {"Run_ID": "auto_1", "Run_State": RUN_REQUESTED, "Template_ID": None}
+        self.released = []
+        self.worker = None
+
+    def acquire_leases(self, worker_id, run_id, batch_size, lease_seconds):
+        return self.batches.pop(0) if self.batches else []
+
+    def release_leases(self, worker_id, run_id=None):
+        self.released.append(run_id)
+        return 0
+
+    def set_run_control(self, run_id, run_state, template_id=None, expected_run_id=None):
+        self.control = dict(self.control, Run_State=run_state)
+        # The worker goes idle once the run is complete; end the test there
+        self.worker.stop()
+        return True
+
+
+@pytest.fixture
+def database(monkeypatch, settings):
+    settings.set(WORKER_HEARTBEAT_SECONDS=3600, WORKER_POLL_SECONDS=0)
+    database = _Database([])
+    monkeypatch.setattr(email_worker, "register_worker", lambda *args: True)
+    monkeypatch.setattr(email_worker, "heartbeat_worker", lambda *args: True)
+    monkeypatch.setattr(email_worker, "release_expired_leases", lambda seconds: 0)
+    monkeypatch.setattr(email_worker, "count_active_leases", lambda: database.active_leases)
+    monkeypatch.setattr(email_worker, "get_run_control", lambda: database.control)
+    monkeypatch.setattr(email_worker, "acquire_leases", database.acquire_leases)
+    monkeypatch.setattr(email_worker, "release_leases", database.release_leases)
+    monkeypatch.setattr(email_worker, "set_run_control", database.set_run_control)
+    monkeypatch.setattr(email_worker, "get_automation_state", state_manager.AutomationState)
+    return database
+
+
+def _worker(database, results):
+    worker = EmailWorker(worker_id="worker-1")
+    database.worker = worker
+    worker._process_batch = lambda run_id, template_id, batch: results.pop(0)
+    return worker
+
+
+def test_complete_batches_keep_their_run_marker_and_partial_ones_are_released(database):
+    database.batches = [[make_record(1)], [make_record(2)]]
+    worker = _worker(database, [BATCH_COMPLETE, BATCH_PARTIAL])
+
+    worker.run()
+
+    # Complete batch: rows still Pending are not leased again in this run;
+    # partial batch and shutdown: rows go back to the pool
+    assert database.released == ["auto_1", None, None]
+    assert database.control["Run_State"] == RUN_DONE
+
+
+def test_run_is_not_completed_while_another_worker_holds_leases(database, monkeypatch):
+    database.active_leases = 1
+    polls = []
+
+    def wait(seconds):
+        polls.append(seconds)
+        if len(polls) == 2:
+            worker.stop()
+
+    worker = _worker(database, [])
+    monkeypatch.setattr(worker._stop, "wait", wait)
+
+    worker.run()
+
+    assert database.control["Run_State"] == RUN_REQUESTED
+
+
+def test_run_marker():
+    assert run_marker("auto_1") == "run:auto_1"
+
+
+@pytest.fixture
+def api_state(monkeypatch):
+    """A fresh automation state and recorded publications for the API side"""
+    state = state_manager.AutomationState()
+    published = []
+    retry_syncs = []
+    monkeypatch.setattr(automation_manager, "get_automation_state", lambda: state)
+    monkeypatch.setattr(automation_manager, "_update_summary", lambda: None)
+    monkeypatch.setattr(automation_manager, "publish_status", lambda: published.append(state.status))
+    monkeypatch.setattr(retry_scheduler, "sync_retry_job", lambda: retry_syncs.append(state.status))
+    return state, published, retry_syncs
+
+
+def test_status_refresh_publishes_changes_and_schedules_retries_when_a_run_ends(api_state, monkeypatch, settings):
+    settings.set(AUTOMATION_EXTERNAL_WORKERS=True)
+    state, published, retry_syncs = api_state
+    controls = [
+        {"Run_State": RUN_REQUESTED, "Updated_At": None},
+        {"Run_State": RUN_REQUESTED, "Updated_At": None},
+        {"Run_State": RUN_DONE, "Updated_At": None},
+    ]
+    monkeypatch.setattr(automation_manager, "get_run_control", lambda: controls[0])
+
+    class _Stop:
+        """Ends the loop once every control row has been read"""
+
+        def is_set(self):
+            return False
+
+        def wait(self, seconds):
+            controls.pop(0)
+            if not controls:
+                raise SystemExit
+
+    monkeypatch.setattr(automation_manager, "_status_refresh_stop", _Stop())
+
+    with pytest.raises(SystemExit):
+        automation_manager._status_refresh_loop(0)
+
+    assert published == [STATUS_RUNNING, STATUS_IDLE]
+    assert retry_syncs == [STATUS_IDLE]
+
+
+def test_status_refresh_only_runs_with_external_workers(settings):
+    settings.set(AUTOMATION_EXTERNAL_WORKERS=False)
+
+    assert not automation_manager.start_worker_status_refresh()
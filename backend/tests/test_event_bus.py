@@ -0,0 +1,78 @@
+"""Tests for resuming the automation event stream"""
+
+import asyncio
+import threading
+
+from app.utils.event_bus import EventBus
+
+
+def _subscribe(bus, last_event_id=None):
+    """Subscribe on a fresh event loop and return the backlog"""
+    async def subscribe():
+        queue, backlog = bus.subscribe(last_event_id)
+        bus.unsubscribe(queue)
+        return backlog
+
+    return asyncio.run(subscribe())
+
+
+def _publish(bus, count):
+    return [bus.publish("log", {"n": n}) for n in range(count)]
+
+
+def test_new_subscriber_gets_no_backlog():
+    bus = EventBus()
+    _publish(bus, 3)
+
+    assert _subscribe(bus) == []
+
+
+def test_resume_replays_events_after_last_id():
+    bus = EventBus()
+    ids = _publish(bus, 5)
+
+    backlog = _subscribe(bus, bus.format_id(ids[2]))
+
+    assert [event["id"] for event in backlog] == ids[3:]
+    assert _subscribe(bus, bus.format_id(ids[-1])) == []
+
+
+def test_resume_from_before_the_buffer_starts_with_resync():
+    bus = EventBus(buffer_size=3)
+    ids = _publish(bus, 6)
+
+    backlog = _subscribe(bus, bus.format_id(ids[0]))
+
+    assert backlog[0]["type"] == "resync"
+    assert [event["id"] for event in backlog[1:]] == ids[3:]
+
+
+def test_ids_from_another_process_resync_and_replay_the_buffer():
+    bus = EventBus()
+    ids = _publish(bus, 3)
+    # The same counter value from before a restart
+    restarted = EventBus()
+    restarted_ids = _publish(restarted, 1)
+
+    for last_event_id in (bus.format_id(ids[0]), "garbage", restarted.format_id(restarted_ids[0] + 10)):
+        backlog = _subscribe(restarted, last_event_id)
+        assert [event["type"] for event in backlog] == ["resync", "log"]
+        assert backlog[1]["id"] == restarted_ids[0]
+
+
+def test_events_published_from_threads_reach_subscribers():
+    bus = EventBus()
+
+    async def receive():
+        queue, _ = bus.subscribe()
+        publisher = threading.Thread(target=_publish, args=(bus, 3))
+        publisher.start()
+        events = [await asyncio.wait_for(queue.get(), 5) for _ in range(3)]
+        publisher.join()
+        bus.unsubscribe(queue)
+        return events
+
+    events = asyncio.run(receive())
+
+    assert [event["data"]["n"] for event in events] == [0, 1, 2]
+    assert bus.subscriber_count == 0
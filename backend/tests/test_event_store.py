@@ -0,0 +1,121 @@
+"""Tests for the structured send-event store"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils import log_parser
+from app.utils.event_store import SendEventStore
+from app.utils.log_archiver import LogArchiver
+
+
+@pytest.fixture
+def logs_dir(tmp_path, monkeypatch):
+    """An empty log directory used for the store's one-time backfill"""
+    directory = tmp_path / "logs"
+    directory.mkdir()
+    monkeypatch.setattr(log_parser, "get_log_archiver", lambda: LogArchiver(str(directory)))
+    return directory
+
+
+@pytest.fixture
+def store(tmp_path, logs_dir):
+    store = SendEventStore(str(tmp_path / "send_events.db"))
+    yield store
+    store.close()
+
+
+def test_append_and_metrics_count_each_email_once(store):
+    day = datetime(2026, 3, 2, 10, 0)
+    assert store.append(1, "Failed", reason="timeout", timestamp=day)
+    assert store.append(1, "Success", elapsed_seconds=2.0, timestamp=day)
+    assert store.append(2, "Failed", reason="bad address", timestamp=day)
+    assert store.append(3, "Success", elapsed_seconds=6.0, timestamp=day)
+
+    metrics = store.get_metrics()
+
+    # Email 1 failed once but was sent in the end
+    assert metrics["success_count"] == 2
+    assert metrics["failed_count"] == 1
+    assert metrics["total_processed"] == 3
+    assert metrics["delivery_rate"] == pytest.approx(66.7)
+    assert metrics["avg_processing_time"] == pytest.approx(4.0)
+
+
+def test_processing_time_uses_latest_timed_success_per_email(store):
+    day = datetime(2026, 3, 2, 10, 0)
+    store.append(1, "Success", elapsed_seconds=10.0, timestamp=day)
+    store.append(1, "Success", elapsed_seconds=2.0, timestamp=day)
+    # A second log of the same send, without timings
+    store.append(1, "Success", timestamp=day)
+    store.append(2, "Success", elapsed_seconds=4.0, timestamp=day)
+
+    stats = store.get_processing_time_stats()
+
+    assert stats["total_emails"] == 2
+    assert stats["avg_seconds"] == pytest.approx(3.0)
+    assert stats["min_seconds"] == pytest.approx(2.0)
+    assert stats["max_seconds"] == pytest.approx(4.0)
+
+
+def test_metrics_and_trends_filter_by_day(store):
+    store.append(1, "Success", timestamp=datetime(2026, 3, 1, 9, 0))
+    store.append(2, "Failed", timestamp=datetime(2026, 3, 2, 9, 0))
+    store.append(3, "Success", timestamp=datetime(2026, 3, 3, 9, 0))
+
+    metrics = store.get_metrics(datetime(2026, 3, 2), datetime(2026, 3, 3))
+    trends = store.get_daily_trends(datetime(2026, 3, 2), datetime(2026, 3, 3))
+
+    assert metrics["total_processed"] == 2
+    assert trends["dates"] == ["2026-03-02", "2026-03-03"]
+    assert trends["success"] == [0, 1]
+    assert trends["failed"] == [1, 0]
+    assert trends["pending"] == [0, 0]
+
+
+def _write_logs(logs_dir, logged_at=datetime(2026, 1, 10, 10, 0)):
+    day = logged_at.strftime("%Y%m%d")
+    (logs_dir / f"success_{day}.log").write_text(
+        f'{logged_at:%Y-%m-%d %H:%M:%S} - INFO - Email ID 5 to a@example.com SENT SUCCESSFULLY (Elapsed: 1m 3.20s)\n',
+        encoding="utf-8"
+    )
+    (logs_dir / f"error_{day}.log").write_text(
+        f'{logged_at + timedelta(minutes=1):%Y-%m-%d %H:%M:%S} - ERROR - '
+        f'Email ID 6 to b@example.com FAILED: ERROR: Invalid email format\n',
+        encoding="utf-8"
+    )
+
+
+def test_backfill_imports_log_outcomes_once_without_timings(tmp_path, logs_dir):
+    _write_logs(logs_dir)
+    db_path = str(tmp_path / "backfilled.db")
+    store = SendEventStore(db_path)
+    # Live appends do not wait for the backfill
+    store.append(7, "Success", timestamp=datetime(2026, 1, 11, 9, 0))
+
+    assert store.backfill() == 2
+    rows = store._query("SELECT ts, email_id, status, elapsed_seconds, source FROM send_events "
+                        "WHERE source = 'log' ORDER BY email_id", [])
+    store.close()
+
+    assert rows == [
+        ("2026-01-10T10:00:00", 5, "Success", None, "log"),
+        ("2026-01-10T10:01:00", 6, "Failed", None, "log"),
+    ]
+
+    # Another process opening the same store does not import the logs again
+    other = SendEventStore(db_path)
+    assert other.backfill() == 0
+    assert other.get_metrics()["total_processed"] == 3
+    other.close()
+
+
+def test_backfill_skips_log_lines_recorded_live(tmp_path, logs_dir):
+    store = SendEventStore(str(tmp_path / "backfilled.db"))
+    store.append(5, "Success")
+    # Logged by the same send, after the store was created
+    _write_logs(logs_dir, datetime.now() + timedelta(seconds=1))
+
+    assert store.backfill() == 0
+    assert store.get_metrics()["total_processed"] == 1
+    store.close()
@@ -0,0 +1,155 @@
+"""Tests of the Google Drive file operations against the local fake Drive server"""
+
+import hashlib
+import threading
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.services.storage.gdrive import file_operations
+from app.services.storage.gdrive.authentication import GoogleDriveAuthenticator
+from app.services.storage.gdrive.fake_drive_server import FakeDriveState, create_fake_drive_server
+from app.services.storage.gdrive.file_operations import GoogleDriveFileOperations
+from app.services.storage.gdrive.upload_cache import UploadCache
+from app.services.storage.gdrive.upload_sessions import UploadSessionStore
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def drive_state():
+    state = FakeDriveState()
+    server = create_fake_drive_server(port=0, state=state)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    store = UploadSessionStore(str(tmp_path / "upload_sessions.json"))
+    monkeypatch.setattr(file_operations, "get_upload_session_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def upload_cache(tmp_path, monkeypatch, settings):
+    settings.set(GDRIVE_UPLOAD_DEDUP_ENABLED=True)
+    cache = UploadCache(str(tmp_path / "upload_cache.db"))
+    monkeypatch.setattr(file_operations, "get_upload_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def drive(drive_state, sessions, settings, monkeypatch):
+    settings.set(GDRIVE_API_BASE_URL=drive_state.base_url, GDRIVE_FOLDER_ID=None,
+                 GDRIVE_UPLOAD_CHUNK_SIZE_MB=1, GDRIVE_UPLOAD_MAX_RETRIES=0)
+    # Permission grant retries back off without waiting
+    monkeypatch.setattr(file_operations.time, "sleep", lambda seconds: None)
+    service = GoogleDriveAuthenticator().authenticate()
+    assert service is not None
+    return GoogleDriveFileOperations(service)
+
+
+def _write(path, size, seed=b"x"):
+    data = (hashlib.sha256(seed).digest() * (size // 32 + 1))[:size]
+    path.write_bytes(data)
+    return str(path), hashlib.md5(data).hexdigest()
+
+
+def test_resumable_upload_resumes_after_an_error(tmp_path, drive, drive_state, sessions):
+    file_path, md5 = _write(tmp_path / "large.zip", 3 * MB + 100)
+    save = sessions.save
+
+    def save_then_fail(*args):
+        save(*args)
+        # The connection breaks after the first chunk is committed
+        drive_state.error_rate = 1.0
+
+    sessions.save = save_then_fail
+    with pytest.raises(HttpError):
+        drive._upload_resumable(file_path, {"name": "large.zip"}, 3 * MB + 100)
+    assert sessions.get(file_path)["offset"] == MB
+
+    sessions.save = save
+    drive_state.error_rate = 0.0
+    received_before = drive_state.stats["bytes_received"]
+    response = drive._upload_resumable(file_path, {"name": "large.zip"}, 3 * MB + 100)
+
+    uploaded = drive_state.files[response["id"]]
+    assert uploaded["md5Checksum"] == md5
+    assert uploaded["size"] == str(3 * MB + 100)
+    # Only the bytes after the committed offset were sent again
+    assert drive_state.stats["bytes_received"] - received_before < 2 * MB + 200 + 64 * 1024
+    assert sessions.get(file_path) is None
+
+
+def test_expired_upload_session_restarts_the_upload(tmp_path, drive, drive_state, sessions):
+    file_path, md5 = _write(tmp_path / "large.zip", 2 * MB)
+    sessions.save(file_path, drive_state.base_url + "upload/drive/v3/files?uploadType=resumable&upload_id=gone",
+                  MB, 2 * MB)
+
+    response = drive._upload_resumable(file_path, {"name": "large.zip"}, 2 * MB)
+
+    assert drive_state.files[response["id"]]["md5Checksum"] == md5
+
+
+def test_grant_permissions_batches_and_retries_transient_failures(tmp_path, drive, drive_state):
+    file_path, _ = _write(tmp_path / "shared.zip", 1000)
+    success, file_id, _ = drive.upload_file(file_path)
+    assert success
+
+    calls = []
+
+    def fail_second_grant():
+        # Call 1 is the batch request itself, calls 2-4 its parts
+        calls.append(len(calls) + 1)
+        return calls[-1] == 3
+
+    drive_state.should_fail = fail_second_grant
+    emails = ["a@example.com", "b@example.com", "c@example.com", "a@example.com"]
+
+    results = drive.grant_permissions(file_id, emails)
+
+    assert results == {"a@example.com": None, "b@example.com": None, "c@example.com": None}
+    granted = [permission["emailAddress"] for permission in drive_state.files[file_id]["permissions"]]
+    assert sorted(granted) == ["a@example.com", "b@example.com", "c@example.com"]
+    # One batch for all grants, then one for the failed grant
+    assert len(calls) == 6
+
+
+def test_grant_permissions_reports_permanent_failures(drive):
+    results = drive.grant_permissions("missing-file", ["a@example.com"])
+
+    assert "File not found" in results["a@example.com"]
+
+
+def test_identical_content_is_uploaded_once(tmp_path, drive, drive_state, upload_cache):
+    first_path, _ = _write(tmp_path / "first.zip", 5000)
+    second_path, _ = _write(tmp_path / "second.zip", 5000)
+    other_path, _ = _write(tmp_path / "other.zip", 5000, seed=b"y")
+
+    first = drive.upload_and_get_link(first_path)
+    second = drive.upload_and_get_link(second_path)
+    other = drive.upload_and_get_link(other_path)
+
+    assert first[0] and second[0] and other[0]
+    assert second[1] == first[1]
+    assert other[1] != first[1]
+    assert len(drive_state.files) == 2
+
+
+def test_dedup_uploads_again_when_the_drive_file_is_gone(tmp_path, drive, drive_state, upload_cache):
+    file_path, _ = _write(tmp_path / "first.zip", 5000)
+    first = drive.upload_and_get_link(file_path)
+    drive_state.files.clear()
+
+    second = drive.upload_and_get_link(file_path)
+
+    assert second[0]
+    assert second[1] != first[1]
+    assert len(drive_state.files) == 1
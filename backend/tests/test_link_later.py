@@ -0,0 +1,154 @@
+"""Tests for the link-later sending of emails with oversized attachments"""
+
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import app.services.email as email_services
+from app.services.automation.processing import link_later
+from app.services.automation.processing.link_later import (
+    JOB_SENT, LinkLaterService, LinkLaterStore
+)
+from app.services.email.core.email_sender import PendingDriveSend
+from app.utils.stage_timing import StageTimer
+from conftest import make_record
+
+
+class _FakeSender:
+    """Stands in for EmailSender, recording the follow-up sends"""
+
+    def __init__(self):
+        self.finished = []
+        self.queued = []
+
+    def finish_deferred_send(self, pending):
+        self.finished.append(pending.email_id)
+        return True, "Email sent successfully"
+
+    def send_in_parts(self, *args):
+        return None
+
+    def queue_drive_send(self, upload_pool, recipient, subject, body, folder_path, zip_path,
+                         total_size, original_size, sender=None, email_id=None, **kwargs):
+        self.queued.append(email_id)
+        future = Future()
+        future.set_result((True, "https://drive/link", "ok", 0.0))
+        return _pending(email_id, zip_path, future)
+
+
+def _pending(email_id, zip_path, future=None):
+    return PendingDriveSend(
+        future or Future(), None, "Body", f"user{email_id}@example.com", f"Subject {email_id}", "/reports",
+        email_id, zip_path, 30 * 1024 * 1024, 40 * 1024 * 1024, StageTimer()
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LinkLaterStore(str(tmp_path / "link_later.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def statuses(monkeypatch):
+    """Record the status updates instead of writing them to the database"""
+    updates = {}
+    monkeypatch.setattr(link_later, "_check_email_status", lambda email_id: (True, "Pending"))
+    monkeypatch.setattr(link_later, "_update_summary", lambda: None)
+    monkeypatch.setattr(link_later, "publish_status", lambda: None)
+    monkeypatch.setattr(email_services, "update_email_status",
+                        lambda email_id, status, **kwargs: updates.__setitem__(email_id, status))
+    return updates
+
+
+@pytest.fixture
+def service(store, statuses, monkeypatch):
+    sender = _FakeSender()
+    monkeypatch.setattr(link_later, "get_drive_upload_pool", lambda: object())
+    service = LinkLaterService(store)
+    service._email_sender = sender
+    yield service
+    service.stop()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the link-later worker"
+        time.sleep(0.01)
+
+
+def test_store_round_trip(store):
+    store.add({"email_id": 7, "recipient": "a@example.com", "zip_path": "/tmp/a.zip",
+               "specific_emails": ["b@example.com"]})
+    store.add({"email_id": 8, "recipient": "c@example.com", "zip_path": "/tmp/c.zip"})
+    store.finish(8, JOB_SENT)
+
+    jobs = store.get_open_jobs()
+
+    assert [job["email_id"] for job in jobs] == [7]
+    assert jobs[0]["specific_emails"] == ["b@example.com"]
+
+
+def test_email_is_sent_when_its_upload_finishes(service, store, statuses):
+    pending = _pending(21, "/tmp/21.zip")
+    service.submit(make_record(21), pending, "run-1", "sender@example.com", "anyone", None)
+    assert service.is_waiting(21)
+
+    pending.future.set_result((True, "https://drive/link", "ok", 0.1))
+    _wait_for(lambda: not service.is_waiting(21))
+
+    assert service._email_sender.finished == [21]
+    assert statuses == {21: "Success"}
+    assert store.get_open_jobs() == []
+
+
+def test_email_changed_while_waiting_is_not_sent(service, store, statuses, monkeypatch):
+    monkeypatch.setattr(link_later, "_check_email_status", lambda email_id: (False, "Cancelled"))
+    pending = _pending(22, "/tmp/22.zip")
+    service.submit(make_record(22), pending, "run-1", None, "anyone", None)
+
+    pending.future.set_result((True, "https://drive/link", "ok", 0.1))
+    _wait_for(lambda: not service.is_waiting(22))
+
+    assert service._email_sender.finished == []
+    assert statuses == {}
+
+
+def test_failed_upload_marks_the_email_failed(service, statuses):
+    pending = _pending(23, "/tmp/23.zip")
+    service.submit(make_record(23), pending, "run-1", None, "anyone", None)
+
+    pending.future.set_result((False, None, "quota exceeded", 0.1))
+    _wait_for(lambda: not service.is_waiting(23))
+
+    assert statuses == {23: "Failed"}
+
+
+def test_interrupted_jobs_are_requeued_on_start(service, store, statuses, tmp_path):
+    archive = tmp_path / "31.zip"
+    archive.write_bytes(b"zip")
+    store.add({"email_id": 31, "recipient": "a@example.com", "zip_path": str(archive)})
+    store.add({"email_id": 32, "recipient": "b@example.com", "zip_path": str(tmp_path / "gone.zip")})
+
+    service.start()
+    _wait_for(lambda: statuses.get(31) == "Success")
+
+    assert service._email_sender.queued == [31]
+    assert store.get_open_jobs() == []
+
+
+def test_link_later_is_off_with_external_workers(settings, monkeypatch):
+    monkeypatch.setattr(link_later, "_disabled", False)
+    settings.set(LARGE_ATTACHMENT_LINK_LATER=True, AUTOMATION_EXTERNAL_WORKERS=False)
+    assert link_later.link_later_enabled()
+
+    settings.set(AUTOMATION_EXTERNAL_WORKERS=True)
+    assert not link_later.link_later_enabled()
+    assert not link_later.start_link_later_service()
+
+    settings.set(AUTOMATION_EXTERNAL_WORKERS=False)
+    link_later.disable_link_later()
+    assert not link_later.link_later_enabled()
@@ -0,0 +1,99 @@
+"""Tests for the block-indexed log archiver"""
+
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime
+
+from app.utils import log_archiver
+from app.utils.log_archiver import LogArchiver
+
+
+def _log_line(timestamp: str, **data) -> str:
+    return f"{timestamp} - INFO - {json.dumps(data)}\n"
+
+
+def _write_day(directory, name: str, lines, age_seconds: int = 7200):
+    path = directory / name
+    path.write_text("".join(lines), encoding="utf-8")
+    old = time.time() - age_seconds
+    os.utime(path, (old, old))
+    return path
+
+
+def test_archive_round_trip_through_block_index(tmp_path):
+    lines = [
+        _log_line(f"2026-01-05 10:{minute:02d}:00", email_id=minute, status="Success" if minute % 2 else "Failed",
+                  message="x" * 200)
+        for minute in range(40)
+    ]
+    # A rotated backup holds the older half of the day
+    _write_day(tmp_path, "success_20260105.log.1", lines[:20])
+    _write_day(tmp_path, "success_20260105.log", lines[20:])
+
+    archiver = LogArchiver(str(tmp_path), block_size_kb=1)
+    assert archiver.archive_closed_days() == 1
+
+    day = date(2026, 1, 5)
+    assert sorted(os.listdir(tmp_path)) == ["success_20260105.log.gz", "success_20260105.log.idx.json"]
+    index = archiver.load_index("success", day)
+    assert len(index["blocks"]) > 1
+    assert sum(block["lines"] for block in index["blocks"]) == 40
+
+    # The archive is a plain multi-member gzip file with the lines in order
+    with gzip.open(archiver.archive_path("success", day), "rt", encoding="utf-8") as f:
+        assert f.read() == "".join(lines)
+    assert list(archiver.read_archived_lines("success", day)) == lines
+
+
+def test_query_entries_reads_only_matching_blocks(tmp_path, monkeypatch):
+    lines = [_log_line(f"2026-01-05 10:{minute:02d}:00", email_id=minute, status="Success", message="x" * 200)
+             for minute in range(40)]
+    _write_day(tmp_path, "success_20260105.log", lines)
+    archiver = LogArchiver(str(tmp_path), block_size_kb=1)
+    archiver.archive_closed_days()
+    day = date(2026, 1, 5)
+    assert len(archiver.load_index("success", day)["blocks"]) > 1
+
+    decompressed = []
+    decompress = gzip.decompress
+
+    def counting_decompress(data):
+        decompressed.append(len(data))
+        return decompress(data)
+
+    monkeypatch.setattr(log_archiver.gzip, "decompress", counting_decompress)
+
+    entries = archiver.query_entries("success", day, email_id=33)
+    assert [entry["email_id"] for entry in entries] == [33]
+    assert len(decompressed) == 1
+
+    decompressed.clear()
+    assert archiver.query_entries("success", day, status="Failed") == []
+    assert decompressed == []
+
+
+def test_iter_day_contents_merges_archived_and_plain_files(tmp_path):
+    _write_day(tmp_path, "error_20260105.log", [_log_line("2026-01-05 10:00:00", email_id=1, status="Failed")])
+    archiver = LogArchiver(str(tmp_path))
+    archiver.archive_closed_days()
+    # A late file for an archived day and a plain file for another day
+    _write_day(tmp_path, "error_20260106.log", [_log_line("2026-01-06 10:00:00", email_id=2, status="Failed")])
+
+    days = dict(archiver.iter_day_contents("error"))
+    assert set(days) == {date(2026, 1, 5), date(2026, 1, 6)}
+    assert '"email_id": 1' in days[date(2026, 1, 5)]
+
+    ranged = dict(archiver.iter_day_contents("error", start_date=datetime(2026, 1, 6)))
+    assert list(ranged) == [date(2026, 1, 6)]
+
+
+def test_recently_written_and_current_days_are_not_archived(tmp_path):
+    today = datetime.now().strftime("%Y%m%d")
+    _write_day(tmp_path, f"automation_{today}.log", [_log_line("2026-01-05 10:00:00")])
+    # Closed day, but another process wrote to it a moment ago
+    _write_day(tmp_path, "automation_20260105.log", [_log_line("2026-01-05 10:00:00")], age_seconds=0)
+
+    assert LogArchiver(str(tmp_path)).archive_closed_days() == 0
+    assert sorted(os.listdir(tmp_path)) == ["automation_20260105.log", f"automation_{today}.log"]
@@ -0,0 +1,118 @@
+"""Tests for the pre-flight validation of automation runs"""
+
+import pytest
+
+from app.services.automation.database import email_repository
+from app.services.automation.validation import preflight
+from app.services.automation.validation.preflight import (
+    REASON_EMPTY_FOLDER, REASON_INVALID_EMAIL, REASON_MISSING_FOLDER, run_preflight
+)
+
+from conftest import make_record
+
+
+@pytest.fixture
+def failed(monkeypatch, settings):
+    """Failures written to the email table, by email ID"""
+    settings.set(AUTOMATION_PREFLIGHT=True, AUTOMATION_PREFLIGHT_WORKERS=2)
+    failures = {}
+
+    def fail_pending_emails(reasons):
+        failures.update(reasons)
+        return list(reasons)
+
+    monkeypatch.setattr(preflight, "_fail_pending_emails", fail_pending_emails)
+    return failures
+
+
+@pytest.fixture
+def folders(tmp_path):
+    full = tmp_path / "full"
+    full.mkdir()
+    (full / "report.csv").write_text("a,b\n1,2\n")
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    return {"full": str(full), "empty": str(empty), "missing": str(tmp_path / "missing")}
+
+
+def test_unsendable_records_are_failed_in_one_update(failed, folders):
+    records = [
+        make_record(1, File_Path=folders["full"]),
+        make_record(2, Email="not-an-address", File_Path=folders["full"]),
+        make_record(3, File_Path=folders["missing"]),
+        make_record(4, File_Path=folders["empty"]),
+        make_record(5, Email="user@exa mple.com"),
+        make_record(6),
+        make_record(7, File_Path=folders["full"]),
+    ]
+
+    sendable = run_preflight(records, "run-1")
+
+    assert [record["Email_ID"] for record in sendable] == [1, 6, 7]
+    assert failed == {
+        2: REASON_INVALID_EMAIL,
+        3: REASON_MISSING_FOLDER,
+        4: REASON_EMPTY_FOLDER,
+        5: REASON_INVALID_EMAIL,
+    }
+
+
+def test_records_changed_meanwhile_are_kept(monkeypatch, failed, folders):
+    # The table update skips records that are no longer Pending
+    monkeypatch.setattr(preflight, "_fail_pending_emails", lambda reasons: [])
+    records = [make_record(1, Email="bad"), make_record(2)]
+
+    assert run_preflight(records) == records
+
+
+def test_disabled_preflight_returns_records_unchecked(failed, settings):
+    settings.set(AUTOMATION_PREFLIGHT=False)
+    records = [make_record(1, Email="bad")]
+
+    assert run_preflight(records) == records
+    assert failed == {}
+
+
+def test_errors_let_every_record_through(monkeypatch, failed):
+    def broken(reasons):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(preflight, "_fail_pending_emails", broken)
+    records = [make_record(1, Email="bad"), make_record(2)]
+
+    assert run_preflight(records) == records
+
+
+class _Connection:
+    """Stands in for a database connection, recording the queries"""
+
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params):
+        self.queries.append(query)
+
+    def fetchall(self):
+        return []
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("external_workers, leases_checked", [(False, False), (True, True)])
+def test_rows_leased_by_workers_are_not_failed(monkeypatch, settings, external_workers, leases_checked):
+    settings.set(AUTOMATION_EXTERNAL_WORKERS=external_workers)
+    connection = _Connection()
+    monkeypatch.setattr(email_repository, "get_db_connection", lambda: connection)
+
+    email_repository._fail_pending_emails({1: REASON_INVALID_EMAIL, 2: REASON_MISSING_FOLDER})
+
+    assert len(connection.queries) == 2
+    assert all(("Lease_Owner IS NULL OR Lease_Owner LIKE 'run:%'" in query) is leases_checked
+               for query in connection.queries)
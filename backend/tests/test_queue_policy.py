@@ -0,0 +1,93 @@
+"""Tests for the ordering of the emails in an automation run"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.automation.processing import queue_policy
+from app.services.automation.processing.queue_policy import (
+    GDRIVE_UPLOAD_THRESHOLD, MB_TO_BYTES, POLICY_SEND_DATE, POLICY_SMALLEST_FIRST, order_emails
+)
+
+from conftest import make_record
+
+NOW = datetime(2026, 3, 1, 12, 0)
+LARGE = GDRIVE_UPLOAD_THRESHOLD + MB_TO_BYTES
+
+
+class _SizeCache:
+    """Manifest size cache with fixed folder sizes"""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.walked = []
+
+    def get_size(self, folder_path):
+        self.walked.append(folder_path)
+        return self.sizes.get(folder_path, 0)
+
+    def get_cached_size(self, folder_path):
+        return None
+
+
+@pytest.fixture
+def size_cache(monkeypatch, settings):
+    cache = _SizeCache({})
+    monkeypatch.setattr(queue_policy, "get_manifest_size_cache", lambda: cache)
+    settings.set(AUTOMATION_DRIVE_LANE_INTERVAL=0, AUTOMATION_QUEUE_AGING_MB_PER_HOUR=10,
+                 AUTOMATION_QUEUE_SIZING_SECONDS=5.0)
+    return cache
+
+
+def _records(*sizes, waited_hours=0):
+    return [make_record(index, File_Path=f"/data/{index}", Date=NOW - timedelta(hours=waited_hours))
+            for index, _ in enumerate(sizes, 1)]
+
+
+def _ids(records):
+    return [record["Email_ID"] for record in records]
+
+
+def test_send_date_policy_keeps_order_without_sizing(size_cache):
+    records = _records(3, 1, 2)
+
+    assert _ids(order_emails(records, POLICY_SEND_DATE, NOW)) == [1, 2, 3]
+    assert size_cache.walked == []
+
+
+def test_smallest_first_orders_by_size_keeping_ties_in_send_date_order(size_cache):
+    size_cache.sizes = {"/data/1": 30 * MB_TO_BYTES, "/data/2": 5 * MB_TO_BYTES,
+                        "/data/3": 30 * MB_TO_BYTES, "/data/4": 0}
+
+    assert _ids(order_emails(_records(1, 2, 3, 4), POLICY_SMALLEST_FIRST, NOW)) == [4, 2, 1, 3]
+
+
+def test_smallest_first_ages_records_that_waited(size_cache):
+    records = [
+        make_record(1, File_Path="/data/1", Date=NOW - timedelta(hours=3)),
+        make_record(2, File_Path="/data/2", Date=NOW),
+    ]
+    size_cache.sizes = {"/data/1": 40 * MB_TO_BYTES, "/data/2": 15 * MB_TO_BYTES}
+
+    # 40 MB less 3 hours at 10 MB/hour is smaller than 15 MB
+    assert _ids(order_emails(records, POLICY_SMALLEST_FIRST, NOW)) == [1, 2]
+
+
+def test_drive_lane_interleaves_large_records(size_cache, settings):
+    settings.set(AUTOMATION_DRIVE_LANE_INTERVAL=2)
+    size_cache.sizes = {"/data/1": LARGE, "/data/2": LARGE}
+
+    assert _ids(order_emails(_records(*range(7)), POLICY_SEND_DATE, NOW)) == [3, 4, 1, 5, 6, 2, 7]
+
+
+def test_unknown_policy_falls_back_to_send_date(size_cache):
+    assert _ids(order_emails(_records(1, 2), "largest_first", NOW)) == [1, 2]
+
+
+def test_sizing_stops_at_the_budget(size_cache, settings):
+    settings.set(AUTOMATION_QUEUE_SIZING_SECONDS=0)
+    size_cache.sizes = {"/data/1": 30 * MB_TO_BYTES}
+
+    # Nothing is walked, so every folder counts as empty and the order is kept
+    assert _ids(order_emails(_records(1, 2, 3), POLICY_SMALLEST_FIRST, NOW)) == [1, 2, 3]
+    assert size_cache.walked == []
@@ -0,0 +1,98 @@
+"""Tests for the classification and scheduling of automatic retries"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.automation.scheduling import retry_scheduler
+from app.services.automation.scheduling.retry_scheduler import (
+    ERROR_PERMANENT, ERROR_TRANSIENT, RetryStore, backoff_seconds, classify_failure
+)
+
+
+@pytest.mark.parametrize("reason", [
+    "(421, b'4.7.0 Try again later')",
+    "ERROR: Failed to send email: (451, b'Temporary local problem')",
+    "Mailbox busy 4.2.1",
+    "ERROR: Connection timed out",
+    "SMTPServerDisconnected: Connection unexpectedly closed",
+    "[Errno 111] Connection refused",
+])
+def test_transient_failures(reason):
+    assert classify_failure(reason) == ERROR_TRANSIENT
+
+
+@pytest.mark.parametrize("reason", [
+    None,
+    "",
+    "ERROR: Invalid email format",
+    "(550, b'5.1.1 User unknown')",
+    # A permanent SMTP reply wins over a transient-sounding message
+    "(554, b'5.7.1 Message rejected, try again never')",
+    "Attachment folder not found",
+])
+def test_permanent_failures(reason):
+    assert classify_failure(reason) == ERROR_PERMANENT
+
+
+def test_backoff_doubles_with_jitter_and_is_capped():
+    for attempt, delay in ((1, 60), (2, 120), (3, 240), (10, 1000)):
+        for _ in range(50):
+            assert delay / 2 <= backoff_seconds(attempt, 60, 1000) <= delay
+
+
+def test_store_schedules_due_retries_earliest_first(tmp_path):
+    store = RetryStore(str(tmp_path / "retries.db"))
+    now = datetime(2026, 3, 1, 12, 0)
+    store.schedule(1, 1, now + timedelta(minutes=5), "timeout")
+    store.schedule(2, 1, now - timedelta(minutes=1), "timeout")
+    store.schedule(3, 2, now - timedelta(minutes=10), "timeout")
+    # Rescheduling replaces the earlier entry
+    store.schedule(1, 2, now - timedelta(minutes=5), "timeout")
+
+    assert store.due(now) == [3, 1, 2]
+    assert store.get_attempts(1) == 2
+    assert store.next_due() == now - timedelta(minutes=10)
+
+    store.discard([1, 3])
+    assert [entry["email_id"] for entry in store.list()] == [2]
+    assert store.get_attempts(3) == 0
+    store.close()
+
+
+@pytest.fixture
+def retry_store(tmp_path, monkeypatch, settings):
+    store = RetryStore(str(tmp_path / "retries.db"))
+    monkeypatch.setattr(retry_scheduler, "get_retry_store", lambda: store)
+    automation_settings = {"retry_on_failure": True, "retry_interval": "10m"}
+    monkeypatch.setattr(retry_scheduler, "get_automation_state",
+                        lambda: SimpleNamespace(get_settings=lambda: dict(automation_settings)))
+    # Only record the retries, without starting the scheduler
+    settings.set(AUTOMATION_EXTERNAL_WORKERS=True, RETRY_MAX_ATTEMPTS=2, RETRY_MAX_BACKOFF_SECONDS=3600)
+    yield store
+    store.close()
+
+
+def test_record_failure_schedules_transient_failures_up_to_the_limit(retry_store):
+    before = datetime.now()
+    first = retry_scheduler.record_failure(7, "Connection timed out")
+    assert before + timedelta(minutes=5) <= first <= datetime.now() + timedelta(minutes=10)
+
+    second = retry_scheduler.record_failure(7, "Connection timed out")
+    assert second is not None
+    assert retry_store.get_attempts(7) == 2
+
+    # The third failure exceeds RETRY_MAX_ATTEMPTS
+    assert retry_scheduler.record_failure(7, "Connection timed out") is None
+    assert retry_store.get_attempts(7) == 0
+
+
+def test_record_failure_and_success_discard_retries(retry_store):
+    retry_scheduler.record_failure(7, "Connection timed out")
+    retry_scheduler.record_failure(8, "Connection timed out")
+
+    assert retry_scheduler.record_failure(7, "ERROR: Invalid email format") is None
+    retry_scheduler.record_success(8)
+
+    assert retry_store.list() == []
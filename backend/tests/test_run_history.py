@@ -0,0 +1,46 @@
+"""Tests for the compact run history"""
+
+import pytest
+
+from app.services.automation.core.run_history import RunHistory, format_id_ranges
+
+from conftest import make_record
+
+
+@pytest.mark.parametrize("ids, expected", [
+    ([], ""),
+    ([7], "7"),
+    ([1, 2, 3, 5, 8, 9], "1-3, 5, 8-9"),
+    ([3, 2, 1], "3, 2, 1"),
+])
+def test_format_id_ranges(ids, expected):
+    assert format_id_ranges(ids) == expected
+
+
+def test_history_keeps_every_outcome_but_only_the_recent_emails():
+    history = RunHistory(recent_limit=2)
+    for email_id in range(1, 6):
+        history.record(make_record(email_id), success=email_id != 3, reason="ERROR: bounced" if email_id == 3 else None)
+
+    assert list(history.successful_ids()) == [1, 2, 4, 5]
+    assert list(history.failed_ids()) == [3]
+    assert [email["Email_ID"] for email in history.recent()] == [4, 5]
+
+
+def test_recent_emails_are_copies():
+    history = RunHistory(recent_limit=5)
+    history.record(make_record(1), success=False, reason="ERROR: bounced")
+
+    history.recent()[0]["reason"] = "changed"
+
+    assert history.recent()[0]["reason"] == "ERROR: bounced"
+    assert history.recent()[0]["Email"] == "user1@example.com"
+
+
+def test_recent_limit_defaults_to_the_setting(settings):
+    settings.set(AUTOMATION_RECENT_EMAILS=1)
+    history = RunHistory()
+    history.record(make_record(1), success=True)
+    history.record(make_record(2), success=True)
+
+    assert [email["Email_ID"] for email in history.recent()] == [2]
@@ -0,0 +1,158 @@
+"""Tests for the journaled automation run queue"""
+
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import email as email_services
+from app.services.automation.core import automation_manager
+from app.services.automation.processing import email_processor
+from app.services.automation.core.run_queue import (
+    RunQueue, RunQueueStore,
+    ITEM_QUEUED, ITEM_CLAIMED, ITEM_SENDING, ITEM_FINISHED, ITEM_DONE,
+    OUTCOME_SENT, OUTCOME_FAILED, OUTCOME_SKIPPED
+)
+
+from conftest import make_record
+
+PROCESS_ID = "run-1"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunQueueStore(str(tmp_path / "automation_queue.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def run_queue(store):
+    records = [
+        make_record(1, Email="a@example.com", File_Path="/data/reports", Subject="Report"),
+        make_record(2, Email="b@example.com", File_Path="/data/reports", Subject="Report"),
+        make_record(3, Email="A@example.com ", File_Path="/data/other", Subject="Other"),
+        make_record(4, Email="c@example.com", File_Path="/data/reports", Subject="Report"),
+    ]
+    store.create_run(PROCESS_ID, "auto", "template-1", records)
+    return RunQueue(store, PROCESS_ID)
+
+
+def _states(store):
+    items = store.get_items(PROCESS_ID, (ITEM_QUEUED, ITEM_CLAIMED, ITEM_SENDING, ITEM_FINISHED, ITEM_DONE))
+    return {item["email_id"]: item["state"] for item in items}
+
+
+def test_get_claims_records_in_order_until_empty(run_queue):
+    assert run_queue.qsize() == 4
+    assert [run_queue.get()["Email_ID"] for _ in range(4)] == [1, 2, 3, 4]
+    assert run_queue.empty()
+    with pytest.raises(queue.Empty):
+        run_queue.get()
+
+
+def test_requeued_record_is_claimed_again_and_attempts_are_journaled(store, run_queue):
+    assert run_queue.get()["Email_ID"] == 1
+    run_queue.requeue(1)
+
+    assert run_queue.get()["Email_ID"] == 1
+    attempts = store._connection().execute(
+        "SELECT attempt FROM run_attempts WHERE process_id = ? AND email_id = 1", (PROCESS_ID,)
+    ).fetchall()
+    assert [attempt for (attempt,) in attempts] == [1, 2]
+
+
+def test_claim_group_and_recipient(store, run_queue):
+    leader = run_queue.get()
+    group = run_queue.claim_group(leader, limit=5)
+    assert [record["Email_ID"] for record in group] == [2, 4]
+
+    # Recipients are matched case- and whitespace-insensitively
+    assert [record["Email_ID"] for record in run_queue.claim_recipient(leader, limit=5)] == [3]
+    assert run_queue.claim_recipient(leader, limit=5) == []
+    assert run_queue.empty()
+
+
+def test_results_are_journaled_and_abandon_keeps_known_outcomes(store, run_queue):
+    for _ in range(3):
+        run_queue.get()
+    run_queue.mark_sending(1)
+    run_queue.record_result(1, True, None)
+    run_queue.task_done(2, OUTCOME_FAILED, "bad address")
+
+    run_queue.abandon(1, "ERROR: boom")
+    run_queue.abandon(3, "ERROR: boom")
+
+    items = {item["email_id"]: item for item in store.get_items(PROCESS_ID, (ITEM_FINISHED, ITEM_DONE))}
+    assert items[1]["state"] == ITEM_FINISHED
+    assert items[1]["outcome"] == OUTCOME_SENT
+    assert items[3]["state"] == ITEM_DONE
+    assert items[3]["reason"] == "ERROR: boom"
+    assert store.count_outcomes(PROCESS_ID) == {OUTCOME_SENT: 1, OUTCOME_FAILED: 2}
+
+
+def test_finished_run_is_not_resumed(store, run_queue):
+    assert store.get_active_run()["process_id"] == PROCESS_ID
+    run_queue.finish("completed")
+
+    assert store.get_active_run() is None
+    assert all(item["record"] is None for item in store.get_items(PROCESS_ID, (ITEM_QUEUED,)))
+
+
+def test_reconcile_settles_interrupted_emails(monkeypatch, store, run_queue):
+    for _ in range(4):
+        run_queue.get()
+    # 1: claimed only; 2: handed to SMTP; 3: outcome known, table not updated; 4: table already updated
+    run_queue.mark_sending(2)
+    run_queue.record_result(3, True, None)
+    run_queue.mark_sending(4)
+
+    statuses = {2: (True, "Pending"), 3: (True, "Pending"), 4: (False, "Success")}
+    monkeypatch.setattr(automation_manager, "_check_email_status", lambda email_id: statuses[email_id])
+    updates = {}
+    monkeypatch.setattr(email_services, "update_email_status",
+                        lambda email_id, status, reason, **kwargs: updates.setdefault(email_id, (status, reason)))
+
+    automation_manager._reconcile_interrupted_emails(run_queue)
+
+    assert _states(store) == {1: ITEM_QUEUED, 2: ITEM_DONE, 3: ITEM_DONE, 4: ITEM_DONE}
+    # The email that may have been delivered is failed rather than sent twice
+    assert updates[2][0] == "Failed"
+    assert "not resent" in updates[2][1]
+    assert updates[3] == ("Success", "Email sent successfully")
+    assert 4 not in updates
+    assert store.count_outcomes(PROCESS_ID) == {OUTCOME_SENT: 1, OUTCOME_FAILED: 1, OUTCOME_SKIPPED: 1}
+
+
+def test_reconcile_leaves_the_run_when_the_table_cannot_be_read(monkeypatch, store, run_queue):
+    run_queue.get()
+    run_queue.mark_sending(1)
+    monkeypatch.setattr(automation_manager, "_check_email_status", lambda email_id: (False, "Error: timeout"))
+
+    with pytest.raises(RuntimeError):
+        automation_manager._reconcile_interrupted_emails(run_queue)
+    assert _states(store)[1] == ITEM_SENDING
+
+
+def test_failed_deferred_send_is_not_left_sending(monkeypatch, store, run_queue):
+    record = run_queue.get()
+
+    class _Sender:
+        def finish_deferred_send(self, pending):
+            raise ConnectionError("SMTP connection lost")
+
+    class _Pending:
+        timer = None
+
+        def done(self):
+            return True
+
+    monkeypatch.setattr(email_processor, "get_automation_state", lambda: SimpleNamespace(email_queue=run_queue))
+
+    still_waiting = email_processor._finish_deferred_sends(_Sender(), [(record, _Pending(), 0.0)], None,
+                                                           PROCESS_ID, "", wait=False)
+
+    assert still_waiting == []
+    item = {item["email_id"]: item for item in store.get_items(PROCESS_ID, (ITEM_DONE,))}[1]
+    assert item["outcome"] == OUTCOME_FAILED
+    assert item["reason"] == "ERROR: SMTP connection lost"
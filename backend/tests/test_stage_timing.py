@@ -0,0 +1,80 @@
+"""Tests for the per-stage timing of the send pipeline"""
+
+import time
+
+import pytest
+
+from app.utils import stage_timing
+from app.utils.stage_timing import (
+    MAX_TRACKED_RUNS, STAGE_COMPRESSION, STAGE_SMTP_DATA, STAGE_TOTAL, StageHistogram, StageTimer,
+    get_run_timings, list_timed_runs, start_run_timings
+)
+
+
+@pytest.fixture(autouse=True)
+def runs(monkeypatch):
+    """Keep the process-wide run histograms of each test apart"""
+    monkeypatch.setattr(stage_timing, "_runs", stage_timing.OrderedDict())
+
+
+def test_timer_accumulates_repeated_stages():
+    timer = StageTimer()
+    with timer.stage(STAGE_COMPRESSION):
+        time.sleep(0.01)
+    timer.record(STAGE_COMPRESSION, 1.0)
+    timer.record(STAGE_SMTP_DATA, 0.5)
+
+    assert timer.timings[STAGE_COMPRESSION] >= 1.01
+    assert timer.timings[STAGE_SMTP_DATA] == 0.5
+    assert timer.elapsed() >= 0.01
+
+
+def test_timer_records_a_stage_that_raises():
+    timer = StageTimer()
+    with pytest.raises(ValueError):
+        with timer.stage(STAGE_SMTP_DATA):
+            raise ValueError("connection dropped")
+
+    assert STAGE_SMTP_DATA in timer.timings
+
+
+def test_histogram_percentiles():
+    histogram = StageHistogram("run-1")
+    for seconds in range(1, 101):
+        histogram.add({STAGE_SMTP_DATA: float(seconds)}, total=float(seconds) * 2)
+
+    summary = histogram.summary()
+
+    assert summary[STAGE_SMTP_DATA] == {
+        "count": 100, "p50": 50.0, "p95": 95.0, "p99": 99.0, "max": 100.0, "total": 5050.0
+    }
+    assert summary[STAGE_TOTAL]["p50"] == 100.0
+    assert "smtp_data p50=50.000s" in histogram.format_summary()
+
+
+def test_empty_histogram_has_no_stages():
+    assert StageHistogram().summary() == {}
+    assert StageHistogram().format_summary() == ""
+
+
+def test_runs_are_kept_up_to_the_limit_most_recent_last():
+    for number in range(MAX_TRACKED_RUNS + 2):
+        start_run_timings(f"run-{number}")
+
+    names = list_timed_runs()
+    assert len(names) == MAX_TRACKED_RUNS
+    assert names[0] == "run-2"
+    assert get_run_timings() is get_run_timings(f"run-{MAX_TRACKED_RUNS + 1}")
+    assert get_run_timings("run-0") is None
+
+
+def test_restarting_a_run_resets_its_histogram():
+    first = start_run_timings("run-1")
+    first.add({STAGE_SMTP_DATA: 1.0})
+    start_run_timings("run-2")
+
+    second = start_run_timings("run-1")
+
+    assert second is not first
+    assert second.summary() == {}
+    assert list_timed_runs() == ["run-2", "run-1"]
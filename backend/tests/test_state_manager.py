@@ -0,0 +1,88 @@
+"""Tests for the lock-protected automation state"""
+
+import threading
+
+import pytest
+
+from app.services.automation.core.state_manager import (
+    STATUS_ERROR, STATUS_IDLE, STATUS_RUNNING, STATUS_STOPPING, AutomationState, RunSummary
+)
+
+
+def test_only_one_run_can_begin():
+    state = AutomationState()
+    results = []
+    threads = [threading.Thread(target=lambda index=index: results.append(state.try_begin_run(f"run-{index}", None)))
+               for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert state.status == STATUS_RUNNING
+
+
+def test_run_lifecycle():
+    state = AutomationState()
+    assert not state.request_stop()
+
+    state.try_begin_run("run-1", None, template_id="template-1")
+    state.start_processing()
+    assert state.request_stop()
+    assert state.snapshot()["status"] == STATUS_STOPPING
+
+    state.finish_run()
+
+    snapshot = state.snapshot()
+    assert snapshot["status"] == STATUS_IDLE
+    assert snapshot["lastRun"] is not None
+    assert not state.is_running and not state.stop_requested
+
+
+def test_invalid_transition_is_rejected():
+    state = AutomationState()
+
+    with pytest.raises(ValueError), state.lock:
+        state._set_status(STATUS_STOPPING)
+
+
+def test_fail_leaves_a_running_run_alone():
+    state = AutomationState()
+    state.fail()
+    assert state.status == STATUS_ERROR
+
+    state.try_begin_run("run-1", None)
+    state.fail()
+    assert state.status == STATUS_RUNNING
+
+
+def test_summary_counters_are_atomic():
+    summary = RunSummary()
+
+    def count():
+        for _ in range(1000):
+            summary.increment("processed")
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert summary["processed"] == 4000
+    with pytest.raises(KeyError):
+        summary.set(unknown=1)
+
+
+def test_totals_keep_the_counters_of_a_running_run():
+    state = AutomationState()
+    state.try_begin_run("run-1", None)
+    state.summary.set(successful=3, failed=1)
+
+    state.apply_totals(pending=10, successful=50, failed=5)
+    assert state.summary.snapshot() == {"processed": 0, "successful": 3, "failed": 1, "pending": 10}
+
+    state.finish_run()
+    state.apply_totals(pending=10, successful=50, failed=5)
+    assert state.summary.snapshot() == {"processed": 0, "successful": 50, "failed": 5, "pending": 10}
@@ -0,0 +1,61 @@
+"""Tests for the template file cache"""
+
+import os
+
+import pytest
+
+from app.services.templates.core.template_cache import TemplateFileCache
+
+
+@pytest.fixture
+def template_path(tmp_path):
+    path = tmp_path / "welcome.txt"
+    path.write_text("Hello {{company_name}}", encoding="utf-8")
+    return path
+
+
+def _change(path, text):
+    """Rewrite a file so its size and modification time both change"""
+    stat = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_cache_reuses_the_loaded_file_within_the_ttl(template_path):
+    cache = TemplateFileCache(ttl_seconds=3600)
+    cached = cache.get(str(template_path))
+
+    _change(template_path, "Changed {{company_name}}")
+
+    assert cache.get(str(template_path)) is cached
+    assert cached.compiled.render({"company_name": "ACME"}) == "Hello ACME"
+
+
+def test_cache_reloads_changed_files_after_the_ttl(template_path):
+    cache = TemplateFileCache(ttl_seconds=0)
+    cached = cache.get(str(template_path))
+    # An unchanged file keeps its entry and compiled form
+    assert cache.get(str(template_path)) is cached
+
+    _change(template_path, "Changed {{company_name}}")
+    reloaded = cache.get(str(template_path))
+
+    assert reloaded is not cached
+    assert reloaded.compiled.render({"company_name": "ACME"}) == "Changed ACME"
+
+
+def test_invalidate_and_missing_files(template_path):
+    cache = TemplateFileCache(ttl_seconds=3600)
+    missing = str(template_path.parent / "missing.txt")
+    assert not cache.exists(missing)
+
+    template_path.parent.joinpath("missing.txt").write_text("Now here", encoding="utf-8")
+    # The missing result is cached until the entry is dropped
+    assert not cache.exists(missing)
+    cache.invalidate(missing)
+    assert cache.get(missing).content == "Now here"
+
+    cached = cache.get(str(template_path))
+    _change(template_path, "Changed")
+    cache.invalidate()
+    assert cache.get(str(template_path)) is not cached
@@ -0,0 +1,45 @@
+"""Tests for compiled templates"""
+
+from app.services.templates.core.template_compiler import (
+    CompiledTemplate, build_placeholder_values, compile_template
+)
+
+from conftest import make_record
+
+
+def test_render_substitutes_placeholders_case_insensitively():
+    template = CompiledTemplate("Dear {{ Company_Name }},\nyour report for {{recipient}} ({{company_name}}).")
+
+    assert template.placeholders == ["company_name", "recipient"]
+    assert template.render({"company_name": "ACME", "recipient": "a@example.com"}) == (
+        "Dear ACME,\nyour report for a@example.com (ACME)."
+    )
+
+
+def test_render_leaves_unknown_placeholders_and_blanks_none():
+    template = CompiledTemplate("{{known}}|{{unknown}}|{{empty}}")
+
+    assert template.render({"known": 1, "empty": None}) == "1|{{unknown}}|"
+
+
+def test_template_without_placeholders_is_returned_as_is():
+    template = CompiledTemplate("No placeholders {{ 1bad }} here")
+
+    assert template.placeholders == []
+    assert template.render({"1bad": "x"}) == "No placeholders {{ 1bad }} here"
+
+
+def test_inline_templates_are_compiled_once():
+    assert compile_template("Report {{date}}") is compile_template("Report {{date}}")
+
+
+def test_placeholder_values_cover_every_column():
+    record = make_record(5, Company_Name="ACME", Email="a@example.com")
+
+    values = build_placeholder_values(record, Date="today")
+
+    assert values["email_id"] == 5
+    assert values["company_name"] == "ACME"
+    assert values["recipient"] == "a@example.com"
+    assert values["date"] == "today"
+    assert "date" in build_placeholder_values()
@@ -0,0 +1,100 @@
+"""Tests for the heap-based automation scheduler"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.automation.scheduling.timer_scheduler import ScheduledJob, TimerScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = TimerScheduler()
+    yield scheduler
+    scheduler.stop()
+
+
+def _once(delay_seconds: float):
+    """Next-run function that is due once, `delay_seconds` after it is first asked"""
+    def next_run(after):
+        if getattr(next_run, "used", False):
+            return None
+        next_run.used = True
+        return after + timedelta(seconds=delay_seconds)
+    return next_run
+
+
+def test_add_job_schedules_and_publishes_due_time(scheduler):
+    published = []
+    due = scheduler.add_job(ScheduledJob("daily", lambda after: after + timedelta(hours=1),
+                                         lambda: None, published.append))
+
+    assert due is not None
+    assert scheduler.next_due("daily") == due
+    assert published == [due]
+    assert scheduler.job_names() == ["daily"]
+
+
+def test_due_jobs_run_in_order(scheduler):
+    ran = []
+    done = threading.Event()
+
+    def action(name):
+        ran.append(name)
+        if len(ran) == 2:
+            done.set()
+
+    scheduler.add_job(ScheduledJob("later", _once(0.2), lambda: action("later")))
+    scheduler.add_job(ScheduledJob("sooner", _once(0.05), lambda: action("sooner")))
+    scheduler.start()
+
+    assert done.wait(5)
+    assert ran == ["sooner", "later"]
+    # Neither job has another due time
+    assert scheduler.next_due("sooner") is None
+
+
+def test_added_job_wakes_an_idle_scheduler(scheduler):
+    ran = threading.Event()
+    scheduler.start()
+    # The thread is now waiting with no timers at all
+    scheduler.add_job(ScheduledJob("new", _once(0.01), ran.set))
+
+    assert ran.wait(5)
+
+
+def test_removed_and_replaced_jobs_do_not_run(scheduler):
+    ran = []
+    done = threading.Event()
+    scheduler.add_job(ScheduledJob("removed", _once(0.05), lambda: ran.append("removed")))
+    scheduler.add_job(ScheduledJob("replaced", _once(0.05), lambda: ran.append("old")))
+    scheduler.add_job(ScheduledJob("replaced", _once(0.1), lambda: (ran.append("new"), done.set())))
+
+    assert scheduler.remove_job("removed")
+    assert not scheduler.remove_job("removed")
+    scheduler.start()
+
+    assert done.wait(5)
+    assert ran == ["new"]
+
+
+def test_failing_next_run_leaves_job_unscheduled(scheduler):
+    def broken(after):
+        raise ValueError("bad schedule")
+
+    assert scheduler.add_job(ScheduledJob("broken", broken, lambda: None)) is None
+    assert scheduler.next_due("broken") is None
+
+
+def test_stop_and_restart(scheduler):
+    scheduler.start()
+    assert scheduler.is_running
+    scheduler.stop()
+    assert not scheduler.is_running
+
+    ran = threading.Event()
+    scheduler.add_job(ScheduledJob("after-restart", lambda after: datetime.now() if not ran.is_set() else None,
+                                   ran.set))
+    scheduler.start()
+    assert ran.wait(5)
@@ -0,0 +1,101 @@
+"""Tests for the bounded Google Drive upload pool"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.email.gdrive import upload_pool
+from app.services.email.gdrive.upload_pool import DriveUploadPool, _is_quota_error
+
+
+class _FakeIntegration:
+    """Stands in for GDriveIntegration, returning scripted upload results"""
+
+    def __init__(self, results=None, upload_seconds=0.0):
+        self.results = list(results or [])
+        self.upload_seconds = upload_seconds
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def handle_large_file_upload(self, attachment_path, share_type, specific_emails, recipient):
+        with self._lock:
+            self.calls.append(attachment_path)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            result = self.results.pop(0) if self.results else (True, f"https://drive/{attachment_path}", "ok")
+        time.sleep(self.upload_seconds)
+        with self._lock:
+            self.running -= 1
+        return result
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    # Rate-limit backoff is a few milliseconds instead of seconds
+    monkeypatch.setattr(upload_pool, "MAX_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(upload_pool.random, "uniform", lambda low, high: 0.01)
+    pools = []
+
+    def make(integration, max_workers=2, quota_retries=2):
+        pool = DriveUploadPool(max_workers=max_workers, quota_retries=quota_retries)
+        pool._gdrive = integration
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("HttpError 403: userRateLimitExceeded", True),
+    ("HttpError 429 Too Many Requests", True),
+    ("File not found", False),
+    (None, False),
+])
+def test_quota_errors(message, expected):
+    assert _is_quota_error(message) is expected
+
+
+def test_uploads_run_concurrently_up_to_the_pool_size(make_pool):
+    integration = _FakeIntegration(upload_seconds=0.05)
+    pool = make_pool(integration, max_workers=2)
+
+    futures = [pool.submit(f"file{index}.zip") for index in range(6)]
+    results = [future.result(5) for future in futures]
+
+    assert all(success for success, _, _, _ in results)
+    assert results[0][1] == "https://drive/file0.zip"
+    assert integration.max_running == 2
+    assert all(seconds >= 0.05 for _, _, _, seconds in results)
+
+
+def test_rate_limited_upload_is_retried(make_pool):
+    integration = _FakeIntegration([(False, None, "rateLimitExceeded"), (True, "https://drive/link", "ok")])
+    pool = make_pool(integration)
+
+    assert pool.submit("file.zip").result(5)[:2] == (True, "https://drive/link")
+    assert integration.calls == ["file.zip", "file.zip"]
+
+
+def test_retries_stop_at_the_limit_and_other_errors_are_not_retried(make_pool):
+    integration = _FakeIntegration([(False, None, "rateLimitExceeded")] * 3 + [(False, None, "File not found")])
+    pool = make_pool(integration, max_workers=1, quota_retries=2)
+
+    assert pool.submit("limited.zip").result(5)[:3] == (False, None, "rateLimitExceeded")
+    assert pool.submit("missing.zip").result(5)[:3] == (False, None, "File not found")
+    assert integration.calls == ["limited.zip"] * 3 + ["missing.zip"]
+
+
+def test_backoff_pauses_every_worker(make_pool, monkeypatch):
+    monkeypatch.setattr(upload_pool.random, "uniform", lambda low, high: 0.2)
+    pool = make_pool(_FakeIntegration())
+
+    pool._back_off(0)
+    started = time.monotonic()
+    pool.submit("file.zip").result(5)
+
+    assert time.monotonic() - started >= 0.15
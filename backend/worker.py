@@ -0,0 +1,84 @@
+"""
+Standalone automation worker.
+
+Start any number of these, on this machine or others sharing the same
+database, with AUTOMATION_EXTERNAL_WORKERS=true in the API's .env. The API
+then only requests runs and reports progress; the workers lease Pending
+emails from the email table and send them.
+
+Usage:
+    python worker.py [--name NAME] [--batch-size N]
+
+Give each worker a stable --name if it may be restarted, so it can settle
+the emails it was sending when it stopped.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+# Add the current directory to Python's path
+sys.path.insert(0, os.path.abspath("."))
+
+from run import ColoredFormatter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EmailManagement automation worker")
+    parser.add_argument("--name", help="Unique worker name (defaults to <host>-<pid>)")
+    parser.add_argument("--batch-size", type=int, help="Pending emails leased at a time (defaults to WORKER_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    # Console logging in the same format as the API server
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(ColoredFormatter(detailed=True))
+    root_logger.addHandler(console_handler)
+    logger = logging.getLogger(__name__)
+
+    env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+    if os.path.exists(env_file):
+        load_dotenv(env_file)
+        logger.info(f"Loaded environment variables from {env_file}")
+    else:
+        logger.warning(f".env file not found at {env_file}")
+
+    from app.core.config import get_settings
+    from app.services.automation.workers import EmailWorker
+
+    settings = get_settings()
+    os.makedirs(os.path.abspath(settings.EMAIL_ARCHIVE_PATH), exist_ok=True)
+
+    # Retries are scheduled by the worker that failed the email but run by the API
+    if not settings.RETRY_STORE_PATH:
+        from app.services.automation.scheduling.retry_scheduler import get_retry_store
+        logger.warning(
+            f"RETRY_STORE_PATH is not set: this worker schedules retries in {get_retry_store().db_path}, "
+            f"which the API only runs if it uses the same file. Set RETRY_STORE_PATH to a path shared with the API"
+        )
+
+    if settings.LARGE_ATTACHMENT_LINK_LATER:
+        logger.warning("LARGE_ATTACHMENT_LINK_LATER is ignored by workers: oversized emails are sent before moving on")
+
+    worker = EmailWorker(worker_id=args.name, batch_size=args.batch_size)
+
+    def request_stop(signum, frame):
+        logger.info(f"SERVER: Stopping worker {worker.worker_id} after the current email")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    logger.info(f"SERVER: Starting automation worker {worker.worker_id}")
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
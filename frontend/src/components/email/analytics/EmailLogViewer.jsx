@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getFrontendLogs, clearAutomationLogs } from '../../../utils/automationApi';
+import { getFrontendLogs, clearAutomationLogs, subscribeAutomationEvents } from '../../../utils/automationApi';
 import { toast } from 'react-toastify';
 import { XCircleIcon, CheckCircleIcon, ClockIcon, TrashIcon, ArrowPathIcon } from '@heroicons/react/24/outline';
 
@@ -7,7 +7,6 @@ const EmailLogViewer = ({ maxHeight = '300px', autoRefresh = true, isActive = fa
   const [logs, setLogs] = useState([]);
   const [loading, setLoading] = useState(false);
   const [filterStatus, setFilterStatus] = useState('');
-  const [refreshInterval, setRefreshInterval] = useState(null);
 
   // Function to fetch logs
   const fetchLogs = async () => {
@@ -26,33 +25,48 @@ const EmailLogViewer = ({ maxHeight = '300px', autoRefresh = true, isActive = fa
     }
   };
 
-  // Set up auto-refresh when component mounts
+  // Set up live updates when component mounts
   useEffect(() => {
     fetchLogs(); // Initial fetch when component mounts
 
-    // Only set up auto-refresh if both autoRefresh is enabled AND automation is active
-    if (autoRefresh && isActive) {
+    // Only stream updates if both autoRefresh is enabled AND automation is active
+    if (!(autoRefresh && isActive)) {
+      return undefined;
+    }
+
+    let interval = null;
+    const startIntervalPolling = () => {
       console.log("Setting up log polling - automation is active");
-      const interval = setInterval(() => {
+      interval = setInterval(() => {
         fetchLogs();
       }, 5000); // Refresh every 5 seconds
+    };
 
-      setRefreshInterval(interval);
-
-      return () => {
-        if (interval) {
-          console.log("Clearing log polling interval");
-          clearInterval(interval);
+    // Prefer the server-sent event stream; fall back to polling
+    const unsubscribe = subscribeAutomationEvents({
+      onLog: (log) => {
+        if (filterStatus && (log.status || '').toLowerCase() !== filterStatus.toLowerCase()) {
+          return;
         }
-      };
-    } else {
-      // Clear any existing interval if automation is not active
-      if (refreshInterval) {
-        console.log("Clearing log polling - automation is not active");
-        clearInterval(refreshInterval);
-        setRefreshInterval(null);
+        setLogs((previous) => [log, ...previous].slice(0, 50));
+      },
+      onResync: fetchLogs,
+      onError: () => {
+        if (!interval) startIntervalPolling();
       }
+    });
+
+    if (!unsubscribe) {
+      startIntervalPolling();
     }
+
+    return () => {
+      if (unsubscribe) unsubscribe();
+      if (interval) {
+        console.log("Clearing log polling interval");
+        clearInterval(interval);
+      }
+    };
   }, [autoRefresh, filterStatus, isActive]); // Add isActive to dependencies
 
   // Handle clearing logs
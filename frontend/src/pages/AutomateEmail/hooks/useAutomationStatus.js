@@ -1,8 +1,9 @@
 import { useState, useEffect, useRef } from 'react';
-import { getAutomationStatus } from '../../../utils/automationApi';
+import { getAutomationStatus, subscribeAutomationEvents } from '../../../utils/automationApi';
 
 /**
- * Custom hook to manage automation status and polling
+ * Custom hook to manage automation status updates.
+ * Uses the server-sent event stream when available and falls back to polling.
  * @returns {Object} Status state and control functions
  */
 const useAutomationStatus = () => {
@@ -13,52 +14,81 @@ const useAutomationStatus = () => {
     summary: { processed: 0, successful: 0, failed: 0, pending: 0 }
   });
   
-  // References for polling and previous status tracking
+  // References for the event stream, polling fallback and previous status tracking
+  const eventStreamRef = useRef(null);
   const statusPollingRef = useRef(null);
   const previousStatusRef = useRef('idle');
   
+  // Apply a status update from the event stream or a poll
+  const handleStatusUpdate = (data) => {
+    const newStatus = data.status;
+    
+    // Update the status
+    setAutomationStatus(data);
+    
+    // Log status change for debugging
+    if (previousStatusRef.current !== newStatus) {
+      console.log(`Status changed: ${previousStatusRef.current} -> ${newStatus}`);
+    }
+    
+    // Automation completion handling
+    if ((previousStatusRef.current === 'running' || previousStatusRef.current === 'restarting') && 
+        newStatus === 'idle') {
+      // Stop updates when automation is finished
+      stopPolling();
+      console.log("Detected automation completion - stopping status updates");
+    }
+    
+    // Update previous status reference
+    previousStatusRef.current = newStatus;
+  };
+  
   // Function to fetch automation status
   const fetchAutomationStatus = async () => {
     try {
       const response = await getAutomationStatus();
       if (response.success) {
-        // Get the current status from response
-        const newStatus = response.data.status;
-        
-        // Update the status
-        setAutomationStatus(response.data);
-        
-        // Log status change for debugging
-        console.log(`Status changed: ${previousStatusRef.current} -> ${newStatus}`);
-        
-        // Automation completion handling
-        if ((previousStatusRef.current === 'running' || previousStatusRef.current === 'restarting') && 
-            newStatus === 'idle') {
-          // Stop polling when automation is finished
-          stopPolling();
-          console.log("Detected automation completion - stopping polling");
-        }
-        
-        // Update previous status reference
-        previousStatusRef.current = newStatus;
+        handleStatusUpdate(response.data);
       }
     } catch (error) {
       console.error('Error fetching automation status:', error);
     }
   };
   
-  // Start polling for status updates
+  // Fall back to polling (every 5 seconds) when the event stream is unavailable
+  const startIntervalPolling = () => {
+    if (statusPollingRef.current !== null) return;
+    statusPollingRef.current = setInterval(fetchAutomationStatus, 5000);
+    console.log('Status polling started - interval ID:', statusPollingRef.current);
+  };
+  
+  // Start receiving status updates
   const startPolling = () => {
-    // Clear any existing polling first
+    // Clear any existing subscription or polling first
     stopPolling();
     
-    // Set up new polling (every 5 seconds)
-    statusPollingRef.current = setInterval(fetchAutomationStatus, 5000);
-    console.log('Status polling started - interval ID:', statusPollingRef.current);
+    eventStreamRef.current = subscribeAutomationEvents({
+      onStatus: handleStatusUpdate,
+      onResync: fetchAutomationStatus,
+      onError: () => {
+        console.warn('Automation event stream closed - falling back to polling');
+        eventStreamRef.current = null;
+        startIntervalPolling();
+      }
+    });
+    
+    if (!eventStreamRef.current) {
+      startIntervalPolling();
+    }
   };
   
-  // Stop polling for status updates
+  // Stop receiving status updates
   const stopPolling = () => {
+    if (eventStreamRef.current) {
+      eventStreamRef.current();
+      eventStreamRef.current = null;
+      console.log('Status event stream closed');
+    }
     if (statusPollingRef.current !== null) {
       console.log('Stopping polling interval ID:', statusPollingRef.current);
       window.clearInterval(statusPollingRef.current);
@@ -148,6 +148,43 @@ export const getFrontendLogs = async (limit = 50, filterStatus = null) => {
   }
 };
 
+// Subscribe to the automation server-sent event stream (status, log, schedule).
+// Returns an unsubscribe function, or null when EventSource is unavailable so
+// callers can fall back to polling.
+export const subscribeAutomationEvents = ({ onStatus, onLog, onSchedule, onResync, onError } = {}) => {
+  if (typeof window === 'undefined' || !window.EventSource) {
+    return null;
+  }
+
+  const source = new EventSource(`${API_BASE_URL}${API_BASE}/events`);
+
+  const listen = (eventType, handler) => {
+    if (!handler) return;
+    source.addEventListener(eventType, (event) => {
+      try {
+        handler(JSON.parse(event.data));
+      } catch (error) {
+        console.error(`Error parsing ${eventType} event:`, error);
+      }
+    });
+  };
+
+  listen('status', onStatus);
+  listen('log', onLog);
+  listen('schedule', onSchedule);
+  listen('resync', onResync);
+
+  source.onerror = (error) => {
+    // EventSource reconnects on its own (resuming from Last-Event-ID);
+    // only report when the browser has given up on the stream
+    if (source.readyState === EventSource.CLOSED && onError) {
+      onError(error);
+    }
+  };
+
+  return () => source.close();
+};
+
 // Clear automation logs
 export const clearAutomationLogs = async () => {
   try {